@@ -28,8 +28,13 @@ class BaseLLMClient(ABC):
         ------
         {"type": "text_delta",   "text": str}
         {"type": "tool_call",    "name": str, "input": dict, "id": str}
+        {"type": "tool_progress", "name": str, "id": str, "job_id": str, "stage": str,
+         "percent": float, "date": str | None, "equity_curve": list[dict]}
         {"type": "tool_result",  "name": str, "result": str, "id": str}
         {"type": "done"}
+
+        ``tool_progress`` events come between a long-running call's
+        ``tool_call`` and ``tool_result`` (see ``stream_tool``).
         """
         # Make the abstract method a proper async generator for type-checking.
         # Subclasses override this; the yield here satisfies the return type.
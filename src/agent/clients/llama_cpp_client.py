@@ -37,7 +37,7 @@ from typing import Any
 from src.agent.clients.base import BaseLLMClient
 from src.agent.utils.logger import get_logger
 from src.config import settings
-from src.tools import dispatch_tool
+from src.tools import stream_tools
 from src.tools.definitions import TOOL_DEFINITIONS, to_openai_tools
 
 logger = get_logger(__name__)
@@ -124,28 +124,24 @@ class LlamaCppClient(BaseLLMClient):
                 yield {"type": "done"}
                 break
 
-            # Dispatch every tool call and feed results back.
-            tool_result_messages: list[dict[str, Any]] = []
+            # Dispatch the tool calls, independent ones concurrently, and feed results back.
+            calls = []
             for tc in tool_calls:
-                tool_name = tc["function"]["name"]
-                tool_id = tc["id"]
                 try:
                     tool_input = json.loads(tc["function"]["arguments"])
                 except (json.JSONDecodeError, KeyError):
                     tool_input = {}
+                calls.append((tc["function"]["name"], tool_input, tc["id"]))
 
-                yield {"type": "tool_call", "name": tool_name, "input": tool_input, "id": tool_id}
-                result_str = await dispatch_tool(tool_name, tool_input)
-                yield {
-                    "type": "tool_result",
-                    "name": tool_name,
-                    "result": result_str,
-                    "id": tool_id,
-                }
-
-                tool_result_messages.append(
-                    {"role": "tool", "tool_call_id": tool_id, "content": result_str}
-                )
+            # tool_call events, tool_progress events while they run, then the
+            # tool_result events in the order of the calls.
+            tool_result_messages: list[dict[str, Any]] = []
+            async for event in stream_tools(calls):
+                yield event
+                if event["type"] == "tool_result":
+                    tool_result_messages.append(
+                        {"role": "tool", "tool_call_id": event["id"], "content": event["result"]}
+                    )
 
             full_messages.extend(tool_result_messages)
 
@@ -34,7 +34,7 @@ from typing import Any
 from src.agent.clients.base import BaseLLMClient
 from src.agent.utils.logger import get_logger
 from src.config import settings
-from src.tools import dispatch_tool
+from src.tools import stream_tools
 from src.tools.definitions import TOOL_DEFINITIONS, to_openai_tools
 
 logger = get_logger(__name__)
@@ -217,25 +217,17 @@ class TransformersClient(BaseLLMClient):
                 yield {"type": "done"}
                 break
 
-            # Dispatch tools and feed results back.
+            # Dispatch tools, independent ones concurrently, and feed results back:
+            # tool_call events, tool_progress events while they run, then the
+            # tool_result events in the order of the calls.
             tool_result_messages: list[dict[str, Any]] = []
-            for tc in tool_calls:
-                yield {
-                    "type": "tool_call",
-                    "name": tc["name"],
-                    "input": tc["input"],
-                    "id": tc["id"],
-                }
-                result_str = await dispatch_tool(tc["name"], tc["input"])
-                yield {
-                    "type": "tool_result",
-                    "name": tc["name"],
-                    "result": result_str,
-                    "id": tc["id"],
-                }
-                tool_result_messages.append(
-                    {"role": "tool", "tool_call_id": tc["id"], "content": result_str}
-                )
+            calls = [(tc["name"], tc["input"], tc["id"]) for tc in tool_calls]
+            async for event in stream_tools(calls):
+                yield event
+                if event["type"] == "tool_result":
+                    tool_result_messages.append(
+                        {"role": "tool", "tool_call_id": event["id"], "content": event["result"]}
+                    )
 
             full_messages.extend(tool_result_messages)
 
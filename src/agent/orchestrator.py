@@ -46,6 +46,7 @@ class InvestmentsAssistantOrchestrator:
         Yields dicts:
           {"type": "text_delta", "text": "..."}
           {"type": "tool_call", "name": "...", "input": {...}}
+          {"type": "tool_progress", "name": "...", "percent": ..., "date": "...", ...}
           {"type": "tool_result", "name": "...", "result": "..."}
           {"type": "done"}
         """
@@ -11,6 +11,8 @@ from src.agent.utils.logger import get_logger, setup_logging
 from src.config import settings
 from src.db.database import create_all_tables
 from src.scheduler.jobs import setup_scheduler, shutdown_scheduler
+from src.simulation.workers import shutdown_process_pool
+from src.tools.tool_pools import shutdown_tool_pools
 from src.web.routes import STATIC_DIR, router
 
 setup_logging()
@@ -34,6 +36,8 @@ async def lifespan(app: FastAPI):
     yield
     # ── Shutdown ───────────────────────────────────────────────────────────────
     shutdown_scheduler()
+    shutdown_process_pool()
+    shutdown_tool_pools()
     logger.info("Investment Assistant shut down")
 
 
@@ -0,0 +1,230 @@
+"""Shared TTL cache for market-data lookups.
+
+Backed by Redis when it is reachable, so the scheduler, every chat session and
+the MCP forwarder share one set of entries; falls back to an in-process store
+when Redis is down. Each entry belongs to a *data class* (``quote``,
+``fundamentals``, ``calendar``, …) that determines its TTL.
+
+Concurrent callers asking for the same missing key are coalesced: one thread
+runs the fetch, the others wait for it and read the stored value. A waiter
+gives up on a fetch still running after ``wait_timeout`` seconds, presumed
+hung, and runs its own in its place, which later callers then wait on.
+
+Values must be JSON-serialisable — they are stored as JSON in both backends,
+so every caller gets its own copy.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import json
+import threading
+import time
+from typing import Any
+
+import redis
+
+from src.agent.utils.logger import get_logger
+from src.config import settings
+
+logger = get_logger(__name__)
+
+# After a Redis error, stay on the in-process store for this long before retrying.
+_REDIS_RETRY_SECONDS = 30.0
+# Upper bound on in-process entries; expired entries are pruned first.
+_MEMORY_MAX_ENTRIES = 10_000
+
+
+@dataclass
+class _Flight:
+    """One in-progress fetch that other callers can wait on."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+class TTLCache:
+    """Key/value cache with a TTL per data class and single-flight fetches."""
+
+    def __init__(
+        self,
+        redis_url: str | None,
+        ttls: dict[str, float],
+        prefix: str = "ia:cache",
+        wait_timeout: float = 20.0,
+    ) -> None:
+        self._ttls = dict(ttls)
+        self._prefix = prefix
+        self._wait_timeout = wait_timeout
+        self._redis = (
+            redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            if redis_url
+            else None
+        )
+        self._redis_down_until = 0.0
+        self._memory: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._inflight: dict[str, _Flight] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def get_or_fetch(
+        self,
+        data_class: str,
+        key: str,
+        fetch: Callable[[], Any],
+        ttl: float | None = None,
+    ) -> Any:
+        """Return the cached value for *key*, calling *fetch* at most once on a miss."""
+        full_key = self._key(data_class, key)
+        found, value = self._read(full_key)
+        if found:
+            self._count(data_class, "hits")
+            return value
+
+        hung: _Flight | None = None
+        while True:
+            with self._lock:
+                joined = self._inflight.get(full_key)
+                if joined is None or joined is hung:
+                    flight = self._inflight[full_key] = _Flight()
+                    break
+            if joined.done.wait(self._wait_timeout):
+                self._count(data_class, "coalesced")
+                if joined.error is not None:
+                    raise joined.error
+                found, value = self._read(full_key)
+                return value if found else joined.value
+            # The fetch is presumed hung: take its place rather than wait forever.
+            logger.warning(
+                "Cache fetch for %s still running after %gs, fetching again",
+                full_key,
+                self._wait_timeout,
+            )
+            self._count(data_class, "wait_timeouts")
+            hung = joined
+
+        self._count(data_class, "misses")
+        try:
+            flight.value = fetch()
+            self.set(data_class, key, flight.value, ttl)
+            return flight.value
+        except BaseException as exc:
+            self._count(data_class, "errors")
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(full_key) is flight:
+                    del self._inflight[full_key]
+            flight.done.set()
+
+    def get(self, data_class: str, key: str) -> tuple[bool, Any]:
+        """Return ``(found, value)`` without fetching."""
+        return self._read(self._key(data_class, key))
+
+    def set(self, data_class: str, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store *value* under *key* for the data class TTL (or *ttl* if given)."""
+        seconds = ttl if ttl is not None else self._ttls.get(data_class, 60.0)
+        if seconds <= 0:
+            return
+        full_key = self._key(data_class, key)
+        payload = json.dumps(value, default=str)
+        if self._redis_available():
+            try:
+                self._redis.setex(full_key, max(1, int(seconds)), payload)  # type: ignore[union-attr]
+                return
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+        with self._lock:
+            if len(self._memory) >= _MEMORY_MAX_ENTRIES:
+                self._prune_memory()
+            self._memory[full_key] = (time.monotonic() + seconds, payload)
+
+    def clear(self) -> None:
+        """Drop every in-process entry and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._stats.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters per data class plus the active backend."""
+        with self._lock:
+            classes = {name: dict(counts) for name, counts in self._stats.items()}
+            memory_entries = len(self._memory)
+        return {
+            "backend": "redis" if self._redis_available() else "memory",
+            "memory_entries": memory_entries,
+            "classes": classes,
+        }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _key(self, data_class: str, key: str) -> str:
+        return f"{self._prefix}:{data_class}:{key}"
+
+    def _count(self, data_class: str, counter: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(
+                data_class,
+                {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "wait_timeouts": 0},
+            )
+            counts[counter] += 1
+
+    def _read(self, full_key: str) -> tuple[bool, Any]:
+        if self._redis_available():
+            try:
+                raw = self._redis.get(full_key)  # type: ignore[union-attr]
+                return (False, None) if raw is None else (True, json.loads(raw))
+            except redis.RedisError as exc:
+                self._mark_redis_down(exc)
+        with self._lock:
+            entry = self._memory.get(full_key)
+            if entry is None:
+                return False, None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self._memory[full_key]
+                return False, None
+        return True, json.loads(payload)
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _mark_redis_down(self, exc: Exception) -> None:
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning("Redis cache unavailable, using in-process store: %s", exc)
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    def _prune_memory(self) -> None:
+        """Drop expired entries, then the soonest-to-expire half if still full."""
+        now = time.monotonic()
+        for k in [k for k, (exp, _) in self._memory.items() if exp <= now]:
+            del self._memory[k]
+        if len(self._memory) >= _MEMORY_MAX_ENTRIES:
+            by_expiry = sorted(self._memory, key=lambda k: self._memory[k][0])
+            for k in by_expiry[: len(by_expiry) // 2]:
+                del self._memory[k]
+
+
+_cache: TTLCache | None = None
+
+
+def get_cache() -> TTLCache:
+    """Return the process-wide market-data cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(
+            settings.redis_url,
+            ttls={
+                "quote": settings.cache_quote_ttl_seconds,
+                "fundamentals": settings.cache_fundamentals_ttl_seconds,
+                "calendar": settings.cache_calendar_ttl_seconds,
+                "options": settings.cache_options_ttl_seconds,
+            },
+            wait_timeout=settings.cache_fetch_wait_seconds,
+        )
+    return _cache
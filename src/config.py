@@ -77,6 +77,8 @@ class Settings(BaseSettings):
     # leaves ~1648 tokens for history — roughly 10 messages at ~150 tok each.
     # Set higher when using a larger context window or the Claude API.
     agent_max_context_messages: int = 15
+    # Tool calls from one model turn that run at once; trade tools always run alone.
+    agent_max_parallel_tools: int = 4
 
     # ── Trading ────────────────────────────────────────────────────────────────
     trading_mode: Literal["recommend", "auto"] = "recommend"
@@ -109,6 +111,51 @@ class Settings(BaseSettings):
     # ── Redis ──────────────────────────────────────────────────────────────────
     redis_url: str = "redis://redis:6379/0"
 
+    # ── Market-data cache (Redis, in-process fallback) ─────────────────────────
+    # TTL per data class. Quotes go stale fast; fundamentals and earnings
+    # calendars barely move within a day.
+    cache_quote_ttl_seconds: int = 15
+    cache_fundamentals_ttl_seconds: int = 6 * 3600
+    cache_calendar_ttl_seconds: int = 24 * 3600
+    # Option chains: short TTL while US markets are open, longer once quotes stop moving.
+    cache_options_ttl_seconds: int = 60
+    cache_options_closed_ttl_seconds: int = 3600
+    # How long a caller waits on another thread's fetch of the same key before fetching itself.
+    cache_fetch_wait_seconds: float = 20.0
+
+    # ── Local market-data store ───────────────────────────────────────────────
+    # Persistent OHLCV bar files (and other derived market data) live here.
+    market_data_dir: str = "/app/data"
+    # Minimum time between incremental syncs of the same symbol's bars.
+    bar_store_refresh_minutes: int = 15
+    # How often the US listing directory behind the offline symbol index is
+    # re-downloaded into {market_data_dir}/symbols/listings.csv.
+    symbol_listings_refresh_hours: int = 7 * 24
+
+    # ── Market overview ────────────────────────────────────────────────────────
+    # Instruments in the get_market_overview snapshot, as comma-separated
+    # "Display name=SYMBOL" pairs (a bare symbol is its own display name).
+    market_overview_instruments: str = (
+        "S&P 500=^GSPC,NASDAQ 100=^NDX,Dow Jones=^DJI,Russell 2000=^RUT,"
+        "VIX (Fear Index)=^VIX,10Y Treasury Yield=^TNX,2Y Treasury Yield=^IRX,"
+        "Gold=GC=F,Crude Oil (WTI)=CL=F,Bitcoin=BTC-USD,Ethereum=ETH-USD,"
+        "Dollar Index=DX-Y.NYB"
+    )
+    # All instruments are fetched concurrently; any still loading after this
+    # many seconds are reported as timed out and the snapshot is returned partial.
+    market_overview_timeout_seconds: float = 5.0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def market_overview_instruments_map(self) -> dict[str, str]:
+        instruments: dict[str, str] = {}
+        for entry in self.market_overview_instruments.split(","):
+            name, sep, symbol = entry.strip().partition("=")
+            if not name:
+                continue
+            instruments[name.strip()] = symbol.strip() if sep else name.strip()
+        return instruments
+
     # ── Alpaca ─────────────────────────────────────────────────────────────────
     alpaca_api_key: str = ""
     alpaca_secret_key: str = ""
@@ -148,6 +195,31 @@ class Settings(BaseSettings):
     weekly_report_hour: int = 18
     weekly_report_minute: int = 0
 
+    # ── Tool thread pools ──────────────────────────────────────────────────────
+    # Synchronous tools run in one thread pool per class, so a slow broker or data
+    # source only queues calls of its own class. Workers cap the calls running at
+    # once; a call not finished this many seconds after it was submitted fails.
+    tool_market_data_workers: int = 8
+    tool_market_data_timeout_seconds: float = 60.0
+    tool_brokers_workers: int = 4
+    tool_brokers_timeout_seconds: float = 30.0
+    tool_news_workers: int = 4
+    tool_news_timeout_seconds: float = 30.0
+    # Parameter sweeps and walk-forward runs, which wait on the simulation workers.
+    tool_cpu_workers: int = 2
+    tool_cpu_timeout_seconds: float = 900.0
+
+    # ── Simulation ─────────────────────────────────────────────────────────────
+    # Worker processes for CPU-bound backtests (simulation jobs, sweeps, walk-forward).
+    # The Pi 5 has 4 cores.
+    simulation_workers: int = 4
+    # Memory budget (MB) for one chunk of Monte Carlo paths; larger runs are processed
+    # chunk by chunk so thousands of paths fit in the Pi's RAM.
+    monte_carlo_chunk_mb: int = 32
+    # Memory budget (MB) for one chunk of an intraday backtest; minute bars are read
+    # from the memory-mapped bar files chunk by chunk, never all at once.
+    intraday_chunk_mb: int = 16
+
     # ── Reports ────────────────────────────────────────────────────────────────
     reports_dir: str = "/app/reports"
 
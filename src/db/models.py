@@ -159,6 +159,12 @@ class SimulationResult(Base):
     period_start: Mapped[str] = mapped_column(String(10))
     period_end: Mapped[str] = mapped_column(String(10))
     equity_curve: Mapped[list] = mapped_column(JSON, default=list)  # [{date, value}]
+    # Daily stitched out-of-sample curve of a walk-forward run; NULL for plain backtests.
+    oos_equity_curve: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    # SHA-256 of the canonicalised run_simulation inputs; identical requests reuse the row.
+    input_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    # Result fields without a column of their own (symbols, trades sample, extra metrics).
+    details: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=_now, server_default=func.now()
     )
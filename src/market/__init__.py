@@ -0,0 +1 @@
+"""Local market-data infrastructure — on-disk bar store and derived data."""
@@ -0,0 +1,364 @@
+"""Persistent OHLCV bar store backed by memory-mapped NumPy files.
+
+Layout: ``{market_data_dir}/bars/{interval}/{symbol}.bars`` holds fixed-width
+records (``BAR_DTYPE``) sorted by timestamp; ``{symbol}.json`` next to it
+records how far back the file is complete, whether that is the symbol's full
+history, and when it was last synced.
+
+``get()`` only asks Yahoo Finance for the bars after the last stored one and
+serves range reads straight from the memory-mapped file. The last two stored
+bars are re-fetched on every sync: the final one may have been a live,
+still-changing bar, and the one before it is compared with the stored copy —
+if it no longer matches, a dividend or split has changed the adjusted history
+and the file is rebuilt from scratch.
+
+Files only ever grow in place (the last record is overwritten, new records are
+appended); anything that would shrink a file writes a new one and swaps it in
+with ``os.replace``, so concurrent readers holding a memory map never see a
+truncated file.
+
+If Yahoo Finance is unavailable or rate-limiting, stored bars are served as-is.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from src.agent.utils.logger import get_logger
+from src.config import settings
+
+logger = get_logger(__name__)
+
+BAR_DTYPE = np.dtype(
+    [
+        ("ts", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+# Daily-or-longer bars are keyed by exchange-local date (naive); intraday bars by UTC.
+_DAILY_INTERVALS = frozenset({"1d", "5d", "1wk", "1mo", "3mo"})
+# How far back Yahoo Finance serves each intraday interval.
+_INTRADAY_LOOKBACK_DAYS = {
+    "1m": 7,
+    "2m": 59,
+    "5m": 59,
+    "15m": 59,
+    "30m": 59,
+    "90m": 59,
+    "60m": 729,
+    "1h": 729,
+}
+# Relative tolerance when comparing a re-fetched bar with the stored copy.
+_ADJUSTMENT_TOLERANCE = 1e-6
+
+_sync_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="bar-sync")
+
+
+def is_daily(interval: str) -> bool:
+    return interval in _DAILY_INTERVALS
+
+
+def to_ns(value: str | datetime | pd.Timestamp, interval: str = "1d") -> int:
+    """Convert a date/datetime to the store's int64 timestamp key for *interval*."""
+    ts = pd.Timestamp(value)
+    if is_daily(interval):
+        if ts.tzinfo is not None:
+            ts = ts.tz_localize(None)
+        ts = ts.normalize()
+    elif ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.as_unit("ns").value)
+
+
+def _frame_to_records(df: pd.DataFrame, interval: str) -> np.ndarray:
+    """Convert a yfinance OHLCV frame to a sorted, de-duplicated record array."""
+    if df is None or df.empty or "Close" not in df.columns:
+        return np.empty(0, dtype=BAR_DTYPE)
+    df = df.dropna(subset=["Close"])
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is not None:
+        idx = (
+            idx.tz_localize(None) if is_daily(interval) else idx.tz_convert("UTC").tz_localize(None)
+        )
+    if is_daily(interval):
+        idx = idx.normalize()
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records["ts"] = idx.as_unit("ns").to_numpy().astype("int64")
+    for field, column in _COLUMNS.items():
+        records[field] = df[column].to_numpy(dtype="float64") if column in df.columns else np.nan
+    order = np.argsort(records["ts"], kind="stable")
+    records = records[order]
+    # Keep the last occurrence of any duplicated timestamp.
+    keep = np.append(records["ts"][1:] != records["ts"][:-1], True)
+    return records[keep]
+
+
+def records_to_frame(records: np.ndarray, interval: str) -> pd.DataFrame:
+    """Convert a record array to an OHLCV DataFrame indexed by timestamp."""
+    index = pd.to_datetime(np.asarray(records["ts"]), unit="ns")
+    if not is_daily(interval):
+        index = index.tz_localize("UTC")
+    return pd.DataFrame(
+        {column: np.asarray(records[field]) for field, column in _COLUMNS.items()},
+        index=pd.DatetimeIndex(index, name="Date"),
+    )
+
+
+class BarStore:
+    """Per-symbol, per-interval bar files with incremental syncs from Yahoo Finance."""
+
+    def __init__(self, root: str | Path, refresh_seconds: float) -> None:
+        self._root = Path(root)
+        self._refresh_seconds = refresh_seconds
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def get(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start: str | datetime | None = None,
+        end: str | datetime | None = None,
+    ) -> pd.DataFrame:
+        """Sync *symbol* if stale, then return bars in ``[start, end)``."""
+        self.sync(symbol, interval, start)
+        return self.read(symbol, interval, start, end)
+
+    def sync(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start: str | datetime | None = None,
+    ) -> None:
+        """Bring the stored bars up to date (and back to *start*) if they are stale.
+
+        A failed sync is only raised when nothing is stored yet.
+        """
+        with self._lock_for(symbol, interval):
+            try:
+                self._sync(symbol, interval, start)
+            except Exception as exc:
+                if not self._data_path(symbol, interval).exists():
+                    raise
+                logger.warning(
+                    "Bar sync failed for %s %s, serving stored bars: %s", symbol, interval, exc
+                )
+
+    def get_many(
+        self,
+        symbols: list[str],
+        interval: str = "1d",
+        start: str | datetime | None = None,
+        end: str | datetime | None = None,
+    ) -> dict[str, pd.DataFrame]:
+        """``get()`` for several symbols concurrently; failed symbols map to an empty frame."""
+        futures = {
+            sym: _sync_pool.submit(self.get, sym, interval, start, end)
+            for sym in dict.fromkeys(symbols)
+        }
+        frames: dict[str, pd.DataFrame] = {}
+        for sym, fut in futures.items():
+            try:
+                frames[sym] = fut.result()
+            except Exception as exc:
+                logger.warning("Bar fetch failed for %s %s: %s", sym, interval, exc)
+                frames[sym] = records_to_frame(np.empty(0, dtype=BAR_DTYPE), interval)
+        return frames
+
+    def read(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start: str | datetime | None = None,
+        end: str | datetime | None = None,
+    ) -> pd.DataFrame:
+        """Return stored bars in ``[start, end)`` without touching the network."""
+        return records_to_frame(self.read_records(symbol, interval, start, end), interval)
+
+    def read_records(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start: str | datetime | None = None,
+        end: str | datetime | None = None,
+    ) -> np.ndarray:
+        """Like ``read()`` but returns a memory-mapped record slice (no copy)."""
+        bars = self.open(symbol, interval)
+        lo = 0 if start is None else int(np.searchsorted(bars["ts"], to_ns(start, interval)))
+        hi = len(bars) if end is None else int(np.searchsorted(bars["ts"], to_ns(end, interval)))
+        return bars[lo:hi]
+
+    def open(self, symbol: str, interval: str = "1d") -> np.ndarray:
+        """Memory-map the stored records for *symbol* (empty array if none)."""
+        path = self._data_path(symbol, interval)
+        if not path.exists() or path.stat().st_size < BAR_DTYPE.itemsize:
+            return np.empty(0, dtype=BAR_DTYPE)
+        count = path.stat().st_size // BAR_DTYPE.itemsize
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def last_timestamp(self, symbol: str, interval: str = "1d") -> pd.Timestamp | None:
+        """Timestamp of the newest stored bar, or None if nothing is stored."""
+        bars = self.open(symbol, interval)
+        if len(bars) == 0:
+            return None
+        ts = pd.Timestamp(int(bars["ts"][-1]), unit="ns")
+        return ts if is_daily(interval) else ts.tz_localize("UTC")
+
+    # ── Sync ───────────────────────────────────────────────────────────────────
+
+    def _sync(self, symbol: str, interval: str, start: str | datetime | None) -> None:
+        meta = self._read_meta(symbol, interval)
+        bars = self.open(symbol, interval)
+        start_ns = None if start is None else to_ns(start, interval)
+        covered_from = meta.get("covered_from")
+        # Nothing older exists than a full history; only a start-less (max) fetch gets one.
+        full_history = bool(meta.get("full_history"))
+
+        if start_ns is None:
+            needs_backfill = not full_history
+        else:
+            needs_backfill = not full_history and (covered_from is None or start_ns < covered_from)
+        if len(bars) == 0 or needs_backfill:
+            self._rebuild(symbol, interval, start_ns)
+            return
+        if time.time() - meta.get("synced_at", 0.0) < self._refresh_seconds:
+            return
+
+        # Re-fetch the last two stored bars: [-1] may have been live, [-2] detects
+        # retroactive price adjustments.
+        anchor = bars[-2] if len(bars) >= 2 else bars[-1]
+        anchor_ts = int(anchor["ts"])
+        anchor_close = float(anchor["close"])
+        stored_count = len(bars)
+        del bars
+
+        fresh = _frame_to_records(self._fetch(symbol, interval, anchor_ts), interval)
+        fresh = fresh[fresh["ts"] >= anchor_ts]
+        if len(fresh) and int(fresh["ts"][0]) == anchor_ts and stored_count >= 2:
+            if not np.isclose(
+                float(fresh["close"][0]), anchor_close, rtol=_ADJUSTMENT_TOLERANCE, atol=0.0
+            ):
+                logger.info("Adjusted history changed for %s %s — rebuilding", symbol, interval)
+                self._rebuild(symbol, interval, None if full_history else covered_from)
+                return
+        if len(fresh):
+            self._merge(symbol, interval, fresh)
+        meta["synced_at"] = time.time()
+        self._write_meta(symbol, interval, meta)
+
+    def _rebuild(self, symbol: str, interval: str, start_ns: int | None) -> None:
+        records = _frame_to_records(self._fetch(symbol, interval, start_ns), interval)
+        if len(records) == 0:
+            raise ValueError(f"No bars returned for {symbol} ({interval})")
+        if not is_daily(interval):
+            # Yahoo only serves recent intraday bars; keep what was accumulated before.
+            stored = self.open(symbol, interval)
+            older = np.asarray(stored[stored["ts"] < records["ts"][0]])
+            del stored
+            records = np.concatenate([older, records])
+        self._replace(symbol, interval, records)
+        covered_from = start_ns if start_ns is not None else int(records["ts"][0])
+        self._write_meta(
+            symbol,
+            interval,
+            {
+                "covered_from": covered_from,
+                "full_history": start_ns is None,
+                "synced_at": time.time(),
+            },
+        )
+
+    def _merge(self, symbol: str, interval: str, fresh: np.ndarray) -> None:
+        """Overwrite stored bars from ``fresh[0].ts`` onwards with *fresh*."""
+        path = self._data_path(symbol, interval)
+        bars = self.open(symbol, interval)
+        keep = int(np.searchsorted(bars["ts"], int(fresh["ts"][0])))
+        count = len(bars)
+        if count - keep > len(fresh):
+            # The new data would shrink the file; never truncate under a live mmap.
+            merged = np.concatenate([np.asarray(bars[:keep]), fresh])
+            del bars
+            self._replace(symbol, interval, merged)
+            return
+        del bars
+        with open(path, "r+b") as fh:
+            fh.seek(keep * BAR_DTYPE.itemsize)
+            fh.write(fresh.tobytes())
+
+    def _fetch(self, symbol: str, interval: str, start_ns: int | None) -> pd.DataFrame:
+        kwargs: dict[str, object] = {"interval": interval, "auto_adjust": True, "actions": False}
+        lookback = _INTRADAY_LOOKBACK_DAYS.get(interval)
+        if lookback is not None:
+            earliest = datetime.now(UTC) - timedelta(days=lookback)
+            start = pd.Timestamp(start_ns, unit="ns", tz="UTC") if start_ns is not None else None
+            kwargs["start"] = max(start, pd.Timestamp(earliest)) if start is not None else earliest
+        elif start_ns is None:
+            kwargs["period"] = "max"
+        else:
+            kwargs["start"] = pd.Timestamp(start_ns, unit="ns").strftime("%Y-%m-%d")
+        return yf.Ticker(symbol).history(**kwargs)
+
+    # ── Files ──────────────────────────────────────────────────────────────────
+
+    def _lock_for(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _data_path(self, symbol: str, interval: str) -> Path:
+        return self._root / interval / f"{quote(symbol, safe='')}.bars"
+
+    def _meta_path(self, symbol: str, interval: str) -> Path:
+        return self._data_path(symbol, interval).with_suffix(".json")
+
+    def _replace(self, symbol: str, interval: str, records: np.ndarray) -> None:
+        path = self._data_path(symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".bars.tmp")
+        tmp.write_bytes(np.ascontiguousarray(records, dtype=BAR_DTYPE).tobytes())
+        os.replace(tmp, path)
+
+    def _read_meta(self, symbol: str, interval: str) -> dict:
+        try:
+            return json.loads(self._meta_path(symbol, interval).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, symbol: str, interval: str, meta: dict) -> None:
+        path = self._meta_path(symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, path)
+
+
+_store: BarStore | None = None
+
+
+def get_bar_store() -> BarStore:
+    """Return the process-wide bar store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = BarStore(
+            Path(settings.market_data_dir) / "bars",
+            refresh_seconds=settings.bar_store_refresh_minutes * 60,
+        )
+    return _store
@@ -0,0 +1,311 @@
+"""Incremental technical indicators with persisted per-symbol state.
+
+``IndicatorState`` holds the recursive state behind each indicator that
+``get_technical_indicators`` reports — EMA accumulators, Wilder RSI averages,
+the ATR average, the Bollinger window and the OBV running total — so a new bar
+updates every indicator in constant time instead of replaying the history.
+The recursions reproduce the ``ta`` library's definitions (``adjust=False``
+EMAs, Wilder smoothing, population standard deviation for the bands), so
+values match a full ``ta`` recomputation over the same bars.
+
+``IndicatorEngine`` keeps one state per ``(symbol, interval)`` on disk under
+``{market_data_dir}/indicators``, anchored at the first bar the bar store
+holds for the symbol rather than at the window a caller asked for, so a
+rolling "last six months" request keeps folding new bars into the same state
+day after day and across restarts. The state is rebuilt only when the store's
+history moves: backfilled further into the past (the origin changes) or
+rewritten (a split or dividend re-adjustment). The most recently used states
+are also kept in memory, up to ``MAX_CACHED_STATES``. Only bars that can no
+longer change are folded into the saved state; the newest bar may still be
+live, so it is applied to a throw-away copy on each read.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+import copy
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+import json
+import math
+import os
+from pathlib import Path
+import threading
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from src.agent.utils.logger import get_logger
+from src.config import settings
+from src.market.bar_store import BarStore, get_bar_store
+
+logger = get_logger(__name__)
+
+EMA_WINDOWS = (12, 20, 26, 50, 200)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_WINDOW = 14
+BB_WINDOW, BB_DEV = 20, 2.0
+ATR_WINDOW = 14
+
+# States kept in memory; the least recently used beyond this are reloaded from disk.
+MAX_CACHED_STATES = 256
+
+# Relative tolerance when checking that the stored bar still matches the state.
+_MATCH_TOLERANCE = 1e-9
+# Bumped whenever the state layout changes; older files are rebuilt.
+_STATE_VERSION = 2
+
+
+def _ema_step(value: float, x: float, alpha: float) -> float:
+    return value + alpha * (x - value)
+
+
+@dataclass
+class IndicatorState:
+    """Recursive indicator state after the last folded-in bar."""
+
+    origin_ns: int | None = None  # timestamp of the first stored bar folded in
+    last_ts: int | None = None
+    last_close: float = math.nan
+    bars: int = 0
+    ema: dict[str, float] = field(default_factory=dict)
+    macd_signal: float = math.nan
+    macd_signal_count: int = 0
+    rsi_up: float = 0.0
+    rsi_down: float = 0.0
+    bb_window: deque[float] = field(default_factory=lambda: deque(maxlen=BB_WINDOW))
+    atr: float = 0.0
+    tr_sum: float = 0.0
+    obv: float = 0.0
+    version: int = _STATE_VERSION
+
+    # ── Updates ────────────────────────────────────────────────────────────────
+
+    def update(self, ts: int, high: float, low: float, close: float, volume: float) -> None:
+        """Fold one bar into the state."""
+        first = self.bars == 0
+        prev_close = self.last_close
+
+        for window in EMA_WINDOWS:
+            key = str(window)
+            self.ema[key] = close if first else _ema_step(self.ema[key], close, 2 / (window + 1))
+
+        if self.bars + 1 >= MACD_SLOW:
+            macd = self.ema[str(MACD_FAST)] - self.ema[str(MACD_SLOW)]
+            if self.macd_signal_count == 0:
+                self.macd_signal = macd
+            else:
+                self.macd_signal = _ema_step(self.macd_signal, macd, 2 / (MACD_SIGNAL + 1))
+            self.macd_signal_count += 1
+
+        # ta treats the first bar's change as zero, which seeds both averages at 0.
+        change = 0.0 if first else close - prev_close
+        alpha = 1 / RSI_WINDOW
+        self.rsi_up = _ema_step(self.rsi_up, max(change, 0.0), alpha)
+        self.rsi_down = _ema_step(self.rsi_down, max(-change, 0.0), alpha)
+
+        self.bb_window.append(close)
+
+        true_range = (
+            high - low if first else max(high - low, abs(high - prev_close), abs(low - prev_close))
+        )
+        if self.bars < ATR_WINDOW:
+            self.tr_sum += true_range
+            if self.bars + 1 == ATR_WINDOW:
+                self.atr = self.tr_sum / ATR_WINDOW
+        else:
+            self.atr = (self.atr * (ATR_WINDOW - 1) + true_range) / ATR_WINDOW
+
+        self.obv += -volume if not first and close < prev_close else volume
+
+        self.bars += 1
+        self.last_ts = ts
+        self.last_close = close
+
+    def update_records(self, records: np.ndarray) -> None:
+        """Fold a ``BAR_DTYPE`` record array into the state, oldest first."""
+        for ts, high, low, close, volume in zip(
+            records["ts"].tolist(),
+            records["high"].tolist(),
+            records["low"].tolist(),
+            records["close"].tolist(),
+            records["volume"].tolist(),
+            strict=True,
+        ):
+            self.update(ts, high, low, close, volume)
+
+    # ── Readout ────────────────────────────────────────────────────────────────
+
+    def values(self) -> dict:
+        """Current indicator values; None where there are not yet enough bars."""
+
+        def ema(window: int) -> float | None:
+            return self.ema[str(window)] if self.bars >= window else None
+
+        macd = (
+            self.ema[str(MACD_FAST)] - self.ema[str(MACD_SLOW)] if self.bars >= MACD_SLOW else None
+        )
+        signal = self.macd_signal if self.macd_signal_count >= MACD_SIGNAL else None
+
+        rsi = None
+        if self.bars >= RSI_WINDOW:
+            rsi = (
+                100.0 if self.rsi_down == 0 else 100.0 - 100.0 / (1.0 + self.rsi_up / self.rsi_down)
+            )
+
+        bb_upper = bb_middle = bb_lower = None
+        if len(self.bb_window) == BB_WINDOW:
+            bb_middle = math.fsum(self.bb_window) / BB_WINDOW
+            std = math.sqrt(math.fsum((x - bb_middle) ** 2 for x in self.bb_window) / BB_WINDOW)
+            bb_upper = bb_middle + BB_DEV * std
+            bb_lower = bb_middle - BB_DEV * std
+
+        return {
+            "bars": self.bars,
+            "close": self.last_close if self.bars else None,
+            "rsi_14": rsi,
+            "macd": macd,
+            "macd_signal": signal,
+            "macd_hist": macd - signal if macd is not None and signal is not None else None,
+            "bb_upper": bb_upper,
+            "bb_middle": bb_middle,
+            "bb_lower": bb_lower,
+            "ema_20": ema(20),
+            "ema_50": ema(50),
+            "ema_200": ema(200),
+            "atr_14": self.atr if self.bars >= ATR_WINDOW else None,
+            "obv": self.obv if self.bars else None,
+        }
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["bb_window"] = list(self.bb_window)
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> IndicatorState | None:
+        data = json.loads(raw)
+        if data.get("version") != _STATE_VERSION:
+            return None
+        data["bb_window"] = deque(data["bb_window"], maxlen=BB_WINDOW)
+        return cls(**data)
+
+
+class IndicatorEngine:
+    """Per-symbol indicator states kept current against the bar store."""
+
+    def __init__(self, root: str | Path, store: BarStore | None = None) -> None:
+        self._root = Path(root)
+        self._store = store
+        self._states: OrderedDict[tuple[str, str], IndicatorState] = OrderedDict()
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def latest(
+        self,
+        symbol: str,
+        interval: str = "1d",
+        start: str | datetime | None = None,
+    ) -> dict:
+        """Indicator values over every stored bar of *symbol*, up to the newest one.
+
+        *start* only says how far back the bar store must hold history. The
+        state runs from the first stored bar whatever window is asked for, so
+        only bars newer than it are read. Returns ``values()`` with
+        ``bars == 0`` when nothing is stored.
+        """
+        store = self._store or get_bar_store()
+        with self._lock_for(symbol, interval):
+            store.sync(symbol, interval, start)
+            stored = store.open(symbol, interval)
+            origin_ns = int(stored["ts"][0]) if len(stored) else None
+            del stored
+            state = self._load(symbol, interval)
+            if state is not None and state.origin_ns != origin_ns:
+                state = None
+
+            new: np.ndarray | None = None
+            if state is not None and state.last_ts is not None:
+                tail = np.asarray(
+                    store.read_records(symbol, interval, pd.Timestamp(state.last_ts, unit="ns"))
+                )
+                if len(tail) and self._continues(state, tail[0]):
+                    new = tail[1:]
+                else:
+                    logger.info("Bars for %s %s changed, rebuilding indicators", symbol, interval)
+            if state is None or new is None:
+                state = IndicatorState(origin_ns=origin_ns)
+                new = np.asarray(store.read_records(symbol, interval))
+
+            # The newest bar may still be forming: fold in everything before it,
+            # and evaluate it on a copy.
+            if len(new) > 1:
+                state.update_records(new[:-1])
+                self._save(symbol, interval, state)
+            if len(new) == 0:
+                return state.values()
+            provisional = copy.deepcopy(state)
+            provisional.update_records(new[-1:])
+            return provisional.values()
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _continues(state: IndicatorState, bar: np.void) -> bool:
+        return int(bar["ts"]) == state.last_ts and math.isclose(
+            float(bar["close"]), state.last_close, rel_tol=_MATCH_TOLERANCE
+        )
+
+    def _lock_for(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _path(self, symbol: str, interval: str) -> Path:
+        return self._root / interval / f"{quote(symbol, safe='')}.json"
+
+    def _cache(self, symbol: str, interval: str, state: IndicatorState) -> None:
+        self._states[(symbol, interval)] = state
+        self._states.move_to_end((symbol, interval))
+        while len(self._states) > MAX_CACHED_STATES:
+            self._states.popitem(last=False)
+
+    def _load(self, symbol: str, interval: str) -> IndicatorState | None:
+        state = self._states.get((symbol, interval))
+        if state is not None:
+            self._states.move_to_end((symbol, interval))
+            return state
+        try:
+            state = IndicatorState.from_json(self._path(symbol, interval).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as exc:
+            logger.warning("Discarding unreadable indicator state for %s: %s", symbol, exc)
+            return None
+        if state is not None:
+            self._cache(symbol, interval, state)
+        return state
+
+    def _save(self, symbol: str, interval: str, state: IndicatorState) -> None:
+        self._cache(symbol, interval, state)
+        path = self._path(symbol, interval)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".json.tmp")
+            tmp.write_text(state.to_json())
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Could not persist indicator state for %s: %s", symbol, exc)
+
+
+_engine: IndicatorEngine | None = None
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """Return the process-wide indicator engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = IndicatorEngine(Path(settings.market_data_dir) / "indicators")
+    return _engine
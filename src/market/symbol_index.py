@@ -0,0 +1,339 @@
+"""Offline ticker-symbol index behind ``search_ticker``.
+
+The index is built from two CSV files with the same columns (``symbol``,
+``name``, ``type``, ``exchange``, ``aliases``):
+
+* ``symbols.csv`` next to this module — a hand-curated list of the
+  instruments people ask about most (mega caps, popular ETFs, indices,
+  futures, crypto, FX) with common aliases such as "google" or "bitcoin";
+* ``{market_data_dir}/symbols/listings.csv`` — every US-listed stock and ETF,
+  downloaded from the Nasdaq Trader symbol directory by ``refresh_listings``.
+
+Curated entries win on duplicate symbols and rank ahead of listing entries
+with the same match score. A query is matched, in order of strength, as an
+exact symbol, an exact company name or alias, a prefix of the name's words
+(via a word trie), a symbol prefix (via binary search over the sorted
+symbols) and finally a fuzzy match on the words, for typos. Everything is in
+memory, so a lookup takes microseconds and needs no network.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterable
+import csv
+from dataclasses import dataclass
+import difflib
+import io
+import os
+from pathlib import Path
+import re
+
+import httpx
+
+from src.agent.utils.logger import get_logger
+from src.config import settings
+
+logger = get_logger(__name__)
+
+BUNDLED_PATH = Path(__file__).with_name("symbols.csv")
+FIELDS = ("symbol", "name", "type", "exchange", "aliases")
+
+# Nasdaq Trader symbol directory: Nasdaq-listed and other-exchange listings.
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+_OTHER_EXCHANGES = {
+    "A": "NYSE American",
+    "N": "NYSE",
+    "P": "NYSE Arca",
+    "Z": "Cboe BZX",
+    "V": "IEX",
+}
+
+# Match scores — higher is a stronger match.
+SCORE_SYMBOL = 100
+SCORE_NAME = 90
+SCORE_NAME_START = 75
+SCORE_SYMBOL_PREFIX = 70
+SCORE_WORDS = 60
+SCORE_FUZZY = 40
+
+# Minimum difflib ratio for a word to count as a typo of a query word.
+FUZZY_CUTOFF = 0.75
+# Symbol prefixes are only tried for queries that could be a ticker.
+_MAX_SYMBOL_LENGTH = 10
+
+# Trailing words dropped from company names for exact-name matching.
+_NAME_SUFFIXES = frozenset(
+    {
+        "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+        "plc", "sa", "se", "nv", "ag", "holdings", "holding", "group", "the",
+        "class", "a", "b", "c", "common", "stock", "shares", "ordinary", "usd",
+    }
+)  # fmt: skip
+_WORD_RE = re.compile(r"[a-z0-9&]+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _core_name(text: str) -> str:
+    """Lower-cased name without punctuation, a leading "the" or legal-form suffixes."""
+    words = _words(text)
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def _yahoo_symbol(symbol: str) -> str:
+    # Listings write share classes as BRK.B; Yahoo Finance uses BRK-B.
+    return symbol.strip().upper().replace(".", "-")
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolEntry:
+    symbol: str
+    name: str
+    type: str
+    exchange: str
+    aliases: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "type": self.type,
+            "exchange": self.exchange,
+        }
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.ids: set[int] = set()
+
+
+class SymbolIndex:
+    """In-memory symbol search over a fixed list of entries."""
+
+    def __init__(self, entries: Iterable[SymbolEntry]) -> None:
+        self._entries: list[SymbolEntry] = []
+        self._by_symbol: dict[str, int] = {}
+        self._by_name: dict[str, set[int]] = {}
+        self._cores: list[tuple[str, ...]] = []
+        self._trie = _TrieNode()
+        self._vocabulary: dict[str, set[int]] = {}
+        for entry in entries:
+            if entry.symbol in self._by_symbol:
+                continue
+            idx = len(self._entries)
+            self._entries.append(entry)
+            self._by_symbol[entry.symbol] = idx
+            cores = tuple(_core_name(name) for name in (entry.name, *entry.aliases))
+            self._cores.append(cores)
+            for core in cores:
+                if core:
+                    self._by_name.setdefault(core, set()).add(idx)
+            for name in (entry.name, *entry.aliases):
+                for word in _words(name):
+                    self._add_word(word, idx)
+        self._symbols = sorted(self._by_symbol)
+        self._words_list = sorted(self._vocabulary)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Building ───────────────────────────────────────────────────────────────
+
+    def _add_word(self, word: str, idx: int) -> None:
+        self._vocabulary.setdefault(word, set()).add(idx)
+        node = self._trie
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(idx)
+
+    # ── Lookup ─────────────────────────────────────────────────────────────────
+
+    def _prefixed(self, prefix: str) -> set[int]:
+        node = self._trie
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return set()
+            node = child
+        return node.ids
+
+    def _fuzzy(self, word: str) -> dict[int, float]:
+        """Entries containing a word close to *word*, with the best similarity ratio."""
+        scores: dict[int, float] = {}
+        for match in difflib.get_close_matches(word, self._words_list, n=5, cutoff=FUZZY_CUTOFF):
+            ratio = difflib.SequenceMatcher(None, word, match).ratio()
+            for idx in self._vocabulary[match]:
+                scores[idx] = max(scores.get(idx, 0.0), ratio)
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> list[SymbolEntry]:
+        """Best matches for *query*, strongest first; empty when nothing matches."""
+        scores: dict[int, float] = {}
+
+        def offer(ids: Iterable[int], score: float) -> None:
+            for idx in ids:
+                if score > scores.get(idx, 0.0):
+                    scores[idx] = score
+
+        symbol = _yahoo_symbol(query)
+        if symbol in self._by_symbol:
+            offer([self._by_symbol[symbol]], SCORE_SYMBOL)
+
+        core = _core_name(query)
+        offer(self._by_name.get(core, ()), SCORE_NAME)
+
+        words = _words(query)
+        if words:
+            matched = set.intersection(*(self._prefixed(word) for word in words))
+            starts = {
+                idx for idx in matched if core and any(c.startswith(core) for c in self._cores[idx])
+            }
+            offer(starts, SCORE_NAME_START)
+            offer(matched - starts, SCORE_WORDS)
+
+        if symbol and len(symbol) <= _MAX_SYMBOL_LENGTH and " " not in symbol:
+            start = bisect.bisect_left(self._symbols, symbol)
+            for candidate in self._symbols[start:]:
+                if not candidate.startswith(symbol):
+                    break
+                # Shorter completions of the typed prefix rank first.
+                offer([self._by_symbol[candidate]], SCORE_SYMBOL_PREFIX - 0.1 * len(candidate))
+
+        if not scores and words:
+            per_word = [self._fuzzy(word) for word in words]
+            common = set.intersection(*(set(s) for s in per_word))
+            for idx in common:
+                offer([idx], SCORE_FUZZY * min(s[idx] for s in per_word))
+
+        ranked = sorted(scores, key=lambda idx: (-scores[idx], idx))
+        return [self._entries[idx] for idx in ranked[:limit]]
+
+
+# ── Listing files ─────────────────────────────────────────────────────────────
+
+
+def read_entries(path: str | Path) -> list[SymbolEntry]:
+    """Entries from a ``symbols.csv``-style file; an empty list if it does not exist."""
+    try:
+        with open(path, newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+    except FileNotFoundError:
+        return []
+    return [
+        SymbolEntry(
+            symbol=_yahoo_symbol(row["symbol"]),
+            name=row["name"].strip(),
+            type=row.get("type") or "EQUITY",
+            exchange=row.get("exchange") or "",
+            aliases=tuple(a.strip() for a in (row.get("aliases") or "").split(";") if a.strip()),
+        )
+        for row in rows
+        if row.get("symbol") and row.get("name")
+    ]
+
+
+def _security_name(raw: str) -> str:
+    # "Apple Inc. - Common Stock" → "Apple Inc."
+    return raw.split(" - ")[0].strip()
+
+
+def parse_nasdaq_listed(text: str) -> list[SymbolEntry]:
+    """Entries from Nasdaq Trader's ``nasdaqlisted.txt``."""
+    return [
+        SymbolEntry(
+            symbol=_yahoo_symbol(row["Symbol"]),
+            name=_security_name(row["Security Name"]),
+            type="ETF" if row.get("ETF") == "Y" else "EQUITY",
+            exchange="NASDAQ",
+        )
+        for row in _pipe_rows(text)
+        if row.get("Test Issue") != "Y" and _listable(row.get("Symbol", ""))
+    ]
+
+
+def parse_other_listed(text: str) -> list[SymbolEntry]:
+    """Entries from Nasdaq Trader's ``otherlisted.txt`` (NYSE, NYSE Arca, Cboe, …)."""
+    return [
+        SymbolEntry(
+            symbol=_yahoo_symbol(row["ACT Symbol"]),
+            name=_security_name(row["Security Name"]),
+            type="ETF" if row.get("ETF") == "Y" else "EQUITY",
+            exchange=_OTHER_EXCHANGES.get(row.get("Exchange", ""), row.get("Exchange", "")),
+        )
+        for row in _pipe_rows(text)
+        if row.get("Test Issue") != "Y" and _listable(row.get("ACT Symbol", ""))
+    ]
+
+
+def _pipe_rows(text: str) -> list[dict[str, str]]:
+    # The last line is a "File Creation Time: …" footer, not a listing.
+    lines = [line for line in text.splitlines() if line and not line.startswith("File Creation")]
+    return list(csv.DictReader(io.StringIO("\n".join(lines)), delimiter="|"))
+
+
+def _listable(symbol: str) -> bool:
+    # Preferreds, warrants and units use characters Yahoo Finance spells differently.
+    return bool(symbol) and not any(ch in symbol for ch in "$^+=")
+
+
+def write_entries(path: str | Path, entries: Iterable[SymbolEntry]) -> None:
+    """Write entries as a ``symbols.csv``-style file, atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".csv.tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(FIELDS)
+        for e in entries:
+            writer.writerow([e.symbol, e.name, e.type, e.exchange, ";".join(e.aliases)])
+    os.replace(tmp, path)
+
+
+def listings_path() -> Path:
+    return Path(settings.market_data_dir) / "symbols" / "listings.csv"
+
+
+def refresh_listings() -> int:
+    """Download the US listing directory, save it and reload the index.
+
+    Returns the number of listings saved. On a download failure the previous
+    file and index are kept and the error is raised.
+    """
+    global _index
+    with httpx.Client(timeout=30, follow_redirects=True) as client:
+        nasdaq = client.get(NASDAQ_LISTED_URL)
+        nasdaq.raise_for_status()
+        other = client.get(OTHER_LISTED_URL)
+        other.raise_for_status()
+    entries = parse_nasdaq_listed(nasdaq.text) + parse_other_listed(other.text)
+    write_entries(listings_path(), entries)
+    _index = load_index()
+    logger.info("Symbol listings refreshed: %d listings, %d indexed", len(entries), len(_index))
+    return len(entries)
+
+
+def load_index() -> SymbolIndex:
+    """Index of the bundled symbols plus the downloaded listings, if any."""
+    return SymbolIndex(read_entries(BUNDLED_PATH) + read_entries(listings_path()))
+
+
+_index: SymbolIndex | None = None
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Return the process-wide symbol index, loading it on first use."""
+    global _index
+    if _index is None:
+        _index = load_index()
+    return _index
@@ -0,0 +1,159 @@
+"""Technical indicators over a (symbols × bars) price matrix.
+
+Every function takes 2-D float arrays with one row per symbol and time along
+axis 1, and computes the indicator for all rows at once. Rows may start with
+NaN padding — symbols with shorter histories are right-aligned so that column
+``-1`` is each symbol's latest bar — but must not contain NaN gaps after their
+first valid value. Definitions match the ``ta`` library (and therefore
+``src.market.streaming``): ``adjust=False`` EMAs, Wilder smoothing for RSI and
+ATR, population standard deviation for Bollinger Bands.
+
+Recursive indicators step through time once with vector operations across
+symbols; window indicators use sliding-window views.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pandas as pd
+
+
+def right_align(series: list[np.ndarray], length: int | None = None) -> np.ndarray:
+    """Stack 1-D arrays into a NaN-left-padded matrix whose last column is aligned."""
+    width = length if length is not None else max((len(s) for s in series), default=0)
+    matrix = np.full((len(series), width), np.nan)
+    if width == 0:
+        return matrix
+    for row, values in enumerate(series):
+        tail = np.asarray(values, dtype="float64")[-width:]
+        if len(tail):
+            matrix[row, width - len(tail) :] = tail
+    return matrix
+
+
+def frames_to_matrices(
+    frames: dict[str, pd.DataFrame], length: int | None = None
+) -> tuple[list[str], dict[str, np.ndarray]]:
+    """Right-align OHLCV frames into one matrix per column (``close``, ``high``, …)."""
+    symbols = list(frames)
+    matrices = {
+        field: right_align([frames[s][column].to_numpy(dtype="float64") for s in symbols], length)
+        for field, column in (
+            ("open", "Open"),
+            ("high", "High"),
+            ("low", "Low"),
+            ("close", "Close"),
+            ("volume", "Volume"),
+        )
+    }
+    return symbols, matrices
+
+
+def valid_counts(x: np.ndarray) -> np.ndarray:
+    """Number of non-NaN values seen so far, per cell."""
+    return np.cumsum(~np.isnan(x), axis=1)
+
+
+def ewm(x: np.ndarray, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """Exponentially weighted mean, ``adjust=False``, seeded at each row's first value."""
+    out = np.full(x.shape, np.nan)
+    state = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        xt = x[:, t]
+        state = np.where(np.isnan(state), xt, state + alpha * (xt - state))
+        out[:, t] = state
+    out[valid_counts(x) < max(min_periods, 1)] = np.nan
+    return out
+
+
+def ema(x: np.ndarray, window: int) -> np.ndarray:
+    return ewm(x, 2 / (window + 1), min_periods=window)
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1 :] = sliding_window_view(x, window, axis=1).mean(axis=2)
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1 :] = sliding_window_view(x, window, axis=1).std(axis=2, ddof=ddof)
+    return out
+
+
+def _first_diff(x: np.ndarray) -> np.ndarray:
+    """Bar-to-bar change, with each row's first valid bar counting as a zero change."""
+    diff = np.full(x.shape, np.nan)
+    diff[:, 1:] = x[:, 1:] - x[:, :-1]
+    first = valid_counts(x) == 1
+    diff[first & ~np.isnan(x)] = 0.0
+    return diff
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    diff = _first_diff(close)
+    up = ewm(np.where(np.isnan(diff), np.nan, np.clip(diff, 0, None)), 1 / window, window)
+    down = ewm(np.where(np.isnan(diff), np.nan, np.clip(-diff, 0, None)), 1 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + up / down)
+    return np.where(down == 0, 100.0, out)
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+def bollinger(
+    close: np.ndarray, window: int = 20, dev: float = 2.0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Upper band, middle band and lower band."""
+    mid = sma(close, window)
+    std = rolling_std(close, window)
+    return mid + dev * std, mid, mid - dev * std
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev = np.full(close.shape, np.nan)
+    prev[:, 1:] = close[:, :-1]
+    # fmax ignores the missing previous close on a row's first bar, leaving high - low.
+    return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder ATR seeded with the mean of each row's first *window* true ranges."""
+    tr = true_range(high, low, close)
+    counts = valid_counts(tr)
+    out = np.full(tr.shape, np.nan)
+    state = np.full(tr.shape[0], np.nan)
+    seed_sum = np.zeros(tr.shape[0])
+    for t in range(tr.shape[1]):
+        tt = tr[:, t]
+        n = counts[:, t]
+        seeding = (n >= 1) & (n <= window)
+        seed_sum = np.where(seeding, seed_sum + np.nan_to_num(tt), seed_sum)
+        state = np.where(n == window, seed_sum / window, state)
+        state = np.where(n > window, (state * (window - 1) + tt) / window, state)
+        out[:, t] = state
+    return out
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    diff = _first_diff(close)
+    signed = np.where(diff < 0, -volume, volume)
+    out = np.nancumsum(signed, axis=1)
+    out[np.isnan(close)] = np.nan
+    return out
+
+
+def latest(x: np.ndarray) -> np.ndarray:
+    """Last column as a 1-D array (the latest value of every symbol)."""
+    return x[:, -1] if x.shape[1] else np.full(x.shape[0], np.nan)
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import UTC, datetime
+import json
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -10,10 +12,10 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 from src.agent.utils.logger import get_logger
 from src.config import settings
+from src.market.symbol_index import listings_path, refresh_listings
 from src.news.email_reader import read_and_ingest_newsletters
 from src.news.ingestion import run_ingestion
-from src.tools.market_data import get_market_overview
-from src.tools.news import search_market_news
+from src.tools.dispatcher import dispatch_tool
 
 logger = get_logger(__name__)
 
@@ -27,25 +29,44 @@ def get_latest_snapshot() -> dict:
     return _latest_snapshot
 
 
-def _refresh_market_data() -> None:
-    """Pull latest market overview + major news. Runs every N minutes."""
+async def _refresh_market_data() -> None:
+    """Pull latest market overview + major news. Runs every N minutes.
+
+    Goes through the tool dispatcher so a chat or autonomous session asking for
+    the same data at the same moment shares these fetches.
+    """
     global _latest_snapshot
     logger.info("Scheduled: refreshing market data")
     try:
-        overview = get_market_overview()
-        btc_news = search_market_news("Bitcoin crypto market", max_articles=5)
-        stock_news = search_market_news("stock market S&P 500", max_articles=5)
+        overview, btc_news, stock_news = await asyncio.gather(
+            dispatch_tool("get_market_overview", {}),
+            dispatch_tool(
+                "search_market_news", {"query": "Bitcoin crypto market", "max_articles": 5}
+            ),
+            dispatch_tool(
+                "search_market_news", {"query": "stock market S&P 500", "max_articles": 5}
+            ),
+        )
         _latest_snapshot = {
             "timestamp": datetime.now(UTC).isoformat(),
-            "market_overview": overview,
-            "crypto_news": btc_news,
-            "stock_news": stock_news,
+            "market_overview": json.loads(overview),
+            "crypto_news": json.loads(btc_news),
+            "stock_news": json.loads(stock_news),
         }
         logger.debug("Market snapshot refreshed")
     except Exception as exc:
         logger.error("Market data refresh failed: %s", exc)
 
 
+def _refresh_symbol_listings() -> None:
+    """Re-download the US listing directory behind search_ticker's offline index."""
+    logger.info("Scheduled: refreshing symbol listings")
+    try:
+        refresh_listings()
+    except Exception as exc:
+        logger.error("Symbol listings refresh failed: %s", exc)
+
+
 async def _run_weekly_report() -> None:
     """Generate and save the weekly report."""
     logger.info("Scheduled: generating weekly report")
@@ -88,7 +109,8 @@ async def _autonomous_scan() -> None:
         session = get_or_create_session("autonomous_scanner")
         prompt = (
             "Perform a proactive market scan. Check market overview, scan for technical "
-            "signals on major stocks and crypto. If you identify a compelling trade opportunity "
+            "signals on major stocks and crypto with scan_technical_signals, and only drill "
+            "into individual symbols that match. If you identify a compelling trade opportunity "
             "with a strong risk/reward profile, execute it. Document your full reasoning."
         )
         text_parts: list[str] = []
@@ -135,6 +157,18 @@ def setup_scheduler() -> None:
         misfire_grace_time=60,
     )
 
+    # Symbol listings for the offline ticker index. Runs at startup when they
+    # were never downloaded (next_run_time=None would add the job paused).
+    first_run = {} if listings_path().exists() else {"next_run_time": datetime.now(UTC)}
+    scheduler.add_job(
+        _refresh_symbol_listings,
+        trigger=IntervalTrigger(hours=settings.symbol_listings_refresh_hours),
+        id="symbol_listings_refresh",
+        replace_existing=True,
+        misfire_grace_time=3600,
+        **first_run,
+    )
+
     # Weekly report
     scheduler.add_job(
         _run_weekly_report,
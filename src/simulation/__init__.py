@@ -0,0 +1 @@
+"""Array-based backtesting engines behind ``src.tools.simulator``."""
@@ -0,0 +1,213 @@
+"""Performance analytics over many equity curves at once.
+
+Every function takes a ``(bars × curves)`` matrix — one column per backtest,
+all on the same calendar — and computes its metrics for every column in the
+same array operations, so scoring a whole parameter sweep or a set of stored
+simulations costs about as much as scoring one. A 1-D array is treated as a
+single curve.
+
+Returns are simple bar-to-bar returns. Annualised figures assume
+``periods_per_year`` bars a year (252 for daily bars, 52 for the weekly
+curves stored in ``simulation_results``). Ratios without a meaningful
+denominator (no volatility, no drawdown) are 0; metrics that cannot be
+computed at all (a beta without benchmark variance) are NaN, which
+``metric_rows()`` turns into None.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+import math
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+# Decimal places of each metric in ``metric_rows()``; unlisted metrics get 2.
+DIGITS = {"sharpe_ratio": 3, "sortino_ratio": 3, "calmar_ratio": 3, "beta": 3}
+
+
+def _matrix(equity: np.ndarray) -> np.ndarray:
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity[:, None] if equity.ndim == 1 else equity
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+
+def bar_returns(equity: np.ndarray) -> np.ndarray:
+    """Bar-to-bar returns, ``(bars - 1) × curves``."""
+    equity = _matrix(equity)
+    return equity[1:] / equity[:-1] - 1.0
+
+
+def drawdowns(equity: np.ndarray) -> np.ndarray:
+    """Fraction below the running peak after each bar (0 at a peak, negative below it)."""
+    equity = _matrix(equity)
+    return equity / np.maximum.accumulate(equity, axis=0) - 1.0
+
+
+def drawdown_durations(equity: np.ndarray, index: pd.DatetimeIndex | None = None) -> np.ndarray:
+    """Longest time each curve spent below a previous peak.
+
+    Measured from the peak to the bar that recovered it, or to the last bar
+    if it never did: in calendar days with a DatetimeIndex, in bars without.
+    """
+    equity = _matrix(equity)
+    n_bars, n_curves = equity.shape
+    under = equity < np.maximum.accumulate(equity, axis=0)
+    bars = np.arange(n_bars)[:, None]
+    last_peak = np.maximum.accumulate(np.where(under, 0, bars), axis=0)
+    length = bars - last_peak
+    # Lengths grow through a spell, so the longest one ends at its argmax.
+    end = length.argmax(axis=0)
+    cols = np.arange(n_curves)
+    peak = last_peak[end, cols]
+    recovered = np.minimum(end + 1, n_bars - 1)
+    if isinstance(index, pd.DatetimeIndex):
+        days = (index[recovered] - index[peak]).days.to_numpy()
+    else:
+        days = recovered - peak
+    return np.where(length[end, cols] > 0, days, 0)
+
+
+def _rolling(returns: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and sample standard deviation of each *window* of returns, from cumulative sums."""
+    # Centring first keeps the sum-of-squares difference from losing precision.
+    centred = returns - returns.mean(axis=0)
+    zero = np.zeros((1, returns.shape[1]))
+    s1 = np.concatenate((zero, np.cumsum(centred, axis=0)))
+    s2 = np.concatenate((zero, np.cumsum(centred * centred, axis=0)))
+    w1 = s1[window:] - s1[:-window]
+    w2 = s2[window:] - s2[:-window]
+    var = np.maximum(w2 - w1 * w1 / window, 0.0) / (window - 1)
+    return w1 / window + returns.mean(axis=0), np.sqrt(var)
+
+
+def _pad(values: np.ndarray, window: int) -> np.ndarray:
+    # Align with the equity bars: a window of returns ends on bar window, not window - 1.
+    return np.concatenate((np.full((window, values.shape[1]), np.nan), values))
+
+
+def rolling_volatility(
+    equity: np.ndarray, window: int = 63, periods_per_year: int = PERIODS_PER_YEAR
+) -> np.ndarray:
+    """Annualised volatility (%) over the last *window* returns, per bar; NaN until then."""
+    returns = bar_returns(equity)
+    if window < 2 or len(returns) < window:
+        return np.full(_matrix(equity).shape, np.nan)
+    _, std = _rolling(returns, window)
+    return _pad(std * math.sqrt(periods_per_year) * 100, window)
+
+
+def rolling_sharpe(
+    equity: np.ndarray, window: int = 63, periods_per_year: int = PERIODS_PER_YEAR
+) -> np.ndarray:
+    """Annualised Sharpe ratio over the last *window* returns, per bar; NaN until then."""
+    returns = bar_returns(equity)
+    if window < 2 or len(returns) < window:
+        return np.full(_matrix(equity).shape, np.nan)
+    mean, std = _rolling(returns, window)
+    return _pad(_ratio(mean, std) * math.sqrt(periods_per_year), window)
+
+
+def summarise(
+    equity: np.ndarray,
+    index: pd.DatetimeIndex | None = None,
+    benchmark: np.ndarray | None = None,
+    turnover: np.ndarray | None = None,
+    periods_per_year: int = PERIODS_PER_YEAR,
+) -> dict[str, np.ndarray]:
+    """Summary metrics of every curve, one array entry per curve.
+
+    Hit rate is the share of bars with a gain among bars where the value
+    moved at all, so days spent in cash do not count as misses.
+
+    *index* gives the bar dates: CAGR then uses the calendar span and drawdown
+    duration is in days. Without it the span is ``bars / periods_per_year``
+    and the duration is in bars. *benchmark* is an equity curve on the same
+    bars (leading NaN allowed) for beta and annualised alpha. *turnover* is
+    the one-way turnover traded on each bar, ``(bars × curves)``, for the
+    average annual turnover.
+    """
+    equity = _matrix(equity)
+    n_bars = len(equity)
+    returns = bar_returns(equity)
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0, ddof=1) if n_bars > 2 else np.zeros(equity.shape[1])
+    downside = np.sqrt((np.minimum(returns, 0.0) ** 2).mean(axis=0))
+    annual = math.sqrt(periods_per_year)
+
+    growth = equity[-1] / equity[0]
+    dated = isinstance(index, pd.DatetimeIndex)
+    if isinstance(index, pd.DatetimeIndex):
+        years = (index[-1] - index[0]).days / 365.25
+    else:
+        years = (n_bars - 1) / periods_per_year
+    if years > 0:
+        cagr = np.power(np.maximum(growth, 0.0), 1.0 / years) - 1.0
+    else:
+        cagr = np.zeros_like(growth)
+    max_dd = drawdowns(equity).min(axis=0)
+
+    moved = np.count_nonzero(returns, axis=0)
+    hits = np.where(moved > 0, (returns > 0).sum(axis=0) / np.maximum(moved, 1), np.nan)
+    metrics = {
+        "total_return_pct": (growth - 1.0) * 100,
+        "cagr_pct": cagr * 100,
+        "annual_volatility_pct": std * annual * 100,
+        "sharpe_ratio": _ratio(mean, std) * annual,
+        "sortino_ratio": _ratio(mean, downside) * annual,
+        "max_drawdown_pct": max_dd * 100,
+        "calmar_ratio": _ratio(cagr, -max_dd),
+        "max_drawdown_days" if dated else "max_drawdown_bars": drawdown_durations(equity, index),
+        "hit_rate_pct": hits * 100,
+    }
+
+    if benchmark is not None:
+        bench = bar_returns(np.asarray(benchmark, dtype=np.float64))[:, 0]
+        valid = np.isfinite(bench)
+        r, b = returns[valid], bench[valid]
+        b_mean = b.mean() if len(b) else np.nan
+        var = ((b - b_mean) ** 2).mean() if len(b) else 0.0
+        cov = ((r - r.mean(axis=0)) * (b - b_mean)[:, None]).mean(axis=0)
+        beta = cov / var if var > 0 else np.full(equity.shape[1], np.nan)
+        metrics["beta"] = beta
+        metrics["alpha_pct"] = (r.mean(axis=0) - beta * b_mean) * periods_per_year * 100
+
+    if turnover is not None and years > 0:
+        metrics["annual_turnover"] = _matrix(turnover).sum(axis=0) / years
+    return metrics
+
+
+def metric_rows(metrics: Mapping[str, np.ndarray]) -> list[dict]:
+    """``summarise()`` output as one dict per curve, rounded for a tool result."""
+    columns: dict[str, list] = {}
+    for name, values in metrics.items():
+        if name.startswith("max_drawdown_") and name != "max_drawdown_pct":
+            columns[name] = [int(v) for v in values.tolist()]
+        else:
+            rounded = np.round(values, DIGITS.get(name, 2)).tolist()
+            columns[name] = [None if math.isnan(v) else v for v in rounded]
+    n = len(next(iter(columns.values()), []))
+    return [{name: values[i] for name, values in columns.items()} for i in range(n)]
+
+
+def align_curves(curves: Mapping[str, list[dict]]) -> pd.DataFrame:
+    """Stored ``[{"date", "value"}]`` curves as one ``(dates × names)`` frame.
+
+    Curves are forward-filled onto the union of their dates and cut to the
+    span they all cover, so the frame can go straight into ``summarise()``.
+    """
+    frame = pd.DataFrame(
+        {
+            name: pd.Series(
+                [p["value"] for p in points], index=pd.to_datetime([p["date"] for p in points])
+            )
+            for name, points in curves.items()
+        }
+    )
+    start = max(frame[name].first_valid_index() for name in frame.columns)
+    end = min(frame[name].last_valid_index() for name in frame.columns)
+    return frame.sort_index().ffill().loc[start:end]
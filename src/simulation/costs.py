@@ -0,0 +1,174 @@
+"""Commission and slippage models for the backtest engines.
+
+A model is any object with the method below, applied to many orders at once,
+as arrays indexed by order:
+
+* a commission model's ``fees(notional, shares)`` returns the fee of each
+  order, given its absolute traded value and absolute share count;
+* a slippage model's ``fill(price, side, atr)`` returns the price each order
+  is filled at, given the reference close, ``side`` (+1 buy, -1 sell) and,
+  optionally, the average true range at the order's bar.
+
+The portfolio engine passes the orders of one rebalance, and only for
+symbols that actually trade, so a fee minimum never applies to a symbol left
+untouched. The long/flat engine passes all entries, then all exits, of a run.
+
+``BROKER_COMMISSIONS`` holds the published base fee schedules of the brokers
+the assistant trades through; ``from_params`` builds the models a strategy's
+parameters ask for.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, replace
+import math
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+
+class CommissionModel(Protocol):
+    def fees(self, notional: np.ndarray, shares: np.ndarray) -> np.ndarray: ...
+
+
+class SlippageModel(Protocol):
+    def fill(
+        self, price: np.ndarray, side: np.ndarray | float, atr: np.ndarray | None = None
+    ) -> np.ndarray: ...
+
+
+@dataclass(frozen=True)
+class Commission:
+    """Percentage of the traded value plus a per-share fee, between a minimum and a cap.
+
+    The cap wins over the minimum, as at brokers that charge at most a
+    percentage of a small order.
+    """
+
+    rate: float = 0.0  # fraction of notional, e.g. 0.001 for 0.1 %
+    per_share: float = 0.0
+    minimum: float = 0.0
+    maximum_rate: float = 0.0  # cap as a fraction of notional; 0 for none
+
+    def fees(self, notional: np.ndarray, shares: np.ndarray) -> np.ndarray:
+        fee = np.maximum(notional * self.rate + shares * self.per_share, self.minimum)
+        if self.maximum_rate > 0:
+            fee = np.minimum(fee, notional * self.maximum_rate)
+        return np.where(shares > 0, fee, 0.0)  # no order, no fee
+
+    def affordable(self, cash: float, price: float) -> float:
+        """Shares that *cash* buys at *price* once their own fee is paid out of it.
+
+        Cost (shares × price + fee) rises with the shares bought, so this is the
+        largest share count whose cost is at most *cash*: the linear fee,
+        unless the minimum is higher, unless the cap is lower.
+        """
+        linear = cash / (price * (1.0 + self.rate) + self.per_share)
+        shares = min(linear, (cash - self.minimum) / price) if self.minimum > 0 else linear
+        if self.maximum_rate > 0:
+            shares = max(shares, cash / (price * (1.0 + self.maximum_rate)))
+        return max(shares, 0.0)
+
+
+@dataclass(frozen=True)
+class Slippage:
+    """Fill prices against the order: buys pay more, sells get less.
+
+    The price moves by a fixed number of basis points, plus half the quoted
+    spread, plus ``atr_multiple`` times the average true range over
+    ``atr_window`` bars, which scales the cost with how much the symbol is
+    moving.
+    """
+
+    bps: float = 0.0
+    spread_bps: float = 0.0
+    atr_multiple: float = 0.0
+    atr_window: int = 14
+
+    def fill(
+        self, price: np.ndarray, side: np.ndarray | float, atr: np.ndarray | None = None
+    ) -> np.ndarray:
+        filled = price * (1.0 + side * (self.bps + self.spread_bps / 2) / 10_000)
+        if self.atr_multiple > 0 and atr is not None:
+            filled = filled + side * self.atr_multiple * atr
+        return filled
+
+
+NO_COMMISSION = Commission()
+NO_SLIPPAGE = Slippage()
+
+# Base tiers of each broker's published schedule for the assets the assistant trades.
+BROKER_COMMISSIONS = {
+    # Commission-free US stocks and ETFs; regulatory fees on sells are not modelled.
+    "alpaca": Commission(),
+    # IBKR Pro Fixed, US stocks: $0.005 a share, at least $1.00, at most 1 % of the value.
+    "ibkr": Commission(per_share=0.005, minimum=1.0, maximum_rate=0.01),
+    # Coinbase Advanced, taker fee of the lowest 30-day volume tier.
+    "coinbase": Commission(rate=0.006),
+    # Binance spot, regular user, without the BNB discount.
+    "binance": Commission(rate=0.001),
+}
+
+
+def average_true_range(close: pd.DataFrame, window: int) -> np.ndarray:
+    """Average absolute close-to-close move over *window* bars, per column.
+
+    Backtests load closes only, so the true range is the move from the
+    previous close. Bars before a full window average what there is, and the
+    first bar, with nothing before it, is 0.
+    """
+    moves = close.diff().abs()
+    return moves.rolling(window, min_periods=1).mean().fillna(0.0).to_numpy()
+
+
+def from_params(params: dict) -> tuple[Commission, Slippage]:
+    """The commission and slippage models that a strategy's *params* ask for.
+
+    ``broker`` picks a schedule from ``BROKER_COMMISSIONS``; ``commission_pct``,
+    ``commission_per_share``, ``commission_min`` and ``commission_max_pct``
+    override its parts. ``slippage_bps``, ``spread_bps``, ``atr_slippage`` (the
+    ATR multiple) and ``atr_window`` set the slippage. Raises ``ValueError``
+    for an unknown broker.
+    """
+    broker = params.get("broker")
+    if broker is not None and broker not in BROKER_COMMISSIONS:
+        raise ValueError(f"Unknown broker: {broker}. Use one of: {', '.join(BROKER_COMMISSIONS)}.")
+    commission = BROKER_COMMISSIONS.get(broker or "", NO_COMMISSION)
+    overrides = {
+        "rate": ("commission_pct", 0.01),
+        "per_share": ("commission_per_share", 1.0),
+        "minimum": ("commission_min", 1.0),
+        "maximum_rate": ("commission_max_pct", 0.01),
+    }
+    commission = replace(
+        commission,
+        **{
+            field: float(params[key]) * scale
+            for field, (key, scale) in overrides.items()
+            if params.get(key) is not None
+        },
+    )
+    slippage = Slippage(
+        bps=float(params.get("slippage_bps", 0)),
+        spread_bps=float(params.get("spread_bps", 0)),
+        atr_multiple=float(params.get("atr_slippage", 0)),
+        atr_window=int(params.get("atr_window", 14)),
+    )
+    return commission, slippage
+
+
+def describe(commission: Commission, slippage: Slippage, broker: str | None = None) -> dict:
+    """The models' parameters, for recording alongside a result."""
+    return {
+        "broker": broker,
+        "commission": asdict(commission),
+        "slippage": asdict(slippage),
+    }
+
+
+def is_free(commission: Commission, slippage: Slippage) -> bool:
+    """Whether the models leave every fill at the close with no fee."""
+    return commission == NO_COMMISSION and math.isclose(
+        slippage.bps + slippage.spread_bps + slippage.atr_multiple, 0.0
+    )
@@ -0,0 +1,162 @@
+"""Vectorized long/flat backtesting.
+
+A strategy is reduced to two boolean arrays per symbol — *buy* and *sell*
+signals per bar — and everything else is derived with array operations:
+the position state, the equity curve and the bar indices of every trade.
+Execution follows the bar-by-bar loop the simulator used before: on a buy
+signal while flat the whole cash balance is invested at the close, on a sell
+signal while long the whole position is sold at the close, and a bar where
+both signals fire flips the position. The signal helpers here
+(``crossover_signals``, ``relative_strength_index``) are shared by the
+strategies and the rule language.
+
+With commission and slippage models (``src.simulation.costs``) orders fill
+at the slipped price and pay their fee out of the balance. Fill prices of all
+entries and all exits are computed in one call each, as are the entry fees.
+
+Only the cash balance after each round trip is computed with a scalar loop,
+over trades rather than bars, so that the arithmetic (and therefore every
+reported number) is the same as the loop's. It has to be sequential anyway:
+what a round trip can buy depends on what the previous one left, and a fee
+minimum or cap makes that more than a running product.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.costs import NO_COMMISSION, NO_SLIPPAGE, Commission, SlippageModel
+
+
+@dataclass(frozen=True)
+class LongFlatRun:
+    """Outcome of trading one symbol long/flat on its own cash allocation."""
+
+    equity: np.ndarray  # value of the allocation after each bar
+    long: np.ndarray  # whether a position is held after each bar
+    entries: np.ndarray  # bar indices of buys
+    exits: np.ndarray  # bar indices of sells
+    shares: np.ndarray  # shares bought at each entry
+    proceeds: np.ndarray  # cash balance after each exit, net of its fee
+    buy_fills: np.ndarray  # fill price of each entry
+    sell_fills: np.ndarray  # fill price of each exit
+    buy_fees: np.ndarray  # commission paid on each entry
+    sell_fees: np.ndarray  # commission paid on each exit
+
+
+def crossover_signals(fast: np.ndarray, slow: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Buy where *fast* crosses above *slow*, sell where it crosses below.
+
+    NaN on either side of a comparison means no signal, and the first bar
+    never signals.
+    """
+    buy = np.zeros(fast.shape, dtype=bool)
+    sell = np.zeros(fast.shape, dtype=bool)
+    buy[1:] = (fast[1:] > slow[1:]) & (fast[:-1] <= slow[:-1])
+    sell[1:] = (fast[1:] < slow[1:]) & (fast[:-1] >= slow[:-1])
+    return buy, sell
+
+
+def relative_strength_index(close: pd.DataFrame, window: int = 14) -> np.ndarray:
+    """``ta``'s RSIIndicator applied to every column at once (same operations, same values)."""
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down)))
+
+
+def position_state(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    """Long/flat state after each bar, starting flat.
+
+    A buy-only bar leaves the position long and a sell-only bar leaves it flat
+    whatever it was before; a bar with both signals flips it. The state is the
+    last buy-only/sell-only bar forward-filled, flipped by the parity of the
+    both-signal bars since then.
+    """
+    n = len(buy)
+    toggle = buy & sell
+    reset = buy ^ sell
+    positions = np.arange(n)
+    last_reset = np.maximum.accumulate(np.where(reset, positions, -1))
+    base = np.where(last_reset >= 0, buy[np.maximum(last_reset, 0)], False)
+    toggles = np.cumsum(toggle)
+    at_reset = np.where(last_reset >= 0, toggles[np.maximum(last_reset, 0)], 0)
+    return base ^ ((toggles - at_reset) % 2 == 1)
+
+
+def simulate_long_flat(
+    close: np.ndarray,
+    long: np.ndarray,
+    cash: float,
+    opening_shares: float = 0.0,
+    commission: Commission = NO_COMMISSION,
+    slippage: SlippageModel = NO_SLIPPAGE,
+    atr: np.ndarray | None = None,
+) -> LongFlatRun:
+    """Trade *close* according to the *long* state, starting with *cash*.
+
+    With *opening_shares* > 0 the run starts long, holding that many shares —
+    how a run over one chunk of a longer series picks up where the previous
+    chunk left off. Without any cash or shares nothing is ever bought.
+
+    Entries buy as many shares as the balance pays for once the commission is
+    taken out of it; *atr* (per bar) feeds ATR-scaled slippage. A balance too
+    small to cover the fee minimum buys nothing and stays in cash.
+    """
+    opening = opening_shares > 0
+    if cash <= 0 and not opening:
+        long = np.zeros(len(close), dtype=bool)
+    change = np.diff(long.astype(np.int8), prepend=np.int8(opening))
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+    buy_fills = slippage.fill(close[entries], 1.0, None if atr is None else atr[entries])
+    sell_fills = slippage.fill(close[exits], -1.0, None if atr is None else atr[exits])
+
+    # Shares of every position held during the run, the opening one first, and
+    # the cash left beside each (all of it when the position could not be bought).
+    held_shares = np.empty(len(entries) + opening)
+    idle = np.zeros(len(held_shares))
+    if opening:
+        held_shares[0] = opening_shares
+    balances = np.empty(len(exits) + 1)
+    balances[0] = cash
+    sell_fees = np.zeros(len(exits))
+    for k in range(len(held_shares)):
+        if k >= opening:
+            held_shares[k] = commission.affordable(cash, buy_fills[k - opening])
+            if held_shares[k] == 0:
+                idle[k] = cash
+        if k < len(exits):
+            notional = held_shares[k] * sell_fills[k]
+            sell_fees[k] = commission.fees(notional, held_shares[k])
+            cash = notional - sell_fees[k] + idle[k]
+            balances[k + 1] = cash
+    bought = held_shares[int(opening) :]
+    buy_fees = commission.fees(bought * buy_fills, bought)
+
+    trade = np.cumsum(change == 1) - 1 + opening
+    closed = np.cumsum(change == -1)
+    if len(held_shares):
+        position = np.maximum(trade, 0)
+        held = held_shares[position] * close + idle[position]
+    else:
+        held = np.zeros(len(close))
+    equity = np.where(long, held, balances[closed])
+    return LongFlatRun(
+        equity=equity,
+        long=long,
+        entries=entries,
+        exits=exits,
+        shares=bought,
+        proceeds=balances[1:],
+        buy_fills=buy_fills,
+        sell_fills=sell_fills,
+        buy_fees=buy_fees,
+        sell_fees=sell_fees,
+    )
@@ -0,0 +1,314 @@
+"""Intraday backtests streamed over memory-mapped minute bars.
+
+Multi-year 1- or 5-minute histories run to tens of millions of bars, more
+than fits in memory next to the LLM. The bars stay in the bar store's
+memory-mapped files and a backtest walks through them chunk by chunk: each
+chunk's timestamps and closes are copied out of the map, its signals are
+computed with the same array operations as the daily strategies, and it is
+traded with ``simulate_long_flat`` from the position the previous chunk ended
+with. Indicator state crosses a chunk boundary as a few scalars and the last
+closes, so the result is the one a single pass over all bars would give —
+including the ATR that scales slippage, when the cost model uses it.
+
+Only the equity at the end of each (UTC) day is kept — what the metrics, the
+equity curve and Monte Carlo paths use anyway — so memory is bounded by the
+chunk size and the number of days, not the number of bars.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.costs import (
+    NO_COMMISSION,
+    NO_SLIPPAGE,
+    Commission,
+    Slippage,
+    average_true_range,
+)
+from src.simulation.engine import (
+    LongFlatRun,
+    crossover_signals,
+    position_state,
+    simulate_long_flat,
+)
+
+INTRADAY_INTERVALS = ("1m", "5m")
+INTRADAY_STRATEGIES = ("buy_and_hold", "sma_crossover", "rsi_mean_reversion")
+
+NS_PER_DAY = 86_400 * 10**9
+# Working memory per bar of a chunk: the copied timestamps and closes plus the
+# indicator, signal, position and equity arrays derived from them.
+BYTES_PER_BAR = 128
+
+
+def chunk_bars(chunk_mb: float) -> int:
+    """Bars per chunk that fit in *chunk_mb* megabytes of working memory."""
+    return max(1_024, int(chunk_mb * 2**20) // BYTES_PER_BAR)
+
+
+def iter_chunks(bars: np.ndarray, size: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """``(timestamps, closes)`` of consecutive chunks of *bars*, each copied out of the map."""
+    for lo in range(0, len(bars), size):
+        chunk = bars[lo : lo + size]
+        yield np.array(chunk["ts"]), np.array(chunk["close"], dtype=np.float64)
+
+
+# ── Signals ────────────────────────────────────────────────────────────────────
+
+
+class ChunkSignals(Protocol):
+    """Buy and sell signals for consecutive chunks of one symbol's closes."""
+
+    def __call__(self, close: np.ndarray) -> tuple[np.ndarray, np.ndarray]: ...
+
+
+class HoldSignals:
+    """Buy on the very first bar, never sell."""
+
+    def __init__(self) -> None:
+        self._started = False
+
+    def __call__(self, close: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        buy = np.zeros(len(close), dtype=bool)
+        if not self._started and len(close):
+            buy[0] = True
+            self._started = True
+        return buy, np.zeros(len(close), dtype=bool)
+
+
+class SmaCrossSignals:
+    """``sma_crossover`` signals; the last *slow* closes carry over to the next chunk."""
+
+    def __init__(self, fast: int, slow: int) -> None:
+        self._fast = fast
+        self._slow = slow
+        self._tail = np.empty(0)
+
+    def __call__(self, close: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        halo = len(self._tail)
+        series = pd.Series(np.concatenate((self._tail, close)))
+        fast = series.rolling(self._fast).mean().to_numpy()
+        slow = series.rolling(self._slow).mean().to_numpy()
+        buy, sell = crossover_signals(fast, slow)
+        self._tail = series.to_numpy()[-self._slow :].copy()
+        return buy[halo:], sell[halo:]
+
+
+class RsiSignals:
+    """``rsi_mean_reversion`` signals.
+
+    Wilder's averages are recurrences, so the last close and the two averages
+    are all that carries over: seeding the next chunk's ``ewm`` with them
+    gives the values a single pass would.
+    """
+
+    def __init__(self, rsi_buy: float, rsi_sell: float, window: int = 14) -> None:
+        self._buy = rsi_buy
+        self._sell = rsi_sell
+        self._alpha = 1 / window
+        self._window = window
+        self._seen = 0
+        self._last_close = np.nan
+        self._avg_up: float | None = None
+        self._avg_down: float | None = None
+
+    def __call__(self, close: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        diff = np.diff(close, prepend=self._last_close)
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+        avg_up = self._wilder(up, self._avg_up)
+        avg_down = self._wilder(down, self._avg_down)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_down == 0, 100, 100 - (100 / (1 + avg_up / avg_down)))
+        # As in the daily strategy, signals start one bar after the first RSI value.
+        active = self._seen + np.arange(len(close)) >= self._window
+        self._seen += len(close)
+        self._last_close = float(close[-1])
+        self._avg_up, self._avg_down = float(avg_up[-1]), float(avg_down[-1])
+        return active & (rsi < self._buy), active & (rsi > self._sell)
+
+    def _wilder(self, values: np.ndarray, seed: float | None) -> np.ndarray:
+        if seed is None:
+            return pd.Series(values).ewm(alpha=self._alpha, adjust=False).mean().to_numpy()
+        seeded = pd.Series(np.concatenate(([seed], values)))
+        return seeded.ewm(alpha=self._alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def signals_for(stype: str, params: dict) -> ChunkSignals:
+    """Chunked signals of one of ``INTRADAY_STRATEGIES``."""
+    if stype == "sma_crossover":
+        return SmaCrossSignals(int(params.get("fast", 20)), int(params.get("slow", 50)))
+    if stype == "rsi_mean_reversion":
+        return RsiSignals(float(params.get("rsi_buy", 30)), float(params.get("rsi_sell", 70)))
+    if stype == "buy_and_hold":
+        return HoldSignals()
+    raise ValueError(
+        f"Strategy type {stype} is not available intraday. "
+        f"Use one of: {', '.join(INTRADAY_STRATEGIES)}."
+    )
+
+
+# ── Streaming run ──────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class IntradayRun:
+    """Daily outcome of trading one symbol long/flat over its intraday bars."""
+
+    days: pd.DatetimeIndex  # each day with at least one bar
+    equity: np.ndarray  # value of the allocation at the end of each day
+    trades: list[dict]  # the first ``max_trades`` fills
+    trades_count: int
+
+
+def _day_ends(ts: np.ndarray) -> np.ndarray:
+    """Whether each bar is the last of its UTC day within *ts*."""
+    day = ts // NS_PER_DAY
+    return np.append(day[1:] != day[:-1], True)
+
+
+def _join_days(days: list[np.ndarray], values: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenate per-chunk day ends; a day split across chunks keeps its later value."""
+    if not days:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    day, value = np.concatenate(days), np.concatenate(values)
+    keep = np.append(day[1:] != day[:-1], True)
+    return day[keep], value[keep]
+
+
+def _as_days(day: np.ndarray) -> pd.DatetimeIndex:
+    """Day numbers since the epoch as a (naive, midnight) DatetimeIndex."""
+    return pd.DatetimeIndex((day * NS_PER_DAY).astype("datetime64[ns]"))
+
+
+def run_long_flat(
+    bars: np.ndarray,
+    signals: ChunkSignals,
+    cash: float,
+    chunk_size: int,
+    symbol: str = "",
+    max_trades: int = 20,
+    on_chunk: Callable[[int], None] | None = None,
+    commission: Commission = NO_COMMISSION,
+    slippage: Slippage = NO_SLIPPAGE,
+) -> IntradayRun:
+    """Trade *bars* (``BAR_DTYPE`` records, e.g. a memory map) on *signals*, one chunk at a time.
+
+    *on_chunk* is called with the number of bars done after every chunk.
+    """
+    shares = 0.0  # held at the end of the previous chunk; 0 while flat
+    long = False
+    tail = np.empty(0)  # the closes before the chunk that its ATR window reaches back to
+    days: list[np.ndarray] = []
+    values: list[np.ndarray] = []
+    trades: list[dict] = []
+    trades_count = 0
+    done = 0
+    for ts, close in iter_chunks(bars, chunk_size):
+        buy, sell = signals(close)
+        # A leading buy-only or sell-only bar restates the position the previous chunk ended with.
+        state = position_state(np.r_[long, buy], np.r_[not long, sell])[1:]
+        atr = None
+        if slippage.atr_multiple > 0:
+            series = pd.DataFrame(np.concatenate((tail, close)))
+            atr = average_true_range(series, slippage.atr_window)[len(tail) :, 0]
+            tail = series[0].to_numpy()[-slippage.atr_window :].copy()
+        run = simulate_long_flat(
+            close,
+            state,
+            cash,
+            opening_shares=shares,
+            commission=commission,
+            slippage=slippage,
+            atr=atr,
+        )
+
+        if len(run.shares):
+            shares = float(run.shares[-1])
+        if len(run.proceeds):
+            cash = float(run.proceeds[-1])
+        long = bool(run.long[-1])
+        if not long:
+            shares = 0.0
+
+        trades_count += len(run.entries) + len(run.exits)
+        if len(trades) < max_trades:
+            trades.extend(_fills(ts, run, symbol, with_fees=commission != NO_COMMISSION))
+            trades.sort(key=lambda t: t["date"])
+            del trades[max_trades:]
+
+        ends = _day_ends(ts)
+        days.append(ts[ends] // NS_PER_DAY)
+        values.append(run.equity[ends])
+        done += len(close)
+        if on_chunk is not None:
+            on_chunk(done)
+
+    day, equity = _join_days(days, values)
+    return IntradayRun(days=_as_days(day), equity=equity, trades=trades, trades_count=trades_count)
+
+
+def _fills(ts: np.ndarray, run: LongFlatRun, symbol: str, with_fees: bool) -> list[dict]:
+    stamps = pd.DatetimeIndex(ts.astype("datetime64[ns]")).strftime("%Y-%m-%d %H:%M")
+    buys = [
+        {
+            "date": stamps[i],
+            "action": "BUY",
+            "symbol": symbol,
+            "price": round(price, 4),
+            "shares": round(n, 4),
+            **({"commission": round(fee, 2)} if with_fees else {}),
+        }
+        for i, price, n, fee in zip(
+            run.entries.tolist(),
+            run.buy_fills.tolist(),
+            run.shares.tolist(),
+            run.buy_fees.tolist(),
+            strict=True,
+        )
+    ]
+    sells = [
+        {
+            "date": stamps[i],
+            "action": "SELL",
+            "symbol": symbol,
+            "price": round(price, 4),
+            **({"commission": round(fee, 2)} if with_fees else {}),
+        }
+        for i, price, fee in zip(
+            run.exits.tolist(), run.sell_fills.tolist(), run.sell_fees.tolist(), strict=True
+        )
+    ]
+    return buys + sells
+
+
+def day_closes(bars: np.ndarray, chunk_size: int) -> pd.Series:
+    """The last close of each UTC day in *bars*, read one chunk at a time."""
+    days: list[np.ndarray] = []
+    values: list[np.ndarray] = []
+    for ts, close in iter_chunks(bars, chunk_size):
+        ends = _day_ends(ts)
+        days.append(ts[ends] // NS_PER_DAY)
+        values.append(close[ends])
+    day, close = _join_days(days, values)
+    return pd.Series(close, index=_as_days(day))
+
+
+def combine(runs: list[IntradayRun], cash: float) -> pd.Series:
+    """Portfolio value at the end of each day across runs that each started with *cash*.
+
+    An allocation keeps its last value on days its symbol did not trade, and
+    its starting cash before its first day. Every run needs at least one day.
+    """
+    day = np.unique(np.concatenate([run.days.asi8 for run in runs]))
+    total = np.zeros(len(day))
+    for run in runs:
+        at = np.searchsorted(run.days.asi8, day, side="right") - 1
+        total += np.where(at >= 0, run.equity[np.maximum(at, 0)], cash)
+    return pd.Series(total, index=pd.DatetimeIndex(day.astype("datetime64[ns]")))
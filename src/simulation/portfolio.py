@@ -0,0 +1,223 @@
+"""Event-driven portfolio backtesting with a shared cash account.
+
+Unlike the per-symbol engines, where each symbol trades its own slice of the
+capital, every symbol here draws on and pays into one cash balance. The
+portfolio holds target weights and is rebalanced back to them on a schedule
+(the first bar of each week, month, quarter or year), whenever any weight
+drifts more than a threshold away from its target, or both.
+
+Bars are processed in time order. The only events are rebalances; between
+two of them the holdings are fixed, so the equity of a stretch of bars is a
+single ``(bars × symbols) @ shares`` product, and the drift check is one
+array comparison over the same stretch. Stretches are capped at
+``_LOOKAHEAD`` bars so a threshold hit early in a long stretch wastes little
+work. State is a shares vector and a cash scalar indexed by symbol id.
+
+A rebalance executes at the bar's close. Sells go first and their proceeds
+(after slippage and commission) join the cash, then buys are filled. When
+costs leave too little cash for every buy, all buys are scaled down by the
+same factor, and sells whose fee would exceed their proceeds are not placed,
+so cash never goes negative. Symbols without a price yet get no
+weight, and their share of the target stays in cash until they list.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.costs import NO_COMMISSION, NO_SLIPPAGE, CommissionModel, SlippageModel
+
+SCHEDULES = {"weekly": "W", "monthly": "M", "quarterly": "Q", "yearly": "Y"}
+# Longest stretch of bars valued at once while looking for a threshold breach.
+_LOOKAHEAD = 256
+# Orders smaller than this fraction of the portfolio are float noise, not trades.
+_MIN_ORDER = 1e-9
+
+
+@dataclass(frozen=True)
+class PortfolioRun:
+    """Outcome of a portfolio backtest over one price matrix."""
+
+    equity: np.ndarray  # portfolio value after each bar
+    cash: np.ndarray  # cash balance after each bar
+    rebalances: np.ndarray  # bar index of each rebalance
+    traded: np.ndarray  # signed shares traded at each rebalance, (rebalances × symbols)
+    fills: np.ndarray  # fill price of each order, NaN where nothing traded
+    fees: np.ndarray  # commission paid on each order
+    shares: np.ndarray  # shares held after each rebalance
+    turnover: np.ndarray  # one-way turnover of each rebalance, as a fraction of the portfolio
+
+
+def period_starts(index: pd.DatetimeIndex, schedule: str) -> np.ndarray:
+    """Bar index of the first bar of every period of *schedule* in *index*.
+
+    *schedule* is a key of ``SCHEDULES``, or ``"none"`` for the first bar only.
+    """
+    if schedule == "none" or len(index) == 0:
+        return np.zeros(min(len(index), 1), dtype=np.intp)
+    if schedule not in SCHEDULES:
+        raise ValueError(
+            f"Unknown rebalance schedule: {schedule}. Use one of: {', '.join(SCHEDULES)}, none."
+        )
+    keys = index.tz_localize(None) if index.tz is not None else index
+    periods = keys.to_period(SCHEDULES[schedule]).asi8
+    return np.flatnonzero(np.diff(periods, prepend=periods[0] - 1) != 0)
+
+
+def simulate_portfolio(
+    close: np.ndarray,
+    targets: np.ndarray,
+    cash: float,
+    schedule: np.ndarray,
+    threshold: float | None = None,
+    commission: CommissionModel = NO_COMMISSION,
+    slippage: SlippageModel = NO_SLIPPAGE,
+    progress: Callable[[np.ndarray], None] | None = None,
+) -> PortfolioRun:
+    """Hold *targets* with a shared cash account, starting with *cash* on the first bar.
+
+    *close* must be forward-filled. *targets* is one weight per symbol, or one
+    row of weights per bar; a row only takes effect at a rebalance. The
+    portfolio rebalances on the first bar, on every bar in *schedule*, and,
+    with a *threshold*, on any bar where a weight is more than *threshold*
+    away from its target. *progress* is called after each stretch of bars
+    with the equity curve so far (a view, valid only during the call).
+    """
+    n_bars, n_symbols = close.shape
+    targets = np.broadcast_to(np.asarray(targets, dtype=np.float64), close.shape)
+    scheduled = np.zeros(n_bars, dtype=bool)
+    scheduled[np.asarray(schedule, dtype=np.intp)] = True
+    if n_bars:
+        scheduled[0] = True
+    upcoming = np.flatnonzero(scheduled)
+
+    shares = np.zeros(n_symbols)
+    balance = float(cash)
+    equity = np.empty(n_bars)
+    cash_curve = np.empty(n_bars)
+    rebalances: list[int] = []
+    traded: list[np.ndarray] = []
+    fills: list[np.ndarray] = []
+    fees: list[np.ndarray] = []
+    held: list[np.ndarray] = []
+    turnover: list[float] = []
+
+    t, rebalance = 0, n_bars > 0
+    while t < n_bars:
+        if rebalance:
+            balance, order = _rebalance(close[t], targets[t], shares, balance, commission, slippage)
+            rebalances.append(t)
+            traded.append(order[0])
+            fills.append(order[1])
+            fees.append(order[2])
+            held.append(shares.copy())
+            turnover.append(order[3])
+
+        nxt = upcoming[np.searchsorted(upcoming, t, side="right") :]
+        end = min(int(nxt[0]) if len(nxt) else n_bars, t + _LOOKAHEAD, n_bars)
+        prices = close[t:end]
+        listed = ~np.isnan(prices)
+        values = balance + np.where(listed, prices, 0.0) @ shares
+        stop = end
+        if threshold is not None:
+            # The bar just rebalanced is on target by construction.
+            first = 1 if rebalance else 0
+            weights = np.where(listed[first:], prices[first:] * shares, 0.0)
+            np.divide(weights, values[first:, None], out=weights, where=values[first:, None] > 0)
+            drift = np.abs(weights - np.where(listed[first:], targets[t + first : end], 0.0))
+            breached = np.flatnonzero(drift.max(axis=1, initial=0.0) > threshold)
+            if len(breached):
+                stop = t + first + int(breached[0])
+        equity[t:stop] = values[: stop - t]
+        cash_curve[t:stop] = balance
+        t = stop
+        if progress is not None:
+            progress(equity[:t])
+        rebalance = t < n_bars and (stop < end or bool(scheduled[t]))
+
+    def stack(rows: list[np.ndarray]) -> np.ndarray:
+        return np.array(rows) if rows else np.zeros((0, n_symbols))
+
+    return PortfolioRun(
+        equity=equity,
+        cash=cash_curve,
+        rebalances=np.array(rebalances, dtype=np.intp),
+        traded=stack(traded),
+        fills=stack(fills),
+        fees=stack(fees),
+        shares=stack(held),
+        turnover=np.array(turnover),
+    )
+
+
+def _rebalance(
+    price: np.ndarray,
+    target: np.ndarray,
+    shares: np.ndarray,
+    cash: float,
+    commission: CommissionModel,
+    slippage: SlippageModel,
+) -> tuple[float, tuple[np.ndarray, np.ndarray, np.ndarray, float]]:
+    """Trade *shares* (updated in place) towards *target* at *price*.
+
+    Returns the new cash balance and the orders: signed shares, fill prices,
+    fees and one-way turnover.
+    """
+    start_cash = cash
+    listed = ~np.isnan(price)
+    px = np.where(listed, price, 0.0)
+    value = cash + px @ shares
+    desired = np.zeros_like(shares)
+    np.divide(np.where(listed, target, 0.0) * value, px, out=desired, where=listed & (px > 0))
+    delta = desired - shares
+    delta[np.abs(delta) * px <= _MIN_ORDER * max(value, 1.0)] = 0.0
+
+    fill = np.full_like(shares, np.nan)
+    fee = np.zeros_like(shares)
+    sells = np.flatnonzero(delta < 0)
+    if len(sells):
+        fill[sells] = slippage.fill(px[sells], np.full(len(sells), -1.0))
+        sold = -delta[sells]
+        proceeds = sold * fill[sells]
+        fee[sells] = commission.fees(proceeds, sold)
+        # A sell whose fee eats all its proceeds is not worth placing.
+        skipped = sells[fee[sells] >= proceeds]
+        delta[skipped], fill[skipped], fee[skipped] = 0.0, np.nan, 0.0
+        cash += float((proceeds - fee[sells])[delta[sells] < 0].sum())
+
+    buys = np.flatnonzero(delta > 0)
+    if len(buys):
+        fill[buys] = slippage.fill(px[buys], np.ones(len(buys)))
+        qty = delta[buys]
+        fee[buys] = commission.fees(qty * fill[buys], qty)
+        cost = float(qty @ fill[buys] + fee[buys].sum())
+        for step in range(2):
+            if cost <= cash + _MIN_ORDER * max(value, 1.0):
+                break
+            if step == 0:
+                qty = qty * (cash / cost)
+            else:
+                # Fit the orders into the cash left after the current fees. Fees do not
+                # grow as orders shrink, so this always fits.
+                room = max(cash - fee[buys].sum(), 0.0)
+                notional = float(qty @ fill[buys])
+                qty = qty * (room / notional if notional > 0 else 0.0)
+            fee[buys] = commission.fees(qty * fill[buys], qty)
+            cost = float(qty @ fill[buys] + fee[buys].sum())
+        if not qty.any():
+            fee[buys] = 0.0
+            fill[buys] = np.nan
+            cost = 0.0
+        delta[buys] = qty
+        cash = max(cash - cost, 0.0)
+
+    shares += delta
+    # Half the absolute change in weights at the close, cash included.
+    turnover = (
+        0.5 * (np.abs(px * delta).sum() + abs(cash - start_cash)) / value if value > 0 else 0.0
+    )
+    return cash, (delta, fill, fee, turnover)
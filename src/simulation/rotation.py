@@ -0,0 +1,117 @@
+"""Vectorized cross-sectional rotation.
+
+A rotation strategy holds, between rebalance dates, an equal-weight basket of
+the symbols that rank best on some score — for momentum, the return over a
+lookback window. Scores, selections, weights, equity and turnover are all
+computed as ``(rebalances × symbols)`` or ``(bars × symbols)`` array
+operations, so the cost grows with the size of the universe but there is no
+Python loop over symbols or bars.
+
+Execution is at the close of each rebalance bar: the whole portfolio value is
+redistributed to the target weights, and the holdings then drift with prices
+until the next rebalance. Weights that do not sum to one leave the rest in
+cash.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class RotationRun:
+    """Outcome of a rotation strategy over one price matrix."""
+
+    equity: np.ndarray  # portfolio value after each bar
+    rebalances: np.ndarray  # bar index of each rebalance
+    weights: np.ndarray  # target weights set at each rebalance, (rebalances × symbols)
+    shares: np.ndarray  # shares held after each rebalance, (rebalances × symbols)
+    turnover: np.ndarray  # one-way turnover of each rebalance, as a fraction of the portfolio
+
+
+def month_starts(index: pd.DatetimeIndex) -> np.ndarray:
+    """Bar index of the first bar of every calendar month in *index*."""
+    months = index.year.to_numpy() * 12 + index.month.to_numpy()
+    return np.flatnonzero(np.diff(months, prepend=months[0] - 1) != 0)
+
+
+def lookback_returns(
+    close: np.ndarray, index: pd.DatetimeIndex, rows: np.ndarray, days: int
+) -> np.ndarray:
+    """Return over the last *days* calendar days at each of *rows*, ``(rows × symbols)``.
+
+    *close* must be forward-filled. The base price is the last close on or
+    before the start of the window; rows whose window starts before the first
+    bar, and symbols without a price at either end, get NaN.
+    """
+    starts = index[rows] - pd.Timedelta(days=days)
+    base = index.searchsorted(starts, side="right") - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = close[rows] / close[np.maximum(base, 0)] - 1.0
+    returns[base < 0] = np.nan
+    return returns
+
+
+def top_n_weights(scores: np.ndarray, n: int) -> np.ndarray:
+    """Equal weights over the *n* highest scores of each row; NaN scores are never picked.
+
+    Rows with fewer than *n* valid scores hold all of them; rows without any
+    hold nothing.
+    """
+    k, m = scores.shape
+    n = min(n, m)
+    if n <= 0 or k == 0:
+        return np.zeros((k, m))
+    ranked = np.where(np.isnan(scores), -np.inf, scores)
+    top = np.argpartition(-ranked, n - 1, axis=1)[:, :n]
+    chosen = np.zeros((k, m), dtype=bool)
+    np.put_along_axis(chosen, top, True, axis=1)
+    chosen &= np.isfinite(ranked)
+    counts = chosen.sum(axis=1, keepdims=True)
+    return np.divide(chosen, counts, out=np.zeros((k, m)), where=counts > 0)
+
+
+def simulate_rotation(
+    close: np.ndarray, rebalances: np.ndarray, weights: np.ndarray, cash: float
+) -> RotationRun:
+    """Hold *weights* from each rebalance bar to the next, starting with *cash*.
+
+    *close* must be forward-filled; a symbol only needs a price where it is
+    given a weight. Before the first rebalance the portfolio is all cash.
+    """
+    n_bars, n_symbols = close.shape
+    k = len(rebalances)
+    equity = np.full(n_bars, float(cash))
+    if k == 0:
+        empty = np.zeros((0, n_symbols))
+        return RotationRun(equity, rebalances, empty, empty, np.zeros(0))
+
+    held = weights > 0
+    entry = np.where(held, close[rebalances], 1.0)
+    idle = 1.0 - weights.sum(axis=1)
+
+    # Growth of each holding period, rebalance to rebalance, and the portfolio
+    # value each rebalance starts from.
+    nxt = close[rebalances[1:]]
+    drifted = np.where(held[:-1], weights[:-1] * nxt / entry[:-1], 0.0)
+    growth = idle[:-1] + drifted.sum(axis=1)
+    value = cash * np.concatenate(([1.0], np.cumprod(growth)))
+
+    # Every bar from the first rebalance on belongs to the latest period.
+    bars = np.arange(rebalances[0], n_bars)
+    period = np.searchsorted(rebalances, bars, side="right") - 1
+    relative = np.where(held[period], weights[period] * close[bars] / entry[period], 0.0)
+    equity[bars] = value[period] * (idle[period] + relative.sum(axis=1))
+
+    # Turnover: half the absolute change from the drifted weights (cash included).
+    before = np.zeros_like(weights)
+    before[1:] = drifted / growth[:, None]
+    cash_before = np.ones(k)
+    cash_before[1:] = idle[:-1] / growth
+    turnover = 0.5 * (np.abs(weights - before).sum(axis=1) + np.abs(idle - cash_before))
+
+    shares = np.where(held, value[:, None] * weights / entry, 0.0)
+    return RotationRun(equity, rebalances, weights, shares, turnover)
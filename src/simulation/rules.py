@@ -0,0 +1,356 @@
+"""A small rule language for long/flat strategies.
+
+The agent describes a strategy as text instead of picking a hard-coded type::
+
+    {
+        "type": "rules",
+        "params": {
+            "entry": "rsi(14) < 30 and close > ema(200)",
+            "exit": "rsi(14) > 70 or crosses_below(close, sma(50))",
+        },
+    }
+
+``parse`` turns a rule into an expression tree of frozen, hashable nodes and
+checks it before any price is touched: unknown names, wrong argument counts
+and a number where a condition is expected are all reported with the column
+they occur at. Nothing is ever ``eval``-ed.
+
+An ``Evaluator`` computes a tree over a whole ``(dates × symbols)`` close
+matrix, one NumPy or pandas operation per node. Equal subtrees are equal
+keys of its cache, so an indicator used twice — within one rule or across
+the entry and exit rules — is computed once.
+
+Grammar, loosest binding first::
+
+    rule   := or
+    or     := and ("or" and)*
+    and    := not ("and" not)*
+    not    := "not" not | cmp
+    cmp    := sum (("<" | "<=" | ">" | ">=" | "==" | "!=") sum)?
+    sum    := term (("+" | "-") term)*
+    term   := unary (("*" | "/") unary)*
+    unary  := "-" unary | atom
+    atom   := number | "close" | call | "(" or ")"
+    call   := name "(" [rule ("," rule)*] ")"
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.engine import crossover_signals, relative_strength_index
+
+# Longest rule accepted, and the largest indicator window.
+MAX_RULE_LENGTH = 500
+MAX_WINDOW = 1_000
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<number>\d+(?:\.\d*)?|\.\d+)|(?P<name>[A-Za-z_]\w*)|"
+    r"(?P<op><=|>=|==|!=|[<>+\-*/(),]))"
+)
+_COMPARISONS = ("<", "<=", ">", ">=", "==", "!=")
+
+
+# ── Expression tree ────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class Num:
+    value: float
+
+
+@dataclass(frozen=True)
+class Close:
+    pass
+
+
+@dataclass(frozen=True)
+class Call:
+    name: str
+    args: tuple[Node, ...]  # an indicator's source series and whole-number window
+
+
+@dataclass(frozen=True)
+class Unary:
+    op: str  # "-" or "not"
+    operand: Node
+
+
+@dataclass(frozen=True)
+class Binary:
+    op: str
+    left: Node
+    right: Node
+
+
+Node = Num | Close | Call | Unary | Binary
+
+
+def _rolling(method: str) -> Callable[[pd.DataFrame, int], pd.DataFrame]:
+    return lambda frame, n: getattr(frame.rolling(n), method)()
+
+
+def _ema(frame: pd.DataFrame, n: int) -> pd.DataFrame:
+    return frame.ewm(span=n, adjust=False, min_periods=n).mean()
+
+
+def _roc(frame: pd.DataFrame, n: int) -> pd.DataFrame:
+    return (frame / frame.shift(n) - 1) * 100
+
+
+# Indicators: a series in, a series out, given one window in bars.
+INDICATORS: dict[str, Callable[[pd.DataFrame, int], pd.DataFrame | np.ndarray]] = {
+    "sma": _rolling("mean"),
+    "ema": _ema,
+    "std": _rolling("std"),
+    "highest": _rolling("max"),
+    "lowest": _rolling("min"),
+    "roc": _roc,
+    "rsi": relative_strength_index,
+}
+# Conditions on two series, true on the bar where the first crosses the second.
+CROSSES = ("crosses_above", "crosses_below")
+
+
+# ── Parser ─────────────────────────────────────────────────────────────────────
+
+
+class RuleError(ValueError):
+    """A rule that does not parse or does not type-check."""
+
+
+def _tokenize(text: str) -> list[tuple[str, str, int]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            column = len(text) - len(text[pos:].lstrip()) + 1
+            raise RuleError(f"Unexpected character {text[column - 1]!r} at column {column}")
+        kind = match.lastgroup or ""
+        tokens.append((kind, match.group(kind), match.start(kind) + 1))
+        pos = match.end()
+    tokens.append(("end", "", len(text) + 1))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self._tokens = _tokenize(text)
+        self._pos = 0
+
+    def parse(self) -> Node:
+        node = self._or()
+        kind, value, column = self._tokens[self._pos]
+        if kind != "end":
+            raise RuleError(f"Unexpected {value!r} at column {column}")
+        return node
+
+    def _peek(self) -> tuple[str, str, int]:
+        return self._tokens[self._pos]
+
+    def _accept(self, *values: str) -> str | None:
+        kind, value, _ = self._peek()
+        if kind in ("op", "name") and value in values:
+            self._pos += 1
+            return value
+        return None
+
+    def _expect(self, value: str) -> None:
+        if self._accept(value) is None:
+            _, found, column = self._peek()
+            raise RuleError(f"Expected {value!r} at column {column}, found {found or 'end'!r}")
+
+    def _or(self) -> Node:
+        node = self._and()
+        while self._accept("or"):
+            node = Binary("or", node, self._and())
+        return node
+
+    def _and(self) -> Node:
+        node = self._not()
+        while self._accept("and"):
+            node = Binary("and", node, self._not())
+        return node
+
+    def _not(self) -> Node:
+        if self._accept("not"):
+            return Unary("not", self._not())
+        return self._comparison()
+
+    def _comparison(self) -> Node:
+        node = self._sum()
+        op = self._accept(*_COMPARISONS)
+        if op is not None:
+            node = Binary(op, node, self._sum())
+        return node
+
+    def _sum(self) -> Node:
+        node = self._term()
+        while op := self._accept("+", "-"):
+            node = Binary(op, node, self._term())
+        return node
+
+    def _term(self) -> Node:
+        node = self._unary()
+        while op := self._accept("*", "/"):
+            node = Binary(op, node, self._unary())
+        return node
+
+    def _unary(self) -> Node:
+        if self._accept("-"):
+            return Unary("-", self._unary())
+        return self._atom()
+
+    def _atom(self) -> Node:
+        kind, value, column = self._peek()
+        self._pos += 1
+        if kind == "number":
+            return Num(float(value))
+        if kind == "op" and value == "(":
+            node = self._or()
+            self._expect(")")
+            return node
+        if kind == "name" and value not in ("and", "or", "not"):
+            if self._accept("("):
+                args: list[Node] = []
+                if not self._accept(")"):
+                    args.append(self._or())
+                    while self._accept(","):
+                        args.append(self._or())
+                    self._expect(")")
+                return _call(value, args, column)
+            if value == "close":
+                return Close()
+            raise RuleError(f"Unknown name {value!r} at column {column}")
+        raise RuleError(f"Unexpected {value or 'end'!r} at column {column}")
+
+
+def _call(name: str, args: list[Node], column: int) -> Call:
+    """Check a call's arguments and normalise them, so equal calls are equal nodes."""
+    if name in CROSSES:
+        if len(args) != 2 or any(_kind(arg) == "condition" for arg in args):
+            raise RuleError(f"{name}() at column {column} takes two series or numbers")
+        return Call(name, tuple(args))
+    if name not in INDICATORS:
+        known = ", ".join([*INDICATORS, *CROSSES])
+        raise RuleError(f"Unknown function {name!r} at column {column}. Use one of: {known}")
+    if len(args) == 1:
+        args = [Close(), *args]  # sma(20) is sma(close, 20)
+    if len(args) != 2 or _kind(args[0]) != "series" or not isinstance(args[1], Num):
+        raise RuleError(f"{name}() at column {column} takes a window, optionally after a series")
+    window = args[1].value
+    if window != int(window) or not 1 <= window <= MAX_WINDOW:
+        raise RuleError(
+            f"{name}() at column {column} needs a whole-number window from 1 to {MAX_WINDOW}"
+        )
+    return Call(name, (args[0], Num(float(int(window)))))
+
+
+def _kind(node: Node) -> str:
+    """``"number"``, ``"series"`` or ``"condition"``; raises on a mistyped subtree."""
+    if isinstance(node, Num):
+        return "number"
+    if isinstance(node, Close):
+        return "series"
+    if isinstance(node, Call):
+        return "condition" if node.name in CROSSES else "series"
+    if isinstance(node, Unary):
+        operand = _kind(node.operand)
+        if node.op == "not":
+            if operand != "condition":
+                raise RuleError("'not' needs a condition")
+            return "condition"
+        if operand == "condition":
+            raise RuleError("Cannot negate a condition; use 'not'")
+        return operand
+    left, right = _kind(node.left), _kind(node.right)
+    if node.op in ("and", "or"):
+        if left != "condition" or right != "condition":
+            raise RuleError(f"'{node.op}' needs a condition on both sides")
+        return "condition"
+    if "condition" in (left, right):
+        raise RuleError(f"'{node.op}' needs numbers or series on both sides, not a condition")
+    if node.op in _COMPARISONS:
+        return "condition"
+    return "number" if left == right == "number" else "series"
+
+
+def parse(text: str) -> Node:
+    """Parse a rule into its expression tree; raises ``RuleError`` unless it is a condition."""
+    if not isinstance(text, str) or not text.strip():
+        raise RuleError("A rule must be a non-empty string")
+    if len(text) > MAX_RULE_LENGTH:
+        raise RuleError(f"A rule can be at most {MAX_RULE_LENGTH} characters")
+    node = _Parser(text).parse()
+    if _kind(node) != "condition":
+        raise RuleError(f"Rule {text!r} is a value, not a condition; compare it with something")
+    return node
+
+
+# ── Evaluation ─────────────────────────────────────────────────────────────────
+
+
+class Evaluator:
+    """Evaluates expression trees over one close matrix, each distinct subtree once."""
+
+    def __init__(self, close: pd.DataFrame) -> None:
+        self._close = close
+        self.cache: dict[Node, np.ndarray | float] = {}
+
+    def __call__(self, node: Node) -> np.ndarray:
+        """A condition as a ``(dates × symbols)`` boolean array; NaN inputs are never true."""
+        return np.broadcast_to(self._eval(node), self._close.shape).astype(bool)
+
+    def _eval(self, node: Node) -> np.ndarray | float:
+        if node in self.cache:
+            return self.cache[node]
+        value = self._compute(node)
+        self.cache[node] = value
+        return value
+
+    def _compute(self, node: Node) -> np.ndarray | float:
+        if isinstance(node, Num):
+            return node.value
+        if isinstance(node, Close):
+            return self._close.to_numpy(dtype=np.float64)
+        if isinstance(node, Call):
+            if node.name in CROSSES:
+                first, second = (self._series(arg) for arg in node.args)
+                above, below = crossover_signals(first, second)
+                return above if node.name == "crosses_above" else below
+            source = pd.DataFrame(self._series(node.args[0]), index=self._close.index)
+            window = int(node.args[1].value)  # type: ignore[union-attr]
+            return np.asarray(INDICATORS[node.name](source, window), dtype=np.float64)
+        if isinstance(node, Unary):
+            operand = self._eval(node.operand)
+            return np.logical_not(operand) if node.op == "not" else np.negative(operand)
+        left, right = self._eval(node.left), self._eval(node.right)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _BINARY[node.op](left, right)
+
+    def _series(self, node: Node) -> np.ndarray:
+        return np.broadcast_to(self._eval(node), self._close.shape).astype(np.float64)
+
+
+_BINARY: dict[str, Callable] = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    # NaN compares unequal to everything; a missing value never makes a rule true.
+    "!=": lambda a, b: np.not_equal(a, b) & ~np.isnan(a) & ~np.isnan(b),
+    "and": np.logical_and,
+    "or": np.logical_or,
+}
@@ -0,0 +1,497 @@
+"""Strategy implementations: prices in, equity curve and trade list out.
+
+Every strategy takes a ``(dates × symbols)`` close-price frame and the
+starting capital and returns the portfolio value after each bar with the
+trades that produced it. The rotation strategies (momentum, rebalance) also
+return the one-way turnover traded on each bar. ``run_strategy`` dispatches on the strategy type
+and its parameters. The simulator, parameter sweeps and walk-forward
+optimisation all backtest through it.
+
+- buy_and_hold: buy on day 1, hold to end
+- sma_crossover: buy when fast SMA crosses above slow SMA, sell on crossunder
+- rsi_mean_reversion: buy when RSI < rsi_buy, sell when RSI > rsi_sell
+- momentum: hold the top_n performers over a lookback window, rebalanced monthly
+- rebalance: hold target weights from one shared cash account, rebalanced on a
+  schedule or when a weight drifts, with commission and slippage
+- rules: buy when an entry rule holds, sell when an exit rule does, both
+  written in the rule language of ``src.simulation.rules``
+
+The long/flat strategies (sma_crossover, rsi_mean_reversion, rules) and
+rebalance take the commission and slippage parameters of
+``src.simulation.costs.from_params``; without them they fill at the close for
+free.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.costs import (
+    NO_COMMISSION,
+    NO_SLIPPAGE,
+    Commission,
+    Slippage,
+    average_true_range,
+    from_params,
+)
+from src.simulation.engine import (
+    LongFlatRun,
+    crossover_signals,
+    position_state,
+    relative_strength_index,
+    simulate_long_flat,
+)
+from src.simulation.portfolio import period_starts, simulate_portfolio
+from src.simulation.rotation import (
+    lookback_returns,
+    month_starts,
+    simulate_rotation,
+    top_n_weights,
+)
+from src.simulation.rules import Evaluator, Unary, parse
+
+
+def _buy_and_hold(prices: pd.DataFrame, capital: float) -> tuple[pd.Series, list[dict]]:
+    # Equal-weight portfolio, buy on first day, sell on last
+    n = len(prices.columns)
+    alloc = capital / n
+    shares = {sym: alloc / prices[sym].iloc[0] for sym in prices.columns}
+    equity = sum(shares[sym] * prices[sym] for sym in prices.columns)
+    trades = [
+        {
+            "date": str(prices.index[0].date()),
+            "action": "BUY",
+            "symbol": sym,
+            "shares": round(shares[sym], 4),
+        }
+        for sym in prices.columns
+    ] + [
+        {
+            "date": str(prices.index[-1].date()),
+            "action": "SELL",
+            "symbol": sym,
+            "shares": round(shares[sym], 4),
+        }
+        for sym in prices.columns
+    ]
+    return equity, trades
+
+
+def _calendar_blocks(prices: pd.DataFrame) -> list[pd.DataFrame]:
+    """Split *prices* into blocks of symbols with the same trading days.
+
+    Each block keeps only the rows where its symbols have a price — what
+    ``prices[sym].dropna()`` gives per symbol — so indicators can be computed
+    for the whole block in one pandas call. Stocks on one exchange share a
+    block; crypto (which also trades at weekends) gets its own.
+    """
+    valid = prices.notna().to_numpy()
+    groups: dict[bytes, list[int]] = {}
+    for col in range(valid.shape[1]):
+        groups.setdefault(valid[:, col].tobytes(), []).append(col)
+    return [prices.iloc[valid[:, cols[0]], cols] for cols in groups.values()]
+
+
+def _allocation_equity(
+    index: pd.DatetimeIndex, dates: pd.DatetimeIndex, run: LongFlatRun, cash: float, start: int
+) -> np.ndarray:
+    """One symbol's equity on the shared calendar.
+
+    Bars from *start* onward carry the run's value; every other row — the
+    warm-up bars and dates the symbol did not trade — stays at the initial
+    allocation.
+    """
+    values = np.full(len(index), cash)
+    values[index.get_indexer(dates[start:])] = run.equity[start:]
+    return values
+
+
+def _trade_dates(index: pd.DatetimeIndex, bars: np.ndarray) -> list[str]:
+    return index[bars].strftime("%Y-%m-%d").tolist()
+
+
+def _per_bar(index: pd.DatetimeIndex, rows: np.ndarray, values: np.ndarray) -> pd.Series:
+    """*values* at bars *rows* of *index*, zero on every other bar."""
+    series = np.zeros(len(index))
+    series[rows] = values
+    return pd.Series(series, index=index)
+
+
+def _block_atr(block: pd.DataFrame, slippage: Slippage) -> np.ndarray | None:
+    """The block's ATR when *slippage* scales with it."""
+    if slippage.atr_multiple > 0:
+        return average_true_range(block, slippage.atr_window)
+    return None
+
+
+def _fees(run: LongFlatRun, commission: Commission) -> tuple[list[float], list[float]]:
+    """Rounded entry and exit fees of *run*; empty when trading is free of commission."""
+    if commission == NO_COMMISSION:
+        return [], []
+    return np.round(run.buy_fees, 2).tolist(), np.round(run.sell_fees, 2).tolist()
+
+
+def _long_flat_trades(
+    prices: pd.DataFrame,
+    runs: dict[str, tuple[pd.DatetimeIndex, LongFlatRun]],
+    sym_cash: float,
+    commission: Commission,
+    start: int,
+    extra: dict[str, dict[str, np.ndarray]] | None = None,
+) -> tuple[pd.Series, list[dict]]:
+    """Combined equity and trade list of per-symbol long/flat *runs*.
+
+    *runs* maps each symbol to its trading dates and run; allocations hold
+    their cash until bar *start*. *extra* maps a symbol to per-bar values,
+    such as its RSI, recorded (to one decimal) on each of its trades.
+    """
+    equity = np.zeros(len(prices.index))
+    trades = []
+    for sym in prices.columns:
+        dates, run = runs[sym]
+        series = (extra or {}).get(sym, {})
+        buy_marks = {key: np.round(v[run.entries], 1).tolist() for key, v in series.items()}
+        sell_marks = {key: np.round(v[run.exits], 1).tolist() for key, v in series.items()}
+        buy_dates = _trade_dates(dates, run.entries)
+        buy_prices = np.round(run.buy_fills, 4).tolist()
+        shares = np.round(run.shares, 4).tolist()
+        sell_dates = _trade_dates(dates, run.exits)
+        sell_prices = np.round(run.sell_fills, 4).tolist()
+        proceeds = np.round(run.proceeds, 2).tolist()
+        buy_fees, sell_fees = _fees(run, commission)
+        for k in range(len(run.entries)):
+            trades.append(
+                {
+                    "date": buy_dates[k],
+                    "action": "BUY",
+                    "symbol": sym,
+                    **{key: values[k] for key, values in buy_marks.items()},
+                    "price": buy_prices[k],
+                    "shares": shares[k],
+                    **({"commission": buy_fees[k]} if buy_fees else {}),
+                }
+            )
+            if k < len(run.exits):
+                trades.append(
+                    {
+                        "date": sell_dates[k],
+                        "action": "SELL",
+                        "symbol": sym,
+                        **{key: values[k] for key, values in sell_marks.items()},
+                        "price": sell_prices[k],
+                        "proceeds": proceeds[k],
+                        **({"commission": sell_fees[k]} if sell_fees else {}),
+                    }
+                )
+        equity += _allocation_equity(prices.index, dates, run, sym_cash, start=start)
+    return pd.Series(equity, index=prices.index), trades
+
+
+def _sma_crossover(
+    prices: pd.DataFrame,
+    capital: float,
+    fast: int = 20,
+    slow: int = 50,
+    commission: Commission = NO_COMMISSION,
+    slippage: Slippage = NO_SLIPPAGE,
+) -> tuple[pd.Series, list[dict]]:
+    # Trade each symbol independently
+    sym_cash = capital / len(prices.columns)
+    runs: dict[str, tuple[pd.DatetimeIndex, LongFlatRun]] = {}
+    for block in _calendar_blocks(prices):
+        close = block.to_numpy()
+        atr = _block_atr(block, slippage)
+        sma_fast = block.rolling(fast).mean().to_numpy()
+        sma_slow = block.rolling(slow).mean().to_numpy()
+        for j, sym in enumerate(block.columns):
+            buy, sell = crossover_signals(sma_fast[:, j], sma_slow[:, j])
+            run = simulate_long_flat(
+                close[:, j],
+                position_state(buy, sell),
+                sym_cash,
+                commission=commission,
+                slippage=slippage,
+                atr=None if atr is None else atr[:, j],
+            )
+            runs[sym] = (block.index, run)
+
+    return _long_flat_trades(prices, runs, sym_cash, commission, start=1)
+
+
+def _rsi_mean_reversion(
+    prices: pd.DataFrame,
+    capital: float,
+    rsi_buy: float = 30.0,
+    rsi_sell: float = 70.0,
+    commission: Commission = NO_COMMISSION,
+    slippage: Slippage = NO_SLIPPAGE,
+) -> tuple[pd.Series, list[dict]]:
+    sym_cash = capital / len(prices.columns)
+    runs: dict[str, tuple[pd.DatetimeIndex, LongFlatRun]] = {}
+    marks: dict[str, dict[str, np.ndarray]] = {}
+    for block in _calendar_blocks(prices):
+        close = block.to_numpy()
+        atr = _block_atr(block, slippage)
+        rsi = relative_strength_index(block)
+        # Signals start at bar 14, one bar after the first RSI value.
+        active = (np.arange(len(block)) >= 14)[:, None]
+        buy = active & (rsi < rsi_buy)
+        sell = active & (rsi > rsi_sell)
+        for j, sym in enumerate(block.columns):
+            long = position_state(buy[:, j], sell[:, j])
+            run = simulate_long_flat(
+                close[:, j],
+                long,
+                sym_cash,
+                commission=commission,
+                slippage=slippage,
+                atr=None if atr is None else atr[:, j],
+            )
+            runs[sym] = (block.index, run)
+            marks[sym] = {"rsi": rsi[:, j]}
+
+    return _long_flat_trades(prices, runs, sym_cash, commission, start=14, extra=marks)
+
+
+def _rules(
+    prices: pd.DataFrame,
+    capital: float,
+    entry: str,
+    exit: str | None = None,
+    commission: Commission = NO_COMMISSION,
+    slippage: Slippage = NO_SLIPPAGE,
+) -> tuple[pd.Series, list[dict]]:
+    # Long/flat on rule-language conditions: buy when entry holds, sell when exit does.
+    # Without an exit rule the position is held while the entry rule holds.
+    entry_rule = parse(entry)
+    exit_rule = parse(exit) if exit else Unary("not", entry_rule)
+    sym_cash = capital / len(prices.columns)
+    runs: dict[str, tuple[pd.DatetimeIndex, LongFlatRun]] = {}
+    for block in _calendar_blocks(prices):
+        close = block.to_numpy()
+        atr = _block_atr(block, slippage)
+        evaluate = Evaluator(block)
+        buy, sell = evaluate(entry_rule), evaluate(exit_rule)
+        for j, sym in enumerate(block.columns):
+            run = simulate_long_flat(
+                close[:, j],
+                position_state(buy[:, j], sell[:, j]),
+                sym_cash,
+                commission=commission,
+                slippage=slippage,
+                atr=None if atr is None else atr[:, j],
+            )
+            runs[sym] = (block.index, run)
+
+    return _long_flat_trades(prices, runs, sym_cash, commission, start=0)
+
+
+def _momentum(
+    prices: pd.DataFrame,
+    capital: float,
+    lookback_days: int = 90,
+    top_n: int = 3,
+) -> tuple[pd.Series, list[dict], pd.Series]:
+    # Hold the top_n symbols by lookback return, equal-weighted, rebalanced monthly.
+    # Symbols without a close on a rebalance date (e.g. stocks on a weekend) trade
+    # at their last close.
+    close = prices.ffill().to_numpy()
+    rows = month_starts(prices.index)
+    scores = lookback_returns(close, prices.index, rows, lookback_days)
+    ranked = ~np.isnan(scores).all(axis=1)
+    rows, scores = rows[ranked], scores[ranked]
+    run = simulate_rotation(close, rows, top_n_weights(scores, top_n), capital)
+
+    held = run.weights > 0
+    before = np.zeros_like(held)
+    before[1:] = held[:-1]
+    sells = np.nonzero(before & ~held)
+    buys = np.nonzero(held & ~before)
+    rebalance = np.concatenate((sells[0], buys[0]))
+    column = np.concatenate((sells[1], buys[1]))
+    is_buy = np.arange(len(rebalance)) >= len(sells[0])
+    # Sells come first on each rebalance date, then buys, each in column order.
+    order = np.lexsort((column, is_buy, rebalance))
+
+    dates = _trade_dates(prices.index, rows)
+    symbols = list(prices.columns)
+    trades = []
+    for k, j, buy in zip(
+        rebalance[order].tolist(), column[order].tolist(), is_buy[order].tolist(), strict=True
+    ):
+        price = float(close[rows[k], j])
+        if buy:
+            trades.append(
+                {
+                    "date": dates[k],
+                    "action": "BUY",
+                    "symbol": symbols[j],
+                    "price": round(price, 4),
+                    "shares": round(float(run.shares[k, j]), 4),
+                    "lookback_return_pct": round(float(scores[k, j]) * 100, 2),
+                }
+            )
+        else:
+            trades.append(
+                {
+                    "date": dates[k],
+                    "action": "SELL",
+                    "symbol": symbols[j],
+                    "price": round(price, 4),
+                    "proceeds": round(float(run.shares[k - 1, j]) * price, 2),
+                }
+            )
+    turnover = _per_bar(prices.index, run.rebalances, run.turnover)
+    return pd.Series(run.equity, index=prices.index), trades, turnover
+
+
+def _rebalance_portfolio(
+    prices: pd.DataFrame,
+    capital: float,
+    weights: dict[str, float] | None = None,
+    schedule: str = "monthly",
+    threshold: float | None = None,
+    commission: Commission = NO_COMMISSION,
+    slippage: Slippage = NO_SLIPPAGE,
+    progress: Callable[[pd.Series], None] | None = None,
+) -> tuple[pd.Series, list[dict], pd.Series]:
+    # Hold target weights (equal by default) from one shared cash account, rebalanced
+    # on the schedule and whenever a weight drifts more than threshold from its target.
+    symbols = list(prices.columns)
+    if weights:
+        missing = sorted(set(weights) - set(symbols))
+        if missing:
+            raise ValueError(f"No price data for weighted symbols: {', '.join(missing)}.")
+        target = np.array([float(weights.get(sym, 0.0)) for sym in symbols])
+    else:
+        target = np.full(len(symbols), 1.0 / len(symbols))
+    if (target < 0).any() or target.sum() > 1 + 1e-9:
+        raise ValueError("Target weights must be non-negative and sum to at most 1.")
+
+    close = prices.ffill().to_numpy()
+    run = simulate_portfolio(
+        close,
+        target,
+        capital,
+        period_starts(prices.index, schedule),
+        threshold=threshold,
+        commission=commission,
+        slippage=slippage,
+        progress=(
+            (lambda done: progress(pd.Series(done, index=prices.index[: len(done)])))
+            if progress is not None
+            else None
+        ),
+    )
+
+    rebalance, column = np.nonzero(run.traded)
+    is_buy = run.traded[rebalance, column] > 0
+    # Sells come first on each rebalance date, then buys, each in column order.
+    order = np.lexsort((column, is_buy, rebalance))
+    rebalance, column, is_buy = rebalance[order], column[order], is_buy[order]
+    dates = _trade_dates(prices.index, run.rebalances[rebalance])
+    fills = np.round(run.fills[rebalance, column], 4).tolist()
+    shares = np.round(np.abs(run.traded[rebalance, column]), 4).tolist()
+    fees = np.round(run.fees[rebalance, column], 2).tolist()
+    trades = [
+        {
+            "date": dates[k],
+            "action": "BUY" if is_buy[k] else "SELL",
+            "symbol": symbols[j],
+            "price": fills[k],
+            "shares": shares[k],
+            "commission": fees[k],
+        }
+        for k, j in enumerate(column.tolist())
+    ]
+    turnover = _per_bar(prices.index, run.rebalances, run.turnover)
+    return pd.Series(run.equity, index=prices.index), trades, turnover
+
+
+STRATEGY_TYPES = (
+    "buy_and_hold",
+    "sma_crossover",
+    "rsi_mean_reversion",
+    "momentum",
+    "rebalance",
+    "rules",
+)
+# Strategies that trade with commission and slippage.
+COSTED_STRATEGY_TYPES = ("sma_crossover", "rsi_mean_reversion", "rebalance", "rules")
+
+
+def costs_for(stype: str, params: dict) -> tuple[Commission, Slippage]:
+    """The commission and slippage *stype* trades with under *params*; none for the others."""
+    if stype in COSTED_STRATEGY_TYPES:
+        return from_params(params)
+    return NO_COMMISSION, NO_SLIPPAGE
+
+
+def run_strategy(
+    prices: pd.DataFrame,
+    capital: float,
+    stype: str,
+    params: dict,
+    progress: Callable[[pd.Series], None] | None = None,
+) -> tuple[pd.Series, list[dict], pd.Series | None]:
+    """Equity curve, trades and per-bar turnover of one of ``STRATEGY_TYPES`` over *prices*.
+
+    Turnover is None for the strategies that do not track it. Engines that
+    step through time (``rebalance``) call *progress* with the equity curve so
+    far as they go; the others compute it in one go.
+    """
+    commission, slippage = costs_for(stype, params)
+    if stype == "momentum":
+        return _momentum(
+            prices,
+            capital,
+            lookback_days=int(params.get("lookback_days", 90)),
+            top_n=int(params.get("top_n", 3)),
+        )
+    if stype == "rebalance":
+        threshold_pct = float(params.get("threshold_pct", 0))
+        return _rebalance_portfolio(
+            prices,
+            capital,
+            weights=params.get("weights"),
+            schedule=str(params.get("rebalance", "monthly")),
+            threshold=threshold_pct / 100 if threshold_pct > 0 else None,
+            commission=commission,
+            slippage=slippage,
+            progress=progress,
+        )
+    if stype == "sma_crossover":
+        equity, trades = _sma_crossover(
+            prices,
+            capital,
+            fast=int(params.get("fast", 20)),
+            slow=int(params.get("slow", 50)),
+            commission=commission,
+            slippage=slippage,
+        )
+    elif stype == "rsi_mean_reversion":
+        equity, trades = _rsi_mean_reversion(
+            prices,
+            capital,
+            rsi_buy=float(params.get("rsi_buy", 30)),
+            rsi_sell=float(params.get("rsi_sell", 70)),
+            commission=commission,
+            slippage=slippage,
+        )
+    elif stype == "rules":
+        if "entry" not in params:
+            raise ValueError("A rules strategy needs an 'entry' rule, e.g. 'rsi(14) < 30'.")
+        equity, trades = _rules(
+            prices,
+            capital,
+            entry=params["entry"],
+            exit=params.get("exit"),
+            commission=commission,
+            slippage=slippage,
+        )
+    else:
+        equity, trades = _buy_and_hold(prices, capital)
+    return equity, trades, None
@@ -0,0 +1,88 @@
+"""Parameter sweeps: one strategy evaluated over a grid of parameters.
+
+Prices are downloaded once by the caller. Small grids run in-process; larger
+ones are split into chunks that the backtest worker pool evaluates in
+parallel, all reading the same shared-memory price matrix.
+"""
+
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.config import settings
+from src.simulation.analytics import metric_rows, summarise
+from src.simulation.strategies import run_strategy
+from src.simulation.workers import map_shared
+
+# Grids larger than this are rejected rather than queued for minutes.
+MAX_COMBINATIONS = 500
+# Chunks per worker: enough to balance uneven run times, few enough to keep overhead low.
+_CHUNKS_PER_WORKER = 2
+
+
+def expand_grid(param_grid: dict[str, list]) -> list[dict]:
+    """Every combination of the grid's values, in the grid's key order."""
+    keys = list(param_grid)
+    return [
+        dict(zip(keys, values, strict=True)) for values in itertools.product(*param_grid.values())
+    ]
+
+
+def evaluate(prices: pd.DataFrame, stype: str, combos: list[dict], capital: float) -> list[dict]:
+    """Backtest *stype* once per parameter combination and summarise each run.
+
+    The equity curves of all successful runs share the price calendar, so their
+    metrics are computed together in one pass.
+    """
+    rows: list[dict] = []
+    scored: list[dict] = []
+    curves = []
+    turnovers = []
+    for params in combos:
+        try:
+            equity, trades, turnover = run_strategy(prices, capital, stype, params)
+        except Exception as exc:
+            rows.append({"params": params, "error": str(exc)})
+            continue
+        row = {
+            "params": params,
+            "final_value": round(float(equity.iloc[-1]), 2),
+            "trades_count": len(trades),
+        }
+        rows.append(row)
+        scored.append(row)
+        curves.append(equity.to_numpy())
+        turnovers.append(turnover)
+    if curves and len(prices) >= 2:
+        # Every run is of one strategy type, so either all track turnover or none do.
+        tracked = [t.to_numpy() for t in turnovers if t is not None]
+        traded = np.column_stack(tracked) if len(tracked) == len(curves) else None
+        metrics = metric_rows(
+            summarise(np.column_stack(curves), index=prices.index, turnover=traded)
+        )
+        for row, row_metrics in zip(scored, metrics, strict=True):
+            row.update(row_metrics)
+    return rows
+
+
+def sweep(prices: pd.DataFrame, stype: str, combos: list[dict], capital: float) -> list[dict]:
+    """Evaluate every combination, in parallel when there is more than one worker.
+
+    Rows come back in the order of *combos*.
+    """
+    workers = settings.simulation_workers
+    if workers <= 1 or len(combos) <= 1:
+        return evaluate(prices, stype, combos, capital)
+
+    n_chunks = min(len(combos), workers * _CHUNKS_PER_WORKER)
+    chunks = [combos[i::n_chunks] for i in range(n_chunks)]
+    results = map_shared(evaluate, prices, [(stype, chunk, capital) for chunk in chunks])
+
+    # Undo the round-robin split.
+    rows: list[dict] = [{}] * len(combos)
+    for i, chunk_rows in enumerate(results):
+        rows[i::n_chunks] = chunk_rows
+    return rows
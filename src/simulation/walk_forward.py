@@ -0,0 +1,125 @@
+"""Walk-forward optimisation: optimise on a rolling window, trade the next one.
+
+The period is cut into consecutive test windows of ``test_days``, each
+preceded by a training window of ``train_days``. For every window the whole
+parameter grid is backtested on the training slice, the best combination is
+run through the test slice, and the test-slice returns are chained into one
+out-of-sample equity curve — an estimate of how re-optimising the strategy
+as time goes by would actually have done, unlike a single in-sample run.
+
+Windows are independent, so they are evaluated in parallel on the backtest
+worker pool, all reading one shared-memory price matrix.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.config import settings
+from src.simulation.strategies import run_strategy
+from src.simulation.sweep import evaluate
+from src.simulation.workers import map_shared
+
+# More windows than this means test windows too short to say anything.
+MAX_WINDOWS = 60
+
+
+@dataclass(frozen=True)
+class Window:
+    train_start: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp  # exclusive
+
+
+def rolling_windows(index: pd.DatetimeIndex, train_days: int, test_days: int) -> list[Window]:
+    """Consecutive test windows over *index*, each after a full training window."""
+    train, test = pd.Timedelta(days=train_days), pd.Timedelta(days=test_days)
+    stop = index[-1] + pd.Timedelta(days=1)
+    windows = []
+    test_start = index[0] + train
+    while test_start < stop:
+        test_end = min(test_start + test, stop)
+        windows.append(Window(test_start - train, test_start, test_end))
+        test_start = test_end
+    return windows
+
+
+def _slice(prices: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    return prices.loc[(prices.index >= start) & (prices.index < end)]
+
+
+def run_window(
+    prices: pd.DataFrame,
+    stype: str,
+    combos: list[dict],
+    capital: float,
+    window: Window,
+    rank_by: str,
+) -> dict:
+    """Optimise on *window*'s training slice and run the winner through its test slice.
+
+    Returns the window's dates, the chosen ``params`` with their in-sample
+    score, the number of test-slice trades and ``growth`` — the test-slice
+    equity relative to the last training bar — or an ``error``.
+    """
+    train = _slice(prices, window.train_start, window.test_start).dropna(axis=1, how="all")
+    summary = {
+        "train_start": str(window.train_start.date()),
+        "test_start": str(window.test_start.date()),
+        "test_end": str((window.test_end - pd.Timedelta(days=1)).date()),
+    }
+    scored = [r for r in evaluate(train, stype, combos, capital) if r.get(rank_by) is not None]
+    if not scored:
+        return {**summary, "error": "No parameter combination could be scored on the training data"}
+    best = max(scored, key=lambda r: r[rank_by])
+
+    # Run through train and test together so indicators and positions carry over.
+    full = _slice(prices, window.train_start, window.test_end)[train.columns]
+    equity, trades, _ = run_strategy(full, capital, stype, best["params"])
+    in_test = equity.index >= window.test_start
+    if not in_test.any():
+        return {**summary, "error": "No trading days in the test window"}
+    test_from = summary["test_start"]
+    return {
+        **summary,
+        "params": best["params"],
+        f"in_sample_{rank_by}": best[rank_by],
+        "base_date": equity.index[~in_test][-1],
+        "growth": equity[in_test] / equity[~in_test].iloc[-1],
+        "trades_count": sum(t["date"] >= test_from for t in trades),
+    }
+
+
+def walk_forward(
+    prices: pd.DataFrame,
+    stype: str,
+    combos: list[dict],
+    capital: float,
+    windows: list[Window],
+    rank_by: str,
+) -> list[dict]:
+    """``run_window`` for every window, in parallel when there is more than one worker."""
+    if settings.simulation_workers <= 1 or len(windows) <= 1:
+        return [run_window(prices, stype, combos, capital, w, rank_by) for w in windows]
+    return map_shared(run_window, prices, [(stype, combos, capital, w, rank_by) for w in windows])
+
+
+def stitch(results: list[dict], capital: float) -> pd.Series:
+    """Chain the windows' test-slice growth into one equity curve starting at *capital*.
+
+    The curve starts on the last training bar of the first scored window.
+    Windows without a result are skipped, leaving the equity unchanged.
+    """
+    parts: list[pd.Series] = []
+    value = capital
+    for result in results:
+        if "error" in result:
+            continue
+        if not parts:
+            parts.append(pd.Series([capital], index=[result["base_date"]]))
+        part = result["growth"] * value
+        parts.append(part)
+        value = float(part.iloc[-1])
+    return pd.concat(parts) if parts else pd.Series(dtype=float)
@@ -0,0 +1,297 @@
+"""Worker processes for CPU-bound backtests and shared-memory price matrices.
+
+Backtests are pure NumPy/pandas work, so threads would serialise on the GIL;
+they run in a process pool instead. The pool uses the ``spawn`` start method
+— forking a process that holds an event loop, database connections and a
+loaded LLM is unsafe — and is created on first use, then reused.
+
+A price matrix is handed to the workers once through
+``multiprocessing.shared_memory`` rather than being pickled into every task:
+``share_prices`` copies the closes into a shared block and yields a small
+picklable ``SharedPrices`` handle, and workers ``apply`` a function to the same
+memory without copying it.
+
+Progress comes back the same way. ``run_shared`` can give the task a
+``SharedProgress`` board — one more small shared block holding the fraction
+done and the equity curve so far — which the worker writes to and the event
+loop polls while it waits for the result. Tasks that read their own data,
+such as intraday backtests over memory-mapped bar files, go through
+``run_in_pool`` with the same progress board and no shared prices.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import threading
+from typing import Any, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from src.agent.utils.logger import get_logger
+from src.config import settings
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Seconds between two reads of a task's progress board.
+PROGRESS_INTERVAL = 0.5
+
+
+@dataclass(frozen=True)
+class SharedPrices:
+    """Picklable handle to a close-price matrix in shared memory."""
+
+    name: str
+    shape: tuple[int, int]
+    dates: np.ndarray  # datetime64, one per row
+    columns: tuple[str, ...]
+
+    def apply(self, fn: Callable[[pd.DataFrame], T]) -> T:
+        """Call *fn* with the shared matrix as a DataFrame, without copying it.
+
+        The DataFrame is a view of the shared block and must not outlive the
+        call: *fn* should return values computed from it, not the frame itself.
+        """
+        # Spawned workers share the parent's resource tracker, so attaching here does
+        # not hand ownership of the block to this process; the creator unlinks it.
+        shm = SharedMemory(name=self.name)
+        values = np.ndarray(self.shape, dtype="float64", buffer=shm.buf)
+        prices = pd.DataFrame(
+            values, index=pd.DatetimeIndex(self.dates), columns=list(self.columns), copy=False
+        )
+        try:
+            return fn(prices)
+        finally:
+            del prices, values
+            shm.close()
+
+
+@contextmanager
+def share_prices(prices: pd.DataFrame) -> Iterator[SharedPrices]:
+    """Copy *prices* into shared memory for the duration of the ``with`` block."""
+    values = prices.to_numpy(dtype="float64")
+    shm = SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype="float64", buffer=shm.buf)[:] = values
+        yield SharedPrices(
+            name=shm.name,
+            shape=values.shape,
+            dates=prices.index.to_numpy(),
+            columns=tuple(prices.columns),
+        )
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@dataclass(frozen=True)
+class SharedProgress:
+    """Picklable handle to a task's progress board in shared memory.
+
+    The block holds the fraction done, the number of equity bars written, and
+    room for one value and one date (ns since the epoch) per bar of the task's
+    prices. The worker is the only writer; the count is written after the
+    bars it covers, so a reader never sees bars that are not there yet.
+    """
+
+    name: str
+    capacity: int
+
+    def _arrays(self, shm: SharedMemory) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        header = np.ndarray(2, dtype="float64", buffer=shm.buf)
+        values = np.ndarray(self.capacity, dtype="float64", buffer=shm.buf, offset=16)
+        dates = np.ndarray(
+            self.capacity, dtype="int64", buffer=shm.buf, offset=16 + 8 * self.capacity
+        )
+        return header, values, dates
+
+    def report(self, fraction: float, equity: pd.Series | None = None) -> None:
+        """Record *fraction* done and, optionally, the equity curve computed so far."""
+        shm = SharedMemory(name=self.name)
+        try:
+            header, values, dates = self._arrays(shm)
+            if equity is not None:
+                n = min(len(equity), self.capacity)
+                values[:n] = equity.to_numpy(dtype="float64")[:n]
+                dates[:n] = pd.DatetimeIndex(equity.index[:n]).as_unit("ns").asi8
+                header[1] = n
+            header[0] = fraction
+            del header, values, dates
+        finally:
+            shm.close()
+
+    def read(self) -> tuple[float, pd.Series]:
+        """The fraction done and a copy of the equity curve reported so far."""
+        shm = SharedMemory(name=self.name)
+        try:
+            header, values, dates = self._arrays(shm)
+            fraction, n = float(header[0]), int(header[1])
+            equity = pd.Series(
+                values[:n].copy(), index=pd.DatetimeIndex(dates[:n].astype("datetime64[ns]"))
+            )
+            del header, values, dates
+            return fraction, equity
+        finally:
+            shm.close()
+
+
+@contextmanager
+def progress_board(capacity: int) -> Iterator[SharedProgress]:
+    """A zeroed progress board for up to *capacity* equity bars, for the ``with`` block."""
+    shm = SharedMemory(create=True, size=16 * (capacity + 1))
+    try:
+        np.ndarray(2, dtype="float64", buffer=shm.buf)[:] = 0.0
+        yield SharedProgress(name=shm.name, capacity=capacity)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _apply_task(shared: SharedPrices, fn: Callable[..., Any], args: tuple) -> Any:
+    # Runs in a worker process.
+    return shared.apply(lambda prices: fn(prices, *args))
+
+
+def map_shared(fn: Callable[..., Any], prices: pd.DataFrame, tasks: list[tuple]) -> list:
+    """Call ``fn(prices, *args)`` for every *args* in *tasks* on the worker pool.
+
+    *prices* is shared with the workers once for all tasks; *fn* must be a
+    module-level function so it can be pickled. Results come back in task
+    order. If a worker dies the pool is restarted and ``BrokenProcessPool`` is
+    raised.
+    """
+    pool = get_process_pool()
+    try:
+        with share_prices(prices) as shared:
+            futures = [pool.submit(_apply_task, shared, fn, args) for args in tasks]
+            return [future.result() for future in futures]
+    except BrokenProcessPool:
+        logger.error("A simulation worker died; restarting the pool")
+        reset_process_pool()
+        raise
+
+
+async def run_shared(
+    fn: Callable[..., Any],
+    prices: pd.DataFrame,
+    *args: Any,
+    on_progress: Callable[[float, pd.Series], None] | None = None,
+) -> Any:
+    """Await ``fn(prices, *args)`` on the worker pool without blocking the event loop.
+
+    With *on_progress*, *fn* is called with an extra ``progress`` keyword: a
+    ``SharedProgress.report`` it may call with the fraction done and the
+    equity curve so far. Every ``PROGRESS_INTERVAL`` seconds the board is read
+    and, if it changed, ``on_progress(fraction, equity)`` is called on the
+    event loop.
+
+    Cancelling the await cancels the task if no worker has picked it up yet; a
+    task that is already running finishes in its worker and its result is
+    dropped.
+    """
+    pool = get_process_pool()
+    try:
+        with share_prices(prices) as shared:
+            if on_progress is None:
+                return await asyncio.wrap_future(pool.submit(_apply_task, shared, fn, args))
+            with progress_board(len(prices)) as board:
+                task = partial(fn, progress=board.report)
+                future = pool.submit(_apply_task, shared, task, args)
+                return await _watch(future, board, on_progress)
+    except BrokenProcessPool:
+        logger.error("A simulation worker died; restarting the pool")
+        reset_process_pool()
+        raise
+
+
+async def run_in_pool(
+    fn: Callable[..., Any],
+    *args: Any,
+    on_progress: Callable[[float, pd.Series], None] | None = None,
+    progress_capacity: int = 0,
+) -> Any:
+    """Await ``fn(*args)`` on the worker pool, for tasks that load their own data.
+
+    Like ``run_shared`` without a shared price matrix, e.g. for a backtest that
+    reads memory-mapped bar files itself. *progress_capacity* bounds the equity
+    bars the task may report through ``progress``.
+    """
+    pool = get_process_pool()
+    try:
+        if on_progress is None:
+            return await asyncio.wrap_future(pool.submit(fn, *args))
+        with progress_board(progress_capacity) as board:
+            future = pool.submit(partial(fn, progress=board.report), *args)
+            return await _watch(future, board, on_progress)
+    except BrokenProcessPool:
+        logger.error("A simulation worker died; restarting the pool")
+        reset_process_pool()
+        raise
+
+
+async def _watch(
+    future: Future,
+    board: SharedProgress,
+    on_progress: Callable[[float, pd.Series], None],
+) -> Any:
+    """Wait for *future*, passing changes on *board* to *on_progress* as they appear."""
+    wrapped = asyncio.wrap_future(future)
+    seen: tuple[float, int] = (0.0, 0)
+    while True:
+        try:
+            done, _ = await asyncio.wait({wrapped}, timeout=PROGRESS_INTERVAL)
+        except asyncio.CancelledError:
+            wrapped.cancel()
+            raise
+        if done:
+            return wrapped.result()
+        fraction, equity = board.read()
+        if (fraction, len(equity)) != seen:
+            seen = (fraction, len(equity))
+            on_progress(fraction, equity)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the process-wide backtest worker pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.simulation_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Started %d simulation worker processes", settings.simulation_workers)
+        return _pool
+
+
+def reset_process_pool() -> None:
+    """Discard the pool (e.g. after a worker crashed); the next call starts a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker processes. Called on application shutdown."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+        logger.info("Simulation workers stopped")
@@ -1,6 +1,6 @@
 """Investment assistant tool registry."""
 
 from src.tools.definitions import TOOL_DEFINITIONS
-from src.tools.dispatcher import dispatch_tool
+from src.tools.dispatcher import dispatch_tool, stream_tool, stream_tools
 
-__all__ = ["TOOL_DEFINITIONS", "dispatch_tool"]
+__all__ = ["TOOL_DEFINITIONS", "dispatch_tool", "stream_tool", "stream_tools"]
@@ -92,11 +92,72 @@ TOOL_DEFINITIONS = [
             "required": ["symbol"],
         },
     },
+    {
+        "name": "scan_technical_signals",
+        "description": (
+            "Scan a whole universe of symbols for technical setups in one call. Computes RSI, "
+            "MACD, Bollinger Bands, EMA(20/50/200), ATR and OBV for every symbol and returns "
+            "only those matching all filters. Prefer this over calling get_technical_indicators "
+            "symbol by symbol."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "universe": {
+                    "type": "string",
+                    "description": (
+                        "Preset universe: major (mega caps + index ETFs + crypto), mega_caps, "
+                        "index_etfs, sector_etfs, crypto"
+                    ),
+                    "default": "major",
+                },
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Explicit list of tickers to scan instead of a preset universe",
+                },
+                "filters": {
+                    "type": "array",
+                    "description": (
+                        "Conditions that must all hold, e.g. "
+                        "[{'field': 'rsi_14', 'op': '<', 'value': 30}, "
+                        "{'field': 'close', 'op': '>', 'value': 'ema_200'}]. "
+                        "Fields: close, change_pct, rsi_14, macd, macd_signal, macd_hist, "
+                        "bb_upper, bb_middle, bb_lower, ema_20, ema_50, ema_200, atr_14, obv. "
+                        "Omit to return every symbol."
+                    ),
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "field": {"type": "string"},
+                            "op": {"type": "string", "enum": ["<", "<=", ">", ">="]},
+                            "value": {
+                                "description": "A number, or another field name such as 'ema_200'"
+                            },
+                        },
+                        "required": ["field", "op", "value"],
+                    },
+                },
+                "period": {
+                    "type": "string",
+                    "description": "History used for the calculation: 6mo, 1y, 2y",
+                    "default": "1y",
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of matching symbols to return",
+                    "default": 25,
+                },
+            },
+            "required": [],
+        },
+    },
     {
         "name": "get_options_chain",
         "description": (
             "Fetch the options chain for a stock symbol (calls and puts). "
-            "Returns strikes, expiries, bid/ask, implied volatility, open interest, delta, gamma."
+            "Returns strikes, expiries, bid/ask, open interest, and implied volatility plus "
+            "delta, gamma, theta, vega and rho computed with Black-Scholes."
         ),
         "input_schema": {
             "type": "object",
@@ -110,6 +171,19 @@ TOOL_DEFINITIONS = [
                     "description": "Expiry date in YYYY-MM-DD format. If omitted, \
                         returns next 3 expiries.",
                 },
+                "moneyness": {
+                    "type": "number",
+                    "description": (
+                        "Only return strikes within this fraction of the underlying price, "
+                        "e.g. 0.15 = ±15%"
+                    ),
+                    "default": 0.15,
+                },
+                "max_strikes": {
+                    "type": "integer",
+                    "description": "Maximum strikes per side per expiry, nearest the money first",
+                    "default": 20,
+                },
             },
             "required": ["symbol"],
         },
@@ -372,7 +446,25 @@ TOOL_DEFINITIONS = [
                         "Strategy parameters. Supported types: "
                         "'buy_and_hold', 'sma_crossover' (params: fast, slow), "
                         "'rsi_mean_reversion' (params: rsi_buy, rsi_sell), "
-                        "'momentum' (params: lookback_days)"
+                        "'momentum' (params: lookback_days, top_n — hold the top_n symbols by "
+                        "lookback return, rebalanced monthly), "
+                        "'rebalance' (params: weights {symbol: fraction, default equal}, "
+                        "rebalance 'weekly'|'monthly'|'quarterly'|'yearly'|'none', "
+                        "threshold_pct — one shared cash account rebalanced to target weights), "
+                        "'rules' (params: entry, exit — conditions on close such as "
+                        "'rsi(14) < 30 and close > ema(200)'; functions sma, ema, rsi, std, "
+                        "highest, lowest, roc (window, optionally after a series), "
+                        "crosses_above, crosses_below; operators + - * / < <= > >= == != and "
+                        "or not. Buy when entry holds, sell when exit holds; without exit, sell "
+                        "when entry stops holding). "
+                        "sma_crossover, rsi_mean_reversion, rules and rebalance also take "
+                        "trading costs: broker 'alpaca'|'ibkr'|'coinbase'|'binance' (that "
+                        "broker's fee schedule), commission_pct, commission_per_share, "
+                        "commission_min, commission_max_pct (override the schedule), "
+                        "spread_bps (quoted spread, half paid per fill), slippage_bps, "
+                        "atr_slippage (multiple of the average true range over atr_window "
+                        "bars, default 14; not for rebalance). Without them fills are at the "
+                        "close with no fees."
                     ),
                     "properties": {
                         "type": {"type": "string"},
@@ -393,10 +485,204 @@ TOOL_DEFINITIONS = [
                     "type": "string",
                     "description": "End date YYYY-MM-DD (defaults to today)",
                 },
+                "monte_carlo_paths": {
+                    "type": "integer",
+                    "description": (
+                        "If > 0, bootstrap the daily returns into this many alternative paths "
+                        "(max 10000) and add 5th–95th percentile bands for final value, return, "
+                        "max drawdown and Sharpe. 2000 is a good default when uncertainty matters"
+                    ),
+                    "default": 0,
+                },
+                "bootstrap_block_days": {
+                    "type": "integer",
+                    "description": "Length of the blocks of consecutive days resampled together",
+                    "default": 10,
+                },
+                "benchmark": {
+                    "type": "string",
+                    "description": (
+                        "Symbol to measure beta and alpha against, e.g. SPY. It is not traded "
+                        "unless it is also in symbols"
+                    ),
+                },
+                "interval": {
+                    "type": "string",
+                    "enum": ["1d", "1m", "5m"],
+                    "description": (
+                        "Bar size to trade on. '1m' and '5m' backtest buy_and_hold, "
+                        "sma_crossover and rsi_mean_reversion on the stored intraday bars "
+                        "(indicator windows are then in bars, not days)"
+                    ),
+                    "default": "1d",
+                },
             },
             "required": ["name", "symbols", "strategy", "period_start"],
         },
     },
+    {
+        "name": "run_parameter_sweep",
+        "description": (
+            "Backtest one strategy over every combination of a parameter grid in a single "
+            "call, e.g. fast=[10, 20, 50] × slow=[50, 100, 200]. Prices are downloaded once "
+            "and the runs are evaluated in parallel. Returns a table of return, Sharpe ratio "
+            "and max drawdown per combination, best first. Use this instead of calling "
+            "run_simulation repeatedly with different parameters."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Symbols to include in every run",
+                },
+                "strategy_type": {
+                    "type": "string",
+                    "enum": [
+                        "buy_and_hold",
+                        "sma_crossover",
+                        "rsi_mean_reversion",
+                        "momentum",
+                        "rebalance",
+                        "rules",
+                    ],
+                    "description": "Strategy to sweep",
+                },
+                "param_grid": {
+                    "type": "object",
+                    "description": (
+                        "Values to try for each strategy parameter, e.g. "
+                        '{"fast": [10, 20], "slow": [50, 100]} for sma_crossover or '
+                        '{"rsi_buy": [25, 30], "rsi_sell": [70, 75]} for rsi_mean_reversion, '
+                        'or alternative rule texts, e.g. {"entry": ["rsi(14) < 30", '
+                        '"rsi(14) < 25"]} for rules'
+                    ),
+                    "additionalProperties": {
+                        "type": "array",
+                        "items": {"type": ["number", "string"]},
+                    },
+                },
+                "initial_capital": {
+                    "type": "number",
+                    "description": "Starting capital in USD",
+                    "default": 10000,
+                },
+                "period_start": {
+                    "type": "string",
+                    "description": "Start date YYYY-MM-DD",
+                },
+                "period_end": {
+                    "type": "string",
+                    "description": "End date YYYY-MM-DD (defaults to today)",
+                },
+                "rank_by": {
+                    "type": "string",
+                    "enum": [
+                        "sharpe_ratio",
+                        "sortino_ratio",
+                        "calmar_ratio",
+                        "total_return_pct",
+                        "cagr_pct",
+                        "max_drawdown_pct",
+                    ],
+                    "description": "Metric to rank combinations by, best first",
+                    "default": "sharpe_ratio",
+                },
+                "top_n": {
+                    "type": "integer",
+                    "description": "Number of ranked combinations to return",
+                    "default": 20,
+                },
+            },
+            "required": ["symbols", "strategy_type", "param_grid", "period_start"],
+        },
+    },
+    {
+        "name": "run_walk_forward",
+        "description": (
+            "Walk-forward optimisation: split the period into rolling train/test windows, "
+            "pick the best parameters from a grid on each training window and trade them on "
+            "the following test window. Returns the stitched out-of-sample equity curve and "
+            "metrics plus the parameters chosen per window. Use this to check whether "
+            "optimised parameters hold up out of sample, not just in a single backtest."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "A descriptive name for this walk-forward run",
+                },
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Symbols to include",
+                },
+                "strategy_type": {
+                    "type": "string",
+                    "enum": [
+                        "buy_and_hold",
+                        "sma_crossover",
+                        "rsi_mean_reversion",
+                        "momentum",
+                        "rebalance",
+                        "rules",
+                    ],
+                    "description": "Strategy to optimise",
+                },
+                "param_grid": {
+                    "type": "object",
+                    "description": (
+                        "Values to try for each strategy parameter, e.g. "
+                        '{"fast": [10, 20], "slow": [50, 100]}'
+                    ),
+                    "additionalProperties": {
+                        "type": "array",
+                        "items": {"type": ["number", "string"]},
+                    },
+                },
+                "train_days": {
+                    "type": "integer",
+                    "description": "Training window length in calendar days (min 30)",
+                    "default": 365,
+                },
+                "test_days": {
+                    "type": "integer",
+                    "description": "Test window length in calendar days (min 5)",
+                    "default": 90,
+                },
+                "initial_capital": {
+                    "type": "number",
+                    "description": "Starting capital in USD",
+                    "default": 10000,
+                },
+                "period_start": {
+                    "type": "string",
+                    "description": "Start date YYYY-MM-DD; the first test window starts "
+                    "train_days later",
+                },
+                "period_end": {
+                    "type": "string",
+                    "description": "End date YYYY-MM-DD (defaults to today)",
+                },
+                "optimise_by": {
+                    "type": "string",
+                    "enum": [
+                        "sharpe_ratio",
+                        "sortino_ratio",
+                        "calmar_ratio",
+                        "total_return_pct",
+                        "cagr_pct",
+                        "max_drawdown_pct",
+                    ],
+                    "description": "Metric maximised on each training window",
+                    "default": "sharpe_ratio",
+                },
+            },
+            "required": ["name", "symbols", "strategy_type", "param_grid", "period_start"],
+        },
+    },
     # ── Agent Control ──────────────────────────────────────────────────────────
     {
         "name": "set_trading_mode",
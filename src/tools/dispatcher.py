@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from concurrent.futures import Future
+from contextlib import aclosing
+from contextvars import ContextVar, copy_context
 from datetime import UTC, datetime
 import json
+import threading
 
 from sqlalchemy import select
 
 from src.agent.utils.logger import get_logger
 from src.config import settings
 from src.db.database import async_session
-from src.db.models import DailyPnL, SimulationResult, Trade
+from src.db.models import DailyPnL, Trade
 from src.tools.brokers import (
     alpaca as alpaca_tool,
     binance as binance_tool,
@@ -24,19 +30,35 @@ from src.tools.market_data import (
     get_options_chain,
     get_stock_data,
     get_technical_indicators,
+    scan_technical_signals,
     search_ticker,
 )
 from src.tools.news import search_market_news
 from src.tools.news_memory import get_latest_news, search_stored_news
 from src.tools.portfolio import get_account_info, get_portfolio_summary, get_trade_history
-from src.tools.simulator import run_simulation
+from src.tools.simulation_jobs import get_simulation_jobs, persist_simulation
+from src.tools.simulator import run_parameter_sweep, run_walk_forward
+from src.tools.tool_pools import get_tool_pool
 
 logger = get_logger(__name__)
 
 
 async def dispatch_tool(tool_name: str, tool_input: dict) -> str:
-    """Call the appropriate tool and return a JSON string result."""
+    """Call the appropriate tool and return a JSON string result.
+
+    Read-only tools are coalesced: a call identical to one already in flight
+    (same tool, same canonicalised input) waits for that execution and returns
+    its result instead of running again.
+    """
     logger.info("Tool call: %s(%s)", tool_name, json.dumps(tool_input)[:200])
+    if tool_name in _COALESCED_TOOLS:
+        return await _single_flight.run(
+            tool_name, _call_key(tool_name, tool_input), lambda: _run(tool_name, tool_input)
+        )
+    return await _run(tool_name, tool_input)
+
+
+async def _run(tool_name: str, tool_input: dict) -> str:
     try:
         result = await _dispatch(tool_name, tool_input)
     except Exception as exc:
@@ -45,12 +67,223 @@ async def dispatch_tool(tool_name: str, tool_input: dict) -> str:
     return json.dumps(result, default=str, ensure_ascii=False)
 
 
+def dispatch_stats() -> dict:
+    """Per-tool call, execution and coalesced counters for ``GET /api/metrics``.
+
+    Thread-pool counters are reported separately, by ``tool_pool_stats()``.
+    """
+    return _single_flight.stats()
+
+
+# ── Progress streaming ───────────────────────────────────────────────────────
+
+# Where the running tool call sends its progress updates; set by stream_tool().
+_progress_sink: ContextVar[Callable[[dict], None] | None] = ContextVar(
+    "tool_progress_sink", default=None
+)
+
+
+async def stream_tool(tool_name: str, tool_input: dict, tool_id: str) -> AsyncGenerator[dict, None]:
+    """Dispatch a tool call, yielding its ``tool_progress`` events and then its ``tool_result``.
+
+    The call runs with a progress sink in its context. Long-running tools
+    (``run_simulation``) pass their updates to it as they go; for the rest
+    this yields the result alone, like awaiting ``dispatch_tool``. Closing the
+    generator early cancels the call.
+    """
+    updates: asyncio.Queue[dict | None] = asyncio.Queue()
+    context = copy_context()
+    context.run(_progress_sink.set, updates.put_nowait)
+    task = asyncio.create_task(dispatch_tool(tool_name, tool_input), context=context)
+    task.add_done_callback(lambda _: updates.put_nowait(None))
+    try:
+        while (update := await updates.get()) is not None:
+            yield {"type": "tool_progress", "name": tool_name, "id": tool_id, **update}
+        yield {"type": "tool_result", "name": tool_name, "result": task.result(), "id": tool_id}
+    finally:
+        task.cancel()
+
+
+# ── Parallel tool calls ──────────────────────────────────────────────────────
+
+# Tools that place, cancel or govern trades. They run one at a time, in the order the
+# model asked for them, after every call before them has finished and before any after.
+_SERIAL_TOOLS = frozenset({"execute_trade", "confirm_trade", "cancel_order", "set_trading_mode"})
+
+
+async def stream_tools(calls: list[tuple[str, dict, str]]) -> AsyncGenerator[dict, None]:
+    """Dispatch one assistant turn's ``(name, input, id)`` tool calls, yielding their events.
+
+    Calls between two trade tools run concurrently, at most
+    ``AGENT_MAX_PARALLEL_TOOLS`` at a time. Their ``tool_call`` events are
+    yielded first, in the order of *calls*, and their ``tool_result`` events
+    in that same order, each as soon as it and every result before it are in;
+    ``tool_progress`` events pass through as they arrive. A trade tool runs
+    alone, as with ``stream_tool``. Closing the generator early cancels the
+    calls still running.
+    """
+    batch: list[tuple[str, dict, str]] = []
+    for call in calls:
+        if call[0] not in _SERIAL_TOOLS:
+            batch.append(call)
+            continue
+        async with aclosing(_stream_batch(batch)) as events:
+            async for event in events:
+                yield event
+        batch = []
+        name, tool_input, tool_id = call
+        yield {"type": "tool_call", "name": name, "input": tool_input, "id": tool_id}
+        async with aclosing(stream_tool(name, tool_input, tool_id)) as events:
+            async for event in events:
+                yield event
+    async with aclosing(_stream_batch(batch)) as events:
+        async for event in events:
+            yield event
+
+
+async def _stream_batch(calls: list[tuple[str, dict, str]]) -> AsyncGenerator[dict, None]:
+    for name, tool_input, tool_id in calls:
+        yield {"type": "tool_call", "name": name, "input": tool_input, "id": tool_id}
+    if not calls:
+        return
+
+    limit = asyncio.Semaphore(max(1, settings.agent_max_parallel_tools))
+    events: asyncio.Queue[tuple[int, dict]] = asyncio.Queue()
+
+    async def run(index: int, name: str, tool_input: dict, tool_id: str) -> None:
+        result = {
+            "type": "tool_result",
+            "name": name,
+            "result": json.dumps({"error": "tool returned no result", "tool": name}),
+            "id": tool_id,
+        }
+        try:
+            async with limit, aclosing(stream_tool(name, tool_input, tool_id)) as stream:
+                async for event in stream:
+                    if event["type"] == "tool_result":
+                        result = event
+                    else:
+                        events.put_nowait((index, event))
+        except Exception as exc:
+            logger.exception("Tool %s failed", name)
+            result["result"] = json.dumps({"error": str(exc), "tool": name})
+        events.put_nowait((index, result))
+
+    tasks = [asyncio.create_task(run(i, *call)) for i, call in enumerate(calls)]
+    try:
+        results: dict[int, dict] = {}
+        done = 0
+        while done < len(calls):
+            index, event = await events.get()
+            if event["type"] != "tool_result":
+                yield event
+                continue
+            results[index] = event
+            while done in results:
+                yield results.pop(done)
+                done += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# ── Request coalescing ───────────────────────────────────────────────────────
+
+# Tools without side effects, safe to share between concurrent identical calls.
+_COALESCED_TOOLS = frozenset(
+    {
+        "get_stock_data",
+        "get_crypto_data",
+        "get_market_overview",
+        "get_technical_indicators",
+        "scan_technical_signals",
+        "get_options_chain",
+        "search_ticker",
+        "get_earnings_calendar",
+        "search_market_news",
+        "search_stored_news",
+        "get_latest_news",
+        "get_portfolio_summary",
+        "get_account_info",
+        "get_trade_history",
+        "run_parameter_sweep",
+    }
+)
+
+
+def _call_key(tool_name: str, tool_input: dict) -> str:
+    # Key order in the model's JSON is arbitrary; list order is meaningful.
+    canonical = json.dumps(tool_input, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{tool_name}:{canonical}"
+
+
+class _SingleFlight:
+    """Share one execution between concurrent identical calls.
+
+    The in-flight result is a ``concurrent.futures.Future`` rather than an
+    asyncio one, so callers on different event loops or threads (the
+    scheduler, chat sessions, the MCP bridge) all join the same flight.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future[str]] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    async def run(self, tool_name: str, key: str, call: Callable[[], Awaitable[str]]) -> str:
+        with self._lock:
+            counts = self._stats.setdefault(
+                tool_name, {"calls": 0, "executions": 0, "coalesced": 0}
+            )
+            counts["calls"] += 1
+            joined = self._inflight.get(key)
+            if joined is None:
+                flight: Future[str] = Future()
+                self._inflight[key] = flight
+                counts["executions"] += 1
+            else:
+                counts["coalesced"] += 1
+
+        if joined is not None:
+            try:
+                return await asyncio.wrap_future(joined)
+            except _LeaderCancelled:
+                return json.dumps({"error": "tool call was cancelled", "tool": tool_name})
+
+        try:
+            result = await call()
+        except BaseException:
+            flight.set_exception(_LeaderCancelled())
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "inflight": len(self._inflight),
+                "tools": {name: dict(counts) for name, counts in self._stats.items()},
+            }
+
+
+class _LeaderCancelled(Exception):
+    """The execution a coalesced call was waiting on did not finish."""
+
+
+_single_flight = _SingleFlight()
+
+
 # Synchronous tools mapped by name to a callable that receives the raw input dict.
 _SYNC_DISPATCH: dict[str, object] = {
     "get_stock_data": lambda inp: get_stock_data(**inp),
     "get_crypto_data": lambda inp: get_crypto_data(**inp),
     "get_market_overview": lambda _: get_market_overview(),
     "get_technical_indicators": lambda inp: get_technical_indicators(**inp),
+    "scan_technical_signals": lambda inp: scan_technical_signals(**inp),
     "get_options_chain": lambda inp: get_options_chain(**inp),
     "search_ticker": lambda inp: search_ticker(**inp),
     "get_earnings_calendar": lambda inp: get_earnings_calendar(**inp),
@@ -60,21 +293,46 @@ _SYNC_DISPATCH: dict[str, object] = {
     "get_trade_history": lambda inp: get_trade_history(
         broker=inp["broker"], days=inp.get("days", 30)
     ),
+    "run_parameter_sweep": lambda inp: run_parameter_sweep(**inp),
     "set_trading_mode": lambda inp: _set_trading_mode(inp["mode"]),
 }
 
+# The thread pool each synchronous tool runs in (see src/tools/tool_pools.py).
+# set_trading_mode only changes a setting, so it runs on the event loop.
+_TOOL_POOLS: dict[str, str] = {
+    "get_stock_data": "market_data",
+    "get_crypto_data": "market_data",
+    "get_market_overview": "market_data",
+    "get_technical_indicators": "market_data",
+    "scan_technical_signals": "market_data",
+    "get_options_chain": "market_data",
+    "search_ticker": "market_data",
+    "get_earnings_calendar": "market_data",
+    "search_market_news": "news",
+    "get_portfolio_summary": "brokers",
+    "get_account_info": "brokers",
+    "get_trade_history": "brokers",
+    "run_parameter_sweep": "cpu",
+}
+
 # Async tools that can't live in _SYNC_DISPATCH (they are awaited in _dispatch)
 _ASYNC_DISPATCH: dict[str, object] = {
     "search_stored_news": lambda inp: search_stored_news(**inp),
     "get_latest_news": lambda inp: get_latest_news(limit=inp.get("limit", 20)),
-    # run_simulation is CPU-bound but needs async DB persistence afterward
+    # run_simulation is queued as a job: a worker process backtests, then the DB write
     "run_simulation": lambda inp: _run_simulation_and_persist(inp),
+    "run_walk_forward": lambda inp: _run_walk_forward_and_persist(inp),
 }
 
 
 async def _dispatch(name: str, inp: dict) -> object:
     if name in _SYNC_DISPATCH:
-        return _SYNC_DISPATCH[name](inp)  # type: ignore[operator]
+        call = _SYNC_DISPATCH[name]
+        if name not in _TOOL_POOLS:
+            return call(inp)  # type: ignore[operator]
+        # Blocking I/O runs in its class's pool, off the event loop, which also lets
+        # identical calls overlap long enough to be coalesced.
+        return await get_tool_pool(_TOOL_POOLS[name]).run(call, inp)  # type: ignore[arg-type]
     if name in _ASYNC_DISPATCH:
         return await _ASYNC_DISPATCH[name](inp)  # type: ignore[operator]
     if name == "execute_trade":
@@ -82,7 +340,8 @@ async def _dispatch(name: str, inp: dict) -> object:
     if name == "confirm_trade":
         return await _confirm_trade(inp)
     if name == "cancel_order":
-        return _cancel_order(inp)
+        # Never abandoned on a timeout: the broker may still act on it.
+        return await get_tool_pool("brokers").run_to_completion(_cancel_order, inp)
     if name == "generate_report":
         return await _generate_report(inp)
     return {"error": f"Unknown tool: {name}"}
@@ -184,7 +443,10 @@ async def _execute_trade(inp: dict) -> dict:
             ),
         }
 
-    result = _route_order(broker, symbol, side, quantity, order_type, limit_price, stop_price)
+    # No timeout: an order abandoned mid-submission may still be placed, unrecorded.
+    result = await get_tool_pool("brokers").run_to_completion(
+        _route_order, broker, symbol, side, quantity, order_type, limit_price, stop_price
+    )
     result["reason"] = reason
 
     # Persist trade to DB
@@ -225,7 +487,10 @@ async def _confirm_trade(inp: dict) -> dict:
     stop_price = inp.get("stop_price")
     reason = inp.get("reason", "User confirmed recommendation")
 
-    result = _route_order(broker, symbol, side, quantity, order_type, limit_price, stop_price)
+    # No timeout: an order abandoned mid-submission may still be placed, unrecorded.
+    result = await get_tool_pool("brokers").run_to_completion(
+        _route_order, broker, symbol, side, quantity, order_type, limit_price, stop_price
+    )
     result["reason"] = reason
 
     try:
@@ -310,31 +575,32 @@ async def _generate_report(inp: dict) -> dict:
 
 
 async def _run_simulation_and_persist(inp: dict) -> dict:
-    """Run a backtest simulation and persist the result to the DB."""
-    result = run_simulation(**inp)
-    if "error" in result:
-        return result
-
-    try:
-        async with async_session() as session:
-            sim = SimulationResult(
-                name=result["name"],
-                strategy=result["strategy"],
-                initial_capital=result["initial_capital"],
-                final_value=result["final_value"],
-                total_return_pct=result.get("total_return_pct", 0.0),
-                sharpe_ratio=result.get("sharpe_ratio"),
-                max_drawdown_pct=result.get("max_drawdown_pct"),
-                trades_count=result["trades_count"],
-                period_start=result["period_start"],
-                period_end=result["period_end"],
-                equity_curve=result["equity_curve"],
-            )
-            session.add(sim)
-            await session.commit()
-            result["simulation_id"] = sim.id
-            logger.info("Simulation '%s' persisted (id=%s)", sim.name, sim.id)
-    except Exception as exc:
-        logger.warning("Failed to persist simulation result: %s", exc)
-
+    """Run a backtest as a background simulation job and wait for its result.
+
+    The backtest runs in a worker process and is persisted once it is back, so
+    the event loop stays free meanwhile. Its progress is reported to the
+    caller's ``stream_tool()``, if any.
+    """
+    jobs = get_simulation_jobs()
+    job = jobs.submit(inp)
+    sink = _progress_sink.get()
+    if sink is not None:
+        job.listeners.append(lambda j: sink(j.progress_update()))
+    await jobs.wait(job.id)
+    if job.status == "cancelled":
+        return {"error": f"Simulation job {job.id} was cancelled.", "job_id": job.id}
+    return {**(job.result or {"error": job.error}), "job_id": job.id}
+
+
+async def _run_walk_forward_and_persist(inp: dict) -> dict:
+    """Run a walk-forward optimisation and persist the out-of-sample result to the DB.
+
+    The daily out-of-sample curve is stored but left out of the tool result;
+    the weekly ``equity_curve`` is enough for the model.
+    """
+    # Many backtests: wait for them off the event loop.
+    result = await get_tool_pool("cpu").run(run_walk_forward, **inp)
+    if "error" not in result:
+        oos_curve = result.pop("oos_equity_curve")
+        await persist_simulation(result, oos_equity_curve=oos_curve)
     return result
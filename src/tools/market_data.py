@@ -2,14 +2,26 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor, wait
 import contextlib
-from datetime import UTC, datetime
+from datetime import UTC, datetime, time, timedelta
+from functools import partial
+import math
+import operator
+from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
-import ta
 import yfinance as yf
 
 from src.agent.utils.logger import get_logger
+from src.cache import get_cache
+from src.config import settings
+from src.market import vectorized as vec
+from src.market.bar_store import get_bar_store
+from src.market.options_pricing import greeks, implied_volatility
+from src.market.streaming import get_indicator_engine
+from src.market.symbol_index import get_symbol_index
 
 logger = get_logger(__name__)
 
@@ -37,17 +49,100 @@ def _df_to_records(df: pd.DataFrame, max_rows: int = 90) -> list[dict]:
     return records
 
 
+# yfinance has no bulk ``info`` endpoint, so quote/fundamental lookups are fanned
+# out over a small bounded pool instead of being fetched one symbol at a time.
+# Sized so the default market overview completes in a single wave.
+_FETCH_WORKERS = 16
+_fetch_pool = ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix="yf-fetch")
+
+
+def _split_download(data: pd.DataFrame | None, symbols: list[str]) -> dict[str, pd.DataFrame]:
+    """Split a multi-ticker ``yf.download`` frame into one OHLCV frame per symbol."""
+    if data is None or data.empty:
+        return {sym: pd.DataFrame() for sym in symbols}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data.dropna(subset=["Close"])}
+    available = set(data.columns.get_level_values(0))
+    return {
+        sym: data[sym].dropna(subset=["Close"]) if sym in available else pd.DataFrame()
+        for sym in symbols
+    }
+
+
+def _download_ohlcv(symbols: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+    """Fetch OHLCV for all symbols in a single multi-ticker request."""
+    data = yf.download(
+        symbols,
+        period=period,
+        interval=interval,
+        group_by="ticker",
+        auto_adjust=True,
+        actions=False,
+        threads=True,
+        progress=False,
+    )
+    return _split_download(data, symbols)
+
+
+# ``Ticker.info`` keys that change intraday; cached under the short "quote" TTL.
+_QUOTE_FIELDS = ("currentPrice", "regularMarketPrice", "regularMarketPreviousClose")
+
+
+def _refresh_info(symbol: str) -> dict:
+    """Fetch ``Ticker.info``, store it as fundamentals and return the quote fields."""
+    info = yf.Ticker(symbol).info or {}
+    get_cache().set("fundamentals", symbol, info)
+    return {k: info.get(k) for k in _QUOTE_FIELDS}
+
+
+def get_ticker_info(symbol: str) -> dict:
+    """``Ticker.info`` through the shared cache.
+
+    Price fields are at most ``cache_quote_ttl_seconds`` old; everything else
+    at most ``cache_fundamentals_ttl_seconds``. A quote refresh also refreshes
+    the fundamentals, so a cold lookup costs a single request.
+    """
+    cache = get_cache()
+    quote = cache.get_or_fetch("quote", symbol, lambda: _refresh_info(symbol))
+    fundamentals = cache.get_or_fetch("fundamentals", symbol, lambda: yf.Ticker(symbol).info or {})
+    return {**fundamentals, **quote}
+
+
+def _fetch_infos(symbols: list[str]) -> dict[str, dict | Exception]:
+    """Fetch ``Ticker.info`` for every symbol concurrently; failures are returned, not raised."""
+    futures = {sym: _fetch_pool.submit(get_ticker_info, sym) for sym in symbols}
+    infos: dict[str, dict | Exception] = {}
+    for sym, fut in futures.items():
+        try:
+            infos[sym] = fut.result()
+        except Exception as exc:
+            infos[sym] = exc
+    return infos
+
+
 def get_stock_data(
     symbols: list[str],
     period: str = "1mo",
     interval: str = "1d",
 ) -> dict:
     result: dict[str, object] = {}
-    for sym in symbols:
+    unique = list(dict.fromkeys(symbols))
+    if not unique:
+        return result
+    try:
+        frames = _download_ohlcv(unique, period, interval)
+    except Exception as exc:
+        logger.warning("Batch download failed for %s: %s", unique, exc)
+        return {sym: {"error": str(exc)} for sym in unique}
+
+    infos = _fetch_infos(unique)
+    for sym in unique:
+        info = infos[sym]
+        if isinstance(info, Exception):
+            logger.warning("Failed to fetch %s: %s", sym, info)
+            result[sym] = {"error": str(info)}
+            continue
         try:
-            ticker = yf.Ticker(sym)
-            df = ticker.history(period=period, interval=interval)
-            info = ticker.info or {}
             result[sym] = {
                 "company_name": info.get("longName", sym),
                 "current_price": info.get("currentPrice") or info.get("regularMarketPrice"),
@@ -55,7 +150,7 @@ def get_stock_data(
                 "pe_ratio": info.get("trailingPE"),
                 "52w_high": info.get("fiftyTwoWeekHigh"),
                 "52w_low": info.get("fiftyTwoWeekLow"),
-                "candles": _df_to_records(df),
+                "candles": _df_to_records(frames.get(sym, pd.DataFrame())),
             }
         except Exception as exc:
             logger.warning("Failed to fetch %s: %s", sym, exc)
@@ -72,43 +167,53 @@ def get_crypto_data(
     return get_stock_data(symbols, period=period, interval=interval)
 
 
-def get_market_overview() -> dict:
-    """Snapshot of major indices, VIX, bonds, commodities."""
-    tickers = {
-        "S&P 500": "^GSPC",
-        "NASDAQ 100": "^NDX",
-        "Dow Jones": "^DJI",
-        "Russell 2000": "^RUT",
-        "VIX (Fear Index)": "^VIX",
-        "10Y Treasury Yield": "^TNX",
-        "2Y Treasury Yield": "^IRX",
-        "Gold": "GC=F",
-        "Crude Oil (WTI)": "CL=F",
-        "Bitcoin": "BTC-USD",
-        "Ethereum": "ETH-USD",
-        "Dollar Index": "DX-Y.NYB",
-    }
-    result: dict[str, object] = {
-        "timestamp": datetime.now(UTC).isoformat(),
-        "markets": {},
-    }
-    for name, sym in tickers.items():
+def _overview_entry(symbol: str, info: dict) -> dict:
+    price = info.get("regularMarketPrice") or info.get("currentPrice")
+    prev_close = info.get("regularMarketPreviousClose")
+    change_pct = None
+    if price and prev_close and prev_close != 0:
+        change_pct = round((price - prev_close) / prev_close * 100, 2)
+    return {"symbol": symbol, "price": price, "change_pct": change_pct}
+
+
+def get_market_overview(
+    instruments: dict[str, str] | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """Snapshot of major indices, VIX, bonds, commodities.
+
+    Every instrument is fetched concurrently. Instruments that have not answered
+    within *timeout* seconds are reported as timed out and ``partial`` is set;
+    their fetches keep running and warm the cache for the next snapshot.
+    """
+    if instruments is None:
+        instruments = settings.market_overview_instruments_map
+    if timeout is None:
+        timeout = settings.market_overview_timeout_seconds
+
+    futures = {name: _fetch_pool.submit(get_ticker_info, sym) for name, sym in instruments.items()}
+    wait(futures.values(), timeout=timeout)
+
+    markets: dict[str, dict] = {}
+    timed_out: list[str] = []
+    for name, fut in futures.items():
+        sym = instruments[name]
+        if not fut.done():
+            timed_out.append(name)
+            markets[name] = {"symbol": sym, "error": f"timed out after {timeout:g}s"}
+            continue
         try:
-            ticker = yf.Ticker(sym)
-            info = ticker.info or {}
-            price = info.get("regularMarketPrice") or info.get("currentPrice")
-            prev_close = info.get("regularMarketPreviousClose")
-            change_pct = None
-            if price and prev_close and prev_close != 0:
-                change_pct = round((price - prev_close) / prev_close * 100, 2)
-            result["markets"][name] = {
-                "symbol": sym,
-                "price": price,
-                "change_pct": change_pct,
-            }
+            markets[name] = _overview_entry(sym, fut.result())
         except Exception as exc:
-            result["markets"][name] = {"error": str(exc)}
-    return result
+            markets[name] = {"symbol": sym, "error": str(exc)}
+
+    if timed_out:
+        logger.warning("Market overview returned without %s", ", ".join(timed_out))
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "markets": markets,
+        "partial": bool(timed_out),
+    }
 
 
 # ── Technical Indicators ───────────────────────────────────────────────────────
@@ -143,87 +248,80 @@ def _build_signals(
     return signals
 
 
-def get_technical_indicators(symbol: str, period: str = "6mo") -> dict:
-    """Calculate RSI, MACD, Bollinger Bands, EMA 20/50/200, ATR, OBV."""
-    try:
-        df = yf.Ticker(symbol).history(period=period, interval="1d")
-        if df.empty or len(df) < 20:
-            return {"error": f"Insufficient data for {symbol}"}
+_PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
 
-        close = df["Close"]
-        high = df["High"]
-        low = df["Low"]
-        volume = df["Volume"]
-
-        # RSI (14)
-        rsi_indicator = ta.momentum.RSIIndicator(close=close, window=14)
-        rsi = rsi_indicator.rsi().iloc[-1]
-
-        # MACD
-        macd_ind = ta.trend.MACD(close=close)
-        macd_val = macd_ind.macd().iloc[-1]
-        macd_signal = macd_ind.macd_signal().iloc[-1]
-        macd_hist = macd_ind.macd_diff().iloc[-1]
-
-        # Bollinger Bands (20, 2σ)
-        bb = ta.volatility.BollingerBands(close=close, window=20, window_dev=2)
-        bb_upper = bb.bollinger_hband().iloc[-1]
-        bb_middle = bb.bollinger_mavg().iloc[-1]
-        bb_lower = bb.bollinger_lband().iloc[-1]
-
-        # EMAs
-        ema20 = ta.trend.EMAIndicator(close=close, window=20).ema_indicator().iloc[-1]
-        ema50 = ta.trend.EMAIndicator(close=close, window=50).ema_indicator().iloc[-1]
-        ema200 = (
-            ta.trend.EMAIndicator(close=close, window=200).ema_indicator().iloc[-1]
-            if len(df) >= 200
-            else None
-        )
 
-        # ATR (14)
-        atr = (
-            ta.volatility.AverageTrueRange(high=high, low=low, close=close, window=14)
-            .average_true_range()
-            .iloc[-1]
-        )
+def _period_start(period: str) -> str | None:
+    """Translate a yfinance period string to a start date (None = full history)."""
+    today = datetime.now(UTC).date()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return f"{today.year}-01-01"
+    if period not in _PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return (today - timedelta(days=_PERIOD_DAYS[period])).isoformat()
 
-        # OBV
-        obv = (
-            ta.volume.OnBalanceVolumeIndicator(close=close, volume=volume)
-            .on_balance_volume()
-            .iloc[-1]
-        )
 
-        current_price = float(close.iloc[-1])
+def get_technical_indicators(symbol: str, period: str = "6mo") -> dict:
+    """Calculate RSI, MACD, Bollinger Bands, EMA 20/50/200, ATR, OBV.
+
+    Values come from the incremental indicator engine, over all stored bars:
+    *period* is the least history to fetch, and later calls, for any period,
+    only fold in new bars.
+    """
+    try:
+        v = get_indicator_engine().latest(symbol, "1d", start=_period_start(period))
+        if v["bars"] < 20:
+            return {"error": f"Insufficient data for {symbol}"}
+
+        current_price = float(v["close"])
 
-        def _r(v: float | None, digits: int = 4) -> float | None:
-            return round(float(v), digits) if v is not None and v == v else None
+        def _r(x: float | None, digits: int = 4) -> float | None:
+            return round(float(x), digits) if x is not None and x == x else None
 
+        nan = float("nan")
         signals = _build_signals(
-            rsi, macd_val, macd_signal, current_price, ema200, bb_upper, bb_lower
+            v["rsi_14"] if v["rsi_14"] is not None else nan,
+            v["macd"] if v["macd"] is not None else nan,
+            v["macd_signal"] if v["macd_signal"] is not None else nan,
+            current_price,
+            v["ema_200"],
+            v["bb_upper"],
+            v["bb_lower"],
         )
 
         return {
             "symbol": symbol,
             "current_price": _r(current_price),
-            "rsi_14": _r(rsi, 2),
+            "rsi_14": _r(v["rsi_14"], 2),
             "macd": {
-                "macd": _r(macd_val),
-                "signal": _r(macd_signal),
-                "histogram": _r(macd_hist),
+                "macd": _r(v["macd"]),
+                "signal": _r(v["macd_signal"]),
+                "histogram": _r(v["macd_hist"]),
             },
             "bollinger_bands": {
-                "upper": _r(bb_upper),
-                "middle": _r(bb_middle),
-                "lower": _r(bb_lower),
+                "upper": _r(v["bb_upper"]),
+                "middle": _r(v["bb_middle"]),
+                "lower": _r(v["bb_lower"]),
             },
             "ema": {
-                "ema_20": _r(ema20),
-                "ema_50": _r(ema50),
-                "ema_200": _r(ema200),
+                "ema_20": _r(v["ema_20"]),
+                "ema_50": _r(v["ema_50"]),
+                "ema_200": _r(v["ema_200"]),
             },
-            "atr_14": _r(atr),
-            "obv": _r(obv, 0),
+            "atr_14": _r(v["atr_14"]),
+            "obv": _r(v["obv"], 0),
             "signals": signals,
         }
     except Exception as exc:
@@ -231,6 +329,160 @@ def get_technical_indicators(symbol: str, period: str = "6mo") -> dict:
         return {"error": str(exc)}
 
 
+# ── Universe Scan ──────────────────────────────────────────────────────────────
+
+SCAN_UNIVERSES: dict[str, list[str]] = {
+    "mega_caps": [
+        "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "BRK-B", "AVGO", "JPM",
+        "LLY", "V", "UNH", "XOM", "MA", "COST", "HD", "PG", "JNJ", "NFLX",
+    ],
+    "index_etfs": ["SPY", "QQQ", "DIA", "IWM"],
+    "sector_etfs": [
+        "XLK", "XLF", "XLE", "XLV", "XLI", "XLY", "XLP", "XLU", "XLB", "XLRE", "XLC",
+    ],
+    "crypto": [
+        "BTC-USD", "ETH-USD", "SOL-USD", "BNB-USD", "XRP-USD", "ADA-USD", "DOGE-USD", "AVAX-USD",
+    ],
+}  # fmt: skip
+SCAN_UNIVERSES["major"] = (
+    SCAN_UNIVERSES["mega_caps"] + SCAN_UNIVERSES["index_etfs"] + SCAN_UNIVERSES["crypto"]
+)
+
+_SCAN_FIELDS = (
+    "close",
+    "change_pct",
+    "rsi_14",
+    "macd",
+    "macd_signal",
+    "macd_hist",
+    "bb_upper",
+    "bb_middle",
+    "bb_lower",
+    "ema_20",
+    "ema_50",
+    "ema_200",
+    "atr_14",
+    "obv",
+)
+_SCAN_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+_SCAN_MIN_BARS = 20
+# Rounding per field in scan results (default 4 digits).
+_SCAN_DIGITS = {"change_pct": 2, "rsi_14": 2, "obv": 0}
+
+
+def _scan_matrix(frames: dict[str, pd.DataFrame]) -> tuple[list[str], dict[str, np.ndarray]]:
+    """Latest value of every scan field for every symbol, computed across the whole matrix."""
+    symbols, m = vec.frames_to_matrices(frames)
+    close, high, low = m["close"], m["high"], m["low"]
+    macd_line, macd_sig, macd_hist = vec.macd(close)
+    bb_upper, bb_middle, bb_lower = vec.bollinger(close)
+    prev_close = close[:, -2] if close.shape[1] >= 2 else np.full(len(symbols), np.nan)
+    last_close = vec.latest(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = (last_close - prev_close) / prev_close * 100
+    fields = {
+        "close": last_close,
+        "change_pct": change_pct,
+        "rsi_14": vec.latest(vec.rsi(close)),
+        "macd": vec.latest(macd_line),
+        "macd_signal": vec.latest(macd_sig),
+        "macd_hist": vec.latest(macd_hist),
+        "bb_upper": vec.latest(bb_upper),
+        "bb_middle": vec.latest(bb_middle),
+        "bb_lower": vec.latest(bb_lower),
+        "ema_20": vec.latest(vec.ema(close, 20)),
+        "ema_50": vec.latest(vec.ema(close, 50)),
+        "ema_200": vec.latest(vec.ema(close, 200)),
+        "atr_14": vec.latest(vec.atr(high, low, close)),
+        "obv": vec.latest(vec.obv(close, m["volume"])),
+    }
+    return symbols, fields
+
+
+def scan_technical_signals(
+    universe: str = "major",
+    symbols: list[str] | None = None,
+    filters: list[dict] | None = None,
+    period: str = "1y",
+    max_results: int = 25,
+) -> dict:
+    """Compute the indicator set for a whole universe at once and return matching symbols.
+
+    *filters* are ANDed ``{"field", "op", "value"}`` conditions, where *value*
+    is a number or another field name (e.g. ``close > ema_200``). Explicit
+    *symbols* take precedence over the preset *universe*. Like
+    ``get_technical_indicators``, indicators run over all stored bars, with
+    at least *period* of history fetched.
+    """
+    if symbols:
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        universe_name = "custom"
+    elif universe in SCAN_UNIVERSES:
+        symbols = SCAN_UNIVERSES[universe]
+        universe_name = universe
+    else:
+        return {"error": f"Unknown universe: {universe}", "universes": list(SCAN_UNIVERSES)}
+    filters = filters or []
+    for f in filters:
+        value = f.get("value")
+        if f.get("field") not in _SCAN_FIELDS or f.get("op") not in _SCAN_OPS:
+            return {"error": f"Invalid filter: {f}", "fields": list(_SCAN_FIELDS)}
+        if isinstance(value, str) and value not in _SCAN_FIELDS:
+            return {"error": f"Invalid filter value: {f}", "fields": list(_SCAN_FIELDS)}
+
+    try:
+        store = get_bar_store()
+        frames = store.get_many(symbols, "1d", start=_period_start(period))
+        frames = {sym: store.read(sym, "1d") if len(df) else df for sym, df in frames.items()}
+    except Exception as exc:
+        logger.exception("Technical scan failed for %s", universe_name)
+        return {"error": str(exc)}
+    skipped = {sym: "insufficient data" for sym, df in frames.items() if len(df) < _SCAN_MIN_BARS}
+    usable = {sym: df for sym, df in frames.items() if sym not in skipped}
+
+    matches: list[dict] = []
+    if usable:
+        names, fields = _scan_matrix(usable)
+        mask = np.ones(len(names), dtype=bool)
+        for f in filters:
+            rhs = fields[f["value"]] if isinstance(f["value"], str) else float(f["value"])
+            mask &= _SCAN_OPS[f["op"]](fields[f["field"]], rhs)
+
+        def _r(x: float, digits: int = 4) -> float | None:
+            return round(float(x), digits) if x == x else None
+
+        for i in np.flatnonzero(mask)[:max_results]:
+            row = {name: values[i] for name, values in fields.items()}
+            ema200 = row["ema_200"] if row["ema_200"] == row["ema_200"] else None
+            matches.append(
+                {
+                    "symbol": names[i],
+                    **{name: _r(v, _SCAN_DIGITS.get(name, 4)) for name, v in row.items()},
+                    "signals": _build_signals(
+                        row["rsi_14"],
+                        row["macd"],
+                        row["macd_signal"],
+                        row["close"],
+                        ema200,
+                        row["bb_upper"],
+                        row["bb_lower"],
+                    ),
+                }
+            )
+        matched = int(mask.sum())
+    else:
+        matched = 0
+
+    return {
+        "universe": universe_name,
+        "scanned": len(usable),
+        "matched": matched,
+        "filters": filters,
+        "results": matches,
+        "skipped": skipped,
+    }
+
+
 # ── Options Chain ──────────────────────────────────────────────────────────────
 
 _OPT_COLUMNS = [
@@ -242,13 +494,95 @@ _OPT_COLUMNS = [
     "openInterest",
     "delta",
     "gamma",
+    "theta",
+    "vega",
+    "rho",
 ]
 
+# 13-week T-bill yield, quoted in percent; also shown in the market overview.
+_RISK_FREE_SYMBOL = "^IRX"
+# Used when the T-bill quote is unavailable.
+_FALLBACK_RISK_FREE_RATE = 0.04
+# US equity options stop trading at 16:00 New York time on expiry day.
+_EXPIRY_CLOSE = time(16, 0)
+_EXCHANGE_TZ = ZoneInfo("America/New_York")
+
+
+def get_risk_free_rate() -> float:
+    """Continuously-compounded risk-free rate from the cached ``^IRX`` quote."""
+    try:
+        info = get_ticker_info(_RISK_FREE_SYMBOL)
+        pct = info.get("regularMarketPrice") or info.get("regularMarketPreviousClose")
+        if isinstance(pct, int | float) and pct >= 0:
+            return math.log1p(pct / 100.0)
+    except Exception as exc:
+        logger.warning("Risk-free rate lookup failed: %s", exc)
+    return _FALLBACK_RISK_FREE_RATE
+
 
-def _option_rows(df: pd.DataFrame) -> list[dict]:
+def _underlying_price(symbol: str) -> float | None:
+    """Spot price for greeks; None (greeks omitted) if the quote is unavailable."""
+    try:
+        info = get_ticker_info(symbol)
+    except Exception as exc:
+        logger.warning("Quote for %s unavailable, skipping greeks: %s", symbol, exc)
+        return None
+    spot = info.get("regularMarketPrice") or info.get("currentPrice")
+    return float(spot) if isinstance(spot, int | float) and spot > 0 else None
+
+
+def _years_to_expiry(expiry: str, now: datetime | None = None) -> float:
+    """Time from *now* to the expiry-day close, in years (floored at one hour)."""
+    close = datetime.combine(datetime.fromisoformat(expiry).date(), _EXPIRY_CLOSE, _EXCHANGE_TZ)
+    seconds = (close - (now or datetime.now(UTC))).total_seconds()
+    return max(seconds, 3600.0) / (365.0 * 86400.0)
+
+
+def _with_greeks(
+    df: pd.DataFrame, spot: float | None, t: float, rate: float, is_call: bool
+) -> pd.DataFrame:
+    """Add solved implied volatility and greeks for every row of a chain side.
+
+    IV is solved from the bid/ask mid (last price when there is no two-sided
+    quote); where that fails Yahoo's own ``impliedVolatility`` is kept.
+    """
+    if df.empty or not spot or "strike" not in df.columns:
+        return df
+    strike = df["strike"].to_numpy(dtype="float64")
+    bid = df["bid"].to_numpy(dtype="float64") if "bid" in df.columns else np.zeros(len(df))
+    ask = df["ask"].to_numpy(dtype="float64") if "ask" in df.columns else np.zeros(len(df))
+    last = (
+        df["lastPrice"].to_numpy(dtype="float64")
+        if "lastPrice" in df.columns
+        else np.full(len(df), np.nan)
+    )
+    price = np.where((bid > 0) & (ask > 0), (bid + ask) / 2.0, last)
+    iv = implied_volatility(price, spot, strike, t, rate, is_call)
+    if "impliedVolatility" in df.columns:
+        quoted = df["impliedVolatility"].to_numpy(dtype="float64")
+        iv = np.where(np.isnan(iv) & (quoted > 0), quoted, iv)
+    return df.assign(impliedVolatility=iv, **greeks(spot, strike, t, rate, iv, is_call))
+
+
+def _option_rows(
+    df: pd.DataFrame,
+    spot: float | None = None,
+    moneyness: float | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """Pick the *limit* strikes closest to *spot* within ``±moneyness``, sorted by strike.
+
+    Without a spot price the first *limit* rows by strike are returned.
+    """
     if df.empty:
         return []
-    return df[_OPT_COLUMNS].head(20).to_dict("records")
+    if spot and "strike" in df.columns:
+        distance = (df["strike"] / spot - 1.0).abs()
+        if moneyness is not None:
+            df = df[distance <= moneyness + 1e-9]  # keep strikes exactly on the bound
+            distance = distance[df.index]
+        df = df.loc[distance.nsmallest(limit).index].sort_values("strike")
+    return df[[c for c in _OPT_COLUMNS if c in df.columns]].head(limit).to_dict("records")
 
 
 def _clean_option_list(lst: list[dict]) -> list[dict]:
@@ -263,11 +597,60 @@ def _clean_option_list(lst: list[dict]) -> list[dict]:
     return lst
 
 
-def get_options_chain(symbol: str, expiry: str | None = None) -> dict:
-    """Fetch options chain for a stock symbol."""
+# Raw chain columns kept in the cache; IV and greeks are recomputed per call.
+_CHAIN_COLUMNS = ["strike", "bid", "ask", "lastPrice", "impliedVolatility", "openInterest"]
+_MARKET_OPEN = time(9, 30)
+
+
+def _us_market_open(now: datetime | None = None) -> bool:
+    """Regular US equity session, Mon–Fri 09:30–16:00 New York time (holidays ignored)."""
+    local = (now or datetime.now(UTC)).astimezone(_EXCHANGE_TZ)
+    return local.weekday() < 5 and _MARKET_OPEN <= local.time() < _EXPIRY_CLOSE
+
+
+def _options_ttl() -> int:
+    if _us_market_open():
+        return settings.cache_options_ttl_seconds
+    return settings.cache_options_closed_ttl_seconds
+
+
+def _fetch_expiries(symbol: str) -> list[str]:
+    return list(yf.Ticker(symbol).options or [])
+
+
+def _fetch_chain(symbol: str, expiry: str) -> dict[str, list[dict]]:
+    """One expiry's calls and puts as JSON-safe records, for the shared cache."""
+    opt = yf.Ticker(symbol).option_chain(expiry)
+    return {
+        side: df[[c for c in _CHAIN_COLUMNS if c in df.columns]]
+        .astype("float64")
+        .to_dict("records")
+        for side, df in (("calls", opt.calls), ("puts", opt.puts))
+    }
+
+
+def _cached_chain(symbol: str, expiry: str) -> dict[str, list[dict]]:
+    return get_cache().get_or_fetch(
+        "options", f"{symbol}:{expiry}", lambda: _fetch_chain(symbol, expiry), ttl=_options_ttl()
+    )
+
+
+def get_options_chain(
+    symbol: str,
+    expiry: str | None = None,
+    moneyness: float = 0.15,
+    max_strikes: int = 20,
+) -> dict:
+    """Fetch options chain for a stock symbol, with locally computed IV and greeks.
+
+    Expiries are fetched concurrently and cached per ``(symbol, expiry)``;
+    only strikes within ``±moneyness`` of spot are returned, nearest first.
+    """
     try:
-        ticker = yf.Ticker(symbol)
-        exps = ticker.options  # available expiry dates
+        symbol = symbol.upper()
+        exps = get_cache().get_or_fetch(
+            "options", f"{symbol}:expiries", lambda: _fetch_expiries(symbol), ttl=_options_ttl()
+        )
         if not exps:
             return {"error": f"No options available for {symbol}"}
 
@@ -276,13 +659,30 @@ def get_options_chain(symbol: str, expiry: str | None = None) -> dict:
         else:
             target_exps = list(exps[:3])  # next 3 expiries
 
-        result: dict[str, object] = {"symbol": symbol, "expiries": {}}
-        for exp in target_exps:
-            opt = ticker.option_chain(exp)
-            result["expiries"][exp] = {
-                "calls": _clean_option_list(_option_rows(opt.calls)),
-                "puts": _clean_option_list(_option_rows(opt.puts)),
-            }
+        futures = {exp: _fetch_pool.submit(_cached_chain, symbol, exp) for exp in target_exps}
+        spot = _underlying_price(symbol)
+        rate = get_risk_free_rate()
+        result: dict[str, object] = {
+            "symbol": symbol,
+            "underlying_price": spot,
+            "risk_free_rate": round(rate, 5),
+            "moneyness": moneyness if spot else None,
+            "expiries": {},
+        }
+        for exp, fut in futures.items():
+            try:
+                chain = fut.result()
+            except Exception as exc:
+                logger.warning("Options chain %s %s failed: %s", symbol, exp, exc)
+                result["expiries"][exp] = {"error": str(exc)}
+                continue
+            t = _years_to_expiry(exp)
+            sides = {}
+            for side, is_call in (("calls", True), ("puts", False)):
+                df = pd.DataFrame.from_records(chain[side]).astype("float64")
+                df = _with_greeks(df, spot, t, rate, is_call)
+                sides[side] = _clean_option_list(_option_rows(df, spot, moneyness, max_strikes))
+            result["expiries"][exp] = {"days_to_expiry": round(t * 365, 2), **sides}
         return result
     except Exception as exc:
         logger.exception("Options chain failed for %s", symbol)
@@ -292,14 +692,28 @@ def get_options_chain(symbol: str, expiry: str | None = None) -> dict:
 # ── Ticker Search ──────────────────────────────────────────────────────────────
 
 
+_SEARCH_RESULTS = 10
+
+
 def search_ticker(query: str) -> dict:
-    """Search Yahoo Finance for matching ticker symbols."""
+    """Resolve a company name or keyword to ticker symbols.
+
+    The offline symbol index answers most queries; Yahoo Finance search is only
+    called when the index has no match.
+    """
+    matches = get_symbol_index().search(query, limit=_SEARCH_RESULTS)
+    if matches:
+        return {
+            "query": query,
+            "source": "index",
+            "results": [entry.to_dict() for entry in matches],
+        }
     try:
-        # yfinance doesn't have a search API; use a simple approach
-        results = yf.Search(query, max_results=10)
+        results = yf.Search(query, max_results=_SEARCH_RESULTS)
         quotes = results.quotes if hasattr(results, "quotes") else []
         return {
             "query": query,
+            "source": "yahoo",
             "results": [
                 {
                     "symbol": q.get("symbol"),
@@ -317,6 +731,22 @@ def search_ticker(query: str) -> dict:
 # ── Earnings Calendar ──────────────────────────────────────────────────────────
 
 
+def _fetch_calendar(symbol: str) -> list[dict]:
+    cal = yf.Ticker(symbol).calendar
+    if cal is None or cal.empty:
+        return []
+    return [
+        {
+            "symbol": symbol,
+            "date": str(col),
+            "earnings_date": str(cal[col].get("Earnings Date", "")),
+            "eps_estimate": cal[col].get("EPS Estimate"),
+            "revenue_estimate": cal[col].get("Revenue Estimate"),
+        }
+        for col in cal.columns
+    ]
+
+
 def get_earnings_calendar(days_ahead: int = 7, symbols: list[str] | None = None) -> dict:
     """Return upcoming earnings via yfinance (best-effort)."""
     result: dict[str, object] = {"days_ahead": days_ahead, "earnings": []}
@@ -329,18 +759,8 @@ def get_earnings_calendar(days_ahead: int = 7, symbols: list[str] | None = None)
         )
     for sym in targets:
         try:
-            cal = yf.Ticker(sym).calendar
-            if cal is not None and not cal.empty:
-                for col in cal.columns:
-                    result["earnings"].append(
-                        {
-                            "symbol": sym,
-                            "date": str(col),
-                            "earnings_date": str(cal[col].get("Earnings Date", "")),
-                            "eps_estimate": cal[col].get("EPS Estimate"),
-                            "revenue_estimate": cal[col].get("Revenue Estimate"),
-                        }
-                    )
+            entries = get_cache().get_or_fetch("calendar", sym, partial(_fetch_calendar, sym))
+            result["earnings"].extend(entries)  # type: ignore[attr-defined]
         except Exception as exc:
             result["earnings"].append({"symbol": sym, "error": str(exc)})  # type: ignore[attr-defined]
     return result
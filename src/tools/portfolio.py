@@ -2,8 +2,6 @@
 
 from __future__ import annotations
 
-import yfinance as yf
-
 from src.agent.utils.logger import get_logger
 from src.tools.brokers import (
     alpaca as alpaca_tool,
@@ -11,6 +9,7 @@ from src.tools.brokers import (
     coinbase,
     ibkr as ibkr_tool,
 )
+from src.tools.market_data import get_ticker_info
 
 logger = get_logger(__name__)
 
@@ -21,8 +20,7 @@ def _enrich_position(pos: dict, symbol_key: str = "symbol") -> dict:
     if not sym or pos.get("current_price"):
         return pos
     try:
-        ticker = yf.Ticker(sym)
-        info = ticker.info or {}
+        info = get_ticker_info(sym)
         pos["current_price"] = info.get("regularMarketPrice") or info.get("currentPrice")
     except Exception:
         pass
@@ -0,0 +1,415 @@
+"""Background simulation jobs.
+
+A backtest is CPU-bound for seconds at a time, so ``run_simulation`` never
+runs on the event loop. Each request becomes a job with an ID that moves
+through a few stages:
+
+    queued → downloading → running → persisting → done
+
+and ends up ``failed`` or ``cancelled`` instead when things go wrong. Prices
+are loaded in a thread (bar-store I/O), the backtest runs on the simulation
+worker pool with the prices in shared memory, and the result is written to
+``simulation_results`` back on the event loop only once it has arrived. An
+intraday (``1m``/``5m``) job only syncs the bar store in the thread; its
+worker streams the minute bars from the memory-mapped files itself.
+
+Results are memoized by input fingerprint. A request for a historical
+period whose fingerprint matches a stored row is answered from that row
+without loading prices; a period running to today is fingerprinted with the
+last bar of each symbol once prices are loaded, so it is only recomputed
+after new bars have arrived.
+
+While the backtest runs, the worker reports how far it has got and the
+equity curve so far, which the job keeps as ``as_of`` and ``partial_curve``.
+Listeners added to a job are called on every stage change and progress
+report; the ``run_simulation`` tool uses one to stream ``tool_progress``
+events to the chat.
+
+Jobs can be listed, polled and cancelled through the REST API; the
+``run_simulation`` tool submits a job and waits for it. A job cancelled
+while its backtest is already executing in a worker lets the worker finish
+but drops the result, and nothing is persisted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import partial
+import hashlib
+import json
+import uuid
+
+import pandas as pd
+from sqlalchemy import select
+
+from src.agent.utils.logger import get_logger
+from src.db.database import async_session
+from src.db.models import SimulationResult
+from src.simulation.workers import run_in_pool, run_shared
+from src.tools.simulator import (
+    load_intraday,
+    load_prices,
+    simulate,
+    simulate_intraday,
+    weekly_curve,
+)
+
+logger = get_logger(__name__)
+
+# Rough share of a job's work done when each stage starts.
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "downloading": 0.05,
+    "running": 0.25,
+    "persisting": 0.95,
+    "done": 1.0,
+    "failed": 1.0,
+    "cancelled": 1.0,
+}
+FINISHED = frozenset({"done", "failed", "cancelled"})
+# Finished jobs kept for polling; older ones are forgotten.
+MAX_FINISHED_JOBS = 100
+# Bump when an engine change alters results, so rows computed before it stop matching.
+FINGERPRINT_VERSION = 5
+# Result fields stored in their own simulation_results column; the rest go in ``details``.
+_COLUMN_FIELDS = frozenset(
+    {
+        "name",
+        "strategy",
+        "initial_capital",
+        "final_value",
+        "total_return_pct",
+        "sharpe_ratio",
+        "max_drawdown_pct",
+        "trades_count",
+        "period_start",
+        "period_end",
+        "equity_curve",
+    }
+)
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+@dataclass
+class SimulationJob:
+    """One queued or finished ``run_simulation`` request."""
+
+    request: dict
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "queued"
+    created_at: datetime = field(default_factory=_now)
+    finished_at: datetime | None = None
+    result: dict | None = None
+    error: str | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+    # Share of the backtest done, and the date and weekly equity curve it has reached.
+    fraction: float = 0.0
+    as_of: str | None = None
+    partial_curve: list[dict] = field(default_factory=list, repr=False)
+    listeners: list[Callable[[SimulationJob], None]] = field(default_factory=list, repr=False)
+
+    @property
+    def progress(self) -> float:
+        start = STAGE_PROGRESS[self.status]
+        if self.status == "running":
+            return start + (STAGE_PROGRESS["persisting"] - start) * self.fraction
+        return start
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "name": self.request.get("name"),
+            "status": self.status,
+            "progress": self.progress,
+            "as_of": self.as_of,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+    def progress_update(self) -> dict:
+        """Where the job has got to, as sent in ``tool_progress`` events."""
+        return {
+            "job_id": self.id,
+            "stage": self.status,
+            "percent": round(self.progress * 100, 1),
+            "date": self.as_of,
+            "equity_curve": self.partial_curve,
+        }
+
+
+class SimulationJobs:
+    """Registry and runner of simulation jobs for the current process."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, SimulationJob] = {}
+
+    def submit(self, request: dict) -> SimulationJob:
+        """Queue a ``run_simulation`` request; it starts as soon as the loop gets to it."""
+        job = SimulationJob(request=dict(request))
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job), name=f"simulation-{job.id}")
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> SimulationJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[SimulationJob]:
+        """All known jobs, newest first."""
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not finished; False if it is unknown or already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        if job.status == "queued":
+            # The task never started, so it cannot record its own cancellation.
+            self._finish(job, "cancelled", error="Simulation job was cancelled")
+        return True
+
+    async def wait(self, job_id: str) -> SimulationJob:
+        """Wait for a job to finish. Cancelling the waiter does not cancel the job."""
+        job = self._jobs[job_id]
+        if job.task is not None and not job.finished:
+            try:
+                await asyncio.shield(job.task)
+            except asyncio.CancelledError:
+                if not job.task.cancelled():
+                    raise  # the waiter itself was cancelled
+        return job
+
+    async def _run(self, job: SimulationJob) -> None:
+        args = dict(job.request)
+        try:
+            input_hash = None
+            if _is_historical(args.get("period_end")):
+                input_hash = fingerprint(args, args["period_end"])
+                if cached := await find_simulation(input_hash, args.get("name")):
+                    self._finish(job, "done", result=cached)
+                    return
+            self._stage(job, "downloading")
+            interval = args.get("interval") or "1d"
+            intraday = interval != "1d"
+            load = partial(load_intraday, interval=interval) if intraday else load_prices
+            data, args["period_end"] = await asyncio.to_thread(
+                load,
+                args.get("symbols", []),
+                period_start=args.get("period_start", "2023-01-01"),
+                period_end=args.get("period_end"),
+                benchmark=args.get("benchmark"),
+            )
+            if input_hash is None:
+                data_end = _last_stamps(data) if intraday else _last_bars(data)
+                input_hash = fingerprint(args, data_end)
+                if cached := await find_simulation(input_hash, args.get("name")):
+                    self._finish(job, "done", result=cached)
+                    return
+            self._stage(job, "running")
+            if intraday:
+                # The worker streams the bars from the bar store's files itself.
+                result = await run_in_pool(
+                    partial(simulate_intraday, **args),
+                    on_progress=partial(self._on_progress, job),
+                )
+            else:
+                args.pop("interval", None)
+                result = await run_shared(
+                    partial(simulate, **args),
+                    data,
+                    on_progress=partial(self._on_progress, job),
+                )
+            if "error" in result:
+                self._finish(job, "failed", result=result, error=result["error"])
+                return
+            self._stage(job, "persisting")
+            await persist_simulation(result, input_hash=input_hash)
+            self._finish(job, "done", result=result)
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled", error="Simulation job was cancelled")
+            logger.info("Simulation job %s cancelled", job.id)
+        except ValueError as exc:  # no price data
+            self._finish(job, "failed", result={"error": str(exc)}, error=str(exc))
+        except Exception as exc:
+            logger.exception("Simulation job %s failed", job.id)
+            self._finish(job, "failed", result={"error": str(exc)}, error=str(exc))
+
+    def _stage(self, job: SimulationJob, status: str) -> None:
+        job.status = status
+        self._notify(job)
+
+    def _on_progress(self, job: SimulationJob, fraction: float, equity: pd.Series) -> None:
+        job.fraction = fraction
+        if len(equity):
+            job.as_of = f"{equity.index[-1]:%Y-%m-%d}"
+            job.partial_curve = weekly_curve(equity)
+        self._notify(job)
+
+    def _notify(self, job: SimulationJob) -> None:
+        for listener in list(job.listeners):
+            try:
+                listener(job)
+            except Exception:
+                logger.exception("Simulation job %s progress listener failed", job.id)
+
+    def _finish(
+        self, job: SimulationJob, status: str, result: dict | None = None, error: str | None = None
+    ) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = _now()
+        job.partial_curve = []  # the result has the full curve
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in sorted(finished, key=lambda j: j.created_at)[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
+
+
+def _is_historical(period_end: str | None) -> bool:
+    """Whether a period ends before today, so no bar it covers can still change."""
+    if not period_end:
+        return False
+    return period_end < _now().strftime("%Y-%m-%d")
+
+
+def _last_bars(prices: pd.DataFrame) -> str:
+    """The date of each symbol's last bar, which changes whenever a new bar arrives."""
+    return ",".join(f"{sym}:{prices[sym].last_valid_index():%Y-%m-%d}" for sym in prices.columns)
+
+
+def _last_stamps(last: dict[str, pd.Timestamp]) -> str:
+    """Like ``_last_bars`` for intraday bars, to the minute."""
+    return ",".join(f"{sym}:{ts:%Y-%m-%dT%H:%M}" for sym, ts in last.items())
+
+
+def fingerprint(request: dict, data_end: str) -> str:
+    """SHA-256 of the inputs that determine a ``run_simulation`` result.
+
+    *data_end* stands in for the data the backtest sees: the end date of a
+    historical period, or the last bar of each symbol for a period running to
+    today. The simulation's name is only a label and is left out.
+    """
+    strategy = request.get("strategy") or {}
+    monte_carlo_paths = int(request.get("monte_carlo_paths", 0))
+    canonical = {
+        "version": FINGERPRINT_VERSION,
+        "symbols": list(request.get("symbols", [])),
+        "strategy": {
+            **strategy,
+            "type": strategy.get("type", "buy_and_hold"),
+            "params": strategy.get("params") or {},
+        },
+        "initial_capital": float(request.get("initial_capital", 10_000.0)),
+        "period_start": request.get("period_start", "2023-01-01"),
+        "data_end": data_end,
+        "benchmark": request.get("benchmark") or None,
+        "interval": request.get("interval") or "1d",
+        "monte_carlo_paths": monte_carlo_paths,
+        "bootstrap_block_days": (
+            int(request.get("bootstrap_block_days", 10)) if monte_carlo_paths > 0 else None
+        ),
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def find_simulation(input_hash: str, name: str | None = None) -> dict | None:
+    """The stored result of an earlier run with the same fingerprint, or None.
+
+    The name is not part of the fingerprint, so a hit is relabelled with *name*,
+    the current request's name, when one is given. A failed lookup is logged and
+    treated as a miss.
+    """
+    try:
+        async with async_session() as session:
+            rows = await session.execute(
+                select(SimulationResult)
+                .where(SimulationResult.input_hash == input_hash)
+                .order_by(SimulationResult.created_at.desc())
+                .limit(1)
+            )
+            sim = rows.scalars().first()
+    except Exception as exc:
+        logger.warning("Simulation cache lookup failed: %s", exc)
+        return None
+    if sim is None:
+        return None
+    logger.info("Simulation '%s' served from stored result (id=%s)", sim.name, sim.id)
+    return {
+        "name": name or sim.name,
+        "strategy": sim.strategy,
+        "initial_capital": sim.initial_capital,
+        "final_value": sim.final_value,
+        "period_start": sim.period_start,
+        "period_end": sim.period_end,
+        "trades_count": sim.trades_count,
+        "equity_curve": sim.equity_curve,
+        "total_return_pct": sim.total_return_pct,
+        "sharpe_ratio": sim.sharpe_ratio,
+        "max_drawdown_pct": sim.max_drawdown_pct,
+        **(sim.details or {}),
+        "simulation_id": sim.id,
+        "cached": True,
+    }
+
+
+async def persist_simulation(
+    result: dict, oos_equity_curve: list | None = None, input_hash: str | None = None
+) -> None:
+    """Write a simulation result to ``simulation_results`` and add its ``simulation_id``.
+
+    *input_hash* is the request's ``fingerprint()``, which lets later identical
+    requests reuse the row.
+    """
+    try:
+        async with async_session() as session:
+            sim = SimulationResult(
+                name=result["name"],
+                strategy=result["strategy"],
+                initial_capital=result["initial_capital"],
+                final_value=result["final_value"],
+                total_return_pct=result.get("total_return_pct", 0.0),
+                sharpe_ratio=result.get("sharpe_ratio"),
+                max_drawdown_pct=result.get("max_drawdown_pct"),
+                trades_count=result["trades_count"],
+                period_start=result["period_start"],
+                period_end=result["period_end"],
+                equity_curve=result["equity_curve"],
+                oos_equity_curve=oos_equity_curve,
+                input_hash=input_hash,
+                details={k: v for k, v in result.items() if k not in _COLUMN_FIELDS},
+            )
+            session.add(sim)
+            await session.commit()
+            result["simulation_id"] = sim.id
+            logger.info("Simulation '%s' persisted (id=%s)", sim.name, sim.id)
+    except Exception as exc:
+        logger.warning("Failed to persist simulation result: %s", exc)
+
+
+_jobs: SimulationJobs | None = None
+
+
+def get_simulation_jobs() -> SimulationJobs:
+    """Return the process-wide simulation job registry, creating it on first use."""
+    global _jobs
+    if _jobs is None:
+        _jobs = SimulationJobs()
+    return _jobs
@@ -4,184 +4,118 @@ Supported strategies:
 - buy_and_hold: buy on day 1, hold to end
 - sma_crossover: buy when fast SMA crosses above slow SMA, sell on crossunder
 - rsi_mean_reversion: buy when RSI < rsi_buy, sell when RSI > rsi_sell
-- momentum: buy top N performers over lookback window, rebalance monthly
+- momentum: hold the top_n performers over a lookback window, rebalanced monthly
+- rebalance: hold target weights from one shared cash account, rebalanced on a
+  schedule or when a weight drifts, with commission and slippage
+- rules: buy when an entry rule such as ``rsi(14) < 30 and close > ema(200)``
+  holds, sell when the exit rule does
+
+sma_crossover, rsi_mean_reversion, rules and rebalance trade with a broker's
+commission schedule and spread, fixed or ATR-scaled slippage when their params
+ask for them; the model they traded under is recorded in the result's
+``strategy["costs"]``.
+
+With an ``interval`` of 1m or 5m, buy_and_hold, sma_crossover and
+rsi_mean_reversion trade on intraday bars streamed from the bar store's
+memory-mapped files instead (``simulate_intraday``).
+
+The strategies themselves live in ``src.simulation.strategies``; this module loads
+prices, runs them and shapes the results for the LLM.
 """
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from datetime import UTC, datetime
-import math
+from functools import partial
 
 import pandas as pd
-import yfinance as yf
 
 from src.agent.utils.logger import get_logger
+from src.config import settings
+from src.market.bar_store import get_bar_store
+from src.simulation.analytics import metric_rows, summarise
+from src.simulation.bootstrap import bootstrap
+from src.simulation.costs import describe, is_free
+from src.simulation.intraday import (
+    INTRADAY_INTERVALS,
+    chunk_bars,
+    combine,
+    day_closes,
+    run_long_flat,
+    signals_for,
+)
+from src.simulation.strategies import STRATEGY_TYPES, costs_for, run_strategy
 
 logger = get_logger(__name__)
 
 
 def _download(symbols: list[str], start: str, end: str) -> pd.DataFrame:
-    """Download adjusted close prices for symbols."""
-    data = yf.download(symbols, start=start, end=end, auto_adjust=True, progress=False)
-    if isinstance(data.columns, pd.MultiIndex):
-        return data["Close"].dropna(how="all")
-    return data[["Close"]].rename(columns={"Close": symbols[0]}).dropna()
+    """Adjusted close prices for symbols in ``[start, end)``, served from the local bar store."""
+    frames = get_bar_store().get_many(symbols, "1d", start=start, end=end)
+    closes = {sym: df["Close"] for sym, df in frames.items() if not df.empty}
+    if not closes:
+        return pd.DataFrame()
+    return pd.DataFrame(closes).dropna(how="all")
 
 
-def _metrics(equity: pd.Series) -> dict:
-    """Compute performance metrics from equity curve."""
-    if equity.empty or len(equity) < 2:
-        return {}
-    total_ret = (equity.iloc[-1] / equity.iloc[0] - 1) * 100
-    daily_ret = equity.pct_change().dropna()
-    annual_factor = 252
-    if daily_ret.std() == 0:
-        sharpe = 0.0
-    else:
-        sharpe = float(daily_ret.mean() / daily_ret.std() * math.sqrt(annual_factor))
-    # Max drawdown
-    rolling_max = equity.cummax()
-    drawdown = (equity - rolling_max) / rolling_max
-    max_dd = float(drawdown.min() * 100)
-    return {
-        "total_return_pct": round(float(total_ret), 2),
-        "sharpe_ratio": round(sharpe, 3),
-        "max_drawdown_pct": round(max_dd, 2),
-        "annual_volatility_pct": round(float(daily_ret.std() * math.sqrt(annual_factor) * 100), 2),
-    }
+def _with_costs(strategy: dict, stype: str, params: dict) -> dict:
+    """*strategy* with the cost model it trades under, when it trades with one."""
+    commission, slippage = costs_for(stype, params)
+    if is_free(commission, slippage):
+        return strategy
+    return {**strategy, "costs": describe(commission, slippage, params.get("broker"))}
 
 
-def _buy_and_hold(prices: pd.DataFrame, capital: float) -> tuple[pd.Series, list[dict]]:
-    # Equal-weight portfolio, buy on first day, sell on last
-    n = len(prices.columns)
-    alloc = capital / n
-    shares = {sym: alloc / prices[sym].iloc[0] for sym in prices.columns}
-    equity = sum(shares[sym] * prices[sym] for sym in prices.columns)
-    trades = [
-        {
-            "date": str(prices.index[0].date()),
-            "action": "BUY",
-            "symbol": sym,
-            "shares": round(shares[sym], 4),
-        }
-        for sym in prices.columns
-    ] + [
-        {
-            "date": str(prices.index[-1].date()),
-            "action": "SELL",
-            "symbol": sym,
-            "shares": round(shares[sym], 4),
-        }
-        for sym in prices.columns
-    ]
-    return equity, trades
+def _metrics(
+    equity: pd.Series, benchmark: pd.Series | None = None, turnover: pd.Series | None = None
+) -> dict:
+    """Compute performance metrics from equity curve.
 
+    With a *benchmark* close series, beta and alpha against it are included;
+    with the per-bar *turnover* of the run, its average annual turnover.
+    """
+    if equity.empty or len(equity) < 2:
+        return {}
+    index = equity.index if isinstance(equity.index, pd.DatetimeIndex) else None
+    bench = None
+    if benchmark is not None:
+        bench = benchmark.reindex(equity.index).ffill().to_numpy()
+    traded = None if turnover is None else turnover.reindex(equity.index, fill_value=0.0).to_numpy()
+    return metric_rows(summarise(equity.to_numpy(), index=index, benchmark=bench, turnover=traded))[
+        0
+    ]
 
-def _crossover_signal(sma_fast: pd.Series, sma_slow: pd.Series, i: int) -> str | None:
-    """Return 'buy', 'sell', or None based on fast/slow SMA crossover at index i."""
-    if sma_fast.iloc[i] > sma_slow.iloc[i] and sma_fast.iloc[i - 1] <= sma_slow.iloc[i - 1]:
-        return "buy"
-    if sma_fast.iloc[i] < sma_slow.iloc[i] and sma_fast.iloc[i - 1] >= sma_slow.iloc[i - 1]:
-        return "sell"
-    return None
 
+def weekly_curve(equity: pd.Series) -> list[dict]:
+    """*equity* at weekly resolution, as ``[{"date", "value"}]`` — small enough for a response."""
+    return [
+        {"date": str(idx.date()), "value": round(float(val), 2)}
+        for idx, val in equity.resample("W").last().dropna().items()
+    ]
 
-def _sma_crossover(
-    prices: pd.DataFrame,
-    capital: float,
-    fast: int = 20,
-    slow: int = 50,
-) -> tuple[pd.Series, list[dict]]:
-    # Trade each symbol independently
-    equity = pd.Series(0.0, index=prices.index)
-    trades = []
-    for sym in prices.columns:
-        p = prices[sym].dropna()
-        sma_fast = p.rolling(fast).mean()
-        sma_slow = p.rolling(slow).mean()
-        position = 0.0
-        sym_cash = capital / len(prices.columns)
-        sym_equity = pd.Series(sym_cash, index=prices.index)
-
-        for i in range(1, len(p)):
-            date = p.index[i]
-            signal = _crossover_signal(sma_fast, sma_slow, i)
-            if signal == "buy" and sym_cash > 0 and position == 0:
-                position = sym_cash / p.iloc[i]
-                sym_cash = 0.0
-                trades.append(
-                    {
-                        "date": str(date.date()),
-                        "action": "BUY",
-                        "symbol": sym,
-                        "price": round(p.iloc[i], 4),
-                        "shares": round(position, 4),
-                    }
-                )
-            elif signal == "sell" and position > 0:
-                sym_cash = position * p.iloc[i]
-                trades.append(
-                    {
-                        "date": str(date.date()),
-                        "action": "SELL",
-                        "symbol": sym,
-                        "price": round(p.iloc[i], 4),
-                        "proceeds": round(sym_cash, 2),
-                    }
-                )
-                position = 0.0
-            sym_equity.loc[date] = sym_cash + position * p.iloc[i]
-        equity += sym_equity
-    return equity, trades
 
+def load_prices(
+    symbols: list[str],
+    period_start: str,
+    period_end: str | None = None,
+    benchmark: str | None = None,
+) -> tuple[pd.DataFrame, str]:
+    """Closes for a simulation and the resolved end date (today when *period_end* is None).
 
-def _rsi_mean_reversion(
-    prices: pd.DataFrame,
-    capital: float,
-    rsi_buy: float = 30.0,
-    rsi_sell: float = 70.0,
-) -> tuple[pd.Series, list[dict]]:
-    from ta.momentum import RSIIndicator
-
-    equity = pd.Series(0.0, index=prices.index)
-    trades = []
-    for sym in prices.columns:
-        p = prices[sym].dropna()
-        rsi = RSIIndicator(close=p, window=14).rsi()
-        sym_cash = capital / len(prices.columns)
-        position = 0.0
-        sym_equity = pd.Series(sym_cash, index=prices.index)
-
-        for i in range(14, len(p)):
-            date = p.index[i]
-            r = rsi.iloc[i]
-            if r < rsi_buy and position == 0 and sym_cash > 0:
-                position = sym_cash / p.iloc[i]
-                sym_cash = 0.0
-                trades.append(
-                    {
-                        "date": str(date.date()),
-                        "action": "BUY",
-                        "symbol": sym,
-                        "rsi": round(r, 1),
-                        "price": round(p.iloc[i], 4),
-                    }
-                )
-            elif r > rsi_sell and position > 0:
-                sym_cash = position * p.iloc[i]
-                trades.append(
-                    {
-                        "date": str(date.date()),
-                        "action": "SELL",
-                        "symbol": sym,
-                        "rsi": round(r, 1),
-                        "proceeds": round(sym_cash, 2),
-                    }
-                )
-                position = 0.0
-            sym_equity.loc[date] = sym_cash + position * p.iloc[i]
-        equity += sym_equity
-    return equity, trades
+    A *benchmark* symbol is loaded alongside the traded ones. Raises
+    ``ValueError`` with a user-facing message when there is no data.
+    """
+    end = period_end or datetime.now(UTC).strftime("%Y-%m-%d")
+    if benchmark:
+        symbols = list(dict.fromkeys([*symbols, benchmark]))
+    try:
+        prices = _download(symbols, period_start, end)
+    except Exception as exc:
+        raise ValueError(f"Failed to download price data: {exc}") from exc
+    if prices.empty:
+        raise ValueError("No price data returned for the given symbols and period.")
+    return prices, end
 
 
 def run_simulation(
@@ -191,66 +125,488 @@ def run_simulation(
     initial_capital: float = 10_000.0,
     period_start: str = "2023-01-01",
     period_end: str | None = None,
+    monte_carlo_paths: int = 0,
+    bootstrap_block_days: int = 10,
+    benchmark: str | None = None,
+    interval: str = "1d",
 ) -> dict:
-    """Run a backtested simulation. Returns equity curve, metrics, and trades."""
-    end = period_end or datetime.now(UTC).strftime("%Y-%m-%d")
+    """Run a backtested simulation. Returns equity curve, metrics, and trades.
+
+    With ``monte_carlo_paths`` > 0 the daily returns are also block-bootstrapped
+    into that many alternative paths, and percentile bands of the metrics are
+    returned under ``monte_carlo``. With a ``benchmark`` symbol, beta and
+    alpha against it are added to the metrics. An ``interval`` of ``1m`` or
+    ``5m`` trades on intraday bars (see ``simulate_intraday``).
+    """
+    if interval != "1d":
+        try:
+            _, end = load_intraday(symbols, interval, period_start, period_end, benchmark)
+        except ValueError as exc:
+            return {"error": str(exc)}
+        return simulate_intraday(
+            name,
+            symbols,
+            strategy,
+            interval=interval,
+            initial_capital=initial_capital,
+            period_start=period_start,
+            period_end=end,
+            monte_carlo_paths=monte_carlo_paths,
+            bootstrap_block_days=bootstrap_block_days,
+            benchmark=benchmark,
+        )
     try:
-        prices = _download(symbols, period_start, end)
-    except Exception as exc:
-        return {"error": f"Failed to download price data: {exc}"}
+        prices, end = load_prices(symbols, period_start, period_end, benchmark)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    return simulate(
+        prices,
+        name,
+        symbols,
+        strategy,
+        initial_capital=initial_capital,
+        period_start=period_start,
+        period_end=end,
+        monte_carlo_paths=monte_carlo_paths,
+        bootstrap_block_days=bootstrap_block_days,
+        benchmark=benchmark,
+    )
 
-    if prices.empty:
-        return {"error": "No price data returned for the given symbols and period."}
 
+def simulate(
+    prices: pd.DataFrame,
+    name: str,
+    symbols: list[str],
+    strategy: dict,
+    initial_capital: float = 10_000.0,
+    period_start: str = "2023-01-01",
+    period_end: str = "",
+    monte_carlo_paths: int = 0,
+    bootstrap_block_days: int = 10,
+    benchmark: str | None = None,
+    progress: Callable[..., None] | None = None,
+) -> dict:
+    """The CPU-bound part of ``run_simulation``, on prices already loaded.
+
+    Pure computation with no I/O, so it can run in a worker process. A
+    *benchmark* column that is not one of *symbols* is only measured against,
+    never traded. *progress* is called as ``progress(fraction)`` or
+    ``progress(fraction, equity_so_far)`` while the backtest runs, e.g. with
+    ``SharedProgress.report``.
+    """
     stype = strategy.get("type", "buy_and_hold")
     params = strategy.get("params", {})
+    if stype not in STRATEGY_TYPES:
+        return {
+            "error": f"Unknown strategy type: {stype}. Use one of: {', '.join(STRATEGY_TYPES)}."
+        }
+
+    bench = None
+    if benchmark and benchmark in prices.columns:
+        bench = prices[benchmark]
+        if benchmark not in symbols:
+            prices = prices.drop(columns=benchmark).dropna(how="all")
+            if prices.empty:
+                return {"error": "No price data returned for the given symbols and period."}
 
+    # Share of the work that is the backtest itself; Monte Carlo paths are the rest.
+    backtest_share = 0.5 if monte_carlo_paths > 0 else 1.0
     try:
-        if stype == "buy_and_hold":
-            equity, trades = _buy_and_hold(prices, initial_capital)
-        elif stype == "sma_crossover":
-            equity, trades = _sma_crossover(
-                prices,
-                initial_capital,
-                fast=int(params.get("fast", 20)),
-                slow=int(params.get("slow", 50)),
-            )
-        elif stype == "rsi_mean_reversion":
-            equity, trades = _rsi_mean_reversion(
-                prices,
-                initial_capital,
-                rsi_buy=float(params.get("rsi_buy", 30)),
-                rsi_sell=float(params.get("rsi_sell", 70)),
-            )
-        else:
-            return {
-                "error": f"Unknown strategy type: {stype}. Use buy_and_hold, sma_crossover, \
-                    or rsi_mean_reversion."
-            }
+        strategy = _with_costs(strategy, stype, params)
+        equity, trades, turnover = run_strategy(
+            prices,
+            initial_capital,
+            stype,
+            params,
+            progress=(
+                (lambda done: progress(backtest_share * len(done) / len(prices), done))
+                if progress is not None
+                else None
+            ),
+        )
     except Exception as exc:
         logger.exception("Simulation failed")
         return {"error": str(exc)}
+    if progress is not None:
+        progress(backtest_share, equity)
 
-    # Build equity curve (weekly resolution to keep response small)
-    equity_weekly = equity.resample("W").last().dropna()
-    equity_curve = [
-        {"date": str(idx.date()), "value": round(float(val), 2)}
-        for idx, val in equity_weekly.items()
-    ]
-
-    metrics = _metrics(equity)
-    final_value = round(float(equity.iloc[-1]), 2)
-
+    metrics = _report_metrics(
+        equity,
+        bench,
+        benchmark,
+        initial_capital,
+        monte_carlo_paths,
+        bootstrap_block_days,
+        progress=(
+            (lambda paths: progress(backtest_share + (1 - backtest_share) * paths))
+            if progress is not None
+            else None
+        ),
+        turnover=turnover,
+    )
     return {
         "name": name,
         "strategy": strategy,
         "symbols": symbols,
         "initial_capital": initial_capital,
-        "final_value": final_value,
+        "final_value": round(float(equity.iloc[-1]), 2),
         "period_start": period_start,
-        "period_end": end,
+        "period_end": period_end,
         "trades_count": len(trades),
         "trades_sample": trades[:20],  # first 20 trades
-        "equity_curve": equity_curve,
+        "equity_curve": weekly_curve(equity),
+        **metrics,
+    }
+
+
+def _bars_done(
+    progress: Callable[[float], None], share: float, before: int, total: int, done: int
+) -> None:
+    """Report *done* bars of the current symbol, after *before* bars of earlier ones."""
+    progress(share * (before + done) / total)
+
+
+def _report_metrics(
+    equity: pd.Series,
+    bench: pd.Series | None,
+    benchmark: str | None,
+    initial_capital: float,
+    monte_carlo_paths: int,
+    bootstrap_block_days: int,
+    progress: Callable[[float], None] | None = None,
+    turnover: pd.Series | None = None,
+) -> dict:
+    """Metrics of a daily equity curve, with Monte Carlo bands when paths are requested.
+
+    *progress* is called with the fraction of Monte Carlo paths done.
+    """
+    metrics = _metrics(equity, bench, turnover)
+    if bench is not None:
+        metrics["benchmark"] = benchmark
+    if monte_carlo_paths > 0 and len(equity) > 2:
+        metrics["monte_carlo"] = bootstrap(
+            equity.pct_change().dropna().to_numpy(),
+            initial_capital,
+            n_paths=monte_carlo_paths,
+            block_size=bootstrap_block_days,
+            chunk_mb=settings.monte_carlo_chunk_mb,
+            progress=progress,
+        )
+    return metrics
+
+
+# ── Intraday ───────────────────────────────────────────────────────────────────
+
+
+def load_intraday(
+    symbols: list[str],
+    interval: str,
+    period_start: str,
+    period_end: str | None = None,
+    benchmark: str | None = None,
+) -> tuple[dict[str, pd.Timestamp], str]:
+    """Sync a simulation's intraday bars into the bar store, without reading them.
+
+    Returns the last bar of each symbol with bars in the period and the
+    resolved end date. Raises ``ValueError`` with a user-facing message when
+    there are none.
+    """
+    end = period_end or datetime.now(UTC).strftime("%Y-%m-%d")
+    if benchmark:
+        symbols = list(dict.fromkeys([*symbols, benchmark]))
+    store = get_bar_store()
+    last: dict[str, pd.Timestamp] = {}
+    for sym in dict.fromkeys(symbols):
+        try:
+            store.sync(sym, interval, period_start)
+        except Exception as exc:
+            logger.warning("Intraday sync failed for %s %s: %s", sym, interval, exc)
+            continue
+        bars = store.read_records(sym, interval, period_start, end)
+        if len(bars):
+            last[sym] = pd.Timestamp(int(bars["ts"][-1]), unit="ns")
+    if not last:
+        raise ValueError(f"No {interval} bars stored for the given symbols and period.")
+    return last, end
+
+
+def simulate_intraday(
+    name: str,
+    symbols: list[str],
+    strategy: dict,
+    interval: str = "1m",
+    initial_capital: float = 10_000.0,
+    period_start: str = "2023-01-01",
+    period_end: str = "",
+    monte_carlo_paths: int = 0,
+    bootstrap_block_days: int = 10,
+    benchmark: str | None = None,
+    progress: Callable[..., None] | None = None,
+) -> dict:
+    """``simulate`` on 1- or 5-minute bars streamed from the bar store.
+
+    Bars already synced with ``load_intraday`` are read from their memory-mapped
+    files in chunks of ``INTRADAY_CHUNK_MB``, so a history of any length runs
+    in bounded memory, in a worker process or not. Each symbol trades its share
+    of the capital; metrics are computed on the equity at the end of each day.
+    *progress* is called as ``progress(fraction)``.
+    """
+    stype = strategy.get("type", "buy_and_hold")
+    params = strategy.get("params", {})
+    if interval not in INTRADAY_INTERVALS:
+        return {"error": f"Intraday interval must be one of: {', '.join(INTRADAY_INTERVALS)}."}
+    try:
+        signals_for(stype, params)
+        commission, slippage = costs_for(stype, params)
+    except ValueError as exc:
+        return {"error": str(exc)}
+
+    store = get_bar_store()
+    chunk_size = chunk_bars(settings.intraday_chunk_mb)
+    end = period_end or None
+    bars = {sym: store.read_records(sym, interval, period_start, end) for sym in symbols}
+    bars = {sym: records for sym, records in bars.items() if len(records)}
+    if not bars:
+        return {"error": f"No {interval} bars stored for the given symbols and period."}
+
+    total = sum(len(records) for records in bars.values())
+    backtest_share = 0.5 if monte_carlo_paths > 0 else 1.0
+    sym_cash = initial_capital / len(bars)
+    runs = []
+    done = 0
+    try:
+        for sym, records in bars.items():
+            runs.append(
+                run_long_flat(
+                    records,
+                    signals_for(stype, params),
+                    sym_cash,
+                    chunk_size,
+                    symbol=sym,
+                    on_chunk=(
+                        partial(_bars_done, progress, backtest_share, done, total)
+                        if progress is not None
+                        else None
+                    ),
+                    commission=commission,
+                    slippage=slippage,
+                )
+            )
+            done += len(records)
+    except Exception as exc:
+        logger.exception("Intraday simulation failed")
+        return {"error": str(exc)}
+    equity = combine(runs, sym_cash)
+
+    bench = None
+    if benchmark:
+        bench_bars = store.read_records(benchmark, interval, period_start, end)
+        if len(bench_bars):
+            bench = day_closes(bench_bars, chunk_size).reindex(equity.index).ffill()
+
+    metrics = _report_metrics(
+        equity,
+        bench,
+        benchmark,
+        initial_capital,
+        monte_carlo_paths,
+        bootstrap_block_days,
+        progress=(
+            (lambda paths: progress(backtest_share + (1 - backtest_share) * paths))
+            if progress is not None
+            else None
+        ),
+    )
+    trades = sorted((t for run in runs for t in run.trades), key=lambda t: t["date"])
+    return {
+        "name": name,
+        "strategy": {**_with_costs(strategy, stype, params), "interval": interval},
+        "symbols": symbols,
+        "initial_capital": initial_capital,
+        "final_value": round(float(equity.iloc[-1]), 2),
+        "period_start": period_start,
+        "period_end": period_end,
+        "trades_count": sum(run.trades_count for run in runs),
+        "trades_sample": trades[:20],
+        "equity_curve": weekly_curve(equity),
+        "bars": total,
         **metrics,
     }
+
+
+# ── Parameter sweeps ───────────────────────────────────────────────────────────
+
+SWEEP_RANK_METRICS = (
+    "sharpe_ratio",
+    "sortino_ratio",
+    "calmar_ratio",
+    "total_return_pct",
+    "cagr_pct",
+    "max_drawdown_pct",
+)
+
+
+def _grid_combinations(
+    strategy_type: str, param_grid: dict[str, list], rank_by: str
+) -> tuple[list[dict], int] | str:
+    """The combinations to backtest and how many were skipped, or an error message."""
+    from src.simulation.sweep import MAX_COMBINATIONS, expand_grid
+
+    if strategy_type not in STRATEGY_TYPES:
+        return f"Unknown strategy type: {strategy_type}. Use one of: {', '.join(STRATEGY_TYPES)}."
+    if rank_by not in SWEEP_RANK_METRICS:
+        return f"Ranking metric must be one of: {', '.join(SWEEP_RANK_METRICS)}."
+    if not param_grid or any(not isinstance(v, list) or not v for v in param_grid.values()):
+        return "param_grid must map each parameter to a non-empty list of values."
+
+    combos = expand_grid(param_grid)
+    skipped = 0
+    if strategy_type == "sma_crossover":
+        valid = [c for c in combos if int(c.get("fast", 20)) < int(c.get("slow", 50))]
+        skipped = len(combos) - len(valid)
+        combos = valid
+    if not combos:
+        return "No valid parameter combinations (sma_crossover needs fast < slow)."
+    if len(combos) > MAX_COMBINATIONS:
+        return f"{len(combos)} combinations requested; the maximum is {MAX_COMBINATIONS}."
+    return combos, skipped
+
+
+def run_parameter_sweep(
+    symbols: list[str],
+    strategy_type: str,
+    param_grid: dict[str, list],
+    initial_capital: float = 10_000.0,
+    period_start: str = "2023-01-01",
+    period_end: str | None = None,
+    rank_by: str = "sharpe_ratio",
+    top_n: int = 20,
+) -> dict:
+    """Backtest one strategy over every combination in *param_grid*, ranked by *rank_by*.
+
+    Prices are downloaded once and shared by every run; the combinations are
+    evaluated in parallel on the simulation worker pool.
+    """
+    from src.simulation.sweep import sweep
+
+    grid = _grid_combinations(strategy_type, param_grid, rank_by)
+    if isinstance(grid, str):
+        return {"error": grid}
+    combos, skipped = grid
+    try:
+        prices, end = load_prices(symbols, period_start, period_end)
+    except ValueError as exc:
+        return {"error": str(exc)}
+
+    try:
+        rows = sweep(prices, strategy_type, combos, initial_capital)
+    except Exception as exc:
+        logger.exception("Parameter sweep failed")
+        return {"error": str(exc)}
+
+    ranked = sorted(
+        (r for r in rows if r.get(rank_by) is not None),
+        key=lambda r: r[rank_by],
+        reverse=True,
+    )
+    failed = [r for r in rows if r.get(rank_by) is None]
+    return {
+        "strategy_type": strategy_type,
+        "symbols": symbols,
+        "initial_capital": initial_capital,
+        "period_start": period_start,
+        "period_end": end,
+        "combinations": len(combos),
+        "skipped_combinations": skipped,
+        "ranked_by": rank_by,
+        "results": [{"rank": i + 1, **r} for i, r in enumerate(ranked[:top_n])],
+        "failed": failed[:top_n],
+    }
+
+
+# ── Walk-forward optimisation ─────────────────────────────────────────────────
+
+
+def run_walk_forward(
+    name: str,
+    symbols: list[str],
+    strategy_type: str,
+    param_grid: dict[str, list],
+    train_days: int = 365,
+    test_days: int = 90,
+    initial_capital: float = 10_000.0,
+    period_start: str = "2020-01-01",
+    period_end: str | None = None,
+    optimise_by: str = "sharpe_ratio",
+) -> dict:
+    """Walk-forward backtest: re-optimise on each training window, trade the next test window.
+
+    Metrics, ``equity_curve`` (weekly) and ``oos_equity_curve`` (daily) all
+    describe the stitched out-of-sample result.
+    """
+    from src.simulation.walk_forward import MAX_WINDOWS, rolling_windows, stitch, walk_forward
+
+    grid = _grid_combinations(strategy_type, param_grid, optimise_by)
+    if isinstance(grid, str):
+        return {"error": grid}
+    combos, _ = grid
+    if train_days < 30 or test_days < 5:
+        return {"error": "train_days must be at least 30 and test_days at least 5."}
+
+    try:
+        prices, end = load_prices(symbols, period_start, period_end)
+    except ValueError as exc:
+        return {"error": str(exc)}
+
+    windows = rolling_windows(prices.index, train_days, test_days)
+    if not windows:
+        return {"error": f"The period is shorter than one {train_days}-day training window."}
+    if len(windows) > MAX_WINDOWS:
+        return {
+            "error": f"{len(windows)} walk-forward windows; the maximum is {MAX_WINDOWS}. "
+            "Use a longer test_days or a shorter period."
+        }
+
+    try:
+        results = walk_forward(prices, strategy_type, combos, initial_capital, windows, optimise_by)
+    except Exception as exc:
+        logger.exception("Walk-forward optimisation failed")
+        return {"error": str(exc)}
+
+    equity = stitch(results, initial_capital)
+    if len(equity) < 2:
+        errors = sorted({r["error"] for r in results if "error" in r})
+        return {"error": "No walk-forward window could be evaluated: " + "; ".join(errors)}
+
+    summary = []
+    for result in results:
+        growth = result.pop("growth", None)
+        result.pop("base_date", None)
+        if growth is not None:
+            result["oos_return_pct"] = round(float(growth.iloc[-1] - 1) * 100, 2)
+        summary.append(result)
+
+    return {
+        "name": name,
+        "strategy": {
+            "type": strategy_type,
+            "walk_forward": {
+                "param_grid": param_grid,
+                "train_days": train_days,
+                "test_days": test_days,
+                "optimised_by": optimise_by,
+                "windows": summary,
+            },
+        },
+        "symbols": symbols,
+        "initial_capital": initial_capital,
+        "final_value": round(float(equity.iloc[-1]), 2),
+        "period_start": str(equity.index[0].date()),
+        "period_end": str(equity.index[-1].date()),
+        "trades_count": sum(r.get("trades_count", 0) for r in summary),
+        "equity_curve": weekly_curve(equity),
+        "oos_equity_curve": [
+            {"date": str(idx.date()), "value": round(float(val), 2)} for idx, val in equity.items()
+        ],
+        **_metrics(equity),
+    }
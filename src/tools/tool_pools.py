@@ -0,0 +1,180 @@
+"""Bulkhead thread pools for synchronous tools.
+
+Most tools wrap blocking libraries (yfinance, broker SDKs, news APIs), so the
+dispatcher runs them in threads, never on the event loop. Each class of tool
+gets its own pool rather than sharing the default executor:
+
+    market_data   yfinance quotes, history, options, indicators and scans
+    brokers       account reads, order submission and cancellation
+    news          news API searches
+    cpu           parameter sweeps and walk-forward runs (which wait on the
+                  simulation worker processes)
+
+A pool's worker count caps how many of its calls run at once; further calls
+wait in its queue. A broker that stops answering therefore ties up at most the
+broker pool's threads, while market-data calls and the LLM's inference, which
+runs on the default executor, carry on.
+
+A call that has not finished within its pool's timeout, counted from when it
+was submitted, fails with ``ToolTimeout``. If it was still queued it never
+runs; a thread cannot be interrupted, so one already running finishes in the
+background and keeps its slot until then. Order submission and cancellation use
+``run_to_completion`` instead, which has no timeout: an order abandoned while
+the broker is still handling it may yet be placed, with no Trade row recorded,
+and a retry would place it twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+import threading
+import time
+from typing import Any, TypeVar
+
+from src.agent.utils.logger import get_logger
+from src.config import settings
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+POOLS = ("market_data", "brokers", "news", "cpu")
+
+
+class ToolTimeout(Exception):
+    """A tool call did not finish within its pool's timeout."""
+
+
+class ToolPool:
+    """A bounded thread pool with a timeout per call and queue-depth counters."""
+
+    def __init__(self, name: str, workers: int, timeout: float) -> None:
+        self.name = name
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"tool-{name}"
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "queued": 0,
+            "running": 0,
+            "max_queued": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+        }
+        self._max_wait = 0.0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call ``fn(*args, **kwargs)`` in the pool, with the caller's context variables."""
+        return await self._submit(partial(fn, *args, **kwargs), self.timeout)
+
+    async def run_to_completion(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Like ``run``, but wait for the call however long it takes."""
+        return await self._submit(partial(fn, *args, **kwargs), None)
+
+    async def _submit(self, fn: Callable[[], T], timeout: float | None) -> T:
+        call = partial(copy_context().run, fn)
+        submitted = time.monotonic()
+        with self._lock:
+            self._stats["queued"] += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._stats["queued"])
+        future = self._executor.submit(self._execute, call, submitted)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except TimeoutError:
+            self._drop(future)
+            with self._lock:
+                self._stats["timed_out"] += 1
+            logger.warning("Tool call timed out after %gs in the %s pool", self.timeout, self.name)
+            raise ToolTimeout(
+                f"Timed out after {self.timeout:g}s in the {self.name} pool; "
+                "the call may still complete in the background."
+            ) from None
+        except asyncio.CancelledError:
+            self._drop(future)
+            raise
+
+    def _drop(self, future: Future) -> None:
+        """Take a call that has not started out of the queue; it will never run."""
+        if future.cancel():
+            with self._lock:
+                self._stats["queued"] -= 1
+
+    def _execute(self, call: Callable[[], T], submitted: float) -> T:
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+            self._max_wait = max(self._max_wait, time.monotonic() - submitted)
+        try:
+            result = call()
+        except BaseException:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        else:
+            with self._lock:
+                self._stats["completed"] += 1
+            return result
+        finally:
+            with self._lock:
+                self._stats["running"] -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "timeout_seconds": self.timeout,
+                **self._stats,
+                "max_wait_seconds": round(self._max_wait, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pools: dict[str, ToolPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _settings_for(name: str) -> tuple[int, float]:
+    return {
+        "market_data": (
+            settings.tool_market_data_workers,
+            settings.tool_market_data_timeout_seconds,
+        ),
+        "brokers": (settings.tool_brokers_workers, settings.tool_brokers_timeout_seconds),
+        "news": (settings.tool_news_workers, settings.tool_news_timeout_seconds),
+        "cpu": (settings.tool_cpu_workers, settings.tool_cpu_timeout_seconds),
+    }[name]
+
+
+def get_tool_pool(name: str) -> ToolPool:
+    """Return the process-wide pool for one of ``POOLS``, starting it on first use."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            workers, timeout = _settings_for(name)
+            pool = _pools[name] = ToolPool(name, workers, timeout)
+        return pool
+
+
+def tool_pool_stats() -> dict:
+    """Per-pool limits and queue-depth counters for ``GET /api/metrics``."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pools[name].stats() for name in POOLS if name in pools}
+
+
+def shutdown_tool_pools() -> None:
+    """Stop every pool without waiting for calls still running. Called on application shutdown."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -14,8 +14,9 @@ from sqlalchemy import select
 from src.agent.utils.logger import get_logger
 from src.config import settings
 from src.db.database import async_session
-from src.db.models import Report, Trade
+from src.db.models import Report, SimulationResult, Trade
 from src.scheduler.jobs import get_latest_snapshot
+from src.simulation.analytics import align_curves, metric_rows, summarise
 
 logger = get_logger(__name__)
 
@@ -76,7 +77,7 @@ async def websocket_chat(websocket: WebSocket, session_id: str) -> None:
             if not user_message:
                 continue
 
-            # Stream agent response events back over WebSocket
+            # Stream agent response events back over WebSocket, tool_progress included
             async for event in session.chat(user_message):
                 await websocket.send_json(event)
 
@@ -105,6 +106,20 @@ async def health() -> dict:
     }
 
 
+@router.get("/api/metrics", dependencies=[Depends(require_allowed_ip)])
+async def metrics() -> dict:
+    """Runtime counters: cache hits/misses, coalesced tool calls and tool thread pools."""
+    from src.cache import get_cache
+    from src.tools.dispatcher import dispatch_stats
+    from src.tools.tool_pools import tool_pool_stats
+
+    return {
+        "cache": get_cache().stats(),
+        "dispatcher": dispatch_stats(),
+        "tool_pools": tool_pool_stats(),
+    }
+
+
 @router.get("/api/market/snapshot", dependencies=[Depends(require_allowed_ip)])
 async def market_snapshot() -> dict:
     """Return the latest cached market data snapshot."""
@@ -204,6 +219,122 @@ async def list_trades(limit: int = 50) -> list[dict]:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+# ── Simulation jobs ───────────────────────────────────────────────────────────
+
+
+@router.post(
+    "/api/simulations/jobs",
+    status_code=202,
+    dependencies=[Depends(require_allowed_ip)],
+    responses={400: {"description": "Invalid JSON body"}},
+)
+async def submit_simulation_job(request: Request) -> dict:
+    """Queue a backtest (``run_simulation`` arguments) and return its job ID immediately."""
+    try:
+        body = await request.json()
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail="Invalid JSON body") from exc
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Body must be a JSON object")
+
+    from src.tools.simulation_jobs import get_simulation_jobs
+
+    return get_simulation_jobs().submit(body).to_dict(include_result=False)
+
+
+@router.get("/api/simulations/jobs", dependencies=[Depends(require_allowed_ip)])
+async def list_simulation_jobs() -> list[dict]:
+    """Queued, running and recently finished simulation jobs, newest first."""
+    from src.tools.simulation_jobs import get_simulation_jobs
+
+    return [job.to_dict(include_result=False) for job in get_simulation_jobs().jobs()]
+
+
+@router.get(
+    "/api/simulations/jobs/{job_id}",
+    dependencies=[Depends(require_allowed_ip)],
+    responses={404: {"description": "Job not found"}},
+)
+async def get_simulation_job(job_id: str) -> dict:
+    """Status and progress of a simulation job, with its result once finished."""
+    from src.tools.simulation_jobs import get_simulation_jobs
+
+    job = get_simulation_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete(
+    "/api/simulations/jobs/{job_id}",
+    dependencies=[Depends(require_allowed_ip)],
+    responses={
+        404: {"description": "Job not found"},
+        409: {"description": "Job already finished"},
+    },
+)
+async def cancel_simulation_job(job_id: str) -> dict:
+    """Cancel a queued or running simulation job."""
+    from src.tools.simulation_jobs import get_simulation_jobs
+
+    jobs = get_simulation_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"job_id": job_id, "cancelled": True}
+
+
+@router.get(
+    "/api/simulations/compare",
+    dependencies=[Depends(require_allowed_ip)],
+    responses={
+        400: {"description": "No IDs, or curves that do not overlap"},
+        404: {"description": "Simulation not found"},
+        500: {"description": "Database error"},
+    },
+)
+async def compare_simulations(ids: str) -> list[dict]:
+    """Metrics of stored simulations side by side, over the span all their curves cover.
+
+    ``ids`` is a comma-separated list of simulation IDs. The stored equity
+    curves are weekly, so metrics are annualised over 52 bars a year.
+    """
+    wanted = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not wanted:
+        raise HTTPException(status_code=400, detail="No simulation IDs given")
+    try:
+        async with async_session() as session:
+            result = await session.execute(
+                select(SimulationResult).where(SimulationResult.id.in_(wanted))
+            )
+            sims = {sim.id: sim for sim in result.scalars().all()}
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    missing = [i for i in wanted if i not in sims]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Simulation not found: {', '.join(missing)}")
+
+    if any(len(sims[i].equity_curve or []) < 2 for i in wanted):
+        raise HTTPException(status_code=400, detail="Equity curves do not overlap")
+    frame = align_curves({i: sims[i].equity_curve for i in wanted})
+    if len(frame) < 2:
+        raise HTTPException(status_code=400, detail="Equity curves do not overlap")
+    rows = metric_rows(summarise(frame.to_numpy(), index=frame.index, periods_per_year=52))
+    return [
+        {
+            "simulation_id": i,
+            "name": sims[i].name,
+            "strategy": sims[i].strategy,
+            "period_start": str(frame.index[0].date()),
+            "period_end": str(frame.index[-1].date()),
+            **row,
+        }
+        for i, row in zip(wanted, rows, strict=True)
+    ]
+
+
 # ── MCP tool invocation ───────────────────────────────────────────────────────
 
 
@@ -52,6 +52,9 @@ function handleEvent(event) {
     case 'tool_call':
       appendToolCall(event.name, event.input);
       break;
+    case 'tool_progress':
+      updateToolProgress(event);
+      break;
     case 'tool_result':
       appendToolResult(event.name, event.result);
       break;
@@ -122,6 +125,23 @@ function appendToolCall(name, input) {
   scrollBottom();
 }
 
+function updateToolProgress(event) {
+  // One line per running call, updated in place as progress events arrive.
+  let el = messagesEl().querySelector(`[data-tool-id="${CSS.escape(event.id)}"]`);
+  if (!el) {
+    el = document.createElement('div');
+    el.className = 'tool-call progress';
+    el.dataset.toolId = event.id;
+    messagesEl().appendChild(el);
+  }
+  const curve = event.equity_curve || [];
+  const last = curve.length ? ` · equity ${curve[curve.length - 1].value.toLocaleString()}` : '';
+  const asOf = event.date ? ` · ${escapeHtml(event.date)}` : '';
+  el.innerHTML = `<span class="tool-icon">⏳</span> <strong>${escapeHtml(event.name)}</strong> ` +
+    `${escapeHtml(event.stage)} ${event.percent.toFixed(0)}%${asOf}${last}`;
+  scrollBottom();
+}
+
 function appendToolResult(name, resultStr) {
   let preview = resultStr;
   try {
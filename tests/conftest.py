@@ -6,6 +6,11 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.cache import TTLCache
+from src.market.bar_store import BarStore
+from src.market.streaming import IndicatorEngine
+from src.market.symbol_index import BUNDLED_PATH, SymbolIndex, read_entries
+
 # ---------------------------------------------------------------------------
 # Settings override — forces development mode so IP checks are bypassed
 # ---------------------------------------------------------------------------
@@ -46,6 +51,46 @@ def force_development_env(monkeypatch):
         yield mock_cfg
 
 
+# ---------------------------------------------------------------------------
+# Market-data cache — fresh in-process cache per test, never touches Redis
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def isolated_market_cache():
+    """Give every test an empty memory-only cache so cached quotes never leak between tests."""
+    cache = TTLCache(
+        redis_url=None,
+        ttls={"quote": 15, "fundamentals": 3600, "calendar": 3600, "options": 60},
+    )
+    with patch("src.cache._cache", cache):
+        yield cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_bar_store(tmp_path):
+    """Point the on-disk bar store at a per-test temporary directory."""
+    store = BarStore(tmp_path / "bars", refresh_seconds=900)
+    with patch("src.market.bar_store._store", store):
+        yield store
+
+
+@pytest.fixture(autouse=True)
+def isolated_indicator_engine(tmp_path):
+    """Keep persisted indicator state in a per-test temporary directory."""
+    engine = IndicatorEngine(tmp_path / "indicators")
+    with patch("src.market.streaming._engine", engine):
+        yield engine
+
+
+@pytest.fixture(autouse=True)
+def isolated_symbol_index():
+    """Search only the bundled symbol list, never a downloaded listings file."""
+    index = SymbolIndex(read_entries(BUNDLED_PATH))
+    with patch("src.market.symbol_index._index", index):
+        yield index
+
+
 # ---------------------------------------------------------------------------
 # Async DB session mock
 # ---------------------------------------------------------------------------
@@ -0,0 +1,169 @@
+"""Unit tests for src/market/bar_store.py."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.market.bar_store import BarStore
+
+
+def _bars(start: str, periods: int, close0: float = 100.0, tz: str | None = None) -> pd.DataFrame:
+    idx = pd.date_range(start, periods=periods, freq="D", tz=tz)
+    close = close0 + np.arange(periods, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": np.full(periods, 1_000.0),
+        },
+        index=idx,
+    )
+
+
+def _ticker(*frames: pd.DataFrame) -> MagicMock:
+    mock = MagicMock()
+    mock.history.side_effect = list(frames)
+    return mock
+
+
+@pytest.mark.unit
+class TestBarStore:
+    def test_first_get_fetches_and_persists(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        ticker = _ticker(_bars("2024-01-01", 10))
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            df = store.get("AAPL", start="2024-01-01")
+
+        assert len(df) == 10
+        assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+        assert (tmp_path / "1d" / "AAPL.bars").exists()
+
+    def test_fresh_store_served_without_network(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        ticker = _ticker(_bars("2024-01-01", 10))
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            store.get("AAPL", start="2024-01-01")
+            df = store.get("AAPL", start="2024-01-05")
+
+        ticker.history.assert_called_once()
+        assert df.index[0] == pd.Timestamp("2024-01-05")
+
+    def test_range_read_is_end_exclusive(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        with patch("src.market.bar_store.yf.Ticker", return_value=_ticker(_bars("2024-01-01", 10))):
+            store.get("AAPL", start="2024-01-01")
+        df = store.read("AAPL", start="2024-01-03", end="2024-01-06")
+        assert list(df.index.day) == [3, 4, 5]
+
+    def test_stale_store_only_fetches_tail(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=0)
+        history = _bars("2024-01-01", 10)
+        tail = _bars("2024-01-09", 4, close0=108.0)  # overlaps two stored bars, adds two
+        ticker = _ticker(history, tail)
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            store.get("AAPL", start="2024-01-01")
+            df = store.get("AAPL", start="2024-01-01")
+
+        assert ticker.history.call_args_list[1].kwargs["start"] == "2024-01-09"
+        assert len(df) == 12
+        assert df.index.is_monotonic_increasing
+
+    def test_live_last_bar_is_replaced(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=0)
+        history = _bars("2024-01-01", 5)
+        tail = _bars("2024-01-04", 2, close0=103.0)
+        tail.loc[tail.index[-1], "Close"] = 555.0  # last bar moved intraday
+        with patch("src.market.bar_store.yf.Ticker", return_value=_ticker(history, tail)):
+            store.get("AAPL", start="2024-01-01")
+            df = store.get("AAPL", start="2024-01-01")
+
+        assert len(df) == 5
+        assert df["Close"].iloc[-1] == 555.0
+
+    def test_adjusted_history_change_triggers_rebuild(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=0)
+        history = _bars("2024-01-01", 5)
+        tail = _bars("2024-01-04", 2, close0=50.0)  # anchor bar no longer matches (split)
+        rebuilt = _bars("2024-01-01", 6, close0=48.0)
+        ticker = _ticker(history, tail, rebuilt)
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            store.get("AAPL", start="2024-01-01")
+            df = store.get("AAPL", start="2024-01-01")
+
+        assert ticker.history.call_count == 3
+        assert len(df) == 6
+        assert df["Close"].iloc[0] == 48.0
+
+    def test_earlier_start_backfills(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        ticker = _ticker(_bars("2024-02-01", 5), _bars("2024-01-01", 36))
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            store.get("AAPL", start="2024-02-01")
+            df = store.get("AAPL", start="2024-01-01")
+
+        assert ticker.history.call_count == 2
+        assert df.index[0] == pd.Timestamp("2024-01-01")
+
+    def test_max_period_backfills_a_partial_history_once(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        ticker = _ticker(_bars("2024-02-01", 5), _bars("2020-01-01", 30))
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            store.get("AAPL", start="2024-02-01")
+            df = store.get("AAPL")  # period="max"
+            store.get("AAPL")
+            store.get("AAPL", start="2019-01-01")  # before the listing: nothing to backfill
+
+        assert ticker.history.call_count == 2
+        assert ticker.history.call_args_list[1].kwargs["period"] == "max"
+        assert df.index[0] == pd.Timestamp("2020-01-01")
+
+    def test_fetch_failure_serves_stored_bars(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=0)
+        ticker = MagicMock()
+        ticker.history.side_effect = [_bars("2024-01-01", 5), RuntimeError("429")]
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            store.get("AAPL", start="2024-01-01")
+            df = store.get("AAPL", start="2024-01-01")
+        assert len(df) == 5
+
+    def test_fetch_failure_without_stored_bars_raises(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        ticker = MagicMock()
+        ticker.history.side_effect = RuntimeError("429")
+        with (
+            patch("src.market.bar_store.yf.Ticker", return_value=ticker),
+            pytest.raises(RuntimeError),
+        ):
+            store.get("AAPL", start="2024-01-01")
+
+    def test_tz_aware_daily_bars_keyed_by_local_date(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        bars = _bars("2024-01-01", 3, tz="America/New_York")
+        with patch("src.market.bar_store.yf.Ticker", return_value=_ticker(bars)):
+            df = store.get("SPY", start="2024-01-01")
+        assert df.index[0] == pd.Timestamp("2024-01-01")
+        assert df.index.tz is None
+
+    def test_get_many_returns_empty_frame_for_failed_symbol(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        good = _ticker(_bars("2024-01-01", 3))
+        bad = MagicMock()
+        bad.history.side_effect = RuntimeError("delisted")
+        with patch(
+            "src.market.bar_store.yf.Ticker", side_effect=lambda s: good if s == "AAPL" else bad
+        ):
+            frames = store.get_many(["AAPL", "GONE"], start="2024-01-01")
+        assert len(frames["AAPL"]) == 3
+        assert frames["GONE"].empty
+
+    def test_symbols_with_special_characters(self, tmp_path):
+        store = BarStore(tmp_path, refresh_seconds=900)
+        with patch("src.market.bar_store.yf.Ticker", return_value=_ticker(_bars("2024-01-01", 3))):
+            store.get("^GSPC", start="2024-01-01")
+        assert store.last_timestamp("^GSPC") == pd.Timestamp("2024-01-03")
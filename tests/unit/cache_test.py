@@ -0,0 +1,135 @@
+"""Unit tests for src/cache.py."""
+
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+
+from src.cache import TTLCache
+
+
+def _memory_cache(**ttls: float) -> TTLCache:
+    return TTLCache(redis_url=None, ttls=ttls or {"quote": 60})
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    def test_miss_then_hit(self):
+        cache = _memory_cache()
+        fetch = MagicMock(return_value={"price": 1.0})
+
+        first = cache.get_or_fetch("quote", "AAPL", fetch)
+        second = cache.get_or_fetch("quote", "AAPL", fetch)
+
+        assert first == second == {"price": 1.0}
+        fetch.assert_called_once()
+        assert cache.stats()["classes"]["quote"]["hits"] == 1
+        assert cache.stats()["classes"]["quote"]["misses"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        cache = _memory_cache(quote=0.05)
+        fetch = MagicMock(return_value=1)
+
+        cache.get_or_fetch("quote", "AAPL", fetch)
+        time.sleep(0.1)
+        cache.get_or_fetch("quote", "AAPL", fetch)
+
+        assert fetch.call_count == 2
+
+    def test_data_classes_are_separate_namespaces(self):
+        cache = _memory_cache(quote=60, fundamentals=60)
+        cache.set("quote", "AAPL", 1)
+        assert cache.get("fundamentals", "AAPL") == (False, None)
+        assert cache.get("quote", "AAPL") == (True, 1)
+
+    def test_returned_values_are_copies(self):
+        cache = _memory_cache()
+        cache.set("quote", "AAPL", {"price": 1.0})
+        _, value = cache.get("quote", "AAPL")
+        value["price"] = 99.0
+        assert cache.get("quote", "AAPL") == (True, {"price": 1.0})
+
+    def test_fetch_errors_are_not_cached(self):
+        cache = _memory_cache()
+        fetch = MagicMock(side_effect=[RuntimeError("boom"), 5])
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_fetch("quote", "AAPL", fetch)
+        assert cache.get_or_fetch("quote", "AAPL", fetch) == 5
+        assert cache.stats()["classes"]["quote"]["errors"] == 1
+
+    def test_concurrent_callers_share_one_fetch(self):
+        cache = _memory_cache()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            release.wait(timeout=2)
+            return 42
+
+        results: list[int] = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.get_or_fetch("quote", "SPY", slow_fetch))
+            )
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert results == [42] * 5
+        assert len(calls) == 1
+        assert cache.stats()["classes"]["quote"]["coalesced"] == 4
+
+    def test_waiters_give_up_on_a_hung_fetch(self):
+        cache = TTLCache(redis_url=None, ttls={"quote": 60}, wait_timeout=0.05)
+        hung = threading.Event()
+        started = threading.Event()
+
+        def stuck():
+            started.set()
+            hung.wait(timeout=5)
+            return 1
+
+        leader = threading.Thread(target=lambda: cache.get_or_fetch("quote", "SPY", stuck))
+        leader.start()
+        started.wait(timeout=1)
+        try:
+            assert cache.get_or_fetch("quote", "SPY", lambda: 2) == 2
+            # The replacement fetch stored its value; later callers read it.
+            assert cache.get_or_fetch("quote", "SPY", lambda: 3) == 2
+        finally:
+            hung.set()
+            leader.join()
+        counts = cache.stats()["classes"]["quote"]
+        assert (counts["wait_timeouts"], counts["misses"]) == (1, 2)
+
+    def test_redis_error_falls_back_to_memory(self):
+        cache = TTLCache(redis_url="redis://localhost:1/0", ttls={"quote": 60})
+        failing = MagicMock()
+        failing.get.side_effect = redis.ConnectionError("down")
+        failing.setex.side_effect = redis.ConnectionError("down")
+        with patch.object(cache, "_redis", failing):
+            assert cache.get_or_fetch("quote", "AAPL", lambda: 7) == 7
+            assert cache.get("quote", "AAPL") == (True, 7)
+            assert cache.stats()["backend"] == "memory"
+
+    def test_redis_backend_used_when_available(self):
+        cache = TTLCache(redis_url="redis://localhost:1/0", ttls={"quote": 60})
+        store: dict[str, bytes] = {}
+        fake = MagicMock()
+        fake.get.side_effect = store.get
+        fake.setex.side_effect = lambda k, ttl, v: store.__setitem__(k, v.encode())
+        with patch.object(cache, "_redis", fake):
+            cache.set("quote", "AAPL", {"p": 1})
+            assert cache.get("quote", "AAPL") == (True, {"p": 1})
+        assert "ia:cache:quote:AAPL" in store
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -12,7 +15,10 @@ from src.tools.dispatcher import (
     _execute_trade,
     _route_order,
     _set_trading_mode,
+    _SingleFlight,
+    dispatch_stats,
     dispatch_tool,
+    stream_tools,
 )
 
 # ---------------------------------------------------------------------------
@@ -51,6 +57,378 @@ class TestDispatchTool:
         assert "2024-01-01" in result
 
 
+# ---------------------------------------------------------------------------
+# Thread pools
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestToolPools:
+    @pytest.fixture(autouse=True)
+    def fresh_flights(self):
+        with patch("src.tools.dispatcher._single_flight", _SingleFlight()):
+            yield
+
+    @pytest.mark.parametrize(
+        ("tool", "pool"),
+        [
+            ("get_stock_data", "tool-market_data"),
+            ("search_market_news", "tool-news"),
+            ("get_account_info", "tool-brokers"),
+            ("run_parameter_sweep", "tool-cpu"),
+        ],
+    )
+    async def test_sync_tools_run_in_their_class_pool(self, tool, pool):
+        def where(inp):
+            return {"thread": threading.current_thread().name}
+
+        with patch.dict("src.tools.dispatcher._SYNC_DISPATCH", {tool: where}):
+            result = json.loads(await dispatch_tool(tool, {}))
+        assert result["thread"].startswith(pool)
+
+    async def test_trading_mode_switches_on_the_event_loop(self):
+        thread = threading.current_thread().name
+        seen = []
+        with patch.dict(
+            "src.tools.dispatcher._SYNC_DISPATCH",
+            {"set_trading_mode": lambda inp: seen.append(threading.current_thread().name)},
+        ):
+            await dispatch_tool("set_trading_mode", {"mode": "recommend"})
+        assert seen == [thread]
+
+    async def test_orders_are_routed_in_the_broker_pool(self):
+        threads = []
+
+        def route(*args):
+            threads.append(threading.current_thread().name)
+            return {"order_id": "1", "status": "submitted"}
+
+        with patch("src.tools.dispatcher._route_order", side_effect=route):
+            with patch("src.tools.dispatcher.async_session", side_effect=RuntimeError("no db")):
+                await dispatch_tool(
+                    "confirm_trade",
+                    {"broker": "alpaca", "symbol": "AAPL", "side": "buy", "quantity": 1},
+                )
+        with patch("src.tools.dispatcher._cancel_order", side_effect=route):
+            await dispatch_tool("cancel_order", {"broker": "alpaca", "order_id": "1"})
+        assert [name.split("_")[0] for name in threads] == ["tool-brokers", "tool-brokers"]
+
+    async def test_orders_are_not_abandoned_on_the_broker_timeout(self):
+        from src.tools.tool_pools import ToolPool
+
+        def route(*args):
+            time.sleep(0.2)
+            return {"order_id": "42", "status": "submitted"}
+
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.commit = AsyncMock()
+        brokers = ToolPool("brokers", workers=1, timeout=0.05)
+        try:
+            with (
+                patch("src.tools.dispatcher.get_tool_pool", return_value=brokers),
+                patch("src.tools.dispatcher._route_order", side_effect=route),
+                patch("src.tools.dispatcher._cancel_order", side_effect=route),
+                patch("src.tools.dispatcher.async_session", return_value=session),
+            ):
+                order = json.loads(
+                    await dispatch_tool(
+                        "confirm_trade",
+                        {"broker": "alpaca", "symbol": "AAPL", "side": "buy", "quantity": 1},
+                    )
+                )
+                cancel = json.loads(
+                    await dispatch_tool("cancel_order", {"broker": "alpaca", "order_id": "42"})
+                )
+        finally:
+            brokers.shutdown()
+        assert order["order_id"] == cancel["order_id"] == "42"
+        assert session.add.call_args.args[0].broker_order_id == "42"
+        assert brokers.stats()["timed_out"] == 0
+
+    async def test_timeout_is_reported_as_a_tool_error(self):
+        from src.tools.tool_pools import ToolPool
+
+        release = threading.Event()
+        slow = ToolPool("market_data", workers=1, timeout=0.05)
+        try:
+            with patch("src.tools.dispatcher.get_tool_pool", return_value=slow):
+                with patch.dict(
+                    "src.tools.dispatcher._SYNC_DISPATCH",
+                    {"get_stock_data": lambda inp: release.wait(5)},
+                ):
+                    result = json.loads(await dispatch_tool("get_stock_data", {"symbol": "X"}))
+        finally:
+            release.set()
+            slow.shutdown()
+        assert result["tool"] == "get_stock_data"
+        assert result["error"].startswith("Timed out after 0.05s in the market_data pool")
+
+
+# ---------------------------------------------------------------------------
+# Parallel tool calls
+# ---------------------------------------------------------------------------
+
+
+def _timed_dispatch(delays: dict[str, float], log: list[str]):
+    """A ``dispatch_tool`` stand-in that sleeps per tool and logs starts and ends."""
+
+    async def dispatch(name, inp):
+        log.append(f"start {name}")
+        await asyncio.sleep(delays.get(name, 0))
+        log.append(f"end {name}")
+        return json.dumps({"tool": name})
+
+    return dispatch
+
+
+@pytest.mark.unit
+class TestStreamTools:
+    async def test_read_only_calls_run_concurrently_with_results_in_call_order(self):
+        log: list[str] = []
+        delays = {"get_stock_data": 0.2, "search_market_news": 0.0, "get_quote": 0.1}
+        calls = [(name, {}, f"id-{i}") for i, name in enumerate(delays)]
+        with patch("src.tools.dispatcher.dispatch_tool", side_effect=_timed_dispatch(delays, log)):
+            events = [e async for e in stream_tools(calls)]
+
+        assert [(e["type"], e["id"]) for e in events] == [
+            ("tool_call", "id-0"),
+            ("tool_call", "id-1"),
+            ("tool_call", "id-2"),
+            ("tool_result", "id-0"),
+            ("tool_result", "id-1"),
+            ("tool_result", "id-2"),
+        ]
+        assert json.loads(events[3]["result"]) == {"tool": "get_stock_data"}
+        assert log[:3] == ["start get_stock_data", "start search_market_news", "start get_quote"]
+        assert log[3:] == ["end search_market_news", "end get_quote", "end get_stock_data"]
+
+    async def test_concurrency_is_capped(self):
+        running = peak = 0
+
+        async def dispatch(name, inp):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return "{}"
+
+        calls = [("get_quote", {}, str(i)) for i in range(7)]
+        with patch("src.tools.dispatcher.settings.agent_max_parallel_tools", 3):
+            with patch("src.tools.dispatcher.dispatch_tool", side_effect=dispatch):
+                events = [e async for e in stream_tools(calls)]
+        assert peak == 3
+        assert [e["id"] for e in events if e["type"] == "tool_result"] == [str(i) for i in range(7)]
+
+    async def test_trade_tools_run_alone_in_order(self):
+        log: list[str] = []
+        delays = {"get_quote": 0.05, "get_account_info": 0.0, "get_stock_data": 0.0}
+        calls = [
+            ("get_quote", {}, "a"),
+            ("execute_trade", {}, "b"),
+            ("cancel_order", {}, "c"),
+            ("get_account_info", {}, "d"),
+            ("get_stock_data", {}, "e"),
+        ]
+        with patch("src.tools.dispatcher.dispatch_tool", side_effect=_timed_dispatch(delays, log)):
+            events = [e async for e in stream_tools(calls)]
+
+        assert log == [
+            "start get_quote",
+            "end get_quote",
+            "start execute_trade",
+            "end execute_trade",
+            "start cancel_order",
+            "end cancel_order",
+            "start get_account_info",
+            "start get_stock_data",
+            "end get_account_info",
+            "end get_stock_data",
+        ]
+        assert [(e["type"], e["id"]) for e in events] == [
+            ("tool_call", "a"),
+            ("tool_result", "a"),
+            ("tool_call", "b"),
+            ("tool_result", "b"),
+            ("tool_call", "c"),
+            ("tool_result", "c"),
+            ("tool_call", "d"),
+            ("tool_call", "e"),
+            ("tool_result", "d"),
+            ("tool_result", "e"),
+        ]
+
+    async def test_progress_passes_through_before_earlier_results(self):
+        from src.tools.dispatcher import _progress_sink
+
+        async def dispatch(name, inp):
+            if name == "get_stock_data":
+                await asyncio.sleep(0.05)
+            else:
+                _progress_sink.get()({"stage": "running", "progress": 0.5})
+            return "{}"
+
+        calls = [("get_stock_data", {}, "slow"), ("run_simulation", {}, "sim")]
+        with patch("src.tools.dispatcher.dispatch_tool", side_effect=dispatch):
+            events = [e async for e in stream_tools(calls)]
+        assert [(e["type"], e["id"]) for e in events[2:]] == [
+            ("tool_progress", "sim"),
+            ("tool_result", "slow"),
+            ("tool_result", "sim"),
+        ]
+
+    async def test_cancelling_the_consumer_cancels_running_calls(self):
+        cancelled = []
+
+        async def dispatch(name, inp):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+            return "{}"
+
+        calls = [("get_quote", {}, "a"), ("get_stock_data", {}, "b")]
+        with patch("src.tools.dispatcher.dispatch_tool", side_effect=dispatch):
+            events = stream_tools(calls)
+            assert (await anext(events))["type"] == "tool_call"
+            assert (await anext(events))["type"] == "tool_call"
+            pending = asyncio.ensure_future(anext(events))
+            await asyncio.sleep(0.01)
+            pending.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+            await asyncio.sleep(0.01)
+        assert sorted(cancelled) == ["get_quote", "get_stock_data"]
+
+
+# ---------------------------------------------------------------------------
+# Request coalescing
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestRequestCoalescing:
+    @pytest.fixture(autouse=True)
+    def fresh_flights(self):
+        with patch("src.tools.dispatcher._single_flight", _SingleFlight()):
+            yield
+
+    def _blocking_tool(self, release: threading.Event):
+        calls = []
+
+        def tool(inp):
+            calls.append(inp)
+            release.wait(5)
+            return {"calls": len(calls)}
+
+        return tool, calls
+
+    async def _release_after(self, release: threading.Event, tool: str, calls: int):
+        for _ in range(500):
+            if dispatch_stats()["tools"].get(tool, {}).get("calls", 0) >= calls:
+                break
+            await asyncio.sleep(0.01)
+        release.set()
+
+    async def test_identical_concurrent_calls_share_one_execution(self):
+        release = threading.Event()
+        tool, calls = self._blocking_tool(release)
+        with patch.dict("src.tools.dispatcher._SYNC_DISPATCH", {"get_stock_data": tool}):
+            results = await asyncio.gather(
+                dispatch_tool("get_stock_data", {"symbol": "SPY", "period": "1mo"}),
+                dispatch_tool("get_stock_data", {"period": "1mo", "symbol": "SPY"}),
+                self._release_after(release, "get_stock_data", 2),
+            )
+
+        assert len(calls) == 1
+        assert results[0] == results[1] == json.dumps({"calls": 1})
+        assert dispatch_stats()["tools"]["get_stock_data"] == {
+            "calls": 2,
+            "executions": 1,
+            "coalesced": 1,
+        }
+        assert dispatch_stats()["inflight"] == 0
+
+    async def test_different_inputs_run_separately(self):
+        release = threading.Event()
+        tool, calls = self._blocking_tool(release)
+        with patch.dict("src.tools.dispatcher._SYNC_DISPATCH", {"get_stock_data": tool}):
+            await asyncio.gather(
+                dispatch_tool("get_stock_data", {"symbol": "SPY"}),
+                dispatch_tool("get_stock_data", {"symbol": "QQQ"}),
+                self._release_after(release, "get_stock_data", 2),
+            )
+
+        assert len(calls) == 2
+        assert dispatch_stats()["tools"]["get_stock_data"]["coalesced"] == 0
+
+    async def test_sequential_calls_are_not_cached(self):
+        tool = MagicMock(return_value={"ok": True})
+        with patch.dict("src.tools.dispatcher._SYNC_DISPATCH", {"search_ticker": tool}):
+            await dispatch_tool("search_ticker", {"query": "apple"})
+            await dispatch_tool("search_ticker", {"query": "apple"})
+
+        assert tool.call_count == 2
+
+    async def test_side_effecting_tools_are_never_coalesced(self):
+        with patch(
+            "src.tools.dispatcher._dispatch", new=AsyncMock(return_value={"ok": True})
+        ) as dispatch:
+            await asyncio.gather(
+                dispatch_tool("cancel_order", {"broker": "alpaca", "order_id": "1"}),
+                dispatch_tool("cancel_order", {"broker": "alpaca", "order_id": "1"}),
+            )
+
+        assert dispatch.await_count == 2
+        assert "cancel_order" not in dispatch_stats()["tools"]
+
+    async def test_caller_on_another_thread_joins_the_flight(self):
+        release = threading.Event()
+        tool, calls = self._blocking_tool(release)
+        results: list[str] = []
+
+        def other_loop():
+            results.append(asyncio.run(dispatch_tool("get_market_overview", {})))
+
+        with patch.dict("src.tools.dispatcher._SYNC_DISPATCH", {"get_market_overview": tool}):
+            leader = asyncio.create_task(dispatch_tool("get_market_overview", {}))
+            await asyncio.sleep(0.05)
+            thread = threading.Thread(target=other_loop)
+            thread.start()
+            await self._release_after(release, "get_market_overview", 2)
+            results.append(await leader)
+            await asyncio.to_thread(thread.join, 5)
+
+        assert len(calls) == 1
+        assert results[0] == results[1]
+
+    async def test_error_result_is_shared(self):
+        release = threading.Event()
+
+        def failing(inp):
+            release.wait(5)
+            raise RuntimeError("rate limited")
+
+        with patch.dict("src.tools.dispatcher._SYNC_DISPATCH", {"get_options_chain": failing}):
+            results = await asyncio.gather(
+                dispatch_tool("get_options_chain", {"symbol": "AAPL"}),
+                dispatch_tool("get_options_chain", {"symbol": "AAPL"}),
+                self._release_after(release, "get_options_chain", 2),
+            )
+
+        assert (
+            json.loads(results[0])
+            == json.loads(results[1])
+            == {
+                "error": "rate limited",
+                "tool": "get_options_chain",
+            }
+        )
+
+
 # ---------------------------------------------------------------------------
 # _set_trading_mode
 # ---------------------------------------------------------------------------
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import MagicMock, PropertyMock, patch
 
 import pandas as pd
 import pytest
@@ -12,9 +13,13 @@ from src.tools.market_data import (
     _clean_option_list,
     _df_to_records,
     _option_rows,
+    _us_market_open,
+    get_market_overview,
     get_options_chain,
     get_stock_data,
     get_technical_indicators,
+    scan_technical_signals,
+    search_ticker,
 )
 
 # ---------------------------------------------------------------------------
@@ -258,29 +263,164 @@ class TestCleanOptionList:
 
 @pytest.mark.unit
 class TestGetStockData:
-    def _mock_ticker(self):
-        mock = MagicMock()
-        mock.history.return_value = pd.DataFrame(
-            {"Open": [100.0], "High": [105.0], "Low": [98.0], "Close": [102.0], "Volume": [1000]},
+    def _ohlcv(self, close: float = 102.0) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"Open": [100.0], "High": [105.0], "Low": [98.0], "Close": [close], "Volume": [1000]},
             index=pd.date_range("2024-01-01", periods=1),
         )
+
+    def _batch(self, frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Build a yf.download(group_by='ticker') style frame with (symbol, field) columns."""
+        return pd.concat(frames, axis=1)
+
+    def _mock_ticker(self):
+        mock = MagicMock()
         mock.info = {"longName": "Apple Inc.", "currentPrice": 102.0, "marketCap": 2e12}
         return mock
 
     def test_returns_data_for_symbol(self):
-        with patch("src.tools.market_data.yf.Ticker", return_value=self._mock_ticker()):
+        with (
+            patch(
+                "src.tools.market_data.yf.download",
+                return_value=self._batch({"AAPL": self._ohlcv()}),
+            ),
+            patch("src.tools.market_data.yf.Ticker", return_value=self._mock_ticker()),
+        ):
             result = get_stock_data(["AAPL"])
         assert "AAPL" in result
         assert result["AAPL"]["company_name"] == "Apple Inc."
+        assert result["AAPL"]["candles"][0]["close"] == 102.0
+
+    def test_multiple_symbols_use_single_download(self):
+        batch = self._batch({"AAPL": self._ohlcv(102.0), "MSFT": self._ohlcv(400.0)})
+        with (
+            patch("src.tools.market_data.yf.download", return_value=batch) as mock_download,
+            patch("src.tools.market_data.yf.Ticker", return_value=self._mock_ticker()),
+        ):
+            result = get_stock_data(["AAPL", "MSFT"])
+        mock_download.assert_called_once()
+        assert result["AAPL"]["candles"][0]["close"] == 102.0
+        assert result["MSFT"]["candles"][0]["close"] == 400.0
+
+    def test_symbol_missing_from_batch_has_no_candles(self):
+        with (
+            patch(
+                "src.tools.market_data.yf.download",
+                return_value=self._batch({"AAPL": self._ohlcv()}),
+            ),
+            patch("src.tools.market_data.yf.Ticker", return_value=self._mock_ticker()),
+        ):
+            result = get_stock_data(["AAPL", "NOPE"])
+        assert result["NOPE"]["candles"] == []
+
+    def test_info_served_from_cache_on_repeat_calls(self):
+        ticker = self._mock_ticker()
+        with (
+            patch(
+                "src.tools.market_data.yf.download",
+                return_value=self._batch({"AAPL": self._ohlcv()}),
+            ),
+            patch("src.tools.market_data.yf.Ticker", return_value=ticker) as mock_ticker_cls,
+        ):
+            get_stock_data(["AAPL"])
+            result = get_stock_data(["AAPL"])
+        assert mock_ticker_cls.call_count == 1
+        assert result["AAPL"]["current_price"] == 102.0
 
     def test_exception_stored_as_error(self):
-        mock = MagicMock()
-        mock.history.side_effect = Exception("network error")
-        mock.info = {}
-        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+        with patch("src.tools.market_data.yf.download", side_effect=Exception("network error")):
             result = get_stock_data(["AAPL"])
         assert "error" in result["AAPL"]
 
+    def test_info_exception_stored_as_error_for_that_symbol_only(self):
+        good = self._mock_ticker()
+        bad = MagicMock()
+        type(bad).info = PropertyMock(side_effect=Exception("rate limited"))
+        batch = self._batch({"AAPL": self._ohlcv(), "MSFT": self._ohlcv()})
+        with (
+            patch("src.tools.market_data.yf.download", return_value=batch),
+            patch(
+                "src.tools.market_data.yf.Ticker",
+                side_effect=lambda sym: bad if sym == "MSFT" else good,
+            ),
+        ):
+            result = get_stock_data(["AAPL", "MSFT"])
+        assert "error" not in result["AAPL"]
+        assert "error" in result["MSFT"]
+
+
+# ---------------------------------------------------------------------------
+# get_market_overview
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestGetMarketOverview:
+    _INSTRUMENTS = {"S&P 500": "^GSPC", "Gold": "GC=F"}
+
+    def _ticker(self, price: float, prev_close: float):
+        mock = MagicMock()
+        mock.info = {"regularMarketPrice": price, "regularMarketPreviousClose": prev_close}
+        return mock
+
+    def test_computes_change_pct(self):
+        with patch("src.tools.market_data.yf.Ticker", return_value=self._ticker(110.0, 100.0)):
+            result = get_market_overview(self._INSTRUMENTS, timeout=5)
+        assert result["partial"] is False
+        assert result["markets"]["Gold"] == {"symbol": "GC=F", "price": 110.0, "change_pct": 10.0}
+
+    def test_instruments_fetched_concurrently(self):
+        # Each lookup blocks until both have started: a sequential fetch would time out.
+        barrier = threading.Barrier(len(self._INSTRUMENTS), timeout=2)
+
+        def ticker(sym):
+            barrier.wait()
+            return self._ticker(100.0, 100.0)
+
+        with patch("src.tools.market_data.yf.Ticker", side_effect=ticker):
+            result = get_market_overview(self._INSTRUMENTS, timeout=5)
+        assert result["partial"] is False
+        assert all("error" not in entry for entry in result["markets"].values())
+
+    def test_slow_instrument_returns_partial_snapshot(self):
+        release = threading.Event()
+
+        def ticker(sym):
+            if sym == "GC=F":
+                release.wait(5)
+            return self._ticker(100.0, 99.0)
+
+        try:
+            with patch("src.tools.market_data.yf.Ticker", side_effect=ticker):
+                result = get_market_overview(self._INSTRUMENTS, timeout=0.2)
+        finally:
+            release.set()
+        assert result["partial"] is True
+        assert result["markets"]["S&P 500"]["price"] == 100.0
+        assert "timed out" in result["markets"]["Gold"]["error"]
+
+    def test_failed_instrument_reported_as_error(self):
+        bad = MagicMock()
+        type(bad).info = PropertyMock(side_effect=Exception("rate limited"))
+        with patch(
+            "src.tools.market_data.yf.Ticker",
+            side_effect=lambda sym: bad if sym == "GC=F" else self._ticker(100.0, 100.0),
+        ):
+            result = get_market_overview(self._INSTRUMENTS, timeout=5)
+        assert result["partial"] is False
+        assert result["markets"]["Gold"] == {"symbol": "GC=F", "error": "rate limited"}
+
+    def test_instrument_list_from_settings(self):
+        cfg = MagicMock()
+        cfg.market_overview_instruments_map = {"Bitcoin": "BTC-USD"}
+        cfg.market_overview_timeout_seconds = 5.0
+        with (
+            patch("src.tools.market_data.settings", cfg),
+            patch("src.tools.market_data.yf.Ticker", return_value=self._ticker(1.0, 1.0)),
+        ):
+            result = get_market_overview()
+        assert list(result["markets"]) == ["Bitcoin"]
+
 
 # ---------------------------------------------------------------------------
 # get_technical_indicators (mocked yfinance)
@@ -302,14 +442,14 @@ class TestGetTechnicalIndicators:
                 "Close": prices,
                 "Volume": [1_000_000] * n,
             },
-            index=pd.date_range("2023-01-01", periods=n, freq="D"),
+            index=pd.date_range(end=pd.Timestamp.now().normalize(), periods=n, freq="D"),
         )
 
     def test_returns_expected_keys(self):
         df = self._make_price_df(60)
         mock = MagicMock()
         mock.history.return_value = df
-        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+        with patch("src.market.bar_store.yf.Ticker", return_value=mock):
             result = get_technical_indicators("AAPL")
         assert "rsi_14" in result
         assert "macd" in result
@@ -319,17 +459,100 @@ class TestGetTechnicalIndicators:
     def test_insufficient_data_returns_error(self):
         mock = MagicMock()
         mock.history.return_value = pd.DataFrame()  # empty
-        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+        with patch("src.market.bar_store.yf.Ticker", return_value=mock):
             result = get_technical_indicators("AAPL")
         assert "error" in result
 
     def test_yfinance_exception_returns_error(self):
         mock = MagicMock()
         mock.history.side_effect = RuntimeError("timeout")
-        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+        with patch("src.market.bar_store.yf.Ticker", return_value=mock):
             result = get_technical_indicators("AAPL")
         assert "error" in result
 
+    def test_repeat_calls_read_from_bar_store(self):
+        mock = MagicMock()
+        mock.history.return_value = self._make_price_df(60)
+        with patch("src.market.bar_store.yf.Ticker", return_value=mock):
+            first = get_technical_indicators("AAPL")
+            second = get_technical_indicators("AAPL")
+        mock.history.assert_called_once()
+        assert first == second
+
+
+# ---------------------------------------------------------------------------
+# scan_technical_signals
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestScanTechnicalSignals:
+    def _trend(self, n: int, step: float) -> pd.DataFrame:
+        import numpy as np
+
+        close = 100 + step * np.arange(n) + np.sin(np.arange(n))
+        return pd.DataFrame(
+            {
+                "Open": close,
+                "High": close + 1,
+                "Low": close - 1,
+                "Close": close,
+                "Volume": [1_000_000] * n,
+            },
+            index=pd.date_range(end=pd.Timestamp.now().normalize(), periods=n, freq="D"),
+        )
+
+    def _scan(self, frames: dict[str, pd.DataFrame], **kwargs) -> dict:
+        def ticker(sym):
+            mock = MagicMock()
+            mock.history.return_value = frames.get(sym, pd.DataFrame())
+            return mock
+
+        with patch("src.market.bar_store.yf.Ticker", side_effect=ticker):
+            return scan_technical_signals(symbols=list(frames), **kwargs)
+
+    def test_filters_select_matching_symbols(self):
+        frames = {"UP": self._trend(300, 0.5), "DOWN": self._trend(300, -0.2)}
+        result = self._scan(frames, filters=[{"field": "close", "op": ">", "value": "ema_200"}])
+        assert result["scanned"] == 2
+        assert [r["symbol"] for r in result["results"]] == ["UP"]
+        assert "Price above 200 EMA (uptrend)" in result["results"][0]["signals"]
+
+    def test_numeric_filter(self):
+        frames = {"UP": self._trend(300, 0.5), "DOWN": self._trend(300, -0.2)}
+        result = self._scan(frames, filters=[{"field": "rsi_14", "op": "<", "value": 50}])
+        assert [r["symbol"] for r in result["results"]] == ["DOWN"]
+
+    def test_values_match_single_symbol_tool(self):
+        frames = {"UP": self._trend(120, 0.5)}
+        result = self._scan(frames, period="6mo")
+        single = get_technical_indicators("UP", period="6mo")
+        row = result["results"][0]
+        assert row["rsi_14"] == single["rsi_14"]
+        assert row["macd"] == single["macd"]["macd"]
+        assert row["bb_upper"] == single["bollinger_bands"]["upper"]
+
+    def test_short_history_skipped(self):
+        frames = {"UP": self._trend(300, 0.5), "NEW": self._trend(5, 0.5)}
+        result = self._scan(frames)
+        assert result["skipped"] == {"NEW": "insufficient data"}
+        assert result["scanned"] == 1
+
+    def test_nan_fields_never_match(self):
+        # 60 bars: no EMA200 yet, so a filter on it cannot match.
+        frames = {"UP": self._trend(60, 0.5)}
+        result = self._scan(
+            frames, period="6mo", filters=[{"field": "close", "op": ">", "value": "ema_200"}]
+        )
+        assert result["matched"] == 0
+
+    def test_invalid_filter_returns_error(self):
+        result = scan_technical_signals(filters=[{"field": "pe", "op": "<", "value": 10}])
+        assert "error" in result
+
+    def test_unknown_universe_returns_error(self):
+        assert "error" in scan_technical_signals(universe="penny_stocks")
+
 
 # ---------------------------------------------------------------------------
 # get_options_chain (mocked yfinance)
@@ -380,3 +603,152 @@ class TestGetOptionsChain:
 
         assert "expiries" in result
         assert "2024-06-21" in result["expiries"]
+
+    def test_greeks_computed_from_spot_and_irx_rate(self):
+        exp = (pd.Timestamp.now() + pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+        underlying = MagicMock()
+        underlying.options = (exp,)
+        underlying.info = {"regularMarketPrice": 100.0}
+        chain = MagicMock()
+        chain.calls = pd.DataFrame(
+            {"strike": [95.0, 105.0], "bid": [6.0, 1.2], "ask": [6.4, 1.4], "lastPrice": [6.2, 1.3]}
+        )
+        chain.puts = pd.DataFrame(
+            {"strike": [95.0, 105.0], "bid": [0.9, 5.6], "ask": [1.1, 6.0], "lastPrice": [1.0, 5.8]}
+        )
+        underlying.option_chain.return_value = chain
+        irx = MagicMock()
+        irx.info = {"regularMarketPrice": 5.0}
+
+        with patch(
+            "src.tools.market_data.yf.Ticker",
+            side_effect=lambda sym: irx if sym == "^IRX" else underlying,
+        ):
+            result = get_options_chain("AAPL")
+
+        assert result["underlying_price"] == 100.0
+        assert result["risk_free_rate"] == pytest.approx(0.04879, abs=1e-5)  # ln(1.05)
+        calls = result["expiries"][exp]["calls"]
+        puts = result["expiries"][exp]["puts"]
+        assert 0.5 < calls[0]["delta"] < 1 and 0 < calls[1]["delta"] < 0.5
+        assert -0.5 < puts[0]["delta"] < 0 and puts[1]["delta"] < -0.5
+        assert all(0 < row["impliedVolatility"] < 1 for row in calls + puts)
+        assert all(row["theta"] < 0 and row["vega"] > 0 for row in calls + puts)
+
+    def _chain_ticker(self, expiries: tuple[str, ...], strikes: list[float]) -> MagicMock:
+        mock = MagicMock()
+        mock.options = expiries
+        mock.info = {"regularMarketPrice": 100.0}
+        side = pd.DataFrame(
+            {
+                "strike": strikes,
+                "bid": [1.0] * len(strikes),
+                "ask": [1.2] * len(strikes),
+                "lastPrice": [1.1] * len(strikes),
+                "impliedVolatility": [0.3] * len(strikes),
+                "openInterest": [10] * len(strikes),
+            }
+        )
+        chain = MagicMock()
+        chain.calls = side
+        chain.puts = side
+        mock.option_chain.return_value = chain
+        return mock
+
+    def test_expiries_fetched_concurrently(self):
+        expiries = ("2030-01-18", "2030-02-15", "2030-03-15")
+        mock = self._chain_ticker(expiries, [100.0])
+        barrier = threading.Barrier(len(expiries), timeout=2)
+        chain = mock.option_chain.return_value
+
+        def option_chain(exp):
+            barrier.wait()  # a serial fetch would never get all three here
+            return chain
+
+        mock.option_chain.side_effect = option_chain
+        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+            result = get_options_chain("AAPL")
+        assert all("calls" in result["expiries"][exp] for exp in expiries)
+
+    def test_chains_cached_per_symbol_and_expiry(self):
+        mock = self._chain_ticker(("2030-01-18", "2030-02-15"), [100.0])
+        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+            get_options_chain("AAPL")
+            get_options_chain("AAPL", expiry="2030-02-15")
+        assert mock.option_chain.call_count == 2
+
+    def test_moneyness_filter_keeps_nearest_strikes(self):
+        strikes = [float(k) for k in range(50, 151, 5)]
+        mock = self._chain_ticker(("2030-01-18",), strikes)
+        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+            result = get_options_chain("AAPL", moneyness=0.1, max_strikes=3)
+        calls = result["expiries"]["2030-01-18"]["calls"]
+        assert [row["strike"] for row in calls] == [95.0, 100.0, 105.0]
+
+    def test_moneyness_window_bounds_strikes(self):
+        strikes = [float(k) for k in range(50, 151, 5)]
+        mock = self._chain_ticker(("2030-01-18",), strikes)
+        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+            result = get_options_chain("AAPL", moneyness=0.1, max_strikes=50)
+        calls = result["expiries"]["2030-01-18"]["calls"]
+        assert [row["strike"] for row in calls] == [90.0, 95.0, 100.0, 105.0, 110.0]
+
+    def test_failed_expiry_reported_without_failing_chain(self):
+        mock = self._chain_ticker(("2030-01-18", "2030-02-15"), [100.0])
+        chain = mock.option_chain.return_value
+
+        def option_chain(exp):
+            if exp == "2030-02-15":
+                raise RuntimeError("rate limited")
+            return chain
+
+        mock.option_chain.side_effect = option_chain
+        with patch("src.tools.market_data.yf.Ticker", return_value=mock):
+            result = get_options_chain("AAPL")
+        assert "calls" in result["expiries"]["2030-01-18"]
+        assert result["expiries"]["2030-02-15"] == {"error": "rate limited"}
+
+
+@pytest.mark.unit
+class TestUsMarketOpen:
+    @pytest.mark.parametrize(
+        ("utc", "expected"),
+        [
+            ("2024-06-12 14:00", True),  # Wed 10:00 New York
+            ("2024-06-12 13:00", False),  # Wed 09:00, before the open
+            ("2024-06-12 20:30", False),  # Wed 16:30, after the close
+            ("2024-06-15 15:00", False),  # Saturday
+            ("2024-01-10 15:00", True),  # Wed 10:00 EST (no DST)
+        ],
+    )
+    def test_regular_session(self, utc, expected):
+        assert _us_market_open(pd.Timestamp(utc, tz="UTC").to_pydatetime()) is expected
+
+
+@pytest.mark.unit
+class TestSearchTicker:
+    def test_index_hit_skips_network(self):
+        with patch("src.tools.market_data.yf.Search") as search:
+            result = search_ticker("nvidia")
+        search.assert_not_called()
+        assert result["source"] == "index"
+        assert result["results"][0] == {
+            "symbol": "NVDA",
+            "name": "NVIDIA Corporation",
+            "type": "EQUITY",
+            "exchange": "NASDAQ",
+        }
+
+    def test_index_miss_falls_back_to_yahoo(self):
+        quotes = [{"symbol": "ZZZZ", "longname": "Obscure Co", "quoteType": "EQUITY"}]
+        with patch("src.tools.market_data.yf.Search") as search:
+            search.return_value.quotes = quotes
+            result = search_ticker("obscure widget maker")
+        search.assert_called_once()
+        assert result["source"] == "yahoo"
+        assert result["results"][0]["symbol"] == "ZZZZ"
+
+    def test_network_error(self):
+        with patch("src.tools.market_data.yf.Search", side_effect=RuntimeError("offline")):
+            result = search_ticker("obscure widget maker")
+        assert result == {"error": "offline", "query": "obscure widget maker"}
@@ -0,0 +1,97 @@
+"""Unit tests for src/market/options_pricing.py."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from src.market.options_pricing import bs_price, greeks, implied_volatility, norm_cdf
+
+
+@pytest.mark.unit
+class TestNormCdf:
+    def test_matches_math_erfc(self):
+        x = np.linspace(-6, 6, 121)
+        expected = [0.5 * math.erfc(-v / math.sqrt(2)) for v in x]
+        np.testing.assert_allclose(norm_cdf(x), expected, rtol=2e-7, atol=1e-9)
+
+
+@pytest.mark.unit
+class TestBsPrice:
+    def test_reference_values(self):
+        # Hull, S=100 K=100 T=1 r=5% sigma=20%.
+        call, put = bs_price(100, 100, 1, 0.05, 0.2, np.array([True, False]))
+        assert call == pytest.approx(10.4506, abs=1e-4)
+        assert put == pytest.approx(5.5735, abs=1e-4)
+
+    def test_put_call_parity(self):
+        strike = np.array([80.0, 100.0, 120.0])
+        call = bs_price(100, strike, 0.5, 0.03, 0.25, True, div_yield=0.01)
+        put = bs_price(100, strike, 0.5, 0.03, 0.25, False, div_yield=0.01)
+        parity = 100 * math.exp(-0.01 * 0.5) - strike * math.exp(-0.03 * 0.5)
+        np.testing.assert_allclose(call - put, parity, atol=1e-5)
+
+
+@pytest.mark.unit
+class TestGreeks:
+    def _bump(self, **kwargs):
+        base = {"spot": 100.0, "strike": 105.0, "t": 0.4, "rate": 0.04, "sigma": 0.3}
+        base.update(kwargs)
+        return base
+
+    @pytest.mark.parametrize("is_call", [True, False])
+    def test_match_finite_differences(self, is_call):
+        p = self._bump()
+        g = greeks(**p, is_call=is_call)
+
+        def price(**kw):
+            return float(bs_price(**self._bump(**kw), is_call=is_call))
+
+        h = 1e-3
+        delta = (price(spot=100 + h) - price(spot=100 - h)) / (2 * h)
+        gamma = (price(spot=100 + h) - 2 * price() + price(spot=100 - h)) / h**2
+        vega = (price(sigma=0.3 + h) - price(sigma=0.3 - h)) / (2 * h) / 100
+        rho = (price(rate=0.04 + h) - price(rate=0.04 - h)) / (2 * h) / 100
+        theta = -(price(t=0.4 + h) - price(t=0.4 - h)) / (2 * h) / 365
+
+        assert float(g["delta"]) == pytest.approx(delta, rel=1e-4)
+        assert float(g["gamma"]) == pytest.approx(gamma, rel=1e-2)
+        assert float(g["vega"]) == pytest.approx(vega, rel=1e-4)
+        assert float(g["rho"]) == pytest.approx(rho, rel=1e-4)
+        assert float(g["theta"]) == pytest.approx(theta, rel=1e-4)
+
+    def test_broadcasts_over_chain(self):
+        strike = np.linspace(50, 150, 201)
+        g = greeks(100.0, strike, 0.25, 0.04, 0.3, strike > 100)
+        assert all(v.shape == strike.shape for v in g.values())
+        assert ((g["delta"][strike > 100] > 0) & (g["delta"][strike > 100] < 1)).all()
+        assert (g["delta"][strike <= 100] < 0).all()
+
+
+@pytest.mark.unit
+class TestImpliedVolatility:
+    def test_recovers_sigma_across_chain(self):
+        strike = np.tile(np.linspace(85, 115, 25), 2)
+        is_call = np.repeat([True, False], 25)
+        t = np.repeat([0.1, 0.5], 25)
+        sigma = np.linspace(0.15, 0.8, 50)
+        price = bs_price(100.0, strike, t, 0.04, sigma, is_call)
+        solved = implied_volatility(price, 100.0, strike, t, 0.04, is_call)
+        np.testing.assert_allclose(solved, sigma, rtol=1e-4)
+
+    def test_prices_outside_arbitrage_bounds_are_nan(self):
+        # Below intrinsic, above the underlying, zero, and NaN.
+        price = np.array([5.0, 150.0, 0.0, np.nan])
+        strike = np.array([80.0, 100.0, 100.0, 100.0])
+        iv = implied_volatility(price, 100.0, strike, 0.5, 0.04, True)
+        assert np.isnan(iv).all()
+
+    def test_no_time_value_is_nan(self):
+        # Deep in the money and nearly expired: the price carries no volatility information.
+        price = bs_price(100.0, 50.0, 0.01, 0.04, 0.2, True)
+        assert np.isnan(implied_volatility(price, 100.0, 50.0, 0.01, 0.04, True))
+
+    def test_expired_contract_is_nan(self):
+        assert np.isnan(implied_volatility(5.0, 100.0, 100.0, 0.0, 0.04, True))
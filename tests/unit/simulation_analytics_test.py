@@ -0,0 +1,157 @@
+"""Unit tests for src/simulation/analytics.py and the metrics built on it."""
+
+from __future__ import annotations
+
+import math
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.analytics import (
+    align_curves,
+    drawdown_durations,
+    metric_rows,
+    rolling_sharpe,
+    rolling_volatility,
+    summarise,
+)
+from src.simulation.strategies import _sma_crossover
+from src.simulation.sweep import evaluate
+from src.tools.simulator import _metrics, run_simulation
+
+
+def _curves(seed: int = 4, days: int = 600, curves: int = 5) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2021-01-01", periods=days, freq="D")
+    return index, 1_000 * np.cumprod(1 + rng.normal(0.0004, 0.015, (days, curves)), axis=0)
+
+
+def _reference(values: np.ndarray, index: pd.DatetimeIndex) -> dict:
+    """One curve, the long way round with pandas."""
+    equity = pd.Series(values, index=index)
+    r = equity.pct_change().dropna()
+    years = (index[-1] - index[0]).days / 365.25
+    cagr = (equity.iloc[-1] / equity.iloc[0]) ** (1 / years) - 1
+    max_dd = (equity / equity.cummax() - 1).min()
+    downside = math.sqrt((r.clip(upper=0) ** 2).mean())
+    return {
+        "cagr_pct": cagr * 100,
+        "sharpe_ratio": r.mean() / r.std() * math.sqrt(252),
+        "sortino_ratio": r.mean() / downside * math.sqrt(252),
+        "calmar_ratio": cagr / -max_dd,
+        "max_drawdown_pct": max_dd * 100,
+        "hit_rate_pct": (r > 0).sum() / (r != 0).sum() * 100,
+    }
+
+
+@pytest.mark.unit
+class TestSummarise:
+    def test_every_column_matches_the_single_curve_reference(self):
+        index, equity = _curves()
+        metrics = summarise(equity, index=index)
+        for j in range(equity.shape[1]):
+            for name, expected in _reference(equity[:, j], index).items():
+                assert metrics[name][j] == pytest.approx(expected, rel=1e-9), name
+
+    def test_drawdown_duration(self):
+        equity = np.array([100.0, 120.0, 110.0, 100.0, 125.0, 90.0])
+        assert drawdown_durations(equity).tolist() == [3]  # peak on bar 1, recovered on bar 4
+        index = pd.DatetimeIndex(
+            ["2024-01-01", "2024-01-02", "2024-01-05", "2024-01-08", "2024-01-09", "2024-01-10"]
+        )
+        assert drawdown_durations(equity, index).tolist() == [7]
+        assert drawdown_durations(np.array([1.0, 2.0, 3.0])).tolist() == [0]
+
+    def test_unrecovered_drawdown_runs_to_the_last_bar(self):
+        assert drawdown_durations(np.array([5.0, 4.0, 3.0, 4.0])).tolist() == [3]
+
+    def test_beta_and_alpha(self):
+        index, equity = _curves(curves=1)
+        bench = equity[:, 0]
+        r = bench[1:] / bench[:-1] - 1
+        levered = 1_000 * np.concatenate(([1.0], np.cumprod(1 + 2 * r)))
+        padded = bench.copy()
+        padded[:10] = np.nan  # benchmark history starting later
+        metrics = summarise(np.column_stack((levered, bench)), index=index, benchmark=padded)
+        assert metrics["beta"] == pytest.approx([2.0, 1.0])
+        assert metrics["alpha_pct"][1] == pytest.approx(0.0, abs=1e-9)
+
+    def test_hit_rate_ignores_flat_bars(self):
+        equity = np.array([100.0, 100.0, 110.0, 100.0, 100.0, 120.0])
+        assert summarise(equity)["hit_rate_pct"].tolist() == pytest.approx([200 / 3])
+
+    def test_flat_curve(self):
+        metrics = metric_rows(summarise(np.full(10, 50.0)))[0]
+        assert metrics["sharpe_ratio"] == 0.0
+        assert metrics["sortino_ratio"] == 0.0
+        assert metrics["calmar_ratio"] == 0.0
+        assert metrics["max_drawdown_bars"] == 0
+        assert metrics["hit_rate_pct"] is None
+
+    def test_annual_turnover(self):
+        index, equity = _curves(days=366, curves=2)  # 2021 is one year
+        turnover = np.zeros_like(equity)
+        turnover[::30, 0] = 0.5
+        metrics = summarise(equity, index=index, turnover=turnover)
+        assert metrics["annual_turnover"] == pytest.approx([6.5, 0.0], rel=1e-3)
+
+
+@pytest.mark.unit
+class TestRolling:
+    def test_matches_pandas_rolling(self):
+        index, equity = _curves(curves=3)
+        r = pd.DataFrame(equity).pct_change()
+        vol = r.rolling(63).std() * math.sqrt(252) * 100
+        sharpe = r.rolling(63).mean() / r.rolling(63).std() * math.sqrt(252)
+        np.testing.assert_allclose(rolling_volatility(equity, 63), vol.to_numpy(), rtol=1e-8)
+        np.testing.assert_allclose(rolling_sharpe(equity, 63), sharpe.to_numpy(), rtol=1e-8)
+
+    def test_too_short(self):
+        assert np.isnan(rolling_sharpe(np.ones(10), 63)).all()
+
+
+@pytest.mark.unit
+class TestMetricRowsAndAlignment:
+    def test_rows_are_rounded_per_metric(self):
+        rows = metric_rows({"sharpe_ratio": np.array([1.23456]), "cagr_pct": np.array([7.891])})
+        assert rows == [{"sharpe_ratio": 1.235, "cagr_pct": 7.89}]
+
+    def test_align_curves_keeps_the_shared_span(self):
+        frame = align_curves(
+            {
+                "a": [{"date": "2024-01-07", "value": 1.0}, {"date": "2024-01-21", "value": 2.0}],
+                "b": [{"date": "2024-01-14", "value": 5.0}, {"date": "2024-01-28", "value": 6.0}],
+            }
+        )
+        assert frame.index.strftime("%Y-%m-%d").tolist() == ["2024-01-14", "2024-01-21"]
+        assert frame.to_numpy().tolist() == [[1.0, 5.0], [2.0, 5.0]]
+
+
+@pytest.mark.unit
+class TestCallers:
+    def test_sweep_rows_match_single_curve_metrics(self):
+        index, equity = _curves(curves=2)
+        prices = pd.DataFrame(equity, index=index, columns=["AAA", "BBB"])
+        combos = [{"fast": 5, "slow": 20}, {"fast": 10, "slow": 50}]
+        rows = evaluate(prices, "sma_crossover", combos, 10_000.0)
+        for row, combo in zip(rows, combos, strict=True):
+            curve, _ = _sma_crossover(prices, 10_000.0, **combo)
+            assert {k: row[k] for k in _metrics(curve)} == _metrics(curve)
+
+    def test_run_simulation_benchmark_is_measured_not_traded(self):
+        index, equity = _curves(curves=2)
+        prices = pd.DataFrame(equity, index=index, columns=["AAA", "SPY"])
+        with patch("src.tools.simulator._download", return_value=prices) as download:
+            result = run_simulation(
+                name="b",
+                symbols=["AAA"],
+                strategy={"type": "buy_and_hold"},
+                period_start="2021-01-01",
+                benchmark="SPY",
+            )
+        assert download.call_args.args[0] == ["AAA", "SPY"]
+        assert [t["symbol"] for t in result["trades_sample"]] == ["AAA", "AAA"]
+        assert result["benchmark"] == "SPY"
+        assert "beta" in result and "alpha_pct" in result
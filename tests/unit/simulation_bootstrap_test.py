@@ -0,0 +1,100 @@
+"""Unit tests for src/simulation/bootstrap.py and run_simulation's Monte Carlo stage."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.bootstrap import PERCENTILES, block_indices, bootstrap
+from src.tools.simulator import _metrics, run_simulation
+
+
+def _returns(seed: int = 1, days: int = 500) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0.0005, 0.01, days)
+
+
+@pytest.mark.unit
+class TestBlockIndices:
+    def test_blocks_are_consecutive_and_wrap_around(self):
+        idx = block_indices(20, 50, 5, np.random.default_rng(0))
+        assert idx.shape == (50, 20)
+        blocks = idx.reshape(50, 4, 5)
+        assert (np.diff(blocks, axis=2) % 20 == 1).all()
+        assert idx.min() >= 0 and idx.max() < 20
+
+    def test_last_partial_block_is_truncated(self):
+        idx = block_indices(7, 3, 5, np.random.default_rng(0))
+        assert idx.shape == (3, 7)
+
+    def test_block_longer_than_series(self):
+        idx = block_indices(4, 2, 10, np.random.default_rng(0))
+        assert idx.shape == (2, 4)
+
+
+@pytest.mark.unit
+class TestBootstrap:
+    def test_bands_are_ordered(self):
+        result = bootstrap(_returns(), 10_000.0, n_paths=500, seed=3)
+        for key in ("final_value", "total_return_pct", "max_drawdown_pct", "sharpe_ratio"):
+            values = [result[key][f"p{p}"] for p in PERCENTILES]
+            assert values == sorted(values)
+        assert result["paths"] == 500
+        assert 0 <= result["probability_of_loss_pct"] <= 100
+
+    def test_chunking_does_not_change_the_result(self):
+        returns = _returns(days=300)
+        whole = bootstrap(returns, 1_000.0, n_paths=400, chunk_mb=64, seed=9)
+        # Budget so small that every path is its own chunk.
+        chunked = bootstrap(returns, 1_000.0, n_paths=400, chunk_mb=0, seed=9)
+        assert chunked == whole
+
+    def test_single_path_block_matches_history(self):
+        # One block covering the whole series, starting at day 0, is the series itself.
+        returns = _returns(days=250)
+        equity = 10_000.0 * np.cumprod(1 + returns)
+        series = pd.Series(np.concatenate(([10_000.0], equity)))
+        with patch("src.simulation.bootstrap.block_indices", return_value=np.arange(250)[None]):
+            result = bootstrap(returns, 10_000.0, n_paths=1, block_size=250)
+        expected = _metrics(series)
+        assert result["final_value"]["p50"] == round(equity[-1], 2)
+        assert result["max_drawdown_pct"]["p50"] == expected["max_drawdown_pct"]
+        assert result["sharpe_ratio"]["p50"] == expected["sharpe_ratio"]
+
+    def test_flat_returns(self):
+        result = bootstrap(np.zeros(50), 100.0, n_paths=10, seed=0)
+        assert result["final_value"] == {f"p{p}": 100.0 for p in PERCENTILES}
+        assert result["max_drawdown_pct"]["p5"] == 0.0
+        assert result["sharpe_ratio"]["p50"] == 0.0
+        assert result["probability_of_loss_pct"] == 0.0
+
+    def test_paths_are_capped(self):
+        assert bootstrap(np.zeros(5), 1.0, n_paths=10**9, seed=0)["paths"] == 10_000
+
+
+@pytest.mark.unit
+class TestRunSimulationMonteCarlo:
+    def _run(self, **kwargs):
+        dates = pd.date_range("2023-01-01", periods=300, freq="D")
+        prices = pd.DataFrame({"AAPL": 100 * np.cumprod(1 + _returns(days=300))}, index=dates)
+        with patch("src.tools.simulator._download", return_value=prices):
+            return run_simulation(
+                name="mc",
+                symbols=["AAPL"],
+                strategy={"type": "buy_and_hold"},
+                period_start="2023-01-01",
+                **kwargs,
+            )
+
+    def test_off_by_default(self):
+        assert "monte_carlo" not in self._run()
+
+    def test_bands_alongside_metrics(self):
+        result = self._run(monte_carlo_paths=300, bootstrap_block_days=5)
+        mc = result["monte_carlo"]
+        assert mc["paths"] == 300
+        assert mc["block_days"] == 5
+        assert mc["final_value"]["p5"] <= mc["final_value"]["p95"]
+        assert "sharpe_ratio" in result
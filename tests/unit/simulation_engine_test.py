@@ -0,0 +1,315 @@
+"""Unit tests for src/simulation/engine.py and the strategies built on it."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import RSIIndicator
+
+from src.simulation.costs import BROKER_COMMISSIONS, Commission, Slippage, average_true_range
+from src.simulation.engine import crossover_signals, position_state, simulate_long_flat
+from src.simulation.strategies import _rsi_mean_reversion, _sma_crossover, run_strategy
+
+# ---------------------------------------------------------------------------
+# Reference: the bar-by-bar loops the vectorized strategies replaced
+# ---------------------------------------------------------------------------
+
+
+def _crossover_signal(sma_fast: pd.Series, sma_slow: pd.Series, i: int) -> str | None:
+    """Return 'buy', 'sell', or None based on fast/slow SMA crossover at index i."""
+    if sma_fast.iloc[i] > sma_slow.iloc[i] and sma_fast.iloc[i - 1] <= sma_slow.iloc[i - 1]:
+        return "buy"
+    if sma_fast.iloc[i] < sma_slow.iloc[i] and sma_fast.iloc[i - 1] >= sma_slow.iloc[i - 1]:
+        return "sell"
+    return None
+
+
+def _loop_sma_crossover(prices, capital, fast, slow):
+    equity = pd.Series(0.0, index=prices.index)
+    trades = []
+    for sym in prices.columns:
+        p = prices[sym].dropna()
+        sma_fast = p.rolling(fast).mean()
+        sma_slow = p.rolling(slow).mean()
+        position = 0.0
+        sym_cash = capital / len(prices.columns)
+        sym_equity = pd.Series(sym_cash, index=prices.index)
+        for i in range(1, len(p)):
+            date = p.index[i]
+            signal = _crossover_signal(sma_fast, sma_slow, i)
+            if signal == "buy" and sym_cash > 0 and position == 0:
+                position = sym_cash / p.iloc[i]
+                sym_cash = 0.0
+                trades.append(
+                    {
+                        "date": str(date.date()),
+                        "action": "BUY",
+                        "symbol": sym,
+                        "price": round(p.iloc[i], 4),
+                        "shares": round(position, 4),
+                    }
+                )
+            elif signal == "sell" and position > 0:
+                sym_cash = position * p.iloc[i]
+                trades.append(
+                    {
+                        "date": str(date.date()),
+                        "action": "SELL",
+                        "symbol": sym,
+                        "price": round(p.iloc[i], 4),
+                        "proceeds": round(sym_cash, 2),
+                    }
+                )
+                position = 0.0
+            sym_equity.loc[date] = sym_cash + position * p.iloc[i]
+        equity += sym_equity
+    return equity, trades
+
+
+def _loop_rsi_mean_reversion(prices, capital, rsi_buy, rsi_sell):
+    equity = pd.Series(0.0, index=prices.index)
+    trades = []
+    for sym in prices.columns:
+        p = prices[sym].dropna()
+        rsi = RSIIndicator(close=p, window=14).rsi()
+        sym_cash = capital / len(prices.columns)
+        position = 0.0
+        sym_equity = pd.Series(sym_cash, index=prices.index)
+        for i in range(14, len(p)):
+            date = p.index[i]
+            r = rsi.iloc[i]
+            if r < rsi_buy and position == 0 and sym_cash > 0:
+                position = sym_cash / p.iloc[i]
+                sym_cash = 0.0
+                trades.append(
+                    {
+                        "date": str(date.date()),
+                        "action": "BUY",
+                        "symbol": sym,
+                        "rsi": round(r, 1),
+                        "price": round(p.iloc[i], 4),
+                        "shares": round(position, 4),
+                    }
+                )
+            elif r > rsi_sell and position > 0:
+                sym_cash = position * p.iloc[i]
+                trades.append(
+                    {
+                        "date": str(date.date()),
+                        "action": "SELL",
+                        "symbol": sym,
+                        "rsi": round(r, 1),
+                        "price": round(p.iloc[i], 4),
+                        "proceeds": round(sym_cash, 2),
+                    }
+                )
+                position = 0.0
+            sym_equity.loc[date] = sym_cash + position * p.iloc[i]
+        equity += sym_equity
+    return equity, trades
+
+
+def _bisect_shares(cash, price, commission):
+    """Most shares *cash* pays for, fee included, found by bisection."""
+    lo, hi = 0.0, cash / price
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        cost = mid * price + commission.fees(np.array(mid * price), np.array(mid))
+        lo, hi = (mid, hi) if cost <= cash else (lo, mid)
+    return lo
+
+
+def _loop_long_flat_with_costs(close, long, cash, commission, slippage, atr):
+    """Bar-by-bar reference: fill against the order, fee out of the balance."""
+    shares, idle, equity = 0.0, 0.0, []
+    for i in range(len(close)):
+        if long[i] and shares == 0 and idle == 0:
+            fill = slippage.fill(np.array([close[i]]), np.array([1.0]), atr[[i]])[0]
+            shares = _bisect_shares(cash, fill, commission)
+            idle, cash = (cash, 0.0) if shares == 0 else (0.0, 0.0)
+        elif not long[i] and (shares > 0 or idle > 0):
+            fill = slippage.fill(np.array([close[i]]), np.array([-1.0]), atr[[i]])[0]
+            fee = commission.fees(np.array(shares * fill), np.array(shares))
+            cash = shares * fill - float(fee) + idle
+            shares, idle = 0.0, 0.0
+        equity.append(shares * close[i] + idle + cash)
+    return np.array(equity)
+
+
+def _prices(seed: int = 7, days: int = 600) -> pd.DataFrame:
+    """Random walks on a calendar mixing 7-day (crypto) and 5-day (stock) symbols."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=days, freq="D")
+    walk = lambda vol: 100 * np.exp(np.cumsum(rng.normal(0, vol, days)))  # noqa: E731
+    prices = pd.DataFrame(
+        {"BTC-USD": walk(0.03), "AAPL": walk(0.015), "LATE": walk(0.02)}, index=dates
+    )
+    prices.loc[dates.dayofweek >= 5, ["AAPL", "LATE"]] = np.nan
+    prices.loc[dates[:150], "LATE"] = np.nan  # listed later than the others
+    return prices
+
+
+# ---------------------------------------------------------------------------
+# Engine primitives
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestPositionState:
+    def test_buy_then_sell(self):
+        buy = np.array([False, True, True, False, False, False])
+        sell = np.array([False, False, False, False, True, True])
+        assert position_state(buy, sell).tolist() == [False, True, True, True, False, False]
+
+    def test_sell_while_flat_is_ignored(self):
+        buy = np.array([False, False, True])
+        sell = np.array([True, False, False])
+        assert position_state(buy, sell).tolist() == [False, False, True]
+
+    def test_both_signals_flip_the_position(self):
+        buy = np.array([True, True, True, False, True])
+        sell = np.array([False, True, True, True, True])
+        assert position_state(buy, sell).tolist() == [True, False, True, False, True]
+
+    def test_empty(self):
+        assert position_state(np.array([], bool), np.array([], bool)).tolist() == []
+
+
+@pytest.mark.unit
+class TestCrossoverSignals:
+    def test_matches_scalar_crossover_signal(self):
+        rng = np.random.default_rng(1)
+        fast = pd.Series(rng.normal(size=200).cumsum()).rolling(5).mean()
+        slow = pd.Series(rng.normal(size=200).cumsum()).rolling(20).mean()
+        buy, sell = crossover_signals(fast.to_numpy(), slow.to_numpy())
+        for i in range(1, 200):
+            expected = _crossover_signal(fast, slow, i)
+            assert (expected == "buy") == buy[i]
+            assert (expected == "sell") == sell[i]
+        assert not buy[0] and not sell[0]
+
+
+@pytest.mark.unit
+class TestSimulateLongFlat:
+    def test_round_trip(self):
+        close = np.array([10.0, 10.0, 20.0, 40.0, 20.0])
+        run = simulate_long_flat(close, np.array([False, True, True, False, False]), 100.0)
+        assert run.entries.tolist() == [1]
+        assert run.exits.tolist() == [3]
+        assert run.shares.tolist() == [10.0]
+        assert run.proceeds.tolist() == [400.0]
+        assert run.equity.tolist() == [100.0, 100.0, 200.0, 400.0, 400.0]
+
+    def test_open_position_at_end(self):
+        close = np.array([10.0, 20.0])
+        run = simulate_long_flat(close, np.array([True, True]), 100.0)
+        assert run.exits.tolist() == []
+        assert run.equity.tolist() == [100.0, 200.0]
+
+    def test_no_cash_never_buys(self):
+        run = simulate_long_flat(np.array([1.0, 2.0]), np.array([True, True]), 0.0)
+        assert len(run.entries) == 0
+        assert run.equity.tolist() == [0.0, 0.0]
+
+    def test_round_trip_with_costs(self):
+        close = np.array([10.0, 10.0, 20.0, 40.0, 20.0])
+        long = np.array([False, True, True, False, False])
+        run = simulate_long_flat(
+            close, long, 101.0, commission=Commission(minimum=1.0), slippage=Slippage(bps=100)
+        )
+        assert run.buy_fills.tolist() == pytest.approx([10.1])
+        assert run.sell_fills.tolist() == pytest.approx([39.6])
+        assert run.shares.tolist() == pytest.approx([100 / 10.1])
+        assert run.buy_fees.tolist() == run.sell_fees.tolist() == [1.0]
+        assert run.proceeds.tolist() == pytest.approx([100 / 10.1 * 39.6 - 1.0])
+        assert run.equity[2] == pytest.approx(100 / 10.1 * 20.0)
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    @pytest.mark.parametrize(
+        ("commission", "slippage"),
+        [
+            (BROKER_COMMISSIONS["ibkr"], Slippage(spread_bps=5, atr_multiple=0.2)),
+            (BROKER_COMMISSIONS["coinbase"], Slippage(bps=3)),
+            (Commission(rate=0.001, minimum=20.0), Slippage(atr_multiple=0.5, atr_window=5)),
+        ],
+    )
+    def test_matches_loop_with_costs(self, seed, commission, slippage):
+        rng = np.random.default_rng(seed)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+        long = position_state(rng.random(300) < 0.1, rng.random(300) < 0.1)
+        atr = average_true_range(pd.DataFrame(close), slippage.atr_window)[:, 0]
+        run = simulate_long_flat(
+            close, long, 1_000.0, commission=commission, slippage=slippage, atr=atr
+        )
+        expected = _loop_long_flat_with_costs(close, long, 1_000.0, commission, slippage, atr)
+        np.testing.assert_allclose(run.equity, expected, rtol=1e-9)
+
+
+# ---------------------------------------------------------------------------
+# Parity with the bar-by-bar loops
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestStrategyParity:
+    @pytest.mark.parametrize("seed", [3, 7, 11])
+    @pytest.mark.parametrize(("fast", "slow"), [(5, 20), (20, 50)])
+    def test_sma_crossover_identical(self, seed, fast, slow):
+        prices = _prices(seed)
+        equity, trades = _sma_crossover(prices, 10_000.0, fast=fast, slow=slow)
+        ref_equity, ref_trades = _loop_sma_crossover(prices, 10_000.0, fast, slow)
+        assert trades == ref_trades
+        pd.testing.assert_series_equal(equity, ref_equity, check_exact=True)
+
+    @pytest.mark.parametrize("seed", [3, 7, 11])
+    @pytest.mark.parametrize(("rsi_buy", "rsi_sell"), [(30.0, 70.0), (45.0, 55.0), (60.0, 40.0)])
+    def test_rsi_mean_reversion_identical(self, seed, rsi_buy, rsi_sell):
+        # (60, 40) overlaps the thresholds, so some bars carry both signals.
+        prices = _prices(seed)
+        equity, trades = _rsi_mean_reversion(prices, 10_000.0, rsi_buy, rsi_sell)
+        ref_equity, ref_trades = _loop_rsi_mean_reversion(prices, 10_000.0, rsi_buy, rsi_sell)
+        assert trades == ref_trades
+        pd.testing.assert_series_equal(equity, ref_equity, check_exact=True)
+
+    def test_short_history(self):
+        prices = _prices(days=10)
+        equity, trades = _rsi_mean_reversion(prices, 10_000.0)
+        ref_equity, ref_trades = _loop_rsi_mean_reversion(prices, 10_000.0, 30.0, 70.0)
+        assert trades == ref_trades == []
+        pd.testing.assert_series_equal(equity, ref_equity, check_exact=True)
+
+
+@pytest.mark.unit
+class TestTradingCosts:
+    @pytest.mark.parametrize(
+        ("stype", "params"),
+        [
+            ("sma_crossover", {"fast": 5, "slow": 20}),
+            ("rsi_mean_reversion", {"rsi_buy": 45, "rsi_sell": 55}),
+            ("rules", {"entry": "close > sma(10)"}),
+        ],
+    )
+    def test_costs_lower_every_strategy(self, stype, params):
+        prices = _prices()
+        free, free_trades, _ = run_strategy(prices, 10_000.0, stype, params)
+        costed = {**params, "broker": "coinbase", "spread_bps": 10, "atr_slippage": 0.1}
+        equity, trades, _ = run_strategy(prices, 10_000.0, stype, costed)
+        assert len(trades) == len(free_trades)
+        assert equity.iloc[-1] < free.iloc[-1]
+        assert all(trade["commission"] > 0 for trade in trades)
+
+    def test_trades_report_fills_and_fees(self):
+        prices = _prices()[["AAPL"]]
+        params = {"fast": 5, "slow": 20, "broker": "binance", "slippage_bps": 10}
+        _, trades, _ = run_strategy(prices, 10_000.0, "sma_crossover", params)
+        _, free_trades = _sma_crossover(prices, 10_000.0, fast=5, slow=20)
+        buy, sell = trades[0], trades[1]
+        assert buy["price"] == pytest.approx(free_trades[0]["price"] * 1.001, abs=1e-4)
+        assert sell["price"] == pytest.approx(free_trades[1]["price"] * 0.999, abs=1e-4)
+        assert buy["shares"] * buy["price"] + buy["commission"] == pytest.approx(10_000.0, abs=0.1)
+        assert buy["commission"] == pytest.approx(buy["shares"] * buy["price"] * 0.001, abs=0.01)
+
+    def test_free_trades_have_no_commission(self):
+        _, trades, _ = run_strategy(_prices(), 10_000.0, "sma_crossover", {"slippage_bps": 5})
+        assert trades and all("commission" not in trade for trade in trades)
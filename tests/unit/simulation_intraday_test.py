@@ -0,0 +1,251 @@
+"""Unit tests for src/simulation/intraday.py and intraday simulations."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.market.bar_store import BAR_DTYPE, BarStore
+from src.simulation.costs import BROKER_COMMISSIONS, Slippage
+from src.simulation.engine import simulate_long_flat
+from src.simulation.intraday import (
+    HoldSignals,
+    RsiSignals,
+    SmaCrossSignals,
+    chunk_bars,
+    combine,
+    day_closes,
+    iter_chunks,
+    run_long_flat,
+)
+from src.simulation.strategies import _buy_and_hold, _rsi_mean_reversion, _sma_crossover
+from src.tools.simulator import run_simulation, simulate_intraday
+
+MINUTES_PER_DAY = 390  # a US regular session
+
+
+def _records(days: int = 12, seed: int = 0, start: str = "2024-01-02 14:30") -> np.ndarray:
+    """One-minute bars over *days* sessions of 390 bars each."""
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range(start, periods=days)
+    ts = np.concatenate(
+        [
+            pd.date_range(day, periods=MINUTES_PER_DAY, freq="min").as_unit("ns").asi8
+            for day in sessions
+        ]
+    )
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(ts))))
+    records = np.empty(len(ts), dtype=BAR_DTYPE)
+    records["ts"] = ts
+    for field in ("open", "high", "low", "close"):
+        records[field] = close
+    records["volume"] = 1_000.0
+    return records
+
+
+def _memmap(tmp_path, records: np.ndarray) -> np.ndarray:
+    path = tmp_path / "bars.bars"
+    path.write_bytes(records.tobytes())
+    return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(len(records),))
+
+
+def _frame(records: np.ndarray) -> pd.DataFrame:
+    index = pd.DatetimeIndex(records["ts"].astype("datetime64[ns]"))
+    return pd.DataFrame({"AAA": records["close"]}, index=index)
+
+
+def _day_end_values(equity: pd.Series) -> np.ndarray:
+    return equity.groupby(equity.index.normalize()).last().to_numpy()
+
+
+@pytest.mark.unit
+class TestChunks:
+    def test_chunks_are_bounded_copies(self, tmp_path):
+        bars = _memmap(tmp_path, _records(days=2))
+        chunks = list(iter_chunks(bars, 100))
+        assert max(len(close) for _, close in chunks) == 100
+        assert sum(len(close) for _, close in chunks) == len(bars)
+        ts, close = chunks[0]
+        assert not isinstance(close, np.memmap)
+        assert close.tolist() == bars["close"][:100].tolist()
+        assert ts.tolist() == bars["ts"][:100].tolist()
+
+    def test_chunk_size_follows_the_memory_budget(self):
+        assert chunk_bars(16) == 16 * 2**20 // 128
+        assert chunk_bars(0) == 1_024
+
+
+@pytest.mark.unit
+class TestOpeningPosition:
+    def test_split_run_matches_one_pass(self):
+        rng = np.random.default_rng(4)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+        long = rng.random(300) < 0.5
+        whole = simulate_long_flat(close, long, 1_000.0)
+
+        cut = int(np.flatnonzero(long[1:] & long[:-1])[10]) + 1  # inside a long stretch
+        first = simulate_long_flat(close[:cut], long[:cut], 1_000.0)
+        second = simulate_long_flat(
+            close[cut:], long[cut:], float(first.proceeds[-1]), opening_shares=first.shares[-1]
+        )
+        np.testing.assert_array_equal(np.concatenate((first.equity, second.equity)), whole.equity)
+
+
+@pytest.mark.unit
+class TestStreamingMatchesInMemory:
+    @pytest.mark.parametrize("chunk", [97, 1_000, 10_000])
+    def test_sma_crossover(self, tmp_path, chunk):
+        records = _records()
+        run = run_long_flat(_memmap(tmp_path, records), SmaCrossSignals(20, 60), 10_000.0, chunk)
+        equity, trades = _sma_crossover(_frame(records), 10_000.0, fast=20, slow=60)
+        np.testing.assert_allclose(run.equity, _day_end_values(equity), rtol=1e-12)
+        assert run.trades_count == len(trades)
+
+    @pytest.mark.parametrize("chunk", [97, 1_000, 10_000])
+    def test_rsi_mean_reversion(self, tmp_path, chunk):
+        records = _records(seed=1)
+        run = run_long_flat(_memmap(tmp_path, records), RsiSignals(30, 70), 10_000.0, chunk)
+        equity, trades = _rsi_mean_reversion(_frame(records), 10_000.0, 30.0, 70.0)
+        np.testing.assert_array_equal(run.equity, _day_end_values(equity))
+        assert run.trades_count == len(trades)
+
+    @pytest.mark.parametrize("chunk", [97, 10_000])
+    def test_with_costs(self, tmp_path, chunk):
+        records = _records(seed=5)
+        commission = BROKER_COMMISSIONS["ibkr"]
+        slippage = Slippage(spread_bps=2, atr_multiple=0.5, atr_window=30)
+        run = run_long_flat(
+            _memmap(tmp_path, records),
+            SmaCrossSignals(20, 60),
+            10_000.0,
+            chunk,
+            commission=commission,
+            slippage=slippage,
+        )
+        equity, trades = _sma_crossover(
+            _frame(records), 10_000.0, fast=20, slow=60, commission=commission, slippage=slippage
+        )
+        np.testing.assert_allclose(run.equity, _day_end_values(equity), rtol=1e-9)
+        assert run.trades_count == len(trades)
+        assert [t["price"] for t in run.trades] == pytest.approx([t["price"] for t in trades[:20]])
+        assert all(t["commission"] >= 1.0 for t in run.trades)
+
+    def test_buy_and_hold(self, tmp_path):
+        records = _records(seed=2)
+        run = run_long_flat(_memmap(tmp_path, records), HoldSignals(), 10_000.0, 500)
+        equity, _ = _buy_and_hold(_frame(records), 10_000.0)
+        np.testing.assert_allclose(run.equity, _day_end_values(equity), rtol=1e-12)
+        assert run.trades_count == 1
+
+    def test_one_value_per_day_and_first_trades_only(self, tmp_path):
+        records = _records(days=5, seed=1)
+        run = run_long_flat(
+            _memmap(tmp_path, records), RsiSignals(45, 55), 10_000.0, 250, "AAA", max_trades=3
+        )
+        assert len(run.days) == len(run.equity) == 5
+        assert run.days[0] == pd.Timestamp("2024-01-02")
+        assert len(run.trades) == 3 < run.trades_count
+        assert run.trades[0]["action"] == "BUY" and run.trades[0]["symbol"] == "AAA"
+        assert [t["date"] for t in run.trades] == sorted(t["date"] for t in run.trades)
+
+    def test_progress_per_chunk(self, tmp_path):
+        bars = _memmap(tmp_path, _records(days=1))
+        done = []
+        run_long_flat(bars, HoldSignals(), 1.0, 100, on_chunk=done.append)
+        assert done == [100, 200, 300, MINUTES_PER_DAY]
+
+
+@pytest.mark.unit
+class TestCombine:
+    def test_allocations_hold_their_value_on_days_they_miss(self, tmp_path):
+        a = run_long_flat(_records(days=3), HoldSignals(), 100.0, 1_000)
+        b = run_long_flat(_records(days=3, start="2024-01-03 14:30"), HoldSignals(), 100.0, 1_000)
+        total = combine([a, b], 100.0)
+        assert len(total) == 4
+        assert total.iloc[0] == a.equity[0] + 100.0
+        assert total.iloc[-1] == a.equity[-1] + b.equity[-1]
+
+    def test_day_closes(self, tmp_path):
+        records = _records(days=3)
+        closes = day_closes(_memmap(tmp_path, records), 200)
+        expected = _frame(records)["AAA"].groupby(lambda ts: ts.normalize()).last()
+        assert closes.tolist() == expected.tolist()
+
+
+@pytest.fixture
+def store(tmp_path):
+    bar_store = BarStore(tmp_path, refresh_seconds=900)
+    bar_store._replace("AAA", "1m", _records(seed=0))
+    bar_store._replace("BBB", "1m", _records(seed=3))
+    with patch("src.tools.simulator.get_bar_store", return_value=bar_store):
+        yield bar_store
+
+
+@pytest.mark.unit
+class TestSimulateIntraday:
+    def test_result(self, store):
+        strategy = {"type": "sma_crossover", "params": {"fast": 20, "slow": 60}}
+        result = simulate_intraday(
+            "i", ["AAA", "BBB"], strategy, "1m", period_start="2024-01-01", period_end="2024-02-01"
+        )
+        assert result["strategy"] == {**strategy, "interval": "1m"}
+        assert result["bars"] == 2 * 12 * MINUTES_PER_DAY
+        assert result["trades_count"] > 0 and len(result["trades_sample"]) == 20
+        assert result["equity_curve"][-1]["value"] == result["final_value"]
+        assert "sharpe_ratio" in result
+
+    def test_records_the_cost_model(self, store):
+        strategy = {"type": "rsi_mean_reversion", "params": {"broker": "alpaca", "spread_bps": 3}}
+        result = simulate_intraday("i", ["AAA"], strategy, "1m", period_start="2024-01-01")
+        assert result["strategy"]["costs"]["slippage"]["spread_bps"] == 3.0
+        assert result["strategy"]["costs"]["broker"] == "alpaca"
+
+    def test_small_chunks_give_the_same_result(self, store):
+        strategy = {"type": "rsi_mean_reversion"}
+        whole = simulate_intraday("i", ["AAA"], strategy, "1m", period_start="2024-01-01")
+        cfg = MagicMock(intraday_chunk_mb=0.01, monte_carlo_chunk_mb=32)
+        with patch("src.tools.simulator.settings", cfg):
+            chunked = simulate_intraday("i", ["AAA"], strategy, "1m", period_start="2024-01-01")
+        assert chunked == whole
+
+    def test_period_bounds_the_bars_read(self, store):
+        result = simulate_intraday(
+            "i",
+            ["AAA"],
+            {"type": "buy_and_hold"},
+            "1m",
+            period_start="2024-01-05",
+            period_end="2024-01-09",
+        )
+        assert result["bars"] == 2 * MINUTES_PER_DAY  # Fri 5th and Mon 8th
+
+    def test_progress_reaches_the_end_of_the_backtest(self, store):
+        seen = []
+        simulate_intraday("i", ["AAA", "BBB"], {"type": "buy_and_hold"}, "1m", progress=seen.append)
+        assert seen == sorted(seen)
+        assert seen[-1] == 1.0
+
+    def test_unsupported_strategy(self, store):
+        result = simulate_intraday("i", ["AAA"], {"type": "momentum"}, "1m")
+        assert "not available intraday" in result["error"]
+
+    def test_no_bars(self, store):
+        result = simulate_intraday("i", ["ZZZ"], {"type": "buy_and_hold"}, "5m")
+        assert "No 5m bars" in result["error"]
+
+    def test_run_simulation_routes_intraday_requests(self, store):
+        with patch.object(store, "sync") as sync:
+            result = run_simulation(
+                "i",
+                ["AAA"],
+                {"type": "buy_and_hold"},
+                period_start="2024-01-01",
+                period_end="2024-02-01",
+                interval="1m",
+            )
+        sync.assert_called_once_with("AAA", "1m", "2024-01-01")
+        assert result["strategy"]["interval"] == "1m"
+        assert result["period_end"] == "2024-02-01"
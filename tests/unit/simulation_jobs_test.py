@@ -0,0 +1,428 @@
+"""Unit tests for src/tools/simulation_jobs.py."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation import workers
+from src.simulation.workers import progress_board, run_in_pool, run_shared
+from src.tools.dispatcher import _run_simulation_and_persist, stream_tool
+from src.tools.simulation_jobs import (
+    SimulationJobs,
+    find_simulation,
+    fingerprint,
+    persist_simulation,
+)
+from src.tools.simulator import simulate
+
+REQUEST = {
+    "name": "job",
+    "symbols": ["AAA"],
+    "strategy": {"type": "sma_crossover", "params": {"fast": 5, "slow": 20}},
+    "period_start": "2023-01-01",
+    "period_end": "2023-12-31",
+}
+
+
+def _prices() -> pd.DataFrame:
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("2023-01-01", periods=200, freq="D")
+    return pd.DataFrame({"AAA": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))}, index=dates)
+
+
+async def _inline(fn, prices, *args, on_progress=None):
+    if on_progress is None:
+        return fn(prices, *args)
+    empty = pd.Series(dtype="float64")
+    return fn(prices, *args, progress=lambda f, equity=empty: on_progress(f, equity))
+
+
+def _reporting_task(prices, progress):
+    # Runs in a worker process: report halfway, then wait long enough to be polled.
+    progress(0.5, prices["AAA"].iloc[:100])
+    time.sleep(0.3)
+    return len(prices)
+
+
+def _reporting_loader(bars, progress):
+    # Runs in a worker process without shared prices, like an intraday backtest.
+    progress(0.5)
+    time.sleep(0.3)
+    return bars * 2
+
+
+async def _persist(result, oos_equity_curve=None, input_hash=None):
+    result["simulation_id"] = "sim-1"
+
+
+@pytest.fixture
+def jobs():
+    registry = SimulationJobs()
+    with (
+        patch("src.tools.simulation_jobs.load_prices", return_value=(_prices(), "2023-12-31")),
+        patch("src.tools.simulation_jobs.run_shared", side_effect=_inline),
+        patch("src.tools.simulation_jobs.persist_simulation", side_effect=_persist) as persist,
+        patch("src.tools.simulation_jobs.find_simulation", return_value=None) as find,
+        patch("src.tools.simulation_jobs.get_simulation_jobs", return_value=registry),
+        patch("src.tools.dispatcher.get_simulation_jobs", return_value=registry),
+    ):
+        registry.persist = persist
+        registry.find = find
+        yield registry
+
+
+@pytest.mark.unit
+class TestSimulationJobs:
+    async def test_runs_to_done_and_persists_after_the_result(self, jobs):
+        job = jobs.submit(REQUEST)
+        assert job.status == "queued"
+        await jobs.wait(job.id)
+
+        assert job.status == "done"
+        assert job.progress == 1.0
+        assert job.result["simulation_id"] == "sim-1"
+        assert job.result == {**simulate(_prices(), **REQUEST), "simulation_id": "sim-1"}
+        jobs.persist.assert_awaited_once()
+
+    async def test_missing_prices_fail_the_job(self, jobs):
+        with patch(
+            "src.tools.simulation_jobs.load_prices", side_effect=ValueError("No price data")
+        ):
+            job = await jobs.wait(jobs.submit(REQUEST).id)
+        assert job.status == "failed"
+        assert job.result == {"error": "No price data"}
+        jobs.persist.assert_not_awaited()
+
+    async def test_strategy_error_fails_the_job(self, jobs):
+        job = await jobs.wait(jobs.submit({**REQUEST, "strategy": {"type": "magic"}}).id)
+        assert job.status == "failed"
+        assert "Unknown strategy type" in job.error
+
+    async def test_cancel_while_running_drops_the_result(self, jobs):
+        started = asyncio.Event()
+
+        async def never_finishes(fn, prices, *args, on_progress=None):
+            started.set()
+            await asyncio.Event().wait()
+
+        with patch("src.tools.simulation_jobs.run_shared", side_effect=never_finishes):
+            job = jobs.submit(REQUEST)
+            await asyncio.wait_for(started.wait(), timeout=5)
+            assert job.status == "running"
+            assert jobs.cancel(job.id)
+            await asyncio.wait_for(jobs.wait(job.id), timeout=5)
+
+        assert job.status == "cancelled"
+        assert job.result is None
+        jobs.persist.assert_not_awaited()
+        assert not jobs.cancel(job.id)  # already finished
+
+    async def test_cancel_before_start(self, jobs):
+        job = jobs.submit(REQUEST)
+        assert jobs.cancel(job.id)
+        await jobs.wait(job.id)
+        assert job.status == "cancelled"
+
+    async def test_cancelled_waiter_leaves_the_job_running(self, jobs):
+        job = jobs.submit(REQUEST)
+        waiter = asyncio.create_task(jobs.wait(job.id))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await jobs.wait(job.id)
+        assert job.status == "done"
+
+    async def test_unknown_job(self, jobs):
+        assert jobs.get("nope") is None
+        assert not jobs.cancel("nope")
+
+    async def test_listing_is_newest_first(self, jobs):
+        first, second = jobs.submit(REQUEST), jobs.submit(REQUEST)
+        await asyncio.gather(jobs.wait(first.id), jobs.wait(second.id))
+        assert [j.id for j in jobs.jobs()] == [second.id, first.id]
+
+
+@pytest.mark.unit
+class TestFingerprint:
+    def test_name_and_key_order_do_not_matter(self):
+        reordered = {
+            "strategy": {"params": {"slow": 20, "fast": 5}, "type": "sma_crossover"},
+            "symbols": ["AAA"],
+            "period_start": "2023-01-01",
+            "initial_capital": 10_000,
+            "name": "other",
+        }
+        assert fingerprint(reordered, "2023-12-31") == fingerprint(REQUEST, "2023-12-31")
+
+    def test_inputs_that_change_the_result_change_the_hash(self):
+        base = fingerprint(REQUEST, "2023-12-31")
+        assert fingerprint(REQUEST, "2024-01-31") != base
+        assert fingerprint({**REQUEST, "symbols": ["BBB"]}, "2023-12-31") != base
+        assert fingerprint({**REQUEST, "initial_capital": 5_000}, "2023-12-31") != base
+        params = {"type": "sma_crossover", "params": {"fast": 10, "slow": 20}}
+        assert fingerprint({**REQUEST, "strategy": params}, "2023-12-31") != base
+        assert fingerprint({**REQUEST, "monte_carlo_paths": 100}, "2023-12-31") != base
+
+    def test_block_days_only_matter_with_monte_carlo(self):
+        assert fingerprint({**REQUEST, "bootstrap_block_days": 5}, "x") == fingerprint(REQUEST, "x")
+        mc = {**REQUEST, "monte_carlo_paths": 100}
+        assert fingerprint({**mc, "bootstrap_block_days": 5}, "x") != fingerprint(mc, "x")
+
+    def test_interval_matters_and_defaults_to_daily(self):
+        base = fingerprint(REQUEST, "x")
+        assert fingerprint({**REQUEST, "interval": "1d"}, "x") == base
+        assert fingerprint({**REQUEST, "interval": "1m"}, "x") != base
+
+
+@pytest.mark.unit
+class TestMemoization:
+    async def test_historical_hit_skips_loading_and_computing(self, jobs):
+        cached = {"name": "job", "simulation_id": "sim-0", "cached": True}
+        jobs.find.return_value = cached
+        with patch("src.tools.simulation_jobs.load_prices") as load:
+            job = await jobs.wait(jobs.submit(REQUEST).id)
+        assert job.status == "done"
+        assert job.result == cached
+        jobs.find.assert_awaited_once_with(fingerprint(REQUEST, "2023-12-31"), "job")
+        load.assert_not_called()
+        jobs.persist.assert_not_awaited()
+
+    async def test_intraday_job_streams_in_the_worker(self, jobs):
+        request = {k: v for k, v in REQUEST.items() if k != "period_end"}
+        request["interval"] = "5m"
+        last = {"AAA": pd.Timestamp("2023-07-19 19:55")}
+        calls = []
+
+        async def inline(fn, *args, on_progress=None):
+            calls.append(fn.keywords)
+            return {"name": "job", "final_value": 1.0}
+
+        with (
+            patch(
+                "src.tools.simulation_jobs.load_intraday", return_value=(last, "2023-12-31")
+            ) as load,
+            patch("src.tools.simulation_jobs.run_in_pool", side_effect=inline),
+            patch("src.tools.simulation_jobs.run_shared") as shared,
+        ):
+            job = await jobs.wait(jobs.submit(request).id)
+
+        assert job.status == "done"
+        load.assert_called_once_with(
+            ["AAA"], interval="5m", period_start="2023-01-01", period_end=None, benchmark=None
+        )
+        shared.assert_not_called()
+        assert calls[0]["interval"] == "5m" and calls[0]["period_end"] == "2023-12-31"
+        assert jobs.find.await_args.args[0] == fingerprint(request, "AAA:2023-07-19T19:55")
+
+    async def test_miss_stores_the_fingerprint(self, jobs):
+        await jobs.wait(jobs.submit(REQUEST).id)
+        expected = fingerprint(REQUEST, "2023-12-31")
+        assert jobs.persist.await_args.kwargs["input_hash"] == expected
+
+    async def test_open_period_is_keyed_by_the_last_bars(self, jobs):
+        request = {k: v for k, v in REQUEST.items() if k != "period_end"}
+        await jobs.wait(jobs.submit(request).id)
+        assert jobs.find.await_args.args[0] == fingerprint(request, "AAA:2023-07-19")
+
+        newer = pd.concat(
+            [_prices(), pd.DataFrame({"AAA": [1.0]}, index=[pd.Timestamp("2023-07-20")])]
+        )
+        with patch("src.tools.simulation_jobs.load_prices", return_value=(newer, "2023-12-31")):
+            await jobs.wait(jobs.submit(request).id)
+        assert jobs.find.await_args.args[0] == fingerprint(request, "AAA:2023-07-20")
+
+
+def _session(row=None) -> MagicMock:
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    session.commit = AsyncMock()
+    rows = MagicMock()
+    rows.scalars.return_value.first.return_value = row
+    session.execute = AsyncMock(return_value=rows)
+    return session
+
+
+@pytest.mark.unit
+class TestFindSimulation:
+    async def test_rebuilds_the_stored_result(self):
+        result = simulate(_prices(), **REQUEST)
+        session = _session()
+        with patch("src.tools.simulation_jobs.async_session", return_value=session):
+            await persist_simulation(result, input_hash="abc")
+        row = session.add.call_args.args[0]
+        assert row.input_hash == "abc"
+
+        with patch("src.tools.simulation_jobs.async_session", return_value=_session(row)):
+            found = await find_simulation("abc")
+        assert found == {**result, "cached": True}
+
+    async def test_hit_takes_the_current_request_name(self):
+        result = simulate(_prices(), **REQUEST)
+        session = _session()
+        with patch("src.tools.simulation_jobs.async_session", return_value=session):
+            await persist_simulation(result, input_hash="abc")
+        row = session.add.call_args.args[0]
+
+        with patch("src.tools.simulation_jobs.async_session", return_value=_session(row)):
+            found = await find_simulation("abc", "renamed")
+        assert found["name"] == "renamed"
+        assert row.name == "job"
+
+    async def test_miss(self):
+        with patch("src.tools.simulation_jobs.async_session", return_value=_session()):
+            assert await find_simulation("abc") is None
+
+    async def test_db_failure_is_a_miss(self):
+        with patch("src.tools.simulation_jobs.async_session", side_effect=RuntimeError("db")):
+            assert await find_simulation("abc") is None
+
+
+@pytest.mark.unit
+class TestRunSimulationTool:
+    async def test_returns_result_with_job_id(self, jobs):
+        result = await _run_simulation_and_persist(REQUEST)
+        assert result["simulation_id"] == "sim-1"
+        assert result["job_id"] == jobs.jobs()[0].id
+
+    async def test_error_result(self, jobs):
+        result = await _run_simulation_and_persist({**REQUEST, "strategy": {"type": "magic"}})
+        assert "error" in result
+        assert "job_id" in result
+
+
+@pytest.mark.unit
+class TestProgress:
+    async def test_listeners_see_every_stage_and_the_curve_growing(self, jobs):
+        updates = []
+        request = {**REQUEST, "strategy": {"type": "rebalance", "params": {"rebalance": "weekly"}}}
+        job = jobs.submit(request)
+        job.listeners.append(lambda j: updates.append(j.progress_update()))
+        await jobs.wait(job.id)
+
+        assert [u["stage"] for u in updates[:2]] == ["downloading", "running"]
+        assert updates[-1]["stage"] == "persisting"
+        running = [u for u in updates if u["stage"] == "running" and u["date"]]
+        assert len(running) > 2  # one per stretch of bars, then the whole curve
+        percents = [u["percent"] for u in updates]
+        assert percents == sorted(percents)
+        lengths = [len(u["equity_curve"]) for u in running]
+        assert lengths == sorted(lengths) and lengths[0] < lengths[-1]
+        assert running[-1]["equity_curve"] == job.result["equity_curve"]
+        assert running[-1]["date"] == "2023-07-19"  # the last of 200 daily bars
+        assert job.partial_curve == []  # freed once the result is in
+
+    async def test_monte_carlo_counts_towards_progress(self, jobs):
+        fractions = []
+        job = jobs.submit({**REQUEST, "monte_carlo_paths": 50})
+        job.listeners.append(lambda j: fractions.append(j.fraction))
+        await jobs.wait(job.id)
+        assert 0.5 in fractions and fractions[-1] == 1.0
+
+    async def test_stream_tool_yields_progress_then_the_result(self, jobs):
+        events = [e async for e in stream_tool("run_simulation", REQUEST, "call-1")]
+
+        assert {e["type"] for e in events[:-1]} == {"tool_progress"}
+        assert all(e["name"] == "run_simulation" and e["id"] == "call-1" for e in events)
+        assert events[-2]["stage"] == "persisting"
+        result = json.loads(events[-1]["result"])
+        assert events[-1]["type"] == "tool_result"
+        assert result["simulation_id"] == "sim-1"
+        assert events[0]["job_id"] == result["job_id"]
+
+    async def test_stream_tool_without_progress_is_just_the_result(self):
+        with patch("src.tools.dispatcher._dispatch", AsyncMock(return_value={"ok": 1})):
+            events = [e async for e in stream_tool("search_ticker", {"query": "x"}, "c")]
+        assert events == [
+            {"type": "tool_result", "name": "search_ticker", "result": '{"ok": 1}', "id": "c"}
+        ]
+
+    async def test_jobs_without_a_stream_report_to_nobody(self, jobs):
+        result = await _run_simulation_and_persist(REQUEST)
+        assert result["simulation_id"] == "sim-1"
+        assert jobs.jobs()[0].listeners == []
+
+
+@pytest.mark.unit
+class TestRunShared:
+    async def test_worker_process_matches_inline(self):
+        cfg = MagicMock()
+        cfg.simulation_workers = 1
+        with patch("src.simulation.workers.settings", cfg):
+            try:
+                result = await run_shared(simulate, _prices(), "w", ["AAA"], REQUEST["strategy"])
+            finally:
+                workers.shutdown_process_pool()
+        assert result == simulate(_prices(), "w", ["AAA"], REQUEST["strategy"])
+
+    def test_progress_board_round_trip(self):
+        equity = _prices()["AAA"]
+        with progress_board(len(equity)) as board:
+            assert board.read()[0] == 0.0 and board.read()[1].empty
+            board.report(0.25, equity.iloc[:50])
+            board.report(0.3)
+            fraction, so_far = board.read()
+        assert fraction == 0.3
+        assert so_far.tolist() == equity.iloc[:50].tolist()
+        assert (so_far.index == equity.index[:50]).all()
+
+    async def test_worker_progress_is_polled(self):
+        cfg = MagicMock()
+        cfg.simulation_workers = 1
+        seen = []
+        with (
+            patch("src.simulation.workers.settings", cfg),
+            patch("src.simulation.workers.PROGRESS_INTERVAL", 0.02),
+        ):
+            try:
+                result = await run_shared(
+                    _reporting_task, _prices(), on_progress=lambda f, eq: seen.append((f, len(eq)))
+                )
+            finally:
+                workers.shutdown_process_pool()
+        assert result == 200
+        assert seen == [(0.5, 100)]  # reported once, passed on once
+
+    async def test_run_in_pool_without_shared_prices(self):
+        cfg = MagicMock()
+        cfg.simulation_workers = 1
+        seen = []
+        with (
+            patch("src.simulation.workers.settings", cfg),
+            patch("src.simulation.workers.PROGRESS_INTERVAL", 0.02),
+        ):
+            try:
+                result = await run_in_pool(
+                    _reporting_loader, 21, on_progress=lambda f, eq: seen.append((f, len(eq)))
+                )
+            finally:
+                workers.shutdown_process_pool()
+        assert result == 42
+        assert seen == [(0.5, 0)]
+
+
+@pytest.mark.unit
+class TestPersistSimulation:
+    async def test_db_failure_is_logged_not_raised(self):
+        with patch("src.tools.simulation_jobs.async_session", side_effect=RuntimeError("db")):
+            result = {"name": "x"}
+            await persist_simulation(result)
+        assert "simulation_id" not in result
+
+    async def test_writes_row(self):
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.commit = AsyncMock()
+        result = simulate(_prices(), **REQUEST)
+        with patch("src.tools.simulation_jobs.async_session", return_value=session):
+            await persist_simulation(result)
+        row = session.add.call_args.args[0]
+        assert row.final_value == result["final_value"]
+        assert result["simulation_id"] == row.id
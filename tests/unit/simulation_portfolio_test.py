@@ -0,0 +1,254 @@
+"""Unit tests for src/simulation/portfolio.py, the cost models and the rebalance strategy."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.costs import (
+    BROKER_COMMISSIONS,
+    Commission,
+    Slippage,
+    average_true_range,
+    from_params,
+)
+from src.simulation.portfolio import period_starts, simulate_portfolio
+from src.simulation.rotation import month_starts, simulate_rotation
+from src.simulation.strategies import run_strategy
+from src.tools.simulator import run_simulation
+
+
+def _loop_portfolio(close, target, cash, schedule, threshold, commission, slippage):
+    """Bar-by-bar reference with per-symbol scalars; proportional fees only."""
+    n, m = close.shape
+    scheduled = {0, *schedule.tolist()}
+    shares = [0.0] * m
+    equity = []
+    for t in range(n):
+        row = close[t]
+        listed = [not np.isnan(p) for p in row]
+        value = cash + sum(shares[j] * row[j] for j in range(m) if listed[j])
+        drifted = threshold is not None and any(
+            abs((shares[j] * row[j] / value if listed[j] else 0) - (target[j] if listed[j] else 0))
+            > threshold
+            for j in range(m)
+        )
+        if t in scheduled or drifted:
+            desired = [target[j] * value / row[j] if listed[j] else 0.0 for j in range(m)]
+            for j in range(m):
+                if desired[j] < shares[j]:
+                    qty = shares[j] - desired[j]
+                    price = slippage.fill(np.array([row[j]]), np.array([-1.0]))[0]
+                    fee = commission.fees(np.array([qty * price]), np.array([qty]))[0]
+                    cash += qty * price - fee
+                    shares[j] = desired[j]
+            buys = {j: desired[j] - shares[j] for j in range(m) if desired[j] > shares[j]}
+            prices = {j: slippage.fill(np.array([row[j]]), np.array([1.0]))[0] for j in buys}
+            cost = sum(q * prices[j] * (1 + commission.rate) for j, q in buys.items())
+            scale = min(1.0, cash / cost) if cost else 1.0
+            for j, q in buys.items():
+                shares[j] += q * scale
+            cash = max(cash - cost * scale, 0.0)
+        equity.append(cash + sum(shares[j] * row[j] for j in range(m) if listed[j]))
+    return np.array(equity)
+
+
+def _close(seed: int = 5, days: int = 400, symbols: int = 4) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=days, freq="D")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (days, symbols)), axis=0))
+    close[:90, -1] = np.nan  # listed later than the others
+    return index, close
+
+
+@pytest.mark.unit
+class TestCostModels:
+    def test_commission_rate_per_share_and_minimum(self):
+        fees = Commission(rate=0.001, per_share=0.01, minimum=1.0).fees(
+            np.array([10_000.0, 100.0]), np.array([50.0, 2.0])
+        )
+        assert fees.tolist() == pytest.approx([10.5, 1.0])
+
+    def test_slippage_is_against_the_order(self):
+        fills = Slippage(bps=10).fill(np.array([100.0, 100.0]), np.array([1.0, -1.0]))
+        assert fills.tolist() == pytest.approx([100.1, 99.9])
+
+    def test_cap_wins_over_minimum(self):
+        fees = BROKER_COMMISSIONS["ibkr"].fees(
+            np.array([50.0, 10_000.0, 100_000.0, 0.0]), np.array([1.0, 10.0, 1_000.0, 0.0])
+        )
+        assert fees.tolist() == pytest.approx([0.5, 1.0, 5.0, 0.0])
+
+    @pytest.mark.parametrize(
+        "commission",
+        [
+            Commission(),
+            Commission(rate=0.006),
+            Commission(rate=0.001, per_share=0.01, minimum=1.0),
+            BROKER_COMMISSIONS["ibkr"],
+        ],
+    )
+    @pytest.mark.parametrize(("cash", "price"), [(10_000.0, 187.3), (40.0, 95.0), (5.0, 0.5)])
+    def test_affordable_spends_the_balance_fee_included(self, commission, cash, price):
+        shares = commission.affordable(cash, price)
+        cost = shares * price + commission.fees(np.array(shares * price), np.array(shares))
+        assert cost == pytest.approx(cash)
+
+    def test_nothing_affordable_below_the_minimum(self):
+        assert Commission(minimum=5.0).affordable(4.0, 10.0) == 0.0
+
+    def test_spread_and_atr_slippage(self):
+        slippage = Slippage(bps=5, spread_bps=10, atr_multiple=0.5)
+        side = np.array([1.0, -1.0])
+        fills = slippage.fill(np.array([100.0, 100.0]), side, np.array([2.0, 2.0]))
+        assert fills.tolist() == pytest.approx([101.1, 98.9])
+        assert slippage.fill(np.array([100.0]), np.array([1.0])).tolist() == pytest.approx([100.1])
+
+    def test_average_true_range_from_closes(self):
+        close = pd.DataFrame({"A": [10.0, 11.0, 9.0, 12.0, 12.0]})
+        atr = average_true_range(close, 3)[:, 0]
+        assert atr.tolist() == pytest.approx([0.0, 1.0, 1.5, 2.0, 5 / 3])
+
+    def test_from_params(self):
+        commission, slippage = from_params(
+            {"broker": "ibkr", "commission_min": 2, "spread_bps": 4, "atr_slippage": 0.1}
+        )
+        assert commission == Commission(per_share=0.005, minimum=2.0, maximum_rate=0.01)
+        assert slippage == Slippage(spread_bps=4.0, atr_multiple=0.1)
+        assert from_params({"commission_pct": 0.1})[0] == Commission(rate=0.001)
+        assert from_params({}) == (Commission(), Slippage())
+
+    def test_unknown_broker(self):
+        with pytest.raises(ValueError, match="Unknown broker: robinhood"):
+            from_params({"broker": "robinhood"})
+
+
+@pytest.mark.unit
+class TestPeriodStarts:
+    INDEX = pd.to_datetime(["2024-03-29", "2024-04-01", "2024-04-08", "2024-05-02", "2024-07-01"])
+
+    def test_schedules(self):
+        assert period_starts(self.INDEX, "monthly").tolist() == [0, 1, 3, 4]
+        assert period_starts(self.INDEX, "quarterly").tolist() == [0, 1, 4]
+        assert period_starts(self.INDEX, "weekly").tolist() == [0, 1, 2, 3, 4]
+        assert period_starts(self.INDEX, "yearly").tolist() == [0]
+        assert period_starts(self.INDEX, "none").tolist() == [0]
+
+    def test_unknown_schedule(self):
+        with pytest.raises(ValueError, match="Unknown rebalance schedule"):
+            period_starts(self.INDEX, "hourly")
+
+
+@pytest.mark.unit
+class TestSimulatePortfolio:
+    def test_matches_rotation_without_costs(self):
+        index, close = _close()
+        close = close[:, :3]
+        target = np.array([0.5, 0.3, 0.2])
+        rows = month_starts(index)
+        run = simulate_portfolio(close, target, 10_000.0, period_starts(index, "monthly"))
+        rotation = simulate_rotation(close, rows, np.tile(target, (len(rows), 1)), 10_000.0)
+        np.testing.assert_allclose(run.equity, rotation.equity, rtol=1e-12)
+        np.testing.assert_allclose(run.turnover, rotation.turnover, atol=1e-12)
+        assert run.rebalances.tolist() == rows.tolist()
+
+    @pytest.mark.parametrize("threshold", [None, 0.03])
+    def test_matches_loop_with_costs(self, threshold):
+        index, close = _close()
+        close = pd.DataFrame(close).ffill().to_numpy()
+        target = np.array([0.4, 0.3, 0.2, 0.1])
+        schedule = period_starts(index, "quarterly")
+        commission, slippage = Commission(rate=0.002), Slippage(bps=15)
+        run = simulate_portfolio(close, target, 5_000.0, schedule, threshold, commission, slippage)
+        expected = _loop_portfolio(
+            close, target, 5_000.0, schedule, threshold, commission, slippage
+        )
+        np.testing.assert_allclose(run.equity, expected, rtol=1e-10)
+        assert (run.cash >= 0).all()
+
+    def test_threshold_rebalances_between_schedules(self):
+        index, close = _close(days=300)
+        close = close[:, :2]
+        target = np.array([0.5, 0.5])
+        none = period_starts(index, "none")
+        plain = simulate_portfolio(close, target, 1_000.0, none)
+        banded = simulate_portfolio(close, target, 1_000.0, none, threshold=0.05)
+        assert plain.rebalances.tolist() == [0]
+        assert len(banded.rebalances) > 1
+        for k in banded.rebalances[1:]:
+            held = banded.shares[banded.rebalances.tolist().index(k) - 1]
+            drifted = held * close[k] / (held @ close[k])
+            assert np.abs(drifted - target).max() > 0.05
+
+    def test_unlisted_weight_waits_in_cash(self):
+        index, close = _close()
+        close = pd.DataFrame(close).ffill().to_numpy()
+        target = np.full(4, 0.25)
+        run = simulate_portfolio(close, target, 1_000.0, period_starts(index, "none"), 0.1)
+        assert run.cash[0] == pytest.approx(250.0)
+        listing = run.rebalances[1]
+        assert listing == 90  # the drift check sees the new symbol as fully under weight
+        assert run.cash[listing] == pytest.approx(0.0, abs=1e-9)
+
+    def test_fixed_fees_never_overdraw(self):
+        index, close = _close(symbols=3)
+        close = close[:, :3]
+        costly = Commission(rate=0.01, minimum=25.0)
+        run = simulate_portfolio(
+            close, np.full(3, 1 / 3), 500.0, period_starts(index, "weekly"), commission=costly
+        )
+        free = simulate_portfolio(close, np.full(3, 1 / 3), 500.0, period_starts(index, "weekly"))
+        assert (run.cash >= 0).all()
+        assert (run.equity <= free.equity + 1e-9).all()
+        assert (run.fees[run.traded != 0] >= 25.0).all()
+
+
+@pytest.mark.unit
+class TestRebalanceStrategy:
+    def _run(self, params):
+        index, close = _close()
+        prices = pd.DataFrame(close[:, :3], index=index, columns=["SPY", "TLT", "GLD"])
+        with patch("src.tools.simulator._download", return_value=prices):
+            return run_simulation(
+                name="60/40",
+                symbols=["SPY", "TLT", "GLD"],
+                strategy={"type": "rebalance", "params": params},
+                period_start="2020-01-01",
+            )
+
+    def test_trades_carry_fills_and_commission(self):
+        result = self._run(
+            {"weights": {"SPY": 0.6, "TLT": 0.4}, "commission_pct": 0.1, "slippage_bps": 5}
+        )
+        first = [t for t in result["trades_sample"] if t["date"] == "2020-01-01"]
+        assert [(t["action"], t["symbol"]) for t in first] == [("BUY", "SPY"), ("BUY", "TLT")]
+        assert all(t["commission"] > 0 for t in first)
+        assert result["final_value"] > 0
+        assert result["annual_turnover"] > 0
+
+    def test_turnover_is_reported_per_bar(self):
+        index, close = _close()
+        prices = pd.DataFrame(close[:, :3], index=index, columns=["SPY", "TLT", "GLD"])
+        _, _, turnover = run_strategy(prices, 10_000.0, "rebalance", {"rebalance": "quarterly"})
+        run = simulate_portfolio(
+            close[:, :3], np.full(3, 1 / 3), 10_000.0, period_starts(index, "quarterly")
+        )
+        assert turnover.index.equals(index)
+        assert turnover.iloc[run.rebalances].tolist() == pytest.approx(run.turnover.tolist())
+        assert turnover.sum() == pytest.approx(run.turnover.sum())
+
+    def test_sells_come_before_buys(self):
+        trades = self._run({"rebalance": "monthly"})["trades_sample"]
+        for date in {t["date"] for t in trades}:
+            actions = [t["action"] for t in trades if t["date"] == date]
+            assert actions == sorted(actions, reverse=True)  # SELL… then BUY…
+
+    def test_invalid_weights(self):
+        assert "sum to at most 1" in self._run({"weights": {"SPY": 0.8, "TLT": 0.4}})["error"]
+        assert "No price data" in self._run({"weights": {"QQQ": 0.5}})["error"]
+
+    def test_unknown_schedule(self):
+        assert "Unknown rebalance schedule" in self._run({"rebalance": "daily"})["error"]
@@ -0,0 +1,159 @@
+"""Unit tests for src/simulation/rotation.py and the momentum strategy built on it."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.rotation import (
+    lookback_returns,
+    month_starts,
+    simulate_rotation,
+    top_n_weights,
+)
+from src.simulation.strategies import _momentum
+from src.tools.simulator import run_simulation
+
+
+def _loop_momentum(prices, capital, lookback_days, top_n):
+    """Bar-by-bar reference: rank on the first bar of each month, rebalance, hold."""
+    close = prices.ffill()
+    cash, shares = capital, {}
+    equity, turnover = [], []
+    for i, date in enumerate(prices.index):
+        row = close.iloc[i]
+        new_month = i == 0 or date.month != prices.index[i - 1].month
+        window = close.loc[: date - pd.Timedelta(days=lookback_days)]
+        if new_month and len(window):
+            scores = row / window.iloc[-1] - 1
+            scores = scores.dropna()
+            if len(scores):
+                value = cash + sum(n * row[s] for s, n in shares.items())
+                before = {s: n * row[s] / value for s, n in shares.items()}
+                picks = sorted(scores.index, key=lambda s: -scores[s])[:top_n]
+                after = {s: 1 / len(picks) for s in picks}
+                change = sum(abs(after.get(s, 0) - before.get(s, 0)) for s in {*before, *after})
+                turnover.append(0.5 * (change + abs(0 - cash / value)))
+                shares = {s: value * w / row[s] for s, w in after.items()}
+                cash = 0.0
+        equity.append(cash + sum(n * row[s] for s, n in shares.items()))
+    return pd.Series(equity, index=prices.index), turnover
+
+
+def _prices(seed: int = 3, days: int = 500, symbols: int = 8) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=days, freq="D")
+    values = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (days, symbols)), axis=0))
+    prices = pd.DataFrame(values, index=dates, columns=[f"S{i}" for i in range(symbols)])
+    prices.loc[dates.dayofweek >= 5, ["S1", "S2", "S3"]] = np.nan  # stock-like calendars
+    prices.loc[dates[:200], "S4"] = np.nan  # listed later than the others
+    return prices
+
+
+@pytest.mark.unit
+class TestRotationPrimitives:
+    def test_month_starts(self):
+        index = pd.to_datetime(
+            ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02", "2024-03-04"]
+        )
+        assert month_starts(index).tolist() == [0, 2, 4]
+
+    def test_lookback_returns_use_last_close_before_window(self):
+        index = pd.date_range("2024-01-01", periods=5, freq="D")
+        close = np.array([[100.0], [110.0], [120.0], [130.0], [140.0]])
+        returns = lookback_returns(close, index, np.array([1, 4]), days=2)
+        assert np.isnan(returns[0, 0])  # window starts before the first bar
+        assert returns[1, 0] == pytest.approx(140 / 120 - 1)
+
+    def test_top_n_weights(self):
+        scores = np.array([[0.1, 0.5, np.nan, 0.3], [np.nan, np.nan, 0.2, np.nan]])
+        weights = top_n_weights(scores, 2)
+        assert weights.tolist() == [[0.0, 0.5, 0.0, 0.5], [0.0, 0.0, 1.0, 0.0]]
+
+    def test_simulate_rotation(self):
+        close = np.array([[10.0, 20.0], [20.0, 20.0], [20.0, 40.0], [10.0, 40.0]])
+        weights = np.array([[1.0, 0.0], [0.0, 1.0]])
+        run = simulate_rotation(close, np.array([1, 2]), weights, 100.0)
+        assert run.equity.tolist() == [100.0, 100.0, 100.0, 100.0]
+        assert run.shares.tolist() == [[5.0, 0.0], [0.0, 2.5]]
+        assert run.turnover.tolist() == [1.0, 1.0]
+
+    def test_no_rebalances_stays_in_cash(self):
+        run = simulate_rotation(np.ones((3, 2)), np.array([], dtype=int), np.zeros((0, 2)), 50.0)
+        assert run.equity.tolist() == [50.0, 50.0, 50.0]
+
+
+@pytest.mark.unit
+class TestMomentum:
+    @pytest.mark.parametrize("seed", [3, 7])
+    @pytest.mark.parametrize(("lookback", "top_n"), [(30, 2), (90, 3), (60, 20)])
+    def test_matches_reference_loop(self, seed, lookback, top_n):
+        prices = _prices(seed)
+        equity, _, _ = _momentum(prices, 10_000.0, lookback_days=lookback, top_n=top_n)
+        expected, _ = _loop_momentum(prices, 10_000.0, lookback, top_n)
+        np.testing.assert_allclose(equity.to_numpy(), expected.to_numpy(), rtol=1e-10)
+
+    def test_turnover_matches_reference_loop(self):
+        prices = _prices()
+        close = prices.ffill().to_numpy()
+        rows = month_starts(prices.index)
+        scores = lookback_returns(close, prices.index, rows, 60)
+        ranked = ~np.isnan(scores).all(axis=1)
+        rows, scores = rows[ranked], scores[ranked]
+        run = simulate_rotation(close, rows, top_n_weights(scores, 2), 10_000.0)
+        _, expected = _loop_momentum(prices, 10_000.0, 60, 2)
+        np.testing.assert_allclose(run.turnover, expected, rtol=1e-10)
+
+    def test_turnover_is_reported_per_bar(self):
+        prices = _prices()
+        _, _, turnover = _momentum(prices, 10_000.0, lookback_days=60, top_n=2)
+        _, expected = _loop_momentum(prices, 10_000.0, 60, 2)
+        assert turnover.index.equals(prices.index)
+        assert np.count_nonzero(turnover) <= len(expected)
+        np.testing.assert_allclose(turnover.sum(), sum(expected), rtol=1e-10)
+
+    def test_trades_are_entries_and_exits(self):
+        prices = _prices()
+        _, trades, _ = _momentum(prices, 10_000.0, lookback_days=60, top_n=2)
+        held: set[str] = set()
+        for trade in trades:
+            if trade["action"] == "BUY":
+                assert trade["symbol"] not in held
+                held.add(trade["symbol"])
+            else:
+                held.remove(trade["symbol"])
+
+    def test_wide_universe(self):
+        prices = _prices(days=300, symbols=400)
+        equity, trades, _ = _momentum(prices, 10_000.0, lookback_days=60, top_n=20)
+        assert len(equity) == 300
+        assert {t["action"] for t in trades} == {"BUY", "SELL"}
+
+    def test_run_simulation_accepts_momentum(self):
+        with patch("src.tools.simulator._download", return_value=_prices()):
+            result = run_simulation(
+                name="momentum",
+                symbols=list(_prices().columns),
+                strategy={"type": "momentum", "params": {"lookback_days": 60, "top_n": 2}},
+                period_start="2020-01-01",
+            )
+        assert "error" not in result
+        assert result["trades_count"] > 0
+
+    def test_run_simulation_reports_annual_turnover(self):
+        prices = _prices()
+        params = {"lookback_days": 60, "top_n": 2}
+        with patch("src.tools.simulator._download", return_value=prices):
+            result = run_simulation(
+                name="momentum",
+                symbols=list(prices.columns),
+                strategy={"type": "momentum", "params": params},
+                period_start="2020-01-01",
+            )
+        _, _, turnover = _momentum(prices, 10_000.0, **params)
+        years = (prices.index[-1] - prices.index[0]).days / 365.25
+        assert result["annual_turnover"] == round(turnover.sum() / years, 2)
+        assert result["annual_turnover"] > 0
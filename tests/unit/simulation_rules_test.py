@@ -0,0 +1,220 @@
+"""Unit tests for src/simulation/rules.py and the rules strategy."""
+
+from __future__ import annotations
+
+import re
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation import rules
+from src.simulation.engine import relative_strength_index
+from src.simulation.rules import Binary, Call, Close, Evaluator, Num, RuleError, Unary, parse
+from src.simulation.strategies import _rsi_mean_reversion, _sma_crossover, run_strategy
+from src.tools.simulator import run_simulation
+
+
+def _prices(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n)
+    return pd.DataFrame(
+        {
+            "AAA": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))),
+            "BBB": 50 * np.exp(np.cumsum(rng.normal(0, 0.015, n))),
+        },
+        index=dates,
+    )
+
+
+@pytest.mark.unit
+class TestParse:
+    def test_tree(self):
+        assert parse("rsi(14) < 30 and close > ema(200)") == Binary(
+            "and",
+            Binary("<", Call("rsi", (Close(), Num(14.0))), Num(30.0)),
+            Binary(">", Close(), Call("ema", (Close(), Num(200.0)))),
+        )
+
+    def test_precedence(self):
+        assert parse("not close > 1 + 2 * 3 or close < -1") == Binary(
+            "or",
+            Unary(
+                "not", Binary(">", Close(), Binary("+", Num(1.0), Binary("*", Num(2.0), Num(3.0))))
+            ),
+            Binary("<", Close(), Unary("-", Num(1.0))),
+        )
+
+    def test_equal_calls_are_equal_nodes(self):
+        assert parse("sma(20) > 1") == parse("sma(close, 20.0) > 1")
+        assert hash(parse("sma(20) > 1")) == hash(parse("sma(close, 20) > 1"))
+
+    def test_nested_sources(self):
+        node = parse("sma(rsi(14), 5) > 50")
+        assert node.left == Call("sma", (Call("rsi", (Close(), Num(14.0))), Num(5.0)))
+
+    @pytest.mark.parametrize(
+        ("rule", "message"),
+        [
+            ("close >", "Unexpected 'end' at column 8"),
+            ("close > 1)", "Unexpected ')' at column 10"),
+            ("(close > 1", "Expected ')' at column 11"),
+            ("close > $5", "Unexpected character '$' at column 9"),
+            ("price > 1", "Unknown name 'price' at column 1"),
+            ("macd(12) > 0", "Unknown function 'macd'"),
+            ("sma(close) > 1", "sma() at column 1 takes a window"),
+            ("sma(2.5) > 1", "whole-number window"),
+            ("sma(5000) > 1", "whole-number window from 1 to 1000"),
+            ("sma(0) > 1", "whole-number window"),
+            ("close + 1", "is a value, not a condition"),
+            ("close and close > 1", "'and' needs a condition on both sides"),
+            ("(close > 1) + 1", "needs numbers or series on both sides"),
+            ("not close", "'not' needs a condition"),
+            ("crosses_above(close > 1, close)", "takes two series or numbers"),
+            ("", "non-empty"),
+            ("close > 1 or " * 50 + "close > 1", "at most 500 characters"),
+        ],
+    )
+    def test_errors(self, rule, message):
+        with pytest.raises(RuleError, match=re.escape(message)):
+            parse(rule)
+
+    def test_rule_errors_are_value_errors(self):
+        assert issubclass(RuleError, ValueError)
+
+
+@pytest.mark.unit
+class TestEvaluate:
+    def test_indicators_match_pandas(self):
+        prices = _prices()
+        evaluate = Evaluator(prices)
+        close = prices.to_numpy()
+        np.testing.assert_array_equal(
+            evaluate(parse("close > sma(20)")), close > prices.rolling(20).mean().to_numpy()
+        )
+        np.testing.assert_array_equal(
+            evaluate(parse("rsi(10) < 40")), relative_strength_index(prices, 10) < 40
+        )
+        ema = prices.ewm(span=50, adjust=False, min_periods=50).mean().to_numpy()
+        np.testing.assert_array_equal(evaluate(parse("close >= ema(50)")), close >= ema)
+        roc = (prices / prices.shift(5) - 1).to_numpy() * 100
+        np.testing.assert_array_equal(evaluate(parse("roc(5) > 1")), roc > 1)
+
+    def test_arithmetic_and_logic(self):
+        prices = _prices()
+        close = prices.to_numpy()
+        high = prices.rolling(10).max().to_numpy()
+        low = prices.rolling(10).min().to_numpy()
+        got = Evaluator(prices)(parse("(close - lowest(10)) / (highest(10) - lowest(10)) < 0.2"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            expected = (close - low) / (high - low) < 0.2
+        np.testing.assert_array_equal(got, expected)
+
+    def test_warm_up_is_never_true(self):
+        evaluate = Evaluator(_prices())
+        for rule in ("sma(50) != 0", "not sma(50) == 0", "sma(50) > 0"):
+            result = evaluate(parse(rule))
+            assert not result[:49].any() if rule != "not sma(50) == 0" else result[:49].all()
+            assert result[49:].all()
+
+    def test_crosses(self):
+        prices = _prices()
+        fast = prices.rolling(5).mean().to_numpy()
+        slow = prices.rolling(20).mean().to_numpy()
+        evaluate = Evaluator(prices)
+        above = evaluate(parse("crosses_above(sma(5), sma(20))"))
+        below = evaluate(parse("crosses_below(sma(5), sma(20))"))
+        assert above[1:].tolist() == ((fast[1:] > slow[1:]) & (fast[:-1] <= slow[:-1])).tolist()
+        assert below[1:].tolist() == ((fast[1:] < slow[1:]) & (fast[:-1] >= slow[:-1])).tolist()
+        assert evaluate(parse("crosses_above(rsi(14), 30)")).any()
+
+    def test_common_subexpressions_are_computed_once(self):
+        evaluate = Evaluator(_prices())
+        calls = []
+        real = rules.INDICATORS["rsi"]
+
+        def counting(frame, n):
+            calls.append(n)
+            return real(frame, n)
+
+        with patch.dict(rules.INDICATORS, {"rsi": counting}):
+            entry = evaluate(parse("rsi(14) < 30 and (rsi(14) < 25 or close > sma(20))"))
+            exit_ = evaluate(parse("rsi(14) > 70 or close < sma(20)"))
+        assert calls == [14]
+        assert entry.shape == exit_.shape == (400, 2)
+        assert sum(isinstance(node, Call) for node in evaluate.cache) == 2
+
+
+@pytest.mark.unit
+class TestRulesStrategy:
+    def test_matches_sma_crossover(self):
+        prices = _prices()
+        params = {
+            "entry": "crosses_above(sma(10), sma(30))",
+            "exit": "crosses_below(sma(10), sma(30))",
+        }
+        equity, trades, _ = run_strategy(prices, 10_000.0, "rules", params)
+        expected, expected_trades = _sma_crossover(prices, 10_000.0, fast=10, slow=30)
+        np.testing.assert_allclose(equity.to_numpy(), expected.to_numpy(), rtol=1e-12)
+        assert [(t["date"], t["action"], t["symbol"]) for t in trades] == [
+            (t["date"], t["action"], t["symbol"]) for t in expected_trades
+        ]
+
+    def test_matches_rsi_mean_reversion(self):
+        prices = _prices(seed=3)
+        params = {"entry": "rsi(14) < 35", "exit": "rsi(14) > 65"}
+        equity, trades, _ = run_strategy(prices, 10_000.0, "rules", params)
+        expected, expected_trades = _rsi_mean_reversion(prices, 10_000.0, 35.0, 65.0)
+        np.testing.assert_array_equal(equity.to_numpy(), expected.to_numpy())
+        assert len(trades) == len(expected_trades)
+
+    def test_without_exit_holds_while_entry_holds(self):
+        prices = _prices()
+        equity, trades, _ = run_strategy(prices, 10_000.0, "rules", {"entry": "close > sma(50)"})
+        held = Evaluator(prices)(parse("close > sma(50)"))
+        buys = [t for t in trades if t["action"] == "BUY" and t["symbol"] == "AAA"]
+        assert len(buys) == np.count_nonzero(np.diff(held[:, 0].astype(int), prepend=0) == 1)
+
+    def test_missing_entry(self):
+        with pytest.raises(ValueError, match="needs an 'entry' rule"):
+            run_strategy(_prices(), 10_000.0, "rules", {})
+
+    def test_run_simulation_reports_rule_errors(self):
+        with patch("src.tools.simulator._download", return_value=_prices()):
+            result = run_simulation(
+                "r", ["AAA"], {"type": "rules", "params": {"entry": "rsi(14) <"}}, 10_000.0
+            )
+        assert result["error"] == "Unexpected 'end' at column 10"
+
+    def test_run_simulation(self):
+        strategy = {"type": "rules", "params": {"entry": "rsi(14) < 30 and close > ema(200)"}}
+        with patch("src.tools.simulator._download", return_value=_prices(800)):
+            result = run_simulation("r", ["AAA", "BBB"], strategy, 10_000.0)
+        assert "error" not in result
+        assert result["strategy"] == strategy
+
+    def test_run_simulation_records_the_cost_model(self):
+        strategy = {
+            "type": "rules",
+            "params": {"entry": "close > sma(20)", "broker": "ibkr", "commission_max_pct": 0.5},
+        }
+        with patch("src.tools.simulator._download", return_value=_prices()):
+            result = run_simulation("r", ["AAA"], strategy, 10_000.0)
+        assert result["strategy"]["costs"] == {
+            "broker": "ibkr",
+            "commission": {
+                "rate": 0.0,
+                "per_share": 0.005,
+                "minimum": 1.0,
+                "maximum_rate": 0.005,
+            },
+            "slippage": {"bps": 0.0, "spread_bps": 0.0, "atr_multiple": 0.0, "atr_window": 14},
+        }
+        assert result["strategy"]["params"] == strategy["params"]
+
+    def test_run_simulation_reports_unknown_brokers(self):
+        strategy = {"type": "rules", "params": {"entry": "close > 1", "broker": "robinhood"}}
+        with patch("src.tools.simulator._download", return_value=_prices()):
+            result = run_simulation("r", ["AAA"], strategy, 10_000.0)
+        assert result["error"].startswith("Unknown broker: robinhood")
@@ -0,0 +1,139 @@
+"""Unit tests for src/simulation/sweep.py, src/simulation/workers.py and run_parameter_sweep."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation import workers
+from src.simulation.sweep import MAX_COMBINATIONS, evaluate, expand_grid, sweep
+from src.simulation.workers import share_prices
+from src.tools.simulator import run_parameter_sweep
+
+
+def _prices(seed: int = 5, days: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2021-01-01", periods=days, freq="D")
+    walk = lambda vol: 100 * np.exp(np.cumsum(rng.normal(0, vol, days)))  # noqa: E731
+    prices = pd.DataFrame({"BTC-USD": walk(0.03), "AAPL": walk(0.015)}, index=dates)
+    prices.loc[dates.dayofweek >= 5, "AAPL"] = np.nan
+    return prices
+
+
+def _settings(workers: int) -> MagicMock:
+    cfg = MagicMock()
+    cfg.simulation_workers = workers
+    return cfg
+
+
+GRID = {"fast": [5, 10, 20], "slow": [30, 60]}
+
+
+@pytest.mark.unit
+class TestExpandGrid:
+    def test_cartesian_product_in_key_order(self):
+        assert expand_grid({"fast": [5, 10], "slow": [50]}) == [
+            {"fast": 5, "slow": 50},
+            {"fast": 10, "slow": 50},
+        ]
+
+    def test_empty_grid_is_one_default_run(self):
+        assert expand_grid({}) == [{}]
+
+
+@pytest.mark.unit
+class TestSharedPrices:
+    def test_apply_sees_the_same_frame(self):
+        prices = _prices()
+        with share_prices(prices) as shared:
+            seen = shared.apply(lambda frame: frame.copy())
+        pd.testing.assert_frame_equal(seen, prices, check_freq=False)
+
+
+@pytest.mark.unit
+class TestSweep:
+    def test_inline_matches_individual_runs(self):
+        prices = _prices()
+        combos = expand_grid(GRID)
+        with patch("src.simulation.sweep.settings", _settings(1)):
+            rows = sweep(prices, "sma_crossover", combos, 10_000.0)
+        assert [r["params"] for r in rows] == combos
+        assert rows == evaluate(prices, "sma_crossover", combos, 10_000.0)
+        assert {"final_value", "sharpe_ratio", "max_drawdown_pct"} <= set(rows[0])
+
+    def test_rotation_runs_report_annual_turnover(self):
+        prices = _prices().ffill()
+        combos = expand_grid({"top_n": [1, 2]})
+        rows = evaluate(prices, "momentum", combos, 10_000.0)
+        assert all(row["annual_turnover"] > 0 for row in rows)
+        assert "annual_turnover" not in evaluate(prices, "sma_crossover", [{}], 10_000.0)[0]
+
+    def test_worker_pool_matches_inline(self):
+        prices = _prices()
+        combos = expand_grid(GRID)
+        expected = evaluate(prices, "sma_crossover", combos, 10_000.0)
+        cfg = _settings(2)
+        with (
+            patch("src.simulation.sweep.settings", cfg),
+            patch("src.simulation.workers.settings", cfg),
+        ):
+            try:
+                rows = sweep(prices, "sma_crossover", combos, 10_000.0)
+            finally:
+                workers.shutdown_process_pool()
+        assert rows == expected
+
+
+@pytest.mark.unit
+class TestRunParameterSweep:
+    def _run(self, **kwargs):
+        args = {
+            "symbols": ["BTC-USD", "AAPL"],
+            "strategy_type": "sma_crossover",
+            "param_grid": GRID,
+            "period_start": "2021-01-01",
+        }
+        with (
+            patch("src.tools.simulator._download", return_value=_prices()),
+            patch("src.simulation.sweep.settings", _settings(1)),
+        ):
+            return run_parameter_sweep(**{**args, **kwargs})
+
+    def test_ranked_by_sharpe(self):
+        result = self._run()
+        sharpes = [r["sharpe_ratio"] for r in result["results"]]
+        assert sharpes == sorted(sharpes, reverse=True)
+        assert [r["rank"] for r in result["results"]] == list(range(1, 7))
+        assert result["combinations"] == 6
+
+    def test_rank_by_drawdown_puts_shallowest_first(self):
+        result = self._run(rank_by="max_drawdown_pct", top_n=2)
+        drawdowns = [r["max_drawdown_pct"] for r in result["results"]]
+        assert len(drawdowns) == 2
+        assert drawdowns[0] >= drawdowns[1]
+
+    def test_sma_combinations_with_fast_not_below_slow_are_skipped(self):
+        result = self._run(param_grid={"fast": [20, 50], "slow": [50]})
+        assert result["combinations"] == 1
+        assert result["skipped_combinations"] == 1
+
+    def test_unknown_strategy(self):
+        assert "error" in self._run(strategy_type="magic")
+
+    def test_invalid_rank_metric(self):
+        assert "error" in self._run(rank_by="final_value")
+
+    def test_empty_value_list(self):
+        assert "error" in self._run(param_grid={"fast": [], "slow": [50]})
+
+    def test_grid_too_large(self):
+        grid = {"rsi_buy": list(range(MAX_COMBINATIONS)), "rsi_sell": [70, 80]}
+        assert "maximum" in self._run(strategy_type="rsi_mean_reversion", param_grid=grid)["error"]
+
+    def test_empty_prices(self):
+        with patch("src.tools.simulator._download", return_value=pd.DataFrame()):
+            result = run_parameter_sweep(["FAKE"], "buy_and_hold", {"x": [1]}, period_start="2021")
+        assert "error" in result
@@ -0,0 +1,174 @@
+"""Unit tests for src/simulation/walk_forward.py and run_walk_forward."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation import workers
+from src.simulation.strategies import _sma_crossover
+from src.simulation.walk_forward import Window, rolling_windows, run_window, stitch, walk_forward
+from src.tools.dispatcher import _run_walk_forward_and_persist
+from src.tools.simulator import run_walk_forward
+
+GRID = {"fast": [5, 10], "slow": [20, 40]}
+
+
+def _prices(seed: int = 11, days: int = 900) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=days, freq="D")
+    values = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (days, 2)), axis=0))
+    return pd.DataFrame(values, index=dates, columns=["AAA", "BBB"])
+
+
+def _settings(workers: int) -> MagicMock:
+    cfg = MagicMock()
+    cfg.simulation_workers = workers
+    return cfg
+
+
+@pytest.mark.unit
+class TestRollingWindows:
+    def test_consecutive_test_windows_after_training(self):
+        index = pd.date_range("2024-01-01", "2024-12-31", freq="D")
+        windows = rolling_windows(index, train_days=180, test_days=60)
+        assert windows[0].train_start == pd.Timestamp("2024-01-01")
+        assert windows[0].test_start == pd.Timestamp("2024-06-29")
+        for a, b in zip(windows, windows[1:], strict=False):
+            assert b.test_start == a.test_end
+        assert windows[-1].test_end == pd.Timestamp("2025-01-01")
+
+    def test_too_short_for_one_window(self):
+        index = pd.date_range("2024-01-01", periods=100, freq="D")
+        assert rolling_windows(index, train_days=365, test_days=30) == []
+
+
+@pytest.mark.unit
+class TestRunWindow:
+    def test_picks_best_training_params_and_trades_them_out_of_sample(self):
+        prices = _prices()
+        window = Window(
+            pd.Timestamp("2020-01-01"), pd.Timestamp("2021-01-01"), pd.Timestamp("2021-04-01")
+        )
+        result = run_window(
+            prices, "sma_crossover", [{"fast": 5, "slow": 20}, {"fast": 10, "slow": 40}],
+            10_000.0, window, "total_return_pct",
+        )  # fmt: skip
+
+        train = prices.loc[:"2020-12-31"]
+        returns = {
+            (f, s): _sma_crossover(train, 10_000.0, f, s)[0].iloc[-1]
+            for f, s in [(5, 20), (10, 40)]
+        }
+        best = max(returns, key=returns.get)
+        assert (result["params"]["fast"], result["params"]["slow"]) == best
+
+        full, _ = _sma_crossover(prices.loc[:"2021-03-31"], 10_000.0, *best)
+        expected = full.loc["2021-01-01":] / full.loc["2020-12-31"]
+        pd.testing.assert_series_equal(result["growth"], expected, check_freq=False)
+
+    def test_stitch_chains_windows(self):
+        growth = lambda start, values: pd.Series(  # noqa: E731
+            values, index=pd.date_range(start, periods=len(values), freq="D")
+        )
+        results = [
+            {"base_date": pd.Timestamp("2023-12-31"), "growth": growth("2024-01-01", [1.1, 1.2])},
+            {"error": "skipped"},
+            {"base_date": pd.Timestamp("2024-01-02"), "growth": growth("2024-01-03", [0.5])},
+        ]
+        equity = stitch(results, 100.0)
+        assert equity.round(6).tolist() == [100.0, 110.0, 120.0, 60.0]
+        assert equity.index[0] == pd.Timestamp("2023-12-31")
+
+
+@pytest.mark.unit
+class TestWalkForward:
+    def test_worker_pool_matches_inline(self):
+        prices = _prices()
+        windows = rolling_windows(prices.index, 365, 120)
+        combos = [{"fast": 5, "slow": 20}, {"fast": 10, "slow": 40}]
+        with patch("src.simulation.walk_forward.settings", _settings(1)):
+            inline = walk_forward(prices, "sma_crossover", combos, 1e4, windows, "sharpe_ratio")
+        cfg = _settings(2)
+        with (
+            patch("src.simulation.walk_forward.settings", cfg),
+            patch("src.simulation.workers.settings", cfg),
+        ):
+            try:
+                pooled = walk_forward(prices, "sma_crossover", combos, 1e4, windows, "sharpe_ratio")
+            finally:
+                workers.shutdown_process_pool()
+        pd.testing.assert_series_equal(stitch(pooled, 1e4), stitch(inline, 1e4))
+        assert [r["params"] for r in pooled] == [r["params"] for r in inline]
+
+
+@pytest.mark.unit
+class TestRunWalkForward:
+    def _run(self, **kwargs):
+        args = {
+            "name": "wf",
+            "symbols": ["AAA", "BBB"],
+            "strategy_type": "sma_crossover",
+            "param_grid": GRID,
+            "train_days": 365,
+            "test_days": 90,
+            "period_start": "2020-01-01",
+        }
+        with (
+            patch("src.tools.simulator._download", return_value=_prices()),
+            patch("src.simulation.walk_forward.settings", _settings(1)),
+        ):
+            return run_walk_forward(**{**args, **kwargs})
+
+    def test_out_of_sample_result(self):
+        result = self._run()
+        windows = result["strategy"]["walk_forward"]["windows"]
+        assert len(windows) == 6
+        assert all("params" in w and "oos_return_pct" in w for w in windows)
+        assert result["period_start"] == "2020-12-30"  # last bar of the first training window
+        assert result["oos_equity_curve"][0]["value"] == 10_000.0
+        assert result["final_value"] == result["oos_equity_curve"][-1]["value"]
+        assert "sharpe_ratio" in result
+
+    def test_period_shorter_than_training(self):
+        assert "training window" in self._run(train_days=1000)["error"]
+
+    def test_invalid_window_lengths(self):
+        assert "error" in self._run(test_days=1)
+
+    def test_invalid_grid(self):
+        assert "error" in self._run(param_grid={"fast": [50], "slow": [20]})
+
+
+@pytest.mark.unit
+class TestWalkForwardPersistence:
+    async def test_daily_curve_is_stored_not_returned(self):
+        result = {
+            "name": "wf",
+            "strategy": {"type": "sma_crossover", "walk_forward": {}},
+            "initial_capital": 10_000.0,
+            "final_value": 11_000.0,
+            "total_return_pct": 10.0,
+            "trades_count": 4,
+            "period_start": "2021-01-01",
+            "period_end": "2022-01-01",
+            "equity_curve": [{"date": "2021-01-03", "value": 10_000.0}],
+            "oos_equity_curve": [{"date": "2021-01-01", "value": 10_000.0}],
+        }
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.commit = AsyncMock()
+        with (
+            patch("src.tools.dispatcher.run_walk_forward", return_value=dict(result)),
+            patch("src.tools.simulation_jobs.async_session", return_value=session),
+        ):
+            returned = await _run_walk_forward_and_persist({})
+
+        stored = session.add.call_args.args[0]
+        assert stored.oos_equity_curve == result["oos_equity_curve"]
+        assert "oos_equity_curve" not in returned
+        assert returned["simulation_id"] == stored.id
@@ -4,63 +4,47 @@ from __future__ import annotations
 
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
+from src.simulation.engine import crossover_signals
 from src.tools.simulator import (
-    _crossover_signal,
     _metrics,
     run_simulation,
 )
 
 # ---------------------------------------------------------------------------
-# _crossover_signal
+# crossover_signals (the SMA crossover rule)
 # ---------------------------------------------------------------------------
 
 
 @pytest.mark.unit
-class TestCrossoverSignal:
-    """Pure function — tests all three return branches."""
+class TestCrossoverSignals:
+    """The signal on the second bar for each kind of move between two bars."""
 
-    def _make_series(self, values: list[float]) -> pd.Series:
-        return pd.Series(values, dtype=float)
+    def _signal(self, fast: list[float], slow: list[float]) -> str | None:
+        buy, sell = crossover_signals(np.array(fast), np.array(slow))
+        return "buy" if buy[1] else "sell" if sell[1] else None
 
     def test_buy_when_fast_crosses_above_slow(self):
-        # Arrange — fast was below slow (i-1), now above (i)
-        fast = self._make_series([90.0, 101.0])  # index 0 → below, index 1 → above
-        slow = self._make_series([100.0, 100.0])
-        # Act
-        result = _crossover_signal(fast, slow, i=1)
-        # Assert
-        assert result == "buy"
+        assert self._signal([90.0, 101.0], [100.0, 100.0]) == "buy"
 
     def test_sell_when_fast_crosses_below_slow(self):
-        # fast was above slow (i-1), now below (i)
-        fast = self._make_series([110.0, 99.0])
-        slow = self._make_series([100.0, 100.0])
-        result = _crossover_signal(fast, slow, i=1)
-        assert result == "sell"
+        assert self._signal([110.0, 99.0], [100.0, 100.0]) == "sell"
 
     def test_none_when_no_crossover(self):
-        # fast consistently above slow — no crossover
-        fast = self._make_series([110.0, 111.0])
-        slow = self._make_series([100.0, 100.0])
-        result = _crossover_signal(fast, slow, i=1)
-        assert result is None
+        assert self._signal([110.0, 111.0], [100.0, 100.0]) is None
 
     def test_none_when_values_equal(self):
-        # Both equal — no strict crossover
-        fast = self._make_series([100.0, 100.0])
-        slow = self._make_series([100.0, 100.0])
-        result = _crossover_signal(fast, slow, i=1)
-        assert result is None
+        assert self._signal([100.0, 100.0], [100.0, 100.0]) is None
 
     def test_buy_at_exact_equality_boundary(self):
-        # i-1: fast == slow (not strictly above), i: fast > slow → buy
-        fast = self._make_series([100.0, 101.0])
-        slow = self._make_series([100.0, 100.0])
-        result = _crossover_signal(fast, slow, i=1)
-        assert result == "buy"
+        # Bar 0: fast == slow (not strictly above), bar 1: fast > slow → buy
+        assert self._signal([100.0, 101.0], [100.0, 100.0]) == "buy"
+
+    def test_nan_never_signals(self):
+        assert self._signal([np.nan, 101.0], [100.0, 100.0]) is None
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,226 @@
+"""Unit tests for src/market/streaming.py."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+from src.market.bar_store import BarStore
+from src.market.streaming import IndicatorEngine, IndicatorState
+
+
+def _bars(n: int, seed: int = 0, end: str = "2024-06-28") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.2, n),
+            "High": close + rng.uniform(0.1, 1.5, n),
+            "Low": close - rng.uniform(0.1, 1.5, n),
+            "Close": close,
+            "Volume": rng.integers(1_000, 10_000, n).astype(float),
+        },
+        index=pd.bdate_range(end=end, periods=n),
+    )
+
+
+def _ta_reference(df: pd.DataFrame) -> dict:
+    close, high, low = df["Close"], df["High"], df["Low"]
+    macd = ta.trend.MACD(close=close)
+    bb = ta.volatility.BollingerBands(close=close, window=20, window_dev=2)
+    return {
+        "rsi_14": ta.momentum.RSIIndicator(close=close, window=14).rsi().iloc[-1],
+        "macd": macd.macd().iloc[-1],
+        "macd_signal": macd.macd_signal().iloc[-1],
+        "macd_hist": macd.macd_diff().iloc[-1],
+        "bb_upper": bb.bollinger_hband().iloc[-1],
+        "bb_middle": bb.bollinger_mavg().iloc[-1],
+        "bb_lower": bb.bollinger_lband().iloc[-1],
+        "ema_20": ta.trend.EMAIndicator(close=close, window=20).ema_indicator().iloc[-1],
+        "ema_50": ta.trend.EMAIndicator(close=close, window=50).ema_indicator().iloc[-1],
+        "ema_200": ta.trend.EMAIndicator(close=close, window=200).ema_indicator().iloc[-1],
+        "atr_14": ta.volatility.AverageTrueRange(high=high, low=low, close=close, window=14)
+        .average_true_range()
+        .iloc[-1],
+        "obv": ta.volume.OnBalanceVolumeIndicator(close=close, volume=df["Volume"])
+        .on_balance_volume()
+        .iloc[-1],
+    }
+
+
+def _state_from(df: pd.DataFrame) -> IndicatorState:
+    state = IndicatorState()
+    for ts, row in df.iterrows():
+        state.update(ts.value, row["High"], row["Low"], row["Close"], row["Volume"])
+    return state
+
+
+@pytest.mark.unit
+class TestIndicatorState:
+    @pytest.mark.parametrize("n", [30, 60, 250])
+    def test_matches_ta_library(self, n):
+        df = _bars(n)
+        values = _state_from(df).values()
+        for key, expected in _ta_reference(df).items():
+            if pd.isna(expected):
+                assert values[key] is None, key
+            else:
+                assert values[key] == pytest.approx(expected, rel=1e-9, abs=1e-9), key
+
+    def test_indicators_without_enough_bars_are_none(self):
+        values = _state_from(_bars(15)).values()
+        assert values["rsi_14"] is not None
+        assert values["macd"] is None
+        assert values["bb_middle"] is None
+        assert values["ema_200"] is None
+
+    def test_json_round_trip_preserves_state(self):
+        state = _state_from(_bars(40))
+        restored = IndicatorState.from_json(state.to_json())
+        nxt = _bars(41).iloc[-1]
+        for s in (state, restored):
+            s.update(1, nxt["High"], nxt["Low"], nxt["Close"], nxt["Volume"])
+        assert restored.values() == state.values()
+
+    def test_unknown_version_is_discarded(self):
+        raw = _state_from(_bars(5)).to_json().replace('"version": 2', '"version": 1')
+        assert IndicatorState.from_json(raw) is None
+
+
+@pytest.mark.unit
+class TestIndicatorEngine:
+    def _engine(self, tmp_path, refresh_seconds: float = 0) -> IndicatorEngine:
+        store = BarStore(tmp_path / "bars", refresh_seconds=refresh_seconds)
+        return IndicatorEngine(tmp_path / "indicators", store=store)
+
+    def _ticker(self, *frames: pd.DataFrame) -> MagicMock:
+        mock = MagicMock()
+        mock.history.side_effect = list(frames)
+        return mock
+
+    def test_incremental_update_matches_full_recompute(self, tmp_path):
+        full = _bars(120)
+        engine = self._engine(tmp_path)
+        ticker = self._ticker(full.iloc[:100], full.iloc[98:])
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            engine.latest("AAPL", start="2023-01-01")
+            values = engine.latest("AAPL", start="2023-01-01")
+
+        assert values["bars"] == 120
+        for key, expected in _ta_reference(full).items():
+            if not pd.isna(expected):
+                assert values[key] == pytest.approx(expected, rel=1e-9), key
+
+    def test_state_survives_restart(self, tmp_path):
+        full = _bars(80)
+        ticker = self._ticker(full.iloc[:60], full.iloc[58:])
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            self._engine(tmp_path).latest("AAPL", start="2023-01-01")
+            restarted = self._engine(tmp_path)
+            with patch.object(
+                IndicatorState,
+                "update_records",
+                autospec=True,
+                side_effect=IndicatorState.update_records,
+            ) as update:
+                values = restarted.latest("AAPL", start="2023-01-01")
+
+        # The previously-live bar plus the 20 new ones are folded in, not the whole history.
+        assert sum(len(call.args[1]) for call in update.call_args_list) == 21
+        assert values["obv"] == pytest.approx(_ta_reference(full)["obv"])
+
+    def test_live_last_bar_is_not_committed(self, tmp_path):
+        bars = _bars(40)
+        revised = bars.iloc[-2:].copy()
+        revised.loc[revised.index[-1], "Close"] += 5.0  # the live bar moved
+        engine = self._engine(tmp_path)
+        with patch("src.market.bar_store.yf.Ticker", return_value=self._ticker(bars, revised)):
+            engine.latest("AAPL", start="2023-01-01")
+            values = engine.latest("AAPL", start="2023-01-01")
+
+        expected = pd.concat([bars.iloc[:-1], revised.iloc[-1:]])
+        assert values["bars"] == 40
+        assert values["ema_20"] == pytest.approx(_ta_reference(expected)["ema_20"], rel=1e-9)
+
+    def test_rewritten_history_rebuilds_state(self, tmp_path):
+        bars = _bars(40)
+        adjusted = bars * 0.5
+        adjusted["Volume"] = bars["Volume"]
+        tail = adjusted.iloc[-2:]
+        engine = self._engine(tmp_path)
+        ticker = self._ticker(bars, tail, adjusted)
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            engine.latest("AAPL", start="2023-01-01")
+            values = engine.latest("AAPL", start="2023-01-01")
+
+        assert values["ema_20"] == pytest.approx(_ta_reference(adjusted)["ema_20"], rel=1e-9)
+
+    def test_earlier_start_rebuilds_from_more_history(self, tmp_path):
+        full = _bars(300)
+        engine = self._engine(tmp_path, refresh_seconds=900)
+        recent = full.loc["2024-01-01":]
+        ticker = self._ticker(recent, full)
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            short = engine.latest("AAPL", start="2024-01-01")
+            long = engine.latest("AAPL", start=full.index[0])
+
+        assert short["ema_200"] is None
+        assert long["bars"] == 300
+        assert long["ema_200"] == pytest.approx(_ta_reference(full)["ema_200"], rel=1e-9)
+
+    def test_later_start_is_served_from_the_full_history_state(self, tmp_path):
+        full = _bars(300)
+        engine = self._engine(tmp_path, refresh_seconds=900)
+        with patch("src.market.bar_store.yf.Ticker", return_value=self._ticker(full)):
+            long = engine.latest("AAPL", start=full.index[0])
+            with patch.object(
+                IndicatorState,
+                "update_records",
+                autospec=True,
+                side_effect=IndicatorState.update_records,
+            ) as update:
+                short = engine.latest("AAPL", start="2024-01-01")
+
+        assert [len(call.args[1]) for call in update.call_args_list] == [1]  # the live bar
+        assert short == long
+        assert short["bars"] == 300
+
+    def test_rolling_start_keeps_folding_into_one_state(self, tmp_path):
+        full = _bars(120)
+        ticker = self._ticker(full.iloc[:100], full.iloc[98:101], full.iloc[99:])
+        with patch("src.market.bar_store.yf.Ticker", return_value=ticker):
+            engine = self._engine(tmp_path)
+            engine.latest("AAPL", start=full.index[0])
+            # Next day, a window that starts a day later over one more bar.
+            engine.latest("AAPL", start=full.index[1])
+            restarted = self._engine(tmp_path)
+            with patch.object(
+                IndicatorState,
+                "update_records",
+                autospec=True,
+                side_effect=IndicatorState.update_records,
+            ) as update:
+                values = restarted.latest("AAPL", start=full.index[2])
+
+        assert sum(len(call.args[1]) for call in update.call_args_list) == 20
+        assert values["bars"] == 120
+        for key, expected in _ta_reference(full).items():
+            if not pd.isna(expected):
+                assert values[key] == pytest.approx(expected, rel=1e-9), key
+
+    def test_memory_holds_only_the_most_recent_states(self, tmp_path):
+        engine = self._engine(tmp_path, refresh_seconds=900)
+        frames = [_bars(30, seed=i) for i in range(3)]
+        with (
+            patch("src.market.streaming.MAX_CACHED_STATES", 2),
+            patch("src.market.bar_store.yf.Ticker", return_value=self._ticker(*frames)),
+        ):
+            for sym in ("AAA", "BBB", "CCC"):
+                engine.latest(sym, start="2024-01-01")
+
+        assert list(engine._states) == [("BBB", "1d"), ("CCC", "1d")]
+        assert engine.latest("AAA", start="2024-01-01")["bars"] == 30  # reloaded from disk
@@ -0,0 +1,165 @@
+"""Unit tests for src/market/symbol_index.py."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.market import symbol_index
+from src.market.symbol_index import (
+    SymbolEntry,
+    SymbolIndex,
+    parse_nasdaq_listed,
+    parse_other_listed,
+    read_entries,
+    refresh_listings,
+    write_entries,
+)
+
+NASDAQ_LISTED = """\
+Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+QQQ|Invesco QQQ Trust, Series 1|G|N|N|100|Y|N
+ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N
+File Creation Time: 1017202608:30|||||||
+"""
+
+OTHER_LISTED = """\
+ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol
+BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N|BRK.B
+APLE|Apple Hospitality REIT, Inc. Common Shares|N|APLE|N|100|N|APLE
+SPY|SPDR S&P 500 ETF Trust|P|SPY|Y|100|N|SPY
+JPM$D|J P Morgan Chase & Co Depositary Shares|N|JPMpD|N|100|N|JPM$D
+File Creation Time: 1017202608:30||||||
+"""
+
+
+def _index(*extra: SymbolEntry) -> SymbolIndex:
+    return SymbolIndex(
+        [
+            SymbolEntry("AAPL", "Apple Inc.", "EQUITY", "NASDAQ", ("apple", "iphone")),
+            SymbolEntry("GOOGL", "Alphabet Inc. Class A", "EQUITY", "NASDAQ", ("google",)),
+            SymbolEntry("NVDA", "NVIDIA Corporation", "EQUITY", "NASDAQ", ("nvidia",)),
+            SymbolEntry("SOXX", "iShares Semiconductor ETF", "ETF", "NASDAQ"),
+            SymbolEntry("AMAT", "Applied Materials, Inc.", "EQUITY", "NASDAQ"),
+            *extra,
+        ]
+    )
+
+
+@pytest.mark.unit
+class TestSymbolIndexSearch:
+    def test_exact_symbol_first(self):
+        assert _index().search("aapl")[0].symbol == "AAPL"
+
+    def test_exact_name_and_alias(self):
+        index = _index()
+        assert index.search("Apple")[0].symbol == "AAPL"
+        assert index.search("google")[0].symbol == "GOOGL"
+        assert index.search("Alphabet Inc")[0].symbol == "GOOGL"
+
+    def test_word_prefix_uses_trie(self):
+        symbols = [e.symbol for e in _index().search("appl")]
+        assert symbols[:2] == ["AAPL", "AMAT"]
+
+    def test_multi_word_query_matches_all_words(self):
+        results = _index().search("semiconductor etf")
+        assert [e.symbol for e in results] == ["SOXX"]
+
+    def test_symbol_prefix(self):
+        index = _index(
+            SymbolEntry("XLRE", "Real Estate Select Sector SPDR Fund", "ETF", "NYSE Arca"),
+            SymbolEntry("XLK", "Technology Select Sector SPDR Fund", "ETF", "NYSE Arca"),
+        )
+        assert [e.symbol for e in index.search("XL")] == ["XLK", "XLRE"]
+
+    def test_share_class_dot_maps_to_dash(self):
+        index = _index(SymbolEntry("BRK-B", "Berkshire Hathaway Inc. Class B", "EQUITY", "NYSE"))
+        assert index.search("BRK.B")[0].symbol == "BRK-B"
+
+    def test_fuzzy_match_on_typo(self):
+        assert _index().search("nvidai")[0].symbol == "NVDA"
+
+    def test_miss_returns_empty(self):
+        assert _index().search("qwertyuiop") == []
+
+    def test_first_entry_wins_on_duplicate_symbol(self):
+        index = _index(SymbolEntry("AAPL", "Apple Inc. - Common Stock", "EQUITY", "NASDAQ"))
+        assert len(index) == 5
+        assert index.search("AAPL")[0].name == "Apple Inc."
+
+    def test_limit(self):
+        assert len(_index().search("a", limit=2)) == 2
+
+
+@pytest.mark.unit
+class TestListingFiles:
+    def test_parse_nasdaq_listed(self):
+        entries = parse_nasdaq_listed(NASDAQ_LISTED)
+        assert [(e.symbol, e.name, e.type) for e in entries] == [
+            ("AAPL", "Apple Inc.", "EQUITY"),
+            ("QQQ", "Invesco QQQ Trust, Series 1", "ETF"),
+        ]
+
+    def test_parse_other_listed(self):
+        entries = parse_other_listed(OTHER_LISTED)
+        assert [(e.symbol, e.exchange, e.type) for e in entries] == [
+            ("BRK-B", "NYSE", "EQUITY"),
+            ("APLE", "NYSE", "EQUITY"),
+            ("SPY", "NYSE Arca", "ETF"),
+        ]
+
+    def test_write_read_roundtrip(self, tmp_path):
+        entries = [SymbolEntry("AAPL", "Apple Inc.", "EQUITY", "NASDAQ", ("apple", "iphone"))]
+        write_entries(tmp_path / "symbols.csv", entries)
+        assert read_entries(tmp_path / "symbols.csv") == entries
+
+    def test_missing_file_is_empty(self, tmp_path):
+        assert read_entries(tmp_path / "missing.csv") == []
+
+    def test_bundled_list_resolves_common_names(self):
+        index = SymbolIndex(read_entries(symbol_index.BUNDLED_PATH))
+        assert index.search("bitcoin")[0].symbol == "BTC-USD"
+        assert index.search("facebook")[0].symbol == "META"
+        assert index.search("S&P 500")[0].symbol == "^GSPC"
+
+
+@pytest.mark.unit
+class TestRefreshListings:
+    def _client(self, *texts):
+        responses = [MagicMock(text=text) for text in texts]
+        client = MagicMock()
+        client.__enter__.return_value.get.side_effect = responses
+        return client
+
+    def test_downloads_saves_and_reloads(self, tmp_path):
+        path = tmp_path / "symbols" / "listings.csv"
+        with (
+            patch(
+                "src.market.symbol_index.httpx.Client",
+                return_value=self._client(NASDAQ_LISTED, OTHER_LISTED),
+            ),
+            patch("src.market.symbol_index.listings_path", return_value=path),
+        ):
+            count = refresh_listings()
+            index = symbol_index.get_symbol_index()
+
+        assert count == 5
+        assert path.exists()
+        # Bundled entry kept its curated name; listing-only symbols are now searchable.
+        assert index.search("AAPL")[0].name == "Apple Inc."
+        assert index.search("apple hospitality")[0].symbol == "APLE"
+
+    def test_failed_download_keeps_previous_index(self, tmp_path):
+        before = symbol_index.get_symbol_index()
+        client = MagicMock()
+        client.__enter__.return_value.get.side_effect = OSError("offline")
+        with (
+            patch("src.market.symbol_index.httpx.Client", return_value=client),
+            patch("src.market.symbol_index.listings_path", return_value=tmp_path / "l.csv"),
+            pytest.raises(OSError),
+        ):
+            refresh_listings()
+        assert symbol_index.get_symbol_index() is before
+        assert not (tmp_path / "l.csv").exists()
@@ -0,0 +1,129 @@
+"""Unit tests for src/tools/tool_pools.py."""
+
+from __future__ import annotations
+
+import asyncio
+from contextvars import ContextVar
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.tools import tool_pools
+from src.tools.tool_pools import ToolPool, ToolTimeout, get_tool_pool, tool_pool_stats
+
+_request: ContextVar[str] = ContextVar("request", default="")
+
+
+async def _wait_for(predicate, attempts: int = 500):
+    for _ in range(attempts):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition never held")
+
+
+@pytest.fixture
+def pool():
+    tool_pool = ToolPool("test", workers=2, timeout=5.0)
+    yield tool_pool
+    tool_pool.shutdown()
+
+
+@pytest.mark.unit
+class TestToolPool:
+    async def test_runs_off_the_event_loop(self, pool):
+        loop_thread = threading.get_ident()
+        name = await pool.run(lambda: threading.current_thread().name)
+        assert name.startswith("tool-test")
+        assert await pool.run(threading.get_ident) != loop_thread
+
+    async def test_passes_arguments_and_context(self, pool):
+        _request.set("abc")
+        assert await pool.run(lambda a, b=0: (a, b, _request.get()), 1, b=2) == (1, 2, "abc")
+
+    async def test_workers_cap_concurrency_and_the_rest_queue(self, pool):
+        release = threading.Event()
+        calls = [asyncio.create_task(pool.run(release.wait, 5)) for _ in range(5)]
+        await _wait_for(lambda: pool.stats()["running"] == 2)
+        assert pool.stats()["queued"] == 3
+        release.set()
+        await asyncio.gather(*calls)
+        stats = pool.stats()
+        assert (stats["running"], stats["queued"], stats["completed"]) == (0, 0, 5)
+        assert stats["max_queued"] >= 3
+
+    async def test_errors_are_counted_and_raised(self, pool):
+        def boom():
+            raise RuntimeError("broker down")
+
+        with pytest.raises(RuntimeError, match="broker down"):
+            await pool.run(boom)
+        assert pool.stats()["failed"] == 1
+
+    async def test_timeout_drops_queued_calls(self):
+        pool = ToolPool("slow", workers=1, timeout=0.1)
+        release = threading.Event()
+        ran = []
+        try:
+            running = asyncio.create_task(pool.run(release.wait, 5))
+            await _wait_for(lambda: pool.stats()["running"] == 1)
+            with pytest.raises(ToolTimeout, match=r"Timed out after 0.1s in the slow pool"):
+                await pool.run(ran.append, "queued")
+            with pytest.raises(ToolTimeout):
+                await running
+            stats = pool.stats()
+            assert (stats["timed_out"], stats["queued"], stats["running"]) == (2, 0, 1)
+        finally:
+            release.set()
+            pool.shutdown()
+        assert ran == []
+
+    async def test_run_to_completion_outlives_the_timeout(self):
+        pool = ToolPool("orders", workers=1, timeout=0.05)
+        try:
+            assert await pool.run_to_completion(lambda: time.sleep(0.2) or "placed") == "placed"
+        finally:
+            pool.shutdown()
+        assert (pool.stats()["timed_out"], pool.stats()["completed"]) == (0, 1)
+
+    async def test_cancelled_caller_leaves_the_queue(self, pool):
+        release = threading.Event()
+        busy = [asyncio.create_task(pool.run(release.wait, 5)) for _ in range(2)]
+        await _wait_for(lambda: pool.stats()["running"] == 2)
+        waiting = asyncio.create_task(pool.run(lambda: None))
+        await _wait_for(lambda: pool.stats()["queued"] == 1)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert pool.stats()["queued"] == 0
+        release.set()
+        await asyncio.gather(*busy)
+
+
+@pytest.mark.unit
+class TestPoolRegistry:
+    @pytest.fixture(autouse=True)
+    def fresh_pools(self):
+        with patch.object(tool_pools, "_pools", {}):
+            yield
+            tool_pools.shutdown_tool_pools()
+
+    def test_pools_follow_the_settings(self):
+        with patch.object(tool_pools.settings, "tool_brokers_workers", 3):
+            pool = get_tool_pool("brokers")
+        assert pool.workers == 3
+        assert pool.timeout == tool_pools.settings.tool_brokers_timeout_seconds
+        assert get_tool_pool("brokers") is pool
+
+    async def test_stats_list_pools_once_used(self):
+        assert tool_pool_stats() == {}
+        await get_tool_pool("news").run(lambda: None)
+        stats = tool_pool_stats()
+        assert list(stats) == ["news"]
+        assert stats["news"]["completed"] == 1
+
+    def test_unknown_pool(self):
+        with pytest.raises(KeyError):
+            get_tool_pool("gpu")
@@ -0,0 +1,118 @@
+"""Unit tests for src/market/vectorized.py."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+from src.market import vectorized as vec
+
+
+def _bars(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + rng.uniform(0.1, 1.5, n),
+            "Low": close - rng.uniform(0.1, 1.5, n),
+            "Close": close,
+            "Volume": rng.integers(1_000, 10_000, n).astype(float),
+        },
+        index=pd.bdate_range(end="2024-06-28", periods=n),
+    )
+
+
+@pytest.fixture
+def universe() -> dict[str, pd.DataFrame]:
+    # Different history lengths exercise the NaN left-padding.
+    return {"AAA": _bars(260, 1), "BBB": _bars(120, 2), "CCC": _bars(40, 3)}
+
+
+def _assert_last(actual: np.ndarray, frames: dict[str, pd.DataFrame], reference) -> None:
+    for row, df in enumerate(frames.values()):
+        expected = reference(df).iloc[-1]
+        if pd.isna(expected):
+            assert np.isnan(actual[row])
+        else:
+            assert actual[row] == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.unit
+class TestRightAlign:
+    def test_pads_shorter_rows_on_the_left(self):
+        m = vec.right_align([np.array([1.0, 2.0, 3.0]), np.array([4.0])])
+        assert np.isnan(m[1, :2]).all()
+        assert m[:, -1].tolist() == [3.0, 4.0]
+
+    def test_truncates_to_length(self):
+        m = vec.right_align([np.arange(10.0)], length=3)
+        assert m.tolist() == [[7.0, 8.0, 9.0]]
+
+    def test_empty_series(self):
+        assert vec.right_align([np.array([]), np.array([])]).shape == (2, 0)
+
+
+@pytest.mark.unit
+class TestIndicatorsMatchTa:
+    def test_ema(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        for window in (20, 50, 200):
+            _assert_last(
+                vec.latest(vec.ema(m["close"], window)),
+                universe,
+                lambda df, w=window: ta.trend.EMAIndicator(df["Close"], w).ema_indicator(),
+            )
+
+    def test_rsi(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        _assert_last(
+            vec.latest(vec.rsi(m["close"])),
+            universe,
+            lambda df: ta.momentum.RSIIndicator(df["Close"], 14).rsi(),
+        )
+
+    def test_macd(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        line, signal, hist = vec.macd(m["close"])
+        _assert_last(vec.latest(line), universe, lambda df: ta.trend.MACD(df["Close"]).macd())
+        _assert_last(
+            vec.latest(signal), universe, lambda df: ta.trend.MACD(df["Close"]).macd_signal()
+        )
+        _assert_last(vec.latest(hist), universe, lambda df: ta.trend.MACD(df["Close"]).macd_diff())
+
+    def test_bollinger(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        upper, _, lower = vec.bollinger(m["close"])
+        bb = lambda df: ta.volatility.BollingerBands(df["Close"], 20, 2)  # noqa: E731
+        _assert_last(vec.latest(upper), universe, lambda df: bb(df).bollinger_hband())
+        _assert_last(vec.latest(lower), universe, lambda df: bb(df).bollinger_lband())
+
+    def test_atr(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        _assert_last(
+            vec.latest(vec.atr(m["high"], m["low"], m["close"])),
+            universe,
+            lambda df: ta.volatility.AverageTrueRange(
+                df["High"], df["Low"], df["Close"], 14
+            ).average_true_range(),
+        )
+
+    def test_obv(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        _assert_last(
+            vec.latest(vec.obv(m["close"], m["volume"])),
+            universe,
+            lambda df: ta.volume.OnBalanceVolumeIndicator(
+                df["Close"], df["Volume"]
+            ).on_balance_volume(),
+        )
+
+    def test_full_path_matches_for_padded_row(self, universe):
+        _, m = vec.frames_to_matrices(universe)
+        path = vec.ema(m["close"], 20)[2]
+        expected = ta.trend.EMAIndicator(universe["CCC"]["Close"], 20).ema_indicator()
+        np.testing.assert_allclose(path[-40:], expected.to_numpy(), rtol=1e-9)
+        assert np.isnan(path[:-40]).all()
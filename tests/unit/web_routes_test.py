@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+import pandas as pd
 import pytest
 
 # ---------------------------------------------------------------------------
@@ -127,6 +128,25 @@ class TestMarketSnapshotEndpoint:
         assert "message" in response.json()
 
 
+# ---------------------------------------------------------------------------
+# /api/metrics
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestMetricsEndpoint:
+    def test_returns_cache_stats(self, isolated_market_cache):
+        isolated_market_cache.set("quote", "SPY", 1.0)
+        isolated_market_cache.get_or_fetch("quote", "SPY", lambda: 2.0)
+
+        client = _make_client()
+        data = client.get("/api/metrics").json()
+
+        assert data["cache"]["classes"]["quote"]["hits"] == 1
+        assert set(data["dispatcher"]) == {"inflight", "tools"}
+        assert isinstance(data["tool_pools"], dict)
+
+
 # ---------------------------------------------------------------------------
 # /api/reports
 # ---------------------------------------------------------------------------
@@ -279,6 +299,119 @@ class TestListTradesEndpoint:
         assert response.status_code == 500
 
 
+# ---------------------------------------------------------------------------
+# /api/simulations/jobs
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestSimulationJobEndpoints:
+    def _job(self, status="running"):
+        job = MagicMock(status=status)
+        job.to_dict.side_effect = lambda include_result=True: {
+            "job_id": "j1",
+            "status": status,
+            **({"result": None} if include_result else {}),
+        }
+        return job
+
+    def test_submit_returns_202_with_job_id(self):
+        jobs = MagicMock()
+        jobs.submit.return_value = self._job("queued")
+        with patch("src.tools.simulation_jobs.get_simulation_jobs", return_value=jobs):
+            response = _make_client().post("/api/simulations/jobs", json={"name": "x"})
+        assert response.status_code == 202
+        assert response.json() == {"job_id": "j1", "status": "queued"}
+        jobs.submit.assert_called_once_with({"name": "x"})
+
+    def test_submit_rejects_non_object(self):
+        response = _make_client().post("/api/simulations/jobs", json=[1, 2])
+        assert response.status_code == 400
+
+    def test_list_and_get(self):
+        jobs = MagicMock()
+        jobs.jobs.return_value = [self._job()]
+        jobs.get.side_effect = lambda job_id: self._job() if job_id == "j1" else None
+        with patch("src.tools.simulation_jobs.get_simulation_jobs", return_value=jobs):
+            client = _make_client()
+            listed = client.get("/api/simulations/jobs").json()
+            found = client.get("/api/simulations/jobs/j1")
+            missing = client.get("/api/simulations/jobs/nope")
+        assert listed == [{"job_id": "j1", "status": "running"}]
+        assert found.json()["result"] is None
+        assert missing.status_code == 404
+
+    def test_cancel(self):
+        jobs = MagicMock()
+        jobs.get.return_value = self._job()
+        jobs.cancel.return_value = True
+        with patch("src.tools.simulation_jobs.get_simulation_jobs", return_value=jobs):
+            response = _make_client().delete("/api/simulations/jobs/j1")
+        assert response.json() == {"job_id": "j1", "cancelled": True}
+
+    def test_cancel_finished_job_returns_409(self):
+        jobs = MagicMock()
+        jobs.get.return_value = self._job("done")
+        jobs.cancel.return_value = False
+        with patch("src.tools.simulation_jobs.get_simulation_jobs", return_value=jobs):
+            response = _make_client().delete("/api/simulations/jobs/j1")
+        assert response.status_code == 409
+
+
+# ---------------------------------------------------------------------------
+# /api/simulations/compare
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.unit
+class TestCompareSimulationsEndpoint:
+    def _sim(self, sim_id, values, start="2024-01-07"):
+        sim = MagicMock()
+        sim.id = sim_id
+        sim.name = f"sim {sim_id}"
+        sim.strategy = {"type": "buy_and_hold"}
+        dates = pd.date_range(start, periods=len(values), freq="W")
+        sim.equity_curve = [
+            {"date": str(d.date()), "value": v} for d, v in zip(dates, values, strict=True)
+        ]
+        return sim
+
+    def _get(self, ids, sims):
+        execute_result = MagicMock()
+        execute_result.scalars.return_value.all.return_value = sims
+        session = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.execute = AsyncMock(return_value=execute_result)
+        with patch("src.web.routes.async_session", return_value=session):
+            return _make_client().get("/api/simulations/compare", params={"ids": ids})
+
+    def test_metrics_over_the_shared_span(self):
+        a = self._sim("a", [100.0, 110.0, 99.0, 120.0, 130.0])
+        b = self._sim("b", [50.0, 50.0, 60.0], start="2024-01-21")
+        response = self._get("b,a", [a, b])
+        assert response.status_code == 200
+        rows = response.json()
+        assert [r["simulation_id"] for r in rows] == ["b", "a"]
+        assert rows[0]["period_start"] == "2024-01-21"
+        assert rows[1]["total_return_pct"] == pytest.approx((130 / 99 - 1) * 100, abs=0.01)
+        assert rows[0]["max_drawdown_pct"] == 0.0
+        assert "sortino_ratio" in rows[1]
+
+    def test_unknown_id_returns_404(self):
+        response = self._get("a,zzz", [self._sim("a", [1.0, 2.0])])
+        assert response.status_code == 404
+        assert "zzz" in response.json()["detail"]
+
+    def test_disjoint_curves_return_400(self):
+        a = self._sim("a", [1.0, 2.0])
+        b = self._sim("b", [1.0, 2.0], start="2025-01-05")
+        assert self._get("a,b", [a, b]).status_code == 400
+
+    def test_no_ids_returns_400(self):
+        assert self._get(" , ", []).status_code == 400
+
+
 # ---------------------------------------------------------------------------
 # IP whitelist — require_allowed_ip dependency
 # ---------------------------------------------------------------------------